@@ -1,6 +1,11 @@
 import os
 import asyncio
-from fastapi import FastAPI, Request
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, PlainTextResponse
 import uvicorn
 from google.adk.agents import LlmAgent
 from google.adk.sessions import InMemorySessionService
@@ -8,25 +13,81 @@ from google.adk.runners import Runner
 from google.adk.tools.function_tool import FunctionTool
 from typing import Dict, List, Optional, Any, Union
 from auditor.agent import audit_financial_documents, retrieve_financial_docs, compare_documents, create_github_issue
+from auditor.core.constants import (
+    AUDIT_WORKERS, AUDIT_WORKERS_ENV, AUDIT_EXECUTOR_WORKERS, AUDIT_EXECUTOR_WORKERS_ENV,
+    AUDIT_DEBOUNCE_SECONDS, AUDIT_DEBOUNCE_SECONDS_ENV,
+    AUDIT_HISTORY_PAGE_SIZE, AUDIT_HISTORY_MAX_PAGE_SIZE, AUDIT_PROFILE_HEADER
+)
+from auditor.services import metrics, tracing
+from auditor.services.audit_history import default_history_store
+from auditor.services.job_queue import AuditJobQueue
+from auditor.services.llm_backend import default_llm_backend
+from auditor.services.profiling import default_profile_store, default_profiling_policy, profiled_audit
+from auditor.services.push_coalescer import PushCoalescer
+from auditor.services.push_filter import financial_changes
+from auditor.services.result_cache import default_result_cache
+from auditor.services.stage_limits import default_stage_limits
 import hmac
 import hashlib
 
+def queued_audit(repo_url: str, branch: str, profile: bool = False, **options: Any) -> Dict[str, Any]:
+    """Auditoría de un trabajo de la cola; con `profile` se perfila el pipeline."""
+    audit = profiled_audit(audit_financial_documents, f"webhook-{repo_url}", default_profile_store()) if profile else audit_financial_documents
+    return audit(repo_url, branch, **options)
+
+# Cola de auditorías disparadas por webhooks
+job_queue: AuditJobQueue = AuditJobQueue(
+    queued_audit,
+    workers=int(os.getenv(AUDIT_WORKERS_ENV, AUDIT_WORKERS))
+)
+
+# Los pushes seguidos a una misma rama se auditan una sola vez, en su último commit
+push_coalescer: PushCoalescer = PushCoalescer(
+    job_queue,
+    window=float(os.getenv(AUDIT_DEBOUNCE_SECONDS_ENV, AUDIT_DEBOUNCE_SECONDS))
+)
+
+# Hilos para las auditorías síncronas pedidas desde el event loop
+audit_executor: ThreadPoolExecutor = ThreadPoolExecutor(
+    max_workers=int(os.getenv(AUDIT_EXECUTOR_WORKERS_ENV, AUDIT_EXECUTOR_WORKERS)),
+    thread_name_prefix="audit"
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Detiene los workers de la cola y el executor al apagar el servidor."""
+    yield
+    job_queue.shutdown(wait=False)
+    audit_executor.shutdown(wait=False)
+
 # Crear la aplicación FastAPI
-app: FastAPI = FastAPI(title="Auditor Financiero")
+app: FastAPI = FastAPI(title="Auditor Financiero", lifespan=lifespan)
 
 # Definir la función de auditoría
-async def run_audit(repo_url: str, branch: str = "main") -> Dict[str, Any]:
+async def run_audit(repo_url: str, branch: str = "main", force_refresh: bool = False, profile: bool = False) -> Dict[str, Any]:
     """Ejecuta una auditoría financiera.
     
+    El pipeline es bloqueante, así que corre en `audit_executor` y el event
+    loop sigue atendiendo otras peticiones mientras tanto. Corre con una
+    copia del contexto para que sus spans cuelguen del span `audit_request`.
+    
     Args:
         repo_url (str): URL del repositorio GitHub a auditar
         branch (str): Rama del repositorio a auditar (default: "main")
+        force_refresh (bool): Auditar de nuevo aunque el commit ya tenga un
+            resultado en caché
+        profile (bool): Perfilar el pipeline; el nombre del perfil queda en
+            `profile` del resultado
         
     Returns:
         Dict[str, Any]: Resultado de la auditoría con el estado y las discrepancias encontradas
     """
     try:
-        result: Dict[str, Any] = audit_financial_documents(repo_url, branch)
+        loop = asyncio.get_running_loop()
+        audit = profiled_audit(audit_financial_documents, f"audit-{repo_url}", default_profile_store()) if profile else audit_financial_documents
+        audit = functools.partial(audit, repo_url, branch, force_refresh=force_refresh)
+        with tracing.span('audit_request', repo=repo_url, branch=branch):
+            result: Dict[str, Any] = await loop.run_in_executor(audit_executor, contextvars.copy_context().run, audit)
         return result
     except Exception as e:
         return {
@@ -34,16 +95,32 @@ async def run_audit(repo_url: str, branch: str = "main") -> Dict[str, Any]:
             "error_message": str(e)
         }
 
+async def audit_repository(repo_url: str, branch: str = "main") -> Dict[str, Any]:
+    """Ejecuta una auditoría financiera.
+
+    Herramienta de `root_agent`: `run_audit` sin `force_refresh` ni
+    `profile`, que sólo autorizan los endpoints y no deben declararse al
+    modelo.
+
+    Args:
+        repo_url (str): URL del repositorio GitHub a auditar
+        branch (str): Rama del repositorio a auditar (default: "main")
+
+    Returns:
+        Dict[str, Any]: Resultado de la auditoría con el estado y las discrepancias encontradas
+    """
+    return await run_audit(repo_url, branch)
+
 # Crear el agente LLM
 root_agent: LlmAgent = LlmAgent(
     name="financial_auditor",
-    model="gemini-2.0-flash",
+    model=default_llm_backend().adk_model(),
     description="Agente para realizar auditorías financieras",
     instruction="""Soy un agente especializado en auditoría financiera. 
     Mi tarea es analizar documentos financieros y detectar discrepancias.
     Puedo recuperar documentos de GitHub, analizarlos y crear issues con los hallazgos.""",
     tools=[
-        FunctionTool(run_audit),
+        FunctionTool(audit_repository),
         FunctionTool(retrieve_financial_docs),
         FunctionTool(compare_documents),
         FunctionTool(create_github_issue)
@@ -85,14 +162,20 @@ async def verify_github_webhook(request: Request) -> bool:
     return hmac.compare_digest(signature, expected_signature)
 
 @app.post("/webhook/github")
-async def github_webhook(request: Request) -> Dict[str, str]:
+async def github_webhook(request: Request, response: Response) -> Dict[str, Any]:
     """Endpoint para el webhook de GitHub.
     
+    La auditoría se encola y se responde 202 con el id del trabajo, dentro
+    del tiempo límite de GitHub; el resultado se consulta en
+    `GET /audit/jobs/{job_id}`. Los pushes que llegan dentro de la ventana
+    de agrupación reemplazan a la auditoría pendiente de la misma rama.
+    
     Args:
         request (Request): Request de FastAPI
+        response (Response): Respuesta de FastAPI, para fijar el código 202
         
     Returns:
-        Dict[str, str]: Respuesta con el estado de la operación
+        Dict[str, Any]: Respuesta con el estado de la operación
     """
     if not await verify_github_webhook(request):
         return {"status": "error", "message": "Invalid signature"}
@@ -104,18 +187,39 @@ async def github_webhook(request: Request) -> Dict[str, str]:
         payload.get('repository', {}).get('html_url')):
         
         repo_url: str = payload['repository']['html_url']
-        result: Dict[str, Any] = await run_audit(repo_url=repo_url, branch='main')
-        return result
+        
+        # Los pushes que no tocan documentos financieros no se auditan
+        changes = financial_changes(payload)
+        if changes is not None and not changes.touched:
+            return {"status": "skipped", "message": "No financial files changed"}
+        
+        options = {}
+        if default_profiling_policy().should_profile(request.headers.get(AUDIT_PROFILE_HEADER)):
+            options['profile'] = True
+        job = push_coalescer.push(repo_url, 'main', payload.get('after'), changes, **options)
+        response.status_code = 202
+        return {
+            "status": "queued",
+            "job_id": job.id,
+            "status_url": f"/audit/jobs/{job.id}",
+            "coalesced": job.coalesced,
+            "profiled": bool(job.options.get('profile'))
+        }
     
     return {"status": "skipped", "message": "Not a push to main"}
 
 @app.post("/audit")
-async def audit_endpoint(repo_url: str, branch: str = "main") -> Dict[str, Any]:
+async def audit_endpoint(request: Request, repo_url: str, branch: str = "main", force_refresh: bool = False) -> Dict[str, Any]:
     """Ejecuta una auditoría financiera.
     
+    Con la cabecera `X-Audit-Profile` autorizada (o por muestreo) el
+    pipeline se perfila y el resultado incluye el nombre del perfil.
+    
     Args:
+        request (Request): Request de FastAPI, para leer la cabecera de perfil
         repo_url (str): URL del repositorio a auditar
         branch (str): Rama del repositorio a auditar
+        force_refresh (bool): Ignorar el resultado guardado del commit actual
         
     Returns:
         Dict[str, Any]: Resultado de la auditoría
@@ -126,9 +230,138 @@ async def audit_endpoint(repo_url: str, branch: str = "main") -> Dict[str, Any]:
         session_id="audit_session"
     )
     
-    result: Dict[str, Any] = await run_audit(repo_url=repo_url, branch=branch)
+    profile = default_profiling_policy().should_profile(request.headers.get(AUDIT_PROFILE_HEADER))
+    result: Dict[str, Any] = await run_audit(repo_url=repo_url, branch=branch, force_refresh=force_refresh, profile=profile)
     return result
 
+@app.get("/audit/jobs/{job_id}")
+async def audit_job(job_id: str) -> Dict[str, Any]:
+    """Consulta el estado y el resultado de una auditoría encolada.
+    
+    Args:
+        job_id (str): Id devuelto por el webhook
+        
+    Returns:
+        Dict[str, Any]: Estado, tiempos y resultado del trabajo
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo de auditoría no encontrado")
+    return job.to_dict()
+
+@app.get("/audit/queue")
+async def audit_queue() -> Dict[str, Any]:
+    """Métricas de la cola de auditorías: profundidad y tiempos de espera.
+    
+    Returns:
+        Dict[str, Any]: Contadores de trabajos, estadísticas de espera en segundos,
+            ocupación de cada etapa del pipeline, pushes agrupados y aciertos de la
+            caché de resultados
+    """
+    return dict(
+        job_queue.metrics(),
+        stages=default_stage_limits().stats(),
+        result_cache=default_result_cache().stats(),
+        **push_coalescer.stats()
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint() -> PlainTextResponse:
+    """Métricas de `docs/observability.md` en formato de exposición de Prometheus.
+    
+    Returns:
+        PlainTextResponse: Contadores e histogramas de recuperación, parseo,
+            comparación, issues, auditorías y API de GitHub
+    """
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/audits")
+async def list_audits(
+    repo_url: Optional[str] = None,
+    period: Optional[str] = None,
+    type: Optional[str] = None,
+    status: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(AUDIT_HISTORY_PAGE_SIZE, ge=1, le=AUDIT_HISTORY_MAX_PAGE_SIZE)
+) -> Dict[str, Any]:
+    """Historial de auditorías, de la más reciente a la más antigua.
+    
+    Args:
+        repo_url (str): Sólo auditorías de este repositorio
+        period (str): Sólo auditorías de este período contable
+        type (str): Sólo auditorías con alguna discrepancia de este tipo
+        status (str): Sólo auditorías con este estado (`success` o `error`)
+        cursor (int): `next_cursor` de la página anterior
+        limit (int): Auditorías por página
+        
+    Returns:
+        Dict[str, Any]: `items` con las auditorías y sus discrepancias y
+            `next_cursor` para pedir la página siguiente (None al final)
+    """
+    items, next_cursor = await asyncio.to_thread(
+        default_history_store().query,
+        repo_url=repo_url, period=period, discrepancy_type=type, status=status, cursor=cursor, limit=limit
+    )
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/audits/{audit_id}")
+async def get_audit(audit_id: int) -> Dict[str, Any]:
+    """Una auditoría del historial con sus discrepancias y totales parseados.
+    
+    Args:
+        audit_id (int): `audit_id` devuelto por la auditoría
+        
+    Returns:
+        Dict[str, Any]: La auditoría guardada
+    """
+    audit = await asyncio.to_thread(default_history_store().get, audit_id)
+    if audit is None:
+        raise HTTPException(status_code=404, detail="Auditoría no encontrada")
+    return audit
+
+def _require_profile_access(request: Request) -> None:
+    """Exige la cabecera `X-Audit-Profile` con el token configurado."""
+    if not default_profiling_policy().authorized(request.headers.get(AUDIT_PROFILE_HEADER)):
+        raise HTTPException(status_code=403, detail="Acceso a perfiles no autorizado")
+
+@app.get("/profiles")
+async def list_profiles(request: Request) -> Dict[str, Any]:
+    """Perfiles capturados, del más reciente al más antiguo.
+    
+    Args:
+        request (Request): Request de FastAPI, con la cabecera `X-Audit-Profile`
+        
+    Returns:
+        Dict[str, Any]: `profiles` con nombre, tamaño y fecha de cada perfil
+    """
+    _require_profile_access(request)
+    return {"profiles": await asyncio.to_thread(default_profile_store().list)}
+
+@app.get("/profiles/{name}")
+async def get_profile(request: Request, name: str, format: str = Query("pstats", pattern="^(pstats|text)$")) -> Response:
+    """Descarga un perfil.
+    
+    Args:
+        request (Request): Request de FastAPI, con la cabecera `X-Audit-Profile`
+        name (str): Nombre devuelto en `profile` o por `GET /profiles`
+        format (str): `pstats` para el archivo binario (`python -m pstats`,
+            snakeviz) o `text` para las funciones con más tiempo acumulado
+        
+    Returns:
+        Response: El archivo del perfil o su resumen en texto
+    """
+    _require_profile_access(request)
+    store = default_profile_store()
+    if format == "text":
+        summary = await asyncio.to_thread(store.summary, name)
+        if summary is None:
+            raise HTTPException(status_code=404, detail="Perfil no encontrado")
+        return PlainTextResponse(summary)
+    path = store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
+
 def main() -> None:
     """Función principal que inicia el servidor."""
     uvicorn.run(app, host="127.0.0.1", port=8000, log_level="debug")
@@ -6,18 +6,28 @@ import pandas as pd
 import markdown
 import re
 from dataclasses import dataclass
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 from io import StringIO
 import os
-from github import Github
 from dotenv import load_dotenv
 from google.adk.agents import LlmAgent
 from google.adk.tools.function_tool import FunctionTool
 from google.adk.sessions import InMemorySessionService
 from google.adk.runners import Runner
+from auditor.core.statement_tokenizer import RowsEvent, PeriodEvent, tokenize_statement, parse_amount
+from auditor.core.rules import compile_rules
 from auditor.core.prompts import MAIN_AGENT_PROMPT, COMPARISON_PROMPTS, ANALYSIS_PROMPTS, REPORT_PROMPTS
 from .agents.comparison_agent import ComparisonAgent
 from .agents.issue_manager import IssueManagerAgent
+from .services import metrics, tracing
+from .services.audit_history import default_history_store
+from .services.github_clients import default_registry
+from .services.github_http import track_requests
+from .services.llm_backend import LlmBackend, default_llm_backend
+from .services.llm_calls import ESCALATED, SKIPPED, track_llm_calls
+from .services.push_filter import FinancialChanges, default_document_store, document_kind
+from .services.result_cache import default_result_cache, ruleset_hash
+from .services.stage_limits import default_stage_limits
 
 # Cargar variables de entorno
 load_dotenv()
@@ -61,58 +71,55 @@ class FinancialDocument:
 
     def _parse_pl_markdown(self) -> Dict[str, Any]:
         """Parsea un P&L en formato Markdown."""
-        lines: List[str] = self.content.split('\n')
         data: Dict[str, Any] = {
             'period': None,
             'revenue': [],
             'expenses': [],
             'totals': {}
         }
-        
-        current_section: Optional[str] = None
-        period_match: Optional[re.Match] = re.search(r'Periodo:\s*([^\n]+)', self.content)
-        if period_match:
-            data['period'] = period_match.group(1).strip()
+        return self._parse_markdown(data, {
+            'ingresos': ('revenue', 'revenue'),
+            'gastos': ('expenses', 'expense')
+        })
 
-        for line in lines:
-            line = line.strip()
-            
-            # Detectar secciones
-            if line.startswith('##'):
-                current_section = line.replace('#', '').strip().lower()
-                continue
-            
-            # Ignorar líneas vacías o encabezados de tabla
-            if not line or line.startswith('|--') or line.startswith('| Concepto'):
-                continue
-            
-            # Procesar líneas de datos
-            if line.startswith('|'):
-                cells: List[str] = [cell.strip() for cell in line.split('|')[1:-1]]
-                if len(cells) >= 2:
-                    name: str = cells[0]
+    def _parse_markdown(self, data: Dict[str, Any], sections: Dict[str, Tuple[str, str]]) -> Dict[str, Any]:
+        """Llena `data` recorriendo el contenido con el tokenizador compartido.
+
+        `sections` asocia cada sección con (clave en `data`, categoría); la
+        sección 'totales' se guarda en `data['totals']`.
+        """
+        for event in tokenize_statement(self.content):
+            if type(event) is RowsEvent:
+                target: Optional[Tuple[str, str]] = sections.get(event.section)
+                if target is None:
+                    if event.section != 'totales':
+                        continue
+                else:
+                    append = data[target[0]].append
+                    category = target[1]
+                period = data['period']
+
+                for name, value in event.rows:
                     try:
-                        amount: Decimal = Decimal(cells[1].replace('$', '').replace(',', '').strip())
-                        
-                        if current_section == 'ingresos':
-                            data['revenue'].append(FinancialLineItem(
-                                name=name,
-                                amount=amount,
-                                category='revenue',
-                                period=data['period']
-                            ))
-                        elif current_section == 'gastos':
-                            data['expenses'].append(FinancialLineItem(
-                                name=name,
-                                amount=amount,
-                                category='expense',
-                                period=data['period']
-                            ))
-                        elif current_section == 'totales':
-                            data['totals'][name] = amount
-                    except (ValueError, decimal.InvalidOperation):
+                        amount: Decimal = parse_amount(value)
+                    except (ValueError, InvalidOperation):
                         continue
 
+                    if target is None:
+                        data['totals'][name] = amount
+                    else:
+                        append(FinancialLineItem(
+                            name=name,
+                            amount=amount,
+                            category=category,
+                            period=period
+                        ))
+            elif type(event) is PeriodEvent:
+                data['period'] = event.value
+                for key, _ in sections.values():
+                    for item in data[key]:
+                        item.period = event.value
+
         return data
 
     def _parse_pl_csv(self) -> Dict[str, Any]:
@@ -143,7 +150,7 @@ class FinancialDocument:
                         data['expenses'].append(item)
                     elif row['Category'].lower() in ['total', 'totales']:
                         data['totals'][row['Item']] = amount
-                except (ValueError, decimal.InvalidOperation, KeyError):
+                except (ValueError, InvalidOperation, KeyError):
                     continue
             
             return data
@@ -162,7 +169,6 @@ class FinancialDocument:
 
     def _parse_balance_markdown(self) -> Dict[str, Any]:
         """Parsea un Balance General en formato Markdown."""
-        lines: List[str] = self.content.split('\n')
         data: Dict[str, Any] = {
             'period': None,
             'activos': [],
@@ -170,59 +176,11 @@ class FinancialDocument:
             'capital_contable': [],
             'totals': {}
         }
-        
-        current_section: Optional[str] = None
-        period_match: Optional[re.Match] = re.search(r'Periodo:\s*([^\n]+)', self.content)
-        if period_match:
-            data['period'] = period_match.group(1).strip()
-
-        for line in lines:
-            line = line.strip()
-            
-            # Detectar secciones
-            if line.startswith('##'):
-                current_section = line.replace('#', '').strip().lower()
-                continue
-            
-            # Ignorar líneas vacías o encabezados de tabla
-            if not line or line.startswith('|--') or line.startswith('| Concepto'):
-                continue
-            
-            # Procesar líneas de datos
-            if line.startswith('|'):
-                cells: List[str] = [cell.strip() for cell in line.split('|')[1:-1]]
-                if len(cells) >= 2:
-                    name: str = cells[0]
-                    try:
-                        amount: Decimal = Decimal(cells[1].replace('$', '').replace(',', '').strip())
-                        
-                        if current_section == 'activos':
-                            data['activos'].append(FinancialLineItem(
-                                name=name,
-                                amount=amount,
-                                category='asset',
-                                period=data['period']
-                            ))
-                        elif current_section == 'pasivos':
-                            data['pasivos'].append(FinancialLineItem(
-                                name=name,
-                                amount=amount,
-                                category='liability',
-                                period=data['period']
-                            ))
-                        elif current_section == 'capital contable':
-                            data['capital_contable'].append(FinancialLineItem(
-                                name=name,
-                                amount=amount,
-                                category='equity',
-                                period=data['period']
-                            ))
-                        elif current_section == 'totales':
-                            data['totals'][name] = amount
-                    except (ValueError, decimal.InvalidOperation):
-                        continue
-
-        return data
+        return self._parse_markdown(data, {
+            'activos': ('activos', 'asset'),
+            'pasivos': ('pasivos', 'liability'),
+            'capital contable': ('capital_contable', 'equity')
+        })
 
     def _parse_balance_csv(self) -> Dict[str, Any]:
         """Parsea un Balance General en formato CSV."""
@@ -255,7 +213,7 @@ class FinancialDocument:
                         data['capital_contable'].append(item)
                     elif row['Category'].lower() in ['total', 'totales']:
                         data['totals'][row['Item']] = amount
-                except (ValueError, decimal.InvalidOperation, KeyError):
+                except (ValueError, InvalidOperation, KeyError):
                     continue
             
             return data
@@ -272,55 +230,44 @@ def compare_documents(pl_content: str, balance_content: str) -> List[Dict[str, A
     Returns:
         List[Dict]: Lista de discrepancias encontradas con propuestas de corrección
     """
-    # Crear instancias de FinancialDocument
-    pl_doc = FinancialDocument(pl_content, 'pl')
-    balance_doc = FinancialDocument(balance_content, 'balance')
-    
-    # Parsear ambos documentos
-    pl_data = pl_doc.parse()
-    balance_data = balance_doc.parse()
-    
-    discrepancies = []
-    
-    # Verificar que los períodos coincidan
-    if pl_data.get('period') != balance_data.get('period'):
-        discrepancies.append({
-            'type': 'period_mismatch',
-            'description': f"Los períodos no coinciden: P&L ({pl_data.get('period')}) vs Balance ({balance_data.get('period')})",
-            'severity': 'high',
-            'fix': 'Asegurarse de que ambos documentos correspondan al mismo período contable.'
-        })
-    
-    # Verificar que la utilidad neta coincida con la utilidad del período en el balance
-    pl_net_income = None
-    for item in pl_data.get('totals', {}).items():
-        if 'utilidad' in item[0].lower() or 'net' in item[0].lower():
-            pl_net_income = item[1]
-            break
-    
-    balance_net_income = None
-    for item in balance_data.get('capital_contable', []):
-        if 'utilidad' in item.name.lower() or 'net' in item.name.lower():
-            balance_net_income = item.amount
-            break
-    
-    if pl_net_income is not None and balance_net_income is not None:
-        if abs(pl_net_income - balance_net_income) > Decimal('0.01'):
-            discrepancies.append({
-                'type': 'income_mismatch',
-                'description': f"La utilidad neta no coincide: P&L (${pl_net_income}) vs Balance (${balance_net_income})",
-                'severity': 'high',
-                'fix': f"Ajustar la utilidad neta en el Balance General para que coincida con el P&L: ${pl_net_income}"
-            })
-    
+    pl_data, balance_data = parse_documents(pl_content, balance_content)
+    return compare_parsed(pl_data, balance_data)
+
+def parse_documents(pl_content: str, balance_content: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Parsea el P&L y el Balance y devuelve sus datos en ese orden."""
+    parsed = []
+    for content, doc_type in ((pl_content, 'pl'), (balance_content, 'balance')):
+        document = FinancialDocument(content, doc_type)
+        with tracing.span('document_parsing', doc_type=doc_type, file_type=document.file_format, file_size=len(content.encode('utf-8'))) as span, \
+                metrics.track(metrics.document_parsing_duration, metrics.document_parsing_success, metrics.document_parsing_failure, doc_type=doc_type):
+            data = document.parse()
+            span.set_attribute('parsed_items', sum(len(value) for value in data.values() if isinstance(value, list)))
+        parsed.append(data)
+    return parsed[0], parsed[1]
+
+# Verificaciones del agente: período y utilidad neta
+_COMPARISON_RULES = compile_rules(['period_mismatch', 'income_mismatch'])
+
+# Verificaciones de `ComparisonAgent` que `AuditorAgent.analyze_documents` consulta al modelo
+_MODEL_CHECKS = ('ratios', 'balance')
+
+@tracing.span('financial_comparison')
+@metrics.comparison_duration.time()
+def compare_parsed(pl_data: Dict[str, Any], balance_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Detecta inconsistencias entre un P&L y un Balance ya parseados."""
+    discrepancies = _COMPARISON_RULES.evaluate(pl_data, balance_data)
+    metrics.record_discrepancies(discrepancies)
+    tracing.record_comparison(discrepancies)
     return discrepancies
 
-def retrieve_financial_docs(repo_url: str, branch: str = "main") -> Dict[str, str]:
+def retrieve_financial_docs(repo_url: str, branch: str = "main", commit_sha: Optional[str] = None) -> Dict[str, str]:
     """Recupera los documentos financieros del repositorio.
 
     Args:
         repo_url (str): URL del repositorio GitHub (formato: https://github.com/owner/repo)
         branch (str): Rama del repositorio a consultar (default: "main")
+        commit_sha (Optional[str]): Commit exacto a consultar en lugar del
+            head de la rama (p. ej. el `after` de un push)
 
     Returns:
         Dict[str, str]: Diccionario con los contenidos de los documentos
@@ -330,6 +277,17 @@ def retrieve_financial_docs(repo_url: str, branch: str = "main") -> Dict[str, st
     Raises:
         ValueError: Si hay errores al acceder al repositorio o los documentos
     """
+    return _retrieve_documents(repo_url, branch, commit_sha)
+
+@tracing.span('document_retrieval')
+@metrics.track(metrics.document_retrieval_duration, metrics.document_retrieval_success, metrics.document_retrieval_failure)
+def _retrieve_documents(repo_url: str, branch: str, commit_sha: Optional[str], changes: Optional[FinancialChanges] = None) -> Dict[str, str]:
+    """Recupera los documentos; con `changes` descarga sólo el que cambió si es posible.
+
+    Los documentos descargados se guardan en `default_document_store()` con
+    `commit_sha` para que el siguiente push que toque uno solo de ellos
+    reutilice el otro si no cambió desde ese commit.
+    """
     try:
         # Extraer owner y repo de la URL
         match = re.match(r'https://github.com/([^/]+)/([^/]+)', repo_url)
@@ -343,23 +301,36 @@ def retrieve_financial_docs(repo_url: str, branch: str = "main") -> Dict[str, st
         if not github_token:
             raise ValueError("Token de GitHub no encontrado en variables de entorno")
         
-        g = Github(github_token)
-        repo = g.get_repo(f"{owner}/{repo_name}")
+        registry = default_registry()
+        repo = registry.repository(registry.client(github_token), f"{owner}/{repo_name}")
+        ref = commit_sha or branch
+        store = default_document_store()
+        tracing.set_attributes(repo=f"{owner}/{repo_name}", branch=branch, commit_sha=commit_sha)
+        
+        # Si el push sólo modificó uno de los documentos ya conocidos, el otro
+        # se toma del almacén sin volver a listar el repositorio
+        partial = store.plan_partial(repo_url, branch, changes)
+        if partial is not None:
+            doc_type, path, other_content = partial
+            content = repo.get_contents(path, ref=ref).decoded_content.decode('utf-8')
+            store.put(repo_url, branch, doc_type, path, content, commit_sha)
+            tracing.set_attributes(files=[path], partial=True)
+            other_type = 'balance' if doc_type == 'pl' else 'pl'
+            return {doc_type: content, other_type: other_content}
         
         # Buscar archivos financieros
         pl_files = []
         balance_files = []
         
         # Buscar en la rama especificada
-        contents = repo.get_contents("", ref=branch)
+        contents = repo.get_contents("", ref=ref)
         for content in contents:
             if content.type == "file":
-                filename = content.name.lower()
-                if any(ext in filename for ext in ['.md', '.csv']):
-                    if 'pl' in filename or 'income' in filename or 'profit' in filename:
-                        pl_files.append(content)
-                    elif 'balance' in filename or 'bs' in filename:
-                        balance_files.append(content)
+                kind = document_kind(content.name)
+                if kind == 'pl':
+                    pl_files.append(content)
+                elif kind == 'balance':
+                    balance_files.append(content)
         
         if not pl_files:
             raise ValueError("No se encontraron archivos de P&L")
@@ -367,8 +338,11 @@ def retrieve_financial_docs(repo_url: str, branch: str = "main") -> Dict[str, st
             raise ValueError("No se encontraron archivos de Balance General")
         
         # Obtener el contenido de los archivos más recientes
-        pl_content = repo.get_contents(pl_files[0].path, ref=branch).decoded_content.decode('utf-8')
-        balance_content = repo.get_contents(balance_files[0].path, ref=branch).decoded_content.decode('utf-8')
+        pl_content = repo.get_contents(pl_files[0].path, ref=ref).decoded_content.decode('utf-8')
+        balance_content = repo.get_contents(balance_files[0].path, ref=ref).decoded_content.decode('utf-8')
+        store.put(repo_url, branch, 'pl', pl_files[0].path, pl_content, commit_sha)
+        store.put(repo_url, branch, 'balance', balance_files[0].path, balance_content, commit_sha)
+        tracing.set_attributes(files=[pl_files[0].path, balance_files[0].path], partial=False)
         
         return {
             'pl': pl_content,
@@ -378,6 +352,8 @@ def retrieve_financial_docs(repo_url: str, branch: str = "main") -> Dict[str, st
     except Exception as e:
         raise ValueError(f"Error al recuperar documentos: {str(e)}")
 
+@tracing.span('issue_publishing')
+@metrics.track(metrics.issue_creation_duration, metrics.issue_creation_success, metrics.issue_creation_failure)
 def create_github_issue(discrepancies: List[Dict[str, Any]], repo_url: str) -> str:
     """Crea o actualiza un issue en GitHub con las discrepancias encontradas.
 
@@ -395,14 +371,15 @@ def create_github_issue(discrepancies: List[Dict[str, Any]], repo_url: str) -> s
             raise ValueError("URL del repositorio inválida")
         
         owner, repo_name = match.groups()
+        tracing.set_attributes(repo=f"{owner}/{repo_name}", discrepancies=len(discrepancies))
         
         # Inicializar cliente de GitHub
         github_token = os.getenv('GITHUB_TOKEN')
         if not github_token:
             raise ValueError("Token de GitHub no encontrado en variables de entorno")
         
-        g = Github(github_token)
-        repo = g.get_repo(f"{owner}/{repo_name}")
+        registry = default_registry()
+        repo = registry.repository(registry.client(github_token), f"{owner}/{repo_name}")
         
         # Crear título y cuerpo del issue
         title = f"Auditoría Financiera: {len(discrepancies)} discrepancias encontradas"
@@ -472,37 +449,116 @@ def create_github_issue(discrepancies: List[Dict[str, Any]], repo_url: str) -> s
     except Exception as e:
         raise ValueError(f"Error al crear issue: {str(e)}")
 
-def audit_financial_documents(repo_url: str, branch: str = "main") -> Dict[str, Any]:
-    """Función principal que orquesta el proceso de auditoría."""
+@tracing.span('commit_resolution')
+def _resolve_commit(repo_url: str, branch: str) -> str:
+    """Obtiene el SHA del commit al que apunta la rama.
+
+    Raises:
+        ValueError: Si la URL es inválida, falta el token o la rama no existe
+    """
+    match = re.match(r'https://github.com/([^/]+)/([^/]+)', repo_url)
+    if not match:
+        raise ValueError("URL del repositorio inválida")
+    
+    github_token = os.getenv('GITHUB_TOKEN')
+    if not github_token:
+        raise ValueError("Token de GitHub no encontrado en variables de entorno")
+    
+    owner, repo_name = match.groups()
+    registry = default_registry()
+    repo = registry.repository(registry.client(github_token), f"{owner}/{repo_name}")
+    return repo.get_branch(branch).commit.sha
+
+def audit_financial_documents(repo_url: str, branch: str = "main", commit_sha: Optional[str] = None, changes: Optional[FinancialChanges] = None, force_refresh: bool = False) -> Dict[str, Any]:
+    """Función principal que orquesta el proceso de auditoría.
+
+    Es bloqueante; cada etapa respeta los límites de concurrencia de
+    `default_stage_limits()`. `changes` son los archivos financieros que tocó
+    el push, para descargar sólo el documento que cambió. Un commit ya
+    auditado con las mismas reglas devuelve el resultado guardado
+    (`cached: True`) sin repetir la auditoría ni el issue, salvo con
+    `force_refresh`; las demás ejecuciones se guardan en el historial
+    (`audit_id`).
+    """
+    with tracing.span('audit', repo=repo_url, branch=branch) as span, metrics.audit_duration.time():
+        result = _audit_financial_documents(repo_url, branch, commit_sha, changes, force_refresh)
+        span.attributes.update(
+            commit_sha=result.get('commit_sha'), cached=result.get('cached', False),
+            discrepancies=len(result.get('discrepancies', [])), audit_id=result.get('audit_id')
+        )
+        if result['status'] == 'error':
+            span.status, span.error = 'error', result.get('error_message')
+    metrics.audits.inc(status='cached' if result.get('cached') else result['status'])
+    return result
+
+def _audit_financial_documents(repo_url: str, branch: str, commit_sha: Optional[str], changes: Optional[FinancialChanges], force_refresh: bool) -> Dict[str, Any]:
+    """Ejecuta la auditoría de `audit_financial_documents`."""
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    timings: Dict[str, float] = {}
+    parsed: Dict[str, Dict[str, Any]] = {}
     try:
-        # 1. Recuperar documentos
-        docs = retrieve_financial_docs(repo_url, branch)
-        
-        # 2. Comparar documentos
-        discrepancies = compare_documents(docs['pl'], docs['balance'])
-        
-        # 3. Crear/actualizar issue
-        issue_url = create_github_issue(discrepancies, repo_url)
+        limits = default_stage_limits()
+        cache = default_result_cache()
+        with track_requests() as github_requests:
+            # 1. Resolver el commit y recuperar documentos
+            with limits.stage('retrieve', timings):
+                commit_sha = commit_sha or _resolve_commit(repo_url, branch)
+                key = cache.key(repo_url, commit_sha, ruleset_hash())
+                cached = cache.get(key, force_refresh)
+                if cached is not None:
+                    cached['cached'] = True
+                    cached['github_requests'] = github_requests
+                    return cached
+                docs = _retrieve_documents(repo_url, branch, commit_sha, changes)
+            
+            # 2. Comparar documentos
+            with limits.stage('compare', timings):
+                parsed['pl'], parsed['balance'] = parse_documents(docs['pl'], docs['balance'])
+                discrepancies = compare_parsed(parsed['pl'], parsed['balance'])
+            
+            # 3. Crear/actualizar issue
+            with limits.stage('issue', timings):
+                issue_url = create_github_issue(discrepancies, repo_url)
         
-        return {
+        result = {
             "status": "success",
             "discrepancies": discrepancies,
-            "issue_url": issue_url
+            "issue_url": issue_url,
+            "commit_sha": commit_sha,
+            "cached": False,
+            # Lecturas de GitHub: 200, 304 servidas de la copia local y otras
+            "github_requests": github_requests
         }
+        result["audit_id"] = _record_audit(repo_url, branch, result, started_at, timings, parsed)
+        cache.put(key, result)
+        return result
     except Exception as e:
-        return {
+        result = {
             "status": "error",
             "error_message": str(e)
         }
+        error = [{'type': 'system_error', 'description': str(e), 'severity': 'high', 'fix': 'Contacta al equipo de soporte'}]
+        result["audit_id"] = _record_audit(repo_url, branch, dict(result, commit_sha=commit_sha, discrepancies=error), started_at, timings, parsed)
+        return result
+
+def _record_audit(repo_url: str, branch: str, result: Dict[str, Any], started_at: datetime.datetime, timings: Dict[str, float], parsed: Dict[str, Dict[str, Any]]) -> Optional[int]:
+    """Guarda la ejecución en el historial de auditorías del proceso."""
+    period = next((data.get('period') for data in parsed.values() if data.get('period')), None)
+    return default_history_store().record(
+        repo_url, branch, result.get('commit_sha'), result['status'], started_at, timings,
+        result['discrepancies'], issue_url=result.get('issue_url'), period=period,
+        totals={doc_type: dict(data.get('totals') or {}) for doc_type, data in parsed.items()}
+    )
 
 class AuditorAgent(LlmAgent):
     """Agente principal para la auditoría financiera usando ADK."""
     
-    def __init__(self):
-        # Inicializar agente principal
+    def __init__(self, backend: Optional[LlmBackend] = None):
+        # Inicializar agente principal; `backend` es el modelo de todos los agentes
+        backend = backend or default_llm_backend()
         super().__init__(
             name="auditor_agent",
-            model="gemini-2.0-flash",
+            model=backend.adk_model(),
             description="Agente principal para realizar auditorías financieras",
             instruction=MAIN_AGENT_PROMPT,
             tools=[
@@ -519,8 +575,8 @@ class AuditorAgent(LlmAgent):
             agent=self,
             session_service=self._session_service
         )
-        self._comparison_agent = ComparisonAgent()
-        self._issue_manager = IssueManagerAgent()
+        self._comparison_agent = ComparisonAgent(backend=backend)
+        self._issue_manager = IssueManagerAgent(backend=backend)
     
     @property
     def comparison_agent(self) -> ComparisonAgent:
@@ -532,33 +588,31 @@ class AuditorAgent(LlmAgent):
         """Obtiene el agente de gestión de issues."""
         return self._issue_manager
     
+    @tracing.span('agent_tool', tool='retrieve_documents')
     def retrieve_documents(self, repo_url: str, branch: str = "main") -> Dict[str, str]:
         """Recupera los documentos financieros del repositorio."""
         return retrieve_financial_docs(repo_url, branch)
     
+    @tracing.span('agent_tool', tool='analyze_documents')
     def analyze_documents(self, docs: Dict[str, str]) -> List[Dict]:
         """Analiza los documentos financieros usando el agente de comparación."""
-        pl_data = self.comparison_agent.parse_content(docs['pl'])
-        balance_data = self.comparison_agent.parse_content(docs['balance'])
-        
-        discrepancies = []
-        
-        # Comparar períodos
-        period_discrepancy = self.comparison_agent.compare_periods(pl_data, balance_data)
-        if period_discrepancy:
-            discrepancies.append(period_discrepancy)
+        pl_data, balance_data = parse_documents(docs['pl'], docs['balance'])
         
-        # Comparar utilidad neta
-        income_discrepancy = self.comparison_agent.compare_net_income(pl_data, balance_data)
-        if income_discrepancy:
-            discrepancies.append(income_discrepancy)
+        # Comparar períodos y utilidad neta
+        discrepancies = compare_parsed(pl_data, balance_data)
         
-        # Analizar ratios
-        ratio_discrepancies = self.comparison_agent.analyze_ratios(pl_data, balance_data)
-        discrepancies.extend(ratio_discrepancies)
+        # Ratios y ecuación contable con el modelo sólo si las verificaciones
+        # locales los escalan (en un solo prompt si son los dos); la validación
+        # general no tiene verificación local y repetiría las discrepancias de
+        # `compare_parsed`. Las consultas omitidas y escaladas quedan en el span
+        with track_llm_calls() as llm_calls:
+            model_discrepancies = self.comparison_agent.run_validations(pl_data, balance_data, checks=_MODEL_CHECKS)
+        discrepancies.extend(model_discrepancies)
+        tracing.set_attributes(llm_skipped=llm_calls[SKIPPED], llm_escalated=llm_calls[ESCALATED])
         
         return discrepancies
     
+    @tracing.span('agent_tool', tool='report_findings')
     def report_findings(self, discrepancies: List[Dict], repo_owner: str, repo_name: str) -> str:
         """Reporta los hallazgos usando el agente de gestión de issues."""
         return self.issue_manager.update_issue(discrepancies, repo_owner, repo_name)
@@ -590,14 +644,22 @@ def main():
         print(f"Error durante la auditoría: {str(e)}")
         sys.exit(1)
 
+def audit_repository(repo_url: str, branch: str = "main", commit_sha: Optional[str] = None) -> Dict[str, Any]:
+    """Audita los documentos financieros de un repositorio.
+
+    Herramienta de `root_agent`: `audit_financial_documents` sin los
+    parámetros internos del webhook, que ADK no puede declarar al modelo.
+    """
+    return audit_financial_documents(repo_url, branch, commit_sha)
+
 # Crear el agente raíz para ADK
 root_agent = LlmAgent(
     name="financial_auditor",
-    model="gemini-2.0-flash",
+    model=default_llm_backend().adk_model(),
     description="Agente para realizar auditorías financieras",
     instruction=MAIN_AGENT_PROMPT,
     tools=[
-        FunctionTool(audit_financial_documents),
+        FunctionTool(audit_repository),
         FunctionTool(retrieve_financial_docs),
         FunctionTool(compare_documents),
         FunctionTool(create_github_issue)
@@ -1,25 +1,84 @@
+import contextvars
+import functools
+import json
+from concurrent.futures import ThreadPoolExecutor
 from google.adk.agents import Agent
 from google.adk.tools.function_tool import FunctionTool
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 from decimal import Decimal
 from ..core.adk_prompts import (
     FINANCIAL_VALIDATION_PROMPT,
     RATIO_ANALYSIS_PROMPT,
-    BALANCE_VALIDATION_PROMPT
+    BALANCE_VALIDATION_PROMPT,
+    COMBINED_VALIDATION_PROMPT,
+    COMBINED_SECTION_TITLES,
+    COMBINED_RESPONSE_SCHEMA
 )
+from ..core.constants import PROMPT_DATA_TOKEN_BUDGET, TOLERANCE
+from ..core.fixed_point import to_cents, from_cents, add_cents, ratio
+from ..core.prompt_tables import statement_table
+from ..core.prechecks import balance_escalation, ratio_escalation
+from ..core.rules import compile_rules
+from ..services import metrics
+from ..services.llm_backend import LlmBackend, default_llm_backend
+from ..services.llm_cache import cached_generate
+from ..services.llm_calls import record_precheck
 from ..core.adk_parser import (
     parse_validation_response,
     parse_ratio_response,
-    parse_balance_response
+    parse_balance_response,
+    parse_combined_response
 )
 
+# Totales que usan los ratios y la ecuación contable, resueltos una vez por par
+_TOTALS = compile_rules(['unusual_ratio', 'expense_ratio', 'unbalanced'])
+
+# Parser de la respuesta de cada verificación, por clave del prompt combinado
+_PARSERS: Dict[str, Callable[[str], List[Dict]]] = {
+    'validation': parse_validation_response,
+    'ratios': parse_ratio_response,
+    'balance': parse_balance_response
+}
+
+# Verificaciones de `run_validations`, en el orden de sus discrepancias
+ALL_CHECKS: Tuple[str, ...] = ('validation', 'ratios', 'balance')
+
+_COMBINED_SCHEMA_TEXT = json.dumps(COMBINED_RESPONSE_SCHEMA, ensure_ascii=False, separators=(',', ':'))
+
+def _totals(pl_data: Dict, balance_data: Dict) -> Tuple[Dict[str, Decimal], List[str]]:
+    """Ingresos, gastos, activos, pasivos y capital (cero si falta alguno) y los que faltan."""
+    totals = _TOTALS.resolve(pl_data, balance_data)
+    missing = [name for name, value in totals.items() if value is None]
+    return {name: Decimal('0') if value is None else value for name, value in totals.items()}, missing
+
 class ComparisonAgent(Agent):
     """Agente especializado en comparar documentos financieros usando ADK."""
+
+    # Calcula ratios y diferencias en centavos enteros (`core.fixed_point`)
+    fixed_point: bool = False
+    # Omite la consulta al modelo cuando los valores locales están en rango (`core.prechecks`)
+    prechecks: bool = True
+    # `run_validations` envía las verificaciones en un solo prompt JSON; si no, en paralelo
+    batch_calls: bool = True
+    # Reutiliza las respuestas a prompts ya consultados (`services.llm_cache`)
+    cache_responses: bool = True
+    # Tokens estimados para las tablas de ambos estados en el prompt (`core.prompt_tables`); None no recorta
+    prompt_token_budget: Optional[int] = PROMPT_DATA_TOKEN_BUDGET
+    # Backend que contesta los prompts (`services.llm_backend`); por defecto el del proceso
+    backend: Any = None
     
-    def __init__(self):
+    def __init__(self, fixed_point: bool = False, prechecks: bool = True, batch_calls: bool = True, cache_responses: bool = True,
+                 prompt_token_budget: Optional[int] = PROMPT_DATA_TOKEN_BUDGET, backend: Optional[LlmBackend] = None):
+        backend = backend or default_llm_backend()
         super().__init__(
+            fixed_point=fixed_point,
+            prechecks=prechecks,
+            batch_calls=batch_calls,
+            cache_responses=cache_responses,
+            prompt_token_budget=prompt_token_budget,
+            backend=backend,
             name="comparison_agent",
-            model="gemini-2.0-flash",
+            model=backend.adk_model(),
             description="Agente para comparar documentos financieros y detectar discrepancias",
             tools=[
                 FunctionTool(self.validate_financial_documents),
@@ -30,50 +89,163 @@ class ComparisonAgent(Agent):
     
     def validate_financial_documents(self, pl_data: Dict, balance_data: Dict) -> List[Dict]:
         """Valida la consistencia entre P&L y Balance usando ADK."""
-        prompt = FINANCIAL_VALIDATION_PROMPT.format(
-            pl_data=pl_data,
-            balance_data=balance_data
-        )
-        
-        response = self.generate(prompt)
-        return parse_validation_response(response)
+        return self._ask('validation', self._validation_prompt(pl_data, balance_data))
     
     def analyze_ratios(self, pl_data: Dict, balance_data: Dict) -> List[Dict]:
         """Analiza ratios financieros usando ADK."""
-        # Calcular ratios
-        revenue = pl_data.get('totals', {}).get('Ingresos Totales', Decimal('0'))
-        expenses = pl_data.get('totals', {}).get('Gastos Totales', Decimal('0'))
-        assets = balance_data.get('totals', {}).get('Total Activos', Decimal('0'))
-        liabilities = balance_data.get('totals', {}).get('Total Pasivos', Decimal('0'))
+        return self._ask('ratios', self._ratio_prompt(pl_data, balance_data))
+    
+    def validate_balance_equation(self, balance_data: Dict) -> List[Dict]:
+        """Valida la ecuación contable usando ADK."""
+        return self._ask('balance', self._balance_prompt(balance_data))
+    
+    def run_validations(self, pl_data: Dict, balance_data: Dict, checks: Sequence[str] = ALL_CHECKS) -> List[Dict]:
+        """Ejecuta las verificaciones `checks` y devuelve sus discrepancias en orden.
+        
+        Con `batch_calls` las verificaciones que llegan al modelo van en un
+        solo prompt (`COMBINED_VALIDATION_PROMPT`) cuya respuesta JSON se
+        separa en las discrepancias de cada una; si la respuesta no cumple
+        el esquema, o sin `batch_calls`, se consultan por separado en
+        paralelo. Las omitidas por las verificaciones locales no se envían.
         
-        revenue_assets_ratio = revenue / assets if assets else Decimal('0')
-        expense_revenue_ratio = expenses / revenue if revenue else Decimal('0')
-        liability_assets_ratio = liabilities / assets if assets else Decimal('0')
+        Args:
+            pl_data: P&L parseado.
+            balance_data: Balance parseado.
+            checks: Claves de las verificaciones (`ALL_CHECKS` por defecto).
+        """
+        builders = {
+            'validation': lambda: self._validation_prompt(pl_data, balance_data),
+            'ratios': lambda: self._ratio_prompt(pl_data, balance_data),
+            'balance': lambda: self._balance_prompt(balance_data)
+        }
+        prompts = {key: builders[key]() for key in ALL_CHECKS if key in checks}
+        prompts = {key: prompt for key, prompt in prompts.items() if prompt is not None}
+        if not prompts:
+            return []
+        if not self.batch_calls or len(prompts) == 1:
+            results = self._ask_concurrently(prompts)
+        else:
+            with metrics.comparison_llm_duration.time(mode='batched'):
+                response = self._generate(self._combined_prompt(prompts), COMBINED_RESPONSE_SCHEMA)
+            try:
+                results = parse_combined_response(response)
+            except ValueError:
+                results = self._ask_concurrently(prompts)
+        return [item for key in prompts for item in results[key]]
+    
+    def generate(self, prompt: str, response_schema: Optional[Dict] = None) -> str:
+        """Respuesta del modelo a `prompt`, según el backend del agente.
         
-        prompt = RATIO_ANALYSIS_PROMPT.format(
-            revenue_assets_ratio=revenue_assets_ratio,
-            expense_revenue_ratio=expense_revenue_ratio,
-            liability_assets_ratio=liability_assets_ratio
+        Con `response_schema` (esquema JSON) el modelo contesta con JSON que lo cumple.
+        """
+        return self.backend.generate(prompt, response_schema)
+    
+    def _validation_prompt(self, pl_data: Dict, balance_data: Dict) -> str:
+        """Prompt de la validación general con cada estado como tabla TSV.
+        
+        Cada estado usa a lo sumo la mitad de `prompt_token_budget`.
+        """
+        budget = None if self.prompt_token_budget is None else self.prompt_token_budget // 2
+        return FINANCIAL_VALIDATION_PROMPT.format(
+            pl_data=statement_table(pl_data, budget),
+            balance_data=statement_table(balance_data, budget)
         )
+    
+    def _ratio_prompt(self, pl_data: Dict, balance_data: Dict) -> Optional[str]:
+        """Prompt del análisis de ratios, o None si la verificación local lo omite."""
+        # Calcular ratios
+        totals, missing = _totals(pl_data, balance_data)
+        revenue, expenses, assets, liabilities = totals['revenue'], totals['expenses'], totals['assets'], totals['liabilities']
+        missing = [name for name in missing if name in ('revenue', 'expenses', 'assets', 'liabilities')]
+        
+        if self.fixed_point:
+            revenue, expenses, assets, liabilities = map(to_cents, (revenue, expenses, assets, liabilities))
+            revenue_assets_ratio = ratio(revenue, assets)
+            expense_revenue_ratio = ratio(expenses, revenue)
+            liability_assets_ratio = ratio(liabilities, assets)
+        else:
+            revenue_assets_ratio = revenue / assets if assets else Decimal('0')
+            expense_revenue_ratio = expenses / revenue if revenue else Decimal('0')
+            liability_assets_ratio = liabilities / assets if assets else Decimal('0')
         
-        response = self.generate(prompt)
-        return parse_ratio_response(response)
+        ratios = {
+            'revenue_assets_ratio': revenue_assets_ratio,
+            'expense_revenue_ratio': expense_revenue_ratio,
+            'liability_assets_ratio': liability_assets_ratio
+        }
+        if not self._escalate('ratios', ratio_escalation(ratios, missing)):
+            return None
+        return RATIO_ANALYSIS_PROMPT.format(**ratios)
     
-    def validate_balance_equation(self, balance_data: Dict) -> List[Dict]:
-        """Valida la ecuación contable usando ADK."""
-        assets = balance_data.get('totals', {}).get('Total Activos', Decimal('0'))
-        liabilities = balance_data.get('totals', {}).get('Total Pasivos', Decimal('0'))
-        equity = balance_data.get('totals', {}).get('Total Capital Contable', Decimal('0'))
+    def _balance_prompt(self, balance_data: Dict) -> Optional[str]:
+        """Prompt de la ecuación contable, o None si la verificación local lo omite."""
+        totals, missing = _totals({}, balance_data)
+        assets, liabilities, equity = totals['assets'], totals['liabilities'], totals['equity']
+        missing = [name for name in missing if name in ('assets', 'liabilities', 'equity')]
         
-        difference = assets - (liabilities + equity)
+        if self.fixed_point:
+            difference = from_cents(to_cents(assets) - add_cents(to_cents(liabilities), to_cents(equity)))
+        else:
+            difference = assets - (liabilities + equity)
         
-        prompt = BALANCE_VALIDATION_PROMPT.format(
+        if not self._escalate('balance_equation', balance_escalation(difference, missing)):
+            return None
+        
+        return BALANCE_VALIDATION_PROMPT.format(
             total_assets=assets,
             total_liabilities=liabilities,
             total_equity=equity,
             difference=difference,
-            tolerance=Decimal('0.01')
+            tolerance=TOLERANCE
         )
+    
+    def _combined_prompt(self, prompts: Dict[str, str]) -> str:
+        """Prompt único con las verificaciones de `prompts` y el esquema de la respuesta."""
+        sections = '\n\n'.join(
+            f"## {COMBINED_SECTION_TITLES[key]} (clave \"{key}\")\n{prompt}" for key, prompt in prompts.items()
+        )
+        return COMBINED_VALIDATION_PROMPT.format(sections=sections, schema=_COMBINED_SCHEMA_TEXT)
+    
+    def _ask(self, key: str, prompt: Optional[str]) -> List[Dict]:
+        """Consulta al modelo con el prompt de la verificación `key` y parsea su respuesta."""
+        if prompt is None:
+            return []
+        response = self._generate(prompt)
+        return _PARSERS[key](response)
+    
+    def _generate(self, prompt: str, response_schema: Optional[Dict] = None) -> str:
+        """Consulta al modelo, o reutiliza su respuesta si ya contestó el mismo prompt.
+        
+        El esquema no entra en la clave de la caché: el prompt combinado ya lo incluye.
+        """
+        generate = self.generate if response_schema is None else functools.partial(self.generate, response_schema=response_schema)
+        if not self.cache_responses:
+            return generate(prompt)
+        return cached_generate(generate, getattr(self.model, 'model', self.model), prompt)
+    
+    def _ask_concurrently(self, prompts: Dict[str, str]) -> Dict[str, List[Dict]]:
+        """Consulta en paralelo cada prompt por separado; resultados por clave.
+        
+        Cada consulta corre con una copia del contexto, así que las trazas y
+        los contadores de la auditoría en curso la siguen viendo.
+        """
+        with metrics.comparison_llm_duration.time(mode='concurrent'):
+            if len(prompts) == 1:
+                key, prompt = next(iter(prompts.items()))
+                return {key: self._ask(key, prompt)}
+            with ThreadPoolExecutor(max_workers=len(prompts), thread_name_prefix='comparison-llm') as executor:
+                futures = {
+                    key: executor.submit(contextvars.copy_context().run, self._ask, key, prompt)
+                    for key, prompt in prompts.items()
+                }
+                return {key: future.result() for key, future in futures.items()}
+    
+    def _escalate(self, check: str, reason: Optional[str]) -> bool:
+        """Decide si la verificación `check` consulta al modelo y cuenta la decisión.
         
-        response = self.generate(prompt)
-        return parse_balance_response(response) 
\ No newline at end of file
+        Sin verificaciones locales siempre se consulta; con ellas, sólo si
+        hay un motivo (valores fuera de rango o totales faltantes).
+        """
+        escalated = not self.prechecks or reason is not None
+        record_precheck(check, escalated)
+        return escalated
\ No newline at end of file
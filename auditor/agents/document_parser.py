@@ -1,10 +1,11 @@
 from google.adk import Agent, Tool
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from dataclasses import dataclass
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 import pandas as pd
 from io import StringIO
-import re
+
+from ..core.statement_tokenizer import TextSource, RowsEvent, PeriodEvent, tokenize_statement, parse_amount
 
 @dataclass
 class FinancialLineItem:
@@ -51,57 +52,53 @@ class DocumentParserAgent(Agent):
         else:
             return self._parse_balance_csv(content)
     
-    def _parse_pl_markdown(self, content: str) -> Dict:
+    def _parse_pl_markdown(self, content: TextSource) -> Dict:
         """Parsea un P&L en formato Markdown."""
-        lines = content.split('\n')
         data = {
             'period': None,
             'revenue': [],
             'expenses': [],
             'totals': {}
         }
-        
-        current_section = None
-        period_match = re.search(r'Periodo:\s*([^\n]+)', content)
-        if period_match:
-            data['period'] = period_match.group(1).strip()
+        return self._parse_markdown(content, data, {
+            'ingresos': ('revenue', 'revenue'),
+            'gastos': ('expenses', 'expense')
+        })
 
-        for line in lines:
-            line = line.strip()
-            
-            if line.startswith('##'):
-                current_section = line.replace('#', '').strip().lower()
-                continue
-            
-            if not line or line.startswith('|--') or line.startswith('| Concepto'):
-                continue
-            
-            if line.startswith('|'):
-                cells = [cell.strip() for cell in line.split('|')[1:-1]]
-                if len(cells) >= 2:
-                    name = cells[0]
+    def _parse_markdown(self, content: TextSource, data: Dict, sections: Dict[str, Tuple[str, str]]) -> Dict:
+        """Llena `data` con los eventos del tokenizador compartido."""
+        for event in tokenize_statement(content):
+            if type(event) is RowsEvent:
+                target = sections.get(event.section)
+                if target is None:
+                    if event.section != 'totales':
+                        continue
+                else:
+                    append = data[target[0]].append
+                    category = target[1]
+                period = data['period']
+
+                for name, value in event.rows:
                     try:
-                        amount = Decimal(cells[1].replace('$', '').replace(',', '').strip())
-                        
-                        if current_section == 'ingresos':
-                            data['revenue'].append(FinancialLineItem(
-                                name=name,
-                                amount=amount,
-                                category='revenue',
-                                period=data['period']
-                            ))
-                        elif current_section == 'gastos':
-                            data['expenses'].append(FinancialLineItem(
-                                name=name,
-                                amount=amount,
-                                category='expense',
-                                period=data['period']
-                            ))
-                        elif current_section == 'totales':
-                            data['totals'][name] = amount
-                    except (ValueError, decimal.InvalidOperation):
+                        amount = parse_amount(value)
+                    except (ValueError, InvalidOperation):
                         continue
 
+                    if target is None:
+                        data['totals'][name] = amount
+                    else:
+                        append(FinancialLineItem(
+                            name=name,
+                            amount=amount,
+                            category=category,
+                            period=period
+                        ))
+            elif type(event) is PeriodEvent:
+                data['period'] = event.value
+                for key, _ in sections.values():
+                    for item in data[key]:
+                        item.period = event.value
+
         return data
     
     def _parse_pl_csv(self, content: str) -> Dict:
@@ -131,16 +128,15 @@ class DocumentParserAgent(Agent):
                         data['expenses'].append(item)
                     elif row['Category'].lower() in ['total', 'totales']:
                         data['totals'][row['Item']] = amount
-                except (ValueError, decimal.InvalidOperation, KeyError):
+                except (ValueError, InvalidOperation, KeyError):
                     continue
             
             return data
         except Exception as e:
             raise ValueError(f"Error al parsear CSV: {str(e)}")
     
-    def _parse_balance_markdown(self, content: str) -> Dict:
+    def _parse_balance_markdown(self, content: TextSource) -> Dict:
         """Parsea un Balance General en formato Markdown."""
-        lines = content.split('\n')
         data = {
             'period': None,
             'activos': [],
@@ -148,56 +144,11 @@ class DocumentParserAgent(Agent):
             'capital_contable': [],
             'totals': {}
         }
-        
-        current_section = None
-        period_match = re.search(r'Periodo:\s*([^\n]+)', content)
-        if period_match:
-            data['period'] = period_match.group(1).strip()
-
-        for line in lines:
-            line = line.strip()
-            
-            if line.startswith('##'):
-                current_section = line.replace('#', '').strip().lower()
-                continue
-            
-            if not line or line.startswith('|--') or line.startswith('| Concepto'):
-                continue
-            
-            if line.startswith('|'):
-                cells = [cell.strip() for cell in line.split('|')[1:-1]]
-                if len(cells) >= 2:
-                    name = cells[0]
-                    try:
-                        amount = Decimal(cells[1].replace('$', '').replace(',', '').strip())
-                        
-                        if current_section == 'activos':
-                            data['activos'].append(FinancialLineItem(
-                                name=name,
-                                amount=amount,
-                                category='asset',
-                                period=data['period']
-                            ))
-                        elif current_section == 'pasivos':
-                            data['pasivos'].append(FinancialLineItem(
-                                name=name,
-                                amount=amount,
-                                category='liability',
-                                period=data['period']
-                            ))
-                        elif current_section == 'capital contable':
-                            data['capital_contable'].append(FinancialLineItem(
-                                name=name,
-                                amount=amount,
-                                category='equity',
-                                period=data['period']
-                            ))
-                        elif current_section == 'totales':
-                            data['totals'][name] = amount
-                    except (ValueError, decimal.InvalidOperation):
-                        continue
-
-        return data
+        return self._parse_markdown(content, data, {
+            'activos': ('activos', 'asset'),
+            'pasivos': ('pasivos', 'liability'),
+            'capital contable': ('capital_contable', 'equity')
+        })
     
     def _parse_balance_csv(self, content: str) -> Dict:
         """Parsea un Balance General en formato CSV."""
@@ -229,7 +180,7 @@ class DocumentParserAgent(Agent):
                         data['capital_contable'].append(item)
                     elif row['Category'].lower() in ['total', 'totales']:
                         data['totals'][row['Item']] = amount
-                except (ValueError, decimal.InvalidOperation, KeyError):
+                except (ValueError, InvalidOperation, KeyError):
                     continue
             
             return data
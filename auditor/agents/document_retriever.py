@@ -2,7 +2,7 @@ from google.adk.tools import Tool
 from google.adk.agents import Agent
 from typing import Dict, List
 import os
-from github import Github
+from auditor.services.github_clients import default_registry
 from dotenv import load_dotenv
 
 class DocumentRetrieverAgent(Agent):
@@ -19,7 +19,7 @@ class DocumentRetrieverAgent(Agent):
         token = os.getenv('GITHUB_TOKEN')
         if not token:
             raise ValueError("Token de GitHub no encontrado en variables de entorno")
-        self.github_client = Github(token)
+        self.github_client = default_registry().client(token)
     
     @Tool
     async def retrieve_documents(self, repo_url: str, branch: str = "main") -> Dict:
@@ -35,7 +35,7 @@ class DocumentRetrieverAgent(Agent):
         try:
             # Extraer owner y repo de la URL
             owner, repo_name = self._parse_repo_url(repo_url)
-            repo = self.github_client.get_repo(f"{owner}/{repo_name}")
+            repo = default_registry().repository(self.github_client, f"{owner}/{repo_name}")
             
             # Buscar archivos financieros
             pl_files = []
@@ -2,7 +2,8 @@ from google.adk.agents import Agent
 from google.adk.tools.function_tool import FunctionTool
 from typing import Dict, List, Optional
 from datetime import datetime
-from github import Github
+from auditor.services.github_clients import default_registry
+from auditor.services.llm_backend import LlmBackend, default_llm_backend
 import os
 from dotenv import load_dotenv
 from auditor.core.prompts import REPORT_PROMPTS
@@ -10,10 +11,10 @@ from auditor.core.prompts import REPORT_PROMPTS
 class IssueManagerAgent(Agent):
     """Agente especializado en gestionar issues de GitHub usando ADK."""
     
-    def __init__(self):
+    def __init__(self, backend: Optional[LlmBackend] = None):
         super().__init__(
             name="issue_manager",
-            model="gemini-2.0-flash",
+            model=(backend or default_llm_backend()).adk_model(),
             description="Agente para gestionar issues de GitHub con discrepancias financieras",
             tools=[
                 FunctionTool(self.create_issue),
@@ -27,12 +28,12 @@ class IssueManagerAgent(Agent):
         self._github_token = os.getenv('GITHUB_TOKEN')
         if not self._github_token:
             raise ValueError("Token de GitHub no encontrado")
-        self._github = Github(self._github_token)
+        self._github = default_registry().client(self._github_token)
     
     def create_issue(self, discrepancies: List[Dict], repo_owner: str, repo_name: str) -> str:
         """Crea un nuevo issue en GitHub."""
         try:
-            repo = self._github.get_repo(f"{repo_owner}/{repo_name}")
+            repo = default_registry().repository(self._github, f"{repo_owner}/{repo_name}")
             
             title = REPORT_PROMPTS['issue_title'].format(
                 period="Q1 2024",
@@ -55,7 +56,7 @@ class IssueManagerAgent(Agent):
     def update_issue(self, discrepancies: List[Dict], repo_owner: str, repo_name: str) -> str:
         """Actualiza un issue existente en GitHub."""
         try:
-            repo = self._github.get_repo(f"{repo_owner}/{repo_name}")
+            repo = default_registry().repository(self._github, f"{repo_owner}/{repo_name}")
             
             title = REPORT_PROMPTS['issue_title'].format(
                 period="Q1 2024",
@@ -0,0 +1,194 @@
+"""Índice de cuentas por nombre normalizado.
+
+Los nombres de las partidas se normalizan una sola vez (`fold`: sin acentos,
+en minúsculas, sin puntuación y con espacios simples) y se buscan en una
+tabla de sinónimos en español e inglés (`ACCOUNT_SYNONYMS`) que los asocia
+con un concepto canónico (`net_income`, `retained_earnings`, ...). Al
+parsear un documento se arma un índice sección -> concepto -> monto con la
+primera partida de cada concepto, así que las reglas consultan una cuenta
+en O(1) en lugar de recorrer los nombres. A diferencia de buscar una
+subcadena como `'net'`, un nombre sólo corresponde a un concepto si es uno
+de sus sinónimos: "Activos Netos" o "Utilidades Retenidas" no son la
+utilidad neta.
+"""
+
+import re
+import unicodedata
+from bisect import bisect_right
+from decimal import Decimal
+from itertools import accumulate
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+NET_INCOME = 'net_income'
+RETAINED_EARNINGS = 'retained_earnings'
+TOTAL_REVENUE = 'total_revenue'
+TOTAL_EXPENSES = 'total_expenses'
+TOTAL_ASSETS = 'total_assets'
+TOTAL_LIABILITIES = 'total_liabilities'
+TOTAL_EQUITY = 'total_equity'
+
+# Concepto canónico -> nombres con que aparece en los estados financieros
+ACCOUNT_SYNONYMS: Dict[str, Tuple[str, ...]] = {
+    NET_INCOME: (
+        'Utilidad', 'Utilidad Neta', 'Utilidad Neta del Ejercicio', 'Utilidad Neta del Período',
+        'Utilidad del Ejercicio', 'Utilidad del Período', 'Resultado Neto', 'Resultado del Ejercicio',
+        'Resultado del Período', 'Resultado Neto del Ejercicio', 'Ganancia Neta', 'Ganancia del Ejercicio',
+        'Beneficio Neto', 'Pérdida Neta', 'Pérdida del Ejercicio', 'Utilidad (Pérdida) Neta',
+        'Net Income', 'Net Profit', 'Net Earnings', 'Net Loss', 'Net Income (Loss)',
+        'Profit for the Period', 'Profit for the Year'
+    ),
+    RETAINED_EARNINGS: (
+        'Utilidades Retenidas', 'Ganancias Retenidas', 'Resultados Acumulados', 'Utilidades Acumuladas',
+        'Resultados de Ejercicios Anteriores', 'Utilidades de Ejercicios Anteriores',
+        'Retained Earnings', 'Accumulated Earnings', 'Accumulated Deficit'
+    ),
+    TOTAL_REVENUE: (
+        'Ingresos Totales', 'Total Ingresos', 'Total de Ingresos', 'Ventas Totales', 'Total Ventas',
+        'Total Revenue', 'Total Revenues', 'Revenue Total'
+    ),
+    TOTAL_EXPENSES: (
+        'Gastos Totales', 'Total Gastos', 'Total de Gastos', 'Costos y Gastos Totales', 'Total Costos y Gastos',
+        'Total Expenses', 'Total Costs and Expenses'
+    ),
+    TOTAL_ASSETS: (
+        'Total Activos', 'Total de Activos', 'Activos Totales', 'Activo Total', 'Total Activo',
+        'Total Assets'
+    ),
+    TOTAL_LIABILITIES: (
+        'Total Pasivos', 'Total de Pasivos', 'Pasivos Totales', 'Pasivo Total', 'Total Pasivo',
+        'Total Liabilities'
+    ),
+    TOTAL_EQUITY: (
+        'Total Capital Contable', 'Total de Capital Contable', 'Capital Contable Total', 'Total Capital',
+        'Total Patrimonio', 'Patrimonio Total', 'Total Equity', "Total Stockholders' Equity",
+        "Total Shareholders' Equity"
+    )
+}
+
+_WORDS = re.compile(r'[a-z0-9]+')
+
+def fold(name: Any) -> str:
+    """Clave canónica de un nombre: sin acentos, minúsculas y palabras separadas por un espacio."""
+    if not isinstance(name, str):
+        return ''
+    if name.isascii():
+        return ' '.join(_WORDS.findall(name.lower()))
+    text = unicodedata.normalize('NFKD', name)
+    text = ''.join(char for char in text if not unicodedata.combining(char)).casefold()
+    return ' '.join(_WORDS.findall(text))
+
+def _aliases(synonyms: Mapping[str, Iterable[str]]) -> Dict[str, str]:
+    """Nombre normalizado -> concepto; un sinónimo no puede tener dos conceptos."""
+    aliases: Dict[str, str] = {}
+    for concept, names in synonyms.items():
+        for name in names:
+            key = fold(name)
+            if aliases.setdefault(key, concept) != concept:
+                raise ValueError(f"El sinónimo {name!r} corresponde a {aliases[key]} y a {concept}")
+    return aliases
+
+_ALIASES = _aliases(ACCOUNT_SYNONYMS)
+
+# Nombres que pueden ser un sinónimo: su primera palabra es la de alguno o
+# tiene caracteres no ASCII (acentos). Descarta casi todas las partidas sin
+# normalizarlas. Cada nombre va precedido de un salto de línea y en minúsculas.
+_FIRST_WORDS = {alias.split(' ', 1)[0] for alias in _ALIASES}
+_CANDIDATE = re.compile(
+    r'\n[^\w\n]*(?:(?:%s)\b|[a-z0-9_]*[^\x00-\x7f])' % '|'.join(sorted(_FIRST_WORDS, key=len, reverse=True))
+)
+
+# Prefijo de las primeras palabras, como entero big-endian, para filtrar con numpy
+_PREFIX_LENGTH = min(map(len, _FIRST_WORDS))
+_PREFIXES = np.array(sorted({int.from_bytes(word[:_PREFIX_LENGTH].encode('ascii'), 'big') for word in _FIRST_WORDS}), dtype=np.int64)
+
+def account_concept(name: Any) -> Optional[str]:
+    """Concepto canónico de un nombre de cuenta, o None si no es un sinónimo conocido."""
+    if not isinstance(name, str) or _CANDIDATE.match('\n' + name.lower()) is None:
+        return None
+    return _ALIASES.get(fold(name))
+
+def name_concepts(names: Sequence[Any]) -> Dict[int, str]:
+    """Posición -> concepto de los nombres de `names` que son sinónimos.
+
+    Une los nombres en un solo texto y busca los candidatos con un recorrido
+    de `re`, así que el costo por nombre que no es sinónimo es mínimo.
+    """
+    text = '\n' + '\n'.join(names).lower() if all(type(name) is str for name in names) else None
+    starts = list(accumulate((len(name) + 1 for name in names), initial=0)) if text is not None else None
+    if text is None or len(text) != starts[-1]:
+        # Nombres que no son texto o que cambian de largo al pasar a minúsculas
+        return {index: concept for index, concept in enumerate(map(account_concept, names)) if concept is not None}
+    concepts = {}
+    for match in _CANDIDATE.finditer(text):
+        index = bisect_right(starts, match.start()) - 1
+        concept = account_concept(names[index])
+        if concept is not None:
+            concepts[index] = concept
+    return concepts
+
+def ascii_name_concepts(data: bytes, offsets: np.ndarray) -> Dict[int, str]:
+    """Como `name_concepts`, para nombres ASCII guardados en un solo bloque.
+
+    El nombre `i` es `data[offsets[i]:offsets[i + 1]]`. Sólo se decodifican
+    los nombres que empiezan con el prefijo de una primera palabra de algún
+    sinónimo o con un carácter que no es de palabra.
+    """
+    count = len(offsets) - 1
+    if count <= 0:
+        return {}
+    raw = np.frombuffer(data + bytes(_PREFIX_LENGTH), dtype=np.uint8)
+    starts = offsets[:-1]
+    keys = np.zeros(count, dtype=np.int64)
+    for position in range(_PREFIX_LENGTH):
+        byte = raw[starts + position]
+        # Minúsculas ASCII, como `str.lower`
+        byte = byte | ((byte >= 65) & (byte <= 90)) * np.uint8(32)
+        if not position:
+            initial = byte
+        keys = (keys << 8) | byte
+    word = ((initial >= 48) & (initial <= 57)) | ((initial >= 97) & (initial <= 122)) | (initial == 95)
+    candidates = np.flatnonzero((np.isin(keys, _PREFIXES) | ~word) & (offsets[1:] > offsets[:-1]))
+    concepts = {}
+    for index, start, stop in zip(candidates.tolist(), offsets[candidates].tolist(), offsets[candidates + 1].tolist()):
+        concept = account_concept(data[start:stop].decode('ascii'))
+        if concept is not None:
+            concepts[index] = concept
+    return concepts
+
+AccountIndex = Dict[str, Dict[str, Decimal]]
+
+def index_accounts(sections: Iterable[Tuple[str, Iterable[Tuple[Any, Decimal]]]]) -> AccountIndex:
+    """Arma el índice sección -> concepto -> monto de la primera partida de cada concepto.
+
+    Args:
+        sections: Pares `(sección, [(nombre, monto), ...])`; los totales van
+            como la sección `'totals'`.
+    """
+    index: AccountIndex = {}
+    for section, items in sections:
+        concepts: Dict[str, Decimal] = {}
+        for name, amount in items:
+            concept = account_concept(name)
+            if concept is not None and concept not in concepts:
+                concepts[concept] = amount
+        if concepts:
+            index[section] = concepts
+    return index
+
+def account_index(data: Mapping) -> AccountIndex:
+    """Índice de cuentas de un documento parseado.
+
+    Una `LineItemTable` ya lo trae armado desde el parseo; para los
+    diccionarios con listas de partidas se arma al consultarlo.
+    """
+    accounts = getattr(data, 'accounts', None)
+    if accounts is not None:
+        return accounts
+    sections = [('totals', (data.get('totals') or {}).items())]
+    sections.extend(
+        (key, ((item.name, item.amount) for item in value))
+        for key, value in data.items() if isinstance(value, list)
+    )
+    return index_accounts(sections)
@@ -1,9 +1,11 @@
 """Módulo para parsear respuestas de ADK en validaciones financieras."""
 
-from typing import Dict, List
+from typing import Any, Dict, List
 import json
 from decimal import Decimal
 
+from .adk_prompts import COMBINED_RESPONSE_SCHEMA
+
 def parse_validation_response(response: str) -> List[Dict]:
     """Parsea la respuesta de ADK para validación general de documentos."""
     try:
@@ -120,4 +122,52 @@ def parse_balance_response(response: str) -> List[Dict]:
     if current_issue:
         discrepancies.append(current_issue)
     
-    return discrepancies 
\ No newline at end of file
+    return discrepancies
+
+
+# Campos numéricos de los hallazgos del prompt combinado, por clave
+_COMBINED_AMOUNTS = {'ratios': 'value', 'balance': 'difference'}
+
+def parse_combined_response(response: str) -> Dict[str, List[Dict]]:
+    """Parsea la respuesta JSON del prompt combinado en las discrepancias de cada verificación.
+
+    Los hallazgos quedan como los de `parse_validation_response`,
+    `parse_ratio_response` y `parse_balance_response`, con `value` y
+    `difference` como `Decimal`.
+
+    Raises:
+        ValueError: Si la respuesta no es un objeto JSON con listas de hallazgos
+            o le faltan claves o campos obligatorios de `COMBINED_RESPONSE_SCHEMA`.
+    """
+    text = response.strip()
+    if text.startswith('```'):
+        # Bloque de código Markdown (```json ... ```)
+        text = text.split('\n', 1)[-1].rsplit('```', 1)[0]
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"La respuesta combinada no es JSON válido: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("La respuesta combinada no es un objeto JSON")
+
+    results = {}
+    for key in COMBINED_RESPONSE_SCHEMA['required']:
+        if key not in data:
+            raise ValueError(f"La respuesta combinada no tiene la clave {key!r}")
+        items = data[key]
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise ValueError(f"La clave {key!r} de la respuesta combinada no es una lista de hallazgos")
+        for item in items:
+            missing = [name for name in COMBINED_RESPONSE_SCHEMA['properties'][key]['items']['required'] if name not in item]
+            if missing:
+                raise ValueError(f"Un hallazgo de {key!r} de la respuesta combinada no tiene {', '.join(missing)}")
+        field = _COMBINED_AMOUNTS.get(key)
+        results[key] = [dict(item, **{field: _decimal(item[field])}) if field in item else item for item in items]
+    return results
+
+def _decimal(value: Any) -> Any:
+    """El valor como `Decimal` si es un número; sin cambios si no se puede convertir."""
+    try:
+        return Decimal(str(value).replace('$', '').replace(',', '').strip())
+    except ArithmeticError:
+        return value
@@ -9,7 +9,7 @@ Reglas de Validación:
 4. Los ratios deben estar dentro de rangos razonables
 5. El balance debe estar balanceado (A = P + C)
 
-Documentos a validar:
+Documentos a validar (tablas separadas por tabuladores; una fila "(otras N partidas)" resume con su suma las partidas omitidas):
 P&L:
 {pl_data}
 
@@ -46,4 +46,45 @@ Datos actuales:
 - Diferencia: ${difference}
 
 La diferencia debe ser cercana a cero (tolerancia: ${tolerance}).
-Si hay una diferencia significativa, identifica posibles causas y sugerencias de corrección.""" 
\ No newline at end of file
+Si hay una diferencia significativa, identifica posibles causas y sugerencias de corrección."""
+
+
+COMBINED_VALIDATION_PROMPT = """Eres un experto en auditoría financiera. Realiza en una sola respuesta cada una de las verificaciones siguientes.
+
+{sections}
+
+Responde únicamente con un objeto JSON, sin texto adicional, que cumpla este esquema. Cada clave lleva la lista de hallazgos de su verificación; usa una lista vacía si no hay hallazgos o si la verificación no aparece arriba.
+{schema}"""
+
+# Títulos de cada verificación del prompt combinado, por clave de la respuesta
+COMBINED_SECTION_TITLES = {
+    'validation': 'Validación de los documentos',
+    'ratios': 'Análisis de ratios',
+    'balance': 'Ecuación contable'
+}
+
+_FINDING = {'type': 'string'}
+
+# Esquema JSON de la respuesta del prompt combinado
+COMBINED_RESPONSE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'validation': {'type': 'array', 'items': {
+            'type': 'object',
+            'properties': {'type': _FINDING, 'description': _FINDING, 'severity': {'type': 'string', 'enum': ['high', 'medium', 'low']}, 'fix': _FINDING},
+            'required': ['type', 'description', 'severity', 'fix']
+        }},
+        'ratios': {'type': 'array', 'items': {
+            'type': 'object',
+            'properties': {'type': _FINDING, 'value': _FINDING, 'normal_range': _FINDING, 'description': _FINDING, 'fix': _FINDING},
+            'required': ['type', 'value', 'description', 'fix']
+        }},
+        'balance': {'type': 'array', 'items': {
+            'type': 'object',
+            'properties': {'type': _FINDING, 'difference': _FINDING, 'description': _FINDING, 'possible_causes': _FINDING, 'fix': _FINDING},
+            'required': ['type', 'difference', 'description', 'fix']
+        }}
+    },
+    'required': ['validation', 'ratios', 'balance'],
+    'additionalProperties': False
+}
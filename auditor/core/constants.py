@@ -15,16 +15,115 @@ CATEGORY_ASSET = 'asset'
 CATEGORY_LIABILITY = 'liability'
 CATEGORY_EQUITY = 'equity'
 
+# Código entero de cada categoría en las tablas de partidas (índice de la tupla)
+CATEGORY_CODES = (CATEGORY_REVENUE, CATEGORY_EXPENSE, CATEGORY_ASSET, CATEGORY_LIABILITY, CATEGORY_EQUITY)
+
 # Umbrales de validación
 MIN_AMOUNT = Decimal('-999999999.99')
 MAX_AMOUNT = Decimal('999999999.99')
 TOLERANCE = Decimal('0.01')
 
+# Escala de los montos enteros: centavos, ampliable hasta MAX_AMOUNT_SCALE decimales
+AMOUNT_SCALE = 2
+MAX_AMOUNT_SCALE = 8
+
+# Decimales de los ratios calculados en modo de punto fijo
+RATIO_SCALE = 6
+
+# Rangos normales (inclusivos) de los ratios; son los que declara RATIO_ANALYSIS_PROMPT
+RATIO_NORMAL_RANGES = {
+    'revenue_assets_ratio': (Decimal('0.5'), Decimal('2.0')),
+    'expense_revenue_ratio': (Decimal('0.6'), Decimal('0.9')),
+    'liability_assets_ratio': (Decimal('0.4'), Decimal('0.7'))
+}
+
+# Tablas de los estados en los prompts (`core.prompt_tables`): tokens para ambos estados
+PROMPT_DATA_TOKEN_BUDGET = 4000
+PROMPT_CHARS_PER_TOKEN = 3
+
+# Versión del formato de los documentos parseados; cambiarla invalida la caché
+PARSER_VERSION = 2
+
+# Caché de documentos parseados
+PARSED_CACHE_MAX_BYTES = 256 * 1024 * 1024
+PARSED_CACHE_DIR_ENV = 'AUDITOR_CACHE_DIR'
+
+# Backend del modelo: 'gemini' (por defecto) o 'fake', local y determinista para pruebas de carga
+LLM_MODEL = 'gemini-2.0-flash'
+LLM_BACKEND_ENV = 'AUDITOR_LLM_BACKEND'
+FAKE_LLM_LATENCY = 0.2
+FAKE_LLM_LATENCY_ENV = 'AUDITOR_FAKE_LLM_LATENCY'
+FAKE_LLM_JITTER = 0.05
+FAKE_LLM_JITTER_ENV = 'AUDITOR_FAKE_LLM_JITTER'
+
+# Caché de respuestas del modelo; en disco vive en el subdirectorio `llm` de AUDITOR_CACHE_DIR
+LLM_CACHE_TTL = 24 * 3600
+LLM_CACHE_MAX_BYTES = 16 * 1024 * 1024
+LLM_CACHE_DISK_MAX_BYTES = 256 * 1024 * 1024
+
 # Configuración de GitHub
 GITHUB_LABELS = ['auditoría', 'finanzas', 'automático']
 GITHUB_DEFAULT_BRANCH = 'main'
+GITHUB_TREE_CACHE_SIZE = 128
+GITHUB_BLOB_CACHE_MAX_BYTES = 64 * 1024 * 1024
+GITHUB_CONDITIONAL_CACHE_MAX_BYTES = 32 * 1024 * 1024
+GITHUB_API_URL = 'https://api.github.com'
+GITHUB_POOL_SIZE = 10
+GITHUB_REPO_CACHE_TTL = 300
 
 # Patrones de búsqueda de archivos
 PL_FILE_PATTERNS = ['pl', 'income', 'profit']
 BALANCE_FILE_PATTERNS = ['balance', 'bs']
-FILE_EXTENSIONS = ['.md', '.csv'] 
\ No newline at end of file
+FILE_EXTENSIONS = ['.md', '.csv']
+
+# Cola de auditorías en segundo plano
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+AUDIT_WORKERS = 2
+AUDIT_WORKERS_ENV = 'AUDIT_WORKERS'
+AUDIT_JOB_HISTORY = 1000
+AUDIT_WAIT_SAMPLES = 1024
+
+# Ejecución de auditorías fuera del event loop
+AUDIT_EXECUTOR_WORKERS = 8
+AUDIT_EXECUTOR_WORKERS_ENV = 'AUDIT_EXECUTOR_WORKERS'
+AUDIT_STAGE_LIMITS = {'retrieve': 4, 'compare': 2, 'issue': 2}
+AUDIT_STAGE_LIMITS_ENV = 'AUDIT_STAGE_LIMITS'
+
+# Agrupación de pushes consecutivos a la misma rama
+AUDIT_DEBOUNCE_SECONDS = 30.0
+AUDIT_DEBOUNCE_SECONDS_ENV = 'AUDIT_DEBOUNCE_SECONDS'
+AUDIT_DEBOUNCE_MAX_SECONDS = 300.0
+
+# Filtro de pushes: GitHub incluye a lo sumo 20 commits en el payload
+GITHUB_PUSH_COMMITS_LIMIT = 20
+DOCUMENT_STORE_MAX_REPOS = 64
+
+# Caché de resultados de auditoría; subir RULESET_VERSION al cambiar las reglas de comparación
+# o de descubrimiento de documentos
+RULESET_VERSION = 2
+AUDIT_RESULT_CACHE_TTL = 3600
+AUDIT_RESULT_CACHE_SIZE = 512
+
+# Historial de auditorías en SQLite; sin `AUDIT_HISTORY_DB` vive sólo en memoria
+# y conserva las últimas `AUDIT_HISTORY_MEMORY_MAX_AUDITS` auditorías
+AUDIT_HISTORY_DB_ENV = 'AUDIT_HISTORY_DB'
+AUDIT_HISTORY_MEMORY_MAX_AUDITS = 10_000
+AUDIT_HISTORY_PAGE_SIZE = 50
+AUDIT_HISTORY_MAX_PAGE_SIZE = 500
+
+# Buckets (segundos) de los histogramas de duración de `/metrics`
+METRICS_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Trazas: archivo JSON-lines donde se exportan los spans (sin definir, no se exportan)
+TRACE_FILE_ENV = 'AUDIT_TRACE_FILE'
+
+# Perfiles bajo demanda de /audit y /webhook/github
+AUDIT_PROFILE_HEADER = 'X-Audit-Profile'
+AUDIT_PROFILE_TOKEN_ENV = 'AUDIT_PROFILE_TOKEN'
+AUDIT_PROFILE_SAMPLE_RATE_ENV = 'AUDIT_PROFILE_SAMPLE_RATE'
+AUDIT_PROFILE_DIR_ENV = 'AUDIT_PROFILE_DIR'
+AUDIT_PROFILE_MAX_FILES = 50
@@ -14,6 +14,10 @@ class ValidationError(FinancialAuditError):
     """Error de validación en los datos financieros."""
     pass
 
+class AmountOverflowError(ValidationError):
+    """Monto o resultado aritmético fuera del rango permitido."""
+    pass
+
 class ConfigurationError(FinancialAuditError):
     """Error en la configuración del sistema."""
-    pass 
\ No newline at end of file
+    pass
\ No newline at end of file
@@ -0,0 +1,227 @@
+"""Aritmética de montos en punto fijo: enteros escalados a centavos.
+
+Alternativa opcional a `Decimal` para parseo y comparación. Los montos se leen
+directamente como enteros (`int` o arreglos int64) con `AMOUNT_SCALE`
+decimales, los decimales adicionales se redondean con las reglas de `decimal`
+(por defecto `ROUND_HALF_EVEN`, igual que `Decimal.quantize`) y todo resultado
+fuera de `MIN_AMOUNT`/`MAX_AMOUNT` lanza `AmountOverflowError`. Los valores se
+convierten a `Decimal` sólo al reportarlos.
+"""
+
+from decimal import (
+    Decimal, InvalidOperation,
+    ROUND_HALF_EVEN, ROUND_HALF_UP, ROUND_HALF_DOWN,
+    ROUND_UP, ROUND_DOWN, ROUND_CEILING, ROUND_FLOOR
+)
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from .constants import AMOUNT_SCALE, MIN_AMOUNT, MAX_AMOUNT, TOLERANCE, RATIO_SCALE
+from .exceptions import AmountOverflowError
+
+CENTS = 10 ** AMOUNT_SCALE
+DEFAULT_ROUNDING = ROUND_HALF_EVEN
+
+# Dígitos máximos de un monto convertido, como la precisión por defecto de `decimal`
+_MAX_DIGITS = 28
+
+_ROUNDINGS = (ROUND_HALF_EVEN, ROUND_HALF_UP, ROUND_HALF_DOWN, ROUND_UP, ROUND_DOWN, ROUND_CEILING, ROUND_FLOOR)
+
+def divide(numerator: int, denominator: int, rounding: str = DEFAULT_ROUNDING) -> int:
+    """Cociente entero de `numerator / denominator` redondeado exactamente.
+
+    Raises:
+        ZeroDivisionError: Si `denominator` es cero.
+        ValueError: Si `rounding` no es un modo de redondeo de `decimal`.
+    """
+    if rounding not in _ROUNDINGS:
+        raise ValueError(f"Modo de redondeo no soportado: {rounding}")
+    negative = (numerator < 0) != (denominator < 0)
+    quotient, remainder = divmod(abs(numerator), abs(denominator))
+    if remainder:
+        twice = 2 * remainder
+        divisor = abs(denominator)
+        if rounding == ROUND_HALF_EVEN:
+            up = twice > divisor or (twice == divisor and quotient % 2 == 1)
+        elif rounding == ROUND_HALF_UP:
+            up = twice >= divisor
+        elif rounding == ROUND_HALF_DOWN:
+            up = twice > divisor
+        elif rounding == ROUND_UP:
+            up = True
+        elif rounding == ROUND_DOWN:
+            up = False
+        elif rounding == ROUND_CEILING:
+            up = not negative
+        else:
+            up = negative
+        quotient += up
+    return -quotient if negative else quotient
+
+def check_cents(cents: int) -> int:
+    """Devuelve `cents` si está dentro de `MIN_AMOUNT`/`MAX_AMOUNT`.
+
+    Raises:
+        AmountOverflowError: Si el monto queda fuera del rango permitido.
+    """
+    if not MIN_CENTS <= cents <= MAX_CENTS:
+        raise AmountOverflowError(f"Monto fuera de rango: {from_cents(cents)}")
+    return cents
+
+def to_cents(amount: Decimal, rounding: str = DEFAULT_ROUNDING) -> int:
+    """Convierte un `Decimal` finito en centavos enteros.
+
+    Raises:
+        decimal.InvalidOperation: Si el monto no es finito o, como en
+            `Decimal.quantize`, excede 28 dígitos.
+    """
+    if not amount.is_finite() or amount.adjusted() + AMOUNT_SCALE >= _MAX_DIGITS:
+        raise InvalidOperation(f"Monto no representable en centavos: {amount}")
+    # Con a lo sumo `AMOUNT_SCALE` decimales la conversión es exacta y no redondea
+    scaled = amount.scaleb(AMOUNT_SCALE)
+    units = int(scaled)
+    if units == scaled:
+        return units
+    sign, digits, exponent = amount.as_tuple()
+    units = int(''.join(map(str, digits)))
+    if sign:
+        units = -units
+    shift = exponent + AMOUNT_SCALE
+    if shift >= 0:
+        return units * 10 ** shift
+    if -shift > len(digits) + 1:
+        # Menor que media unidad: sólo importan el signo y que no sea cero
+        return divide(1 if units > 0 else -1 if units else 0, 10, rounding)
+    return divide(units, 10 ** -shift, rounding)
+
+def from_cents(cents: int) -> Decimal:
+    """Convierte centavos en `Decimal` con `AMOUNT_SCALE` decimales (para reportes)."""
+    return Decimal(int(cents)).scaleb(-AMOUNT_SCALE)
+
+def parse_cents(value: str, rounding: str = DEFAULT_ROUNDING) -> int:
+    """Convierte el texto de una celda (`$1,200.50`) en centavos sin pasar por `Decimal`.
+
+    Acepta lo mismo que `statement_tokenizer.parse_amount`; las notaciones poco
+    comunes (exponentes, `_`) se resuelven con `Decimal` como respaldo.
+
+    Raises:
+        decimal.InvalidOperation: Si el texto no es un monto válido y finito.
+    """
+    text = value.replace('$', '').replace(',', '').strip()
+    whole, _, fraction = text.partition('.')
+    if (fraction.isdecimal() or not fraction) and '_' not in whole and (fraction or whole.lstrip('+-')):
+        try:
+            units = int(whole + fraction.ljust(AMOUNT_SCALE, '0'))
+        except ValueError:
+            pass
+        else:
+            if len(fraction) > AMOUNT_SCALE:
+                return divide(units, 10 ** (len(fraction) - AMOUNT_SCALE), rounding)
+            return units
+    return to_cents(Decimal(text), rounding)
+
+def parse_cents_column(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Convierte una columna de celdas (`$1,200.50`) en centavos con operaciones de numpy.
+
+    Sólo reconoce la forma canónica `-1234.5` (sin contar `$` ni `,`): dígitos
+    con signo opcional y a lo sumo `AMOUNT_SCALE` decimales, dentro de
+    `MIN_AMOUNT`/`MAX_AMOUNT`. Para esas celdas el resultado es exactamente el
+    de `Decimal`, incluido el exponente; las demás quedan marcadas para que se
+    conviertan una por una.
+
+    Returns:
+        Centavos (int64), exponente decimal de cada celda (int8) y la máscara
+        de las celdas convertidas.
+    """
+    count = len(values)
+    cents = np.zeros(count, dtype=np.int64)
+    exponents = np.zeros(count, dtype=np.int8)
+    if not count:
+        return cents, exponents, np.zeros(0, dtype=bool)
+    text = '\n'.join(values).replace('$', '').replace(',', '')
+    if not text.isascii() or text.count('\n') != count - 1:
+        return cents, exponents, np.zeros(count, dtype=bool)
+
+    # Saltos de línea al inicio para que la ventana de cada celda nunca empiece antes del texto
+    data = np.frombuffer(b'\n' * _CELL_WIDTH + text.encode('ascii') + b'\n', dtype=np.uint8)
+    breaks = np.flatnonzero(data == 10)
+    ends = breaks[_CELL_WIDTH:]
+    starts = breaks[_CELL_WIDTH - 1:-1] + 1
+    lengths = ends - starts
+    # Columna k: k-ésimo carácter contando desde el final de la celda
+    cells = data[ends[:, None] - 1 - np.arange(_CELL_WIDTH)]
+    inside = np.arange(_CELL_WIDTH) < lengths[:, None]
+    digits = cells - np.uint8(48)
+    is_digit = (digits < 10) & inside
+    is_dot = (cells == 46) & inside
+    # Conteos por celda como producto con un vector de unos: más rápido que `sum` sobre booleanos
+    ones = np.ones(_CELL_WIDTH, dtype=np.uint8)
+    digit_count = is_digit.view(np.uint8) @ ones
+    dot_count = is_dot.view(np.uint8) @ ones
+    negative = data[starts] == 45
+    fraction = np.where(dot_count == 1, is_dot.argmax(axis=1), 0)
+    whole = digit_count - fraction
+    parsed = (
+        (lengths <= _CELL_WIDTH) & (digit_count + dot_count + negative == lengths)
+        & (dot_count <= 1) & ((dot_count == 0) | (fraction >= 1)) & (fraction <= AMOUNT_SCALE)
+        & (whole >= 1) & (whole <= _WHOLE_DIGITS)
+    )
+
+    fraction = np.where(parsed, fraction, 0)
+    by_fraction = np.where(is_digit, digits, 0).astype(np.int64) @ _DIGIT_WEIGHTS.T
+    number = np.take_along_axis(by_fraction, fraction[:, None], axis=1)[:, 0]
+    cents = np.where(negative, -number, number)
+    parsed &= (cents >= MIN_CENTS) & (cents <= MAX_CENTS)
+    cents[~parsed] = 0
+    exponents = np.where(parsed, -fraction, 0).astype(np.int8)
+    return cents, exponents, parsed
+
+def add_cents(*values: int) -> int:
+    """Suma montos en centavos verificando el rango del resultado."""
+    return check_cents(sum(values))
+
+def sum_cents(values: np.ndarray) -> int:
+    """Suma exacta de un arreglo int64 de centavos, verificando el rango del resultado.
+
+    Con montos acotados por `MAX_AMOUNT` la suma en int64 no desborda hasta
+    ~9e7 filas; arreglos más grandes se suman por bloques en enteros de Python.
+    """
+    block = _SAFE_SUM_ROWS
+    if len(values) <= block:
+        total = int(values.sum(dtype=np.int64))
+    else:
+        total = sum(int(values[start:start + block].sum(dtype=np.int64)) for start in range(0, len(values), block))
+    return check_cents(total)
+
+def ratio(numerator: int, denominator: int, places: int = RATIO_SCALE, rounding: str = DEFAULT_ROUNDING) -> Decimal:
+    """Cociente de dos montos en centavos con `places` decimales; cero si el denominador es cero."""
+    if not denominator:
+        return Decimal('0')
+    return Decimal(divide(numerator * 10 ** places, denominator, rounding)).scaleb(-places)
+
+MIN_CENTS = to_cents(MIN_AMOUNT)
+MAX_CENTS = to_cents(MAX_AMOUNT)
+TOLERANCE_CENTS = to_cents(TOLERANCE)
+
+# Dígitos enteros de la forma canónica que `parse_cents_column` convierte y
+# largo máximo de su celda (signo, enteros, punto y decimales)
+_WHOLE_DIGITS = len(str(max(MAX_CENTS, -MIN_CENTS))) - AMOUNT_SCALE
+_CELL_WIDTH = _WHOLE_DIGITS + AMOUNT_SCALE + 2
+
+def _digit_weights() -> np.ndarray:
+    """Valor en centavos de un dígito según sus decimales (fila) y su distancia al final de la celda (columna)."""
+    weights = np.zeros((AMOUNT_SCALE + 1, _CELL_WIDTH), dtype=np.int64)
+    for fraction in range(AMOUNT_SCALE + 1):
+        for position in range(_CELL_WIDTH):
+            if fraction and position == fraction:
+                continue  # el punto decimal
+            following = position - (fraction and position > fraction)
+            if following < fraction + _WHOLE_DIGITS:
+                weights[fraction, position] = 10 ** (following + AMOUNT_SCALE - fraction)
+    return weights
+
+_DIGIT_WEIGHTS = _digit_weights()
+
+# Filas que pueden sumarse en int64 sin desbordar
+_SAFE_SUM_ROWS = (2 ** 63 - 1) // max(MAX_CENTS, -MIN_CENTS)
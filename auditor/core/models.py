@@ -1,6 +1,17 @@
+import sys
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass
 from decimal import Decimal
-from typing import Dict, List, Optional
+from array import array
+from itertools import repeat
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .account_names import AccountIndex, index_accounts, name_concepts, ascii_name_concepts
+from .constants import CATEGORY_CODES, AMOUNT_SCALE, MAX_AMOUNT_SCALE, MIN_AMOUNT, MAX_AMOUNT
+from .exceptions import AmountOverflowError
+from .fixed_point import sum_cents, from_cents
 
 @dataclass
 class FinancialLineItem:
@@ -10,6 +21,479 @@ class FinancialLineItem:
     category: str
     period: str
 
+class NamePool(Sequence):
+    """Catálogo de nombres únicos de una tabla, en un solo bloque UTF-8 con offsets.
+
+    Si algún nombre no es texto (p. ej. celdas vacías de un CSV), se conserva
+    la lista original para no alterar los valores.
+    """
+
+    __slots__ = ('_data', '_offsets', '_items')
+
+    def __init__(self, names: List[Any]):
+        self._items: Optional[List[Any]] = None
+        if all(type(name) is str for name in names):
+            lengths = (len(name) if name.isascii() else len(name.encode('utf-8')) for name in names)
+            self._data = ''.join(names).encode('utf-8')
+            self._offsets = np.zeros(len(names) + 1, dtype=np.int64)
+            np.cumsum(np.fromiter(lengths, dtype=np.int64, count=len(names)), out=self._offsets[1:])
+        else:
+            self._data = b''
+            self._offsets = np.zeros(1, dtype=np.int64)
+            self._items = list(names)
+
+    @classmethod
+    def from_utf8(cls, data: bytes, offsets: np.ndarray) -> 'NamePool':
+        """Catálogo armado directamente con el bloque UTF-8 y sus `len(nombres) + 1` offsets."""
+        pool = cls.__new__(cls)
+        pool._items = None
+        pool._data = data
+        pool._offsets = offsets
+        return pool
+
+    def __len__(self) -> int:
+        return len(self._items) if self._items is not None else len(self._offsets) - 1
+
+    def __getitem__(self, code: int) -> Any:
+        if self._items is not None:
+            return self._items[code]
+        if not 0 <= code < len(self._offsets) - 1:
+            raise IndexError("Código de nombre fuera de rango")
+        return self._data[self._offsets[code]:self._offsets[code + 1]].decode('utf-8')
+
+    def tolist(self) -> List[Any]:
+        """Todos los nombres, decodificando el bloque de una vez si es ASCII."""
+        if self._items is not None:
+            return list(self._items)
+        offsets = self._offsets.tolist()
+        if self._data.isascii():
+            text = self._data.decode('ascii')
+            return [text[start:stop] for start, stop in zip(offsets, offsets[1:])]
+        data = self._data
+        return [data[start:stop].decode('utf-8') for start, stop in zip(offsets, offsets[1:])]
+
+    def concepts(self) -> Dict[int, str]:
+        """Código -> concepto de los nombres que son sinónimos (`core.account_names`).
+
+        Con un bloque ASCII los candidatos se buscan con numpy sin decodificar
+        los nombres.
+        """
+        if self._items is not None:
+            return name_concepts(self._items)
+        if self._data.isascii():
+            return ascii_name_concepts(self._data, self._offsets)
+        return name_concepts(self.tolist())
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria aproximada del catálogo, en bytes."""
+        if self._items is not None:
+            return sys.getsizeof(self._items) + sum(map(sys.getsizeof, self._items))
+        return sys.getsizeof(self._data) + self._offsets.nbytes
+
+class LineItemTable(Mapping):
+    """Partidas de un documento parseado guardadas en arreglos columnares.
+
+    En lugar de un `FinancialLineItem` con su `Decimal` y su período por fila,
+    la tabla guarda un período único, un catálogo de nombres sin repetir
+    (`NamePool`) y, por fila, el código del nombre (int32), el código de categoría (int8, índice en
+    `CATEGORY_CODES`), el monto entero escalado por `10 ** scale` (int64) y el
+    exponente decimal original (int8), que permite reconstruir el `Decimal`
+    exacto. Las filas de cada sección son contiguas.
+
+    Para compatibilidad se comporta como el diccionario que devolvían los
+    parsers: `'period'`, una clave por sección y `'totals'`. Cada sección es
+    una `LineItemView` que crea los `FinancialLineItem` sólo al accederlos.
+    `accounts` es el índice de cuentas por concepto (`core.account_names`).
+    """
+
+    __slots__ = ('period', 'names', 'name_codes', 'categories', 'amounts', 'exponents', 'sections', 'totals', 'scale', 'accounts')
+
+    def __init__(
+        self,
+        period: Optional[str],
+        names: NamePool,
+        name_codes: np.ndarray,
+        categories: np.ndarray,
+        amounts: np.ndarray,
+        exponents: np.ndarray,
+        sections: Dict[str, Tuple[int, int]],
+        totals: Dict[str, Decimal],
+        scale: int = AMOUNT_SCALE,
+        accounts: Optional[AccountIndex] = None
+    ):
+        self.period = period
+        self.names = names
+        self.name_codes = name_codes
+        self.categories = categories
+        self.amounts = amounts
+        self.exponents = exponents
+        self.sections = sections
+        self.totals = totals
+        self.scale = scale
+        self.accounts = accounts if accounts is not None else self._index_accounts()
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'period':
+            return self.period
+        if key == 'totals':
+            return self.totals
+        start, stop = self.sections[key]
+        return LineItemView(self, start, stop)
+
+    def __iter__(self) -> Iterator[str]:
+        yield 'period'
+        yield from self.sections
+        yield 'totals'
+
+    def __len__(self) -> int:
+        return len(self.sections) + 2
+
+    def __repr__(self) -> str:
+        sizes = ', '.join(f"{key}={stop - start}" for key, (start, stop) in self.sections.items())
+        return f"LineItemTable(period={self.period!r}, {sizes}, totals={len(self.totals)})"
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria aproximada de la tabla, en bytes."""
+        arrays = self.name_codes.nbytes + self.categories.nbytes + self.amounts.nbytes + self.exponents.nbytes
+        names = self.names.nbytes
+        totals = sys.getsizeof(self.totals) + sum(sys.getsizeof(key) + sys.getsizeof(value) for key, value in self.totals.items())
+        return arrays + names + totals
+
+    def _index_accounts(self) -> AccountIndex:
+        """Índice de cuentas de los totales y de la primera fila de cada concepto por sección.
+
+        Cada nombre del catálogo se normaliza una sola vez; las filas se
+        recorren con numpy sólo si algún nombre es un sinónimo conocido.
+        """
+        sections = [('totals', self.totals.items())]
+        names = self.names
+        concepts = names.concepts()
+        if concepts:
+            wanted = np.fromiter(concepts, dtype=np.int32, count=len(concepts))
+            for key, (start, stop) in self.sections.items():
+                rows = start + np.flatnonzero(np.isin(self.name_codes[start:stop], wanted))
+                sections.append((key, ((names[int(self.name_codes[row])], self.amount(int(row))) for row in _first_rows(self.name_codes, rows))))
+        return index_accounts(sections)
+
+    def amount(self, index: int) -> Decimal:
+        """Monto de la fila `index` como el `Decimal` leído del documento."""
+        exponent = int(self.exponents[index])
+        units = int(self.amounts[index]) // 10 ** (self.scale + exponent)
+        return Decimal(units).scaleb(exponent)
+
+    def item(self, index: int) -> FinancialLineItem:
+        """Construye el `FinancialLineItem` de la fila `index`."""
+        return FinancialLineItem(
+            name=self.names[int(self.name_codes[index])],
+            amount=self.amount(index),
+            category=CATEGORY_CODES[self.categories[index]],
+            period=self.period
+        )
+
+    def copy(self) -> 'LineItemTable':
+        """Copia superficial con diccionarios propios y vistas de sólo lectura de los arreglos.
+
+        Modificar la copia no altera la tabla original (p. ej. la guardada en
+        la caché de documentos parseados); escribir en sus arreglos lanza
+        `ValueError`.
+        """
+        return LineItemTable(
+            period=self.period,
+            names=self.names,
+            name_codes=_read_only(self.name_codes),
+            categories=_read_only(self.categories),
+            amounts=_read_only(self.amounts),
+            exponents=_read_only(self.exponents),
+            sections=dict(self.sections),
+            totals=dict(self.totals),
+            scale=self.scale,
+            accounts={concept: dict(accounts) for concept, accounts in self.accounts.items()}
+        )
+
+    def to_dict(self) -> Dict:
+        """Devuelve el diccionario con listas de `FinancialLineItem` del formato anterior."""
+        data = {'period': self.period}
+        for key in self.sections:
+            data[key] = list(self[key])
+        data['totals'] = dict(self.totals)
+        return data
+
+class LineItemView(Sequence):
+    """Filas contiguas de una `LineItemTable`; no copia los arreglos."""
+
+    __slots__ = ('table', 'start', 'stop')
+
+    def __init__(self, table: LineItemTable, start: int, stop: int):
+        self.table = table
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return LineItemView(self.table, self.start + start, self.start + max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Índice de partida fuera de rango")
+        return self.table.item(self.start + index)
+
+    def __iter__(self) -> Iterator[FinancialLineItem]:
+        item = self.table.item
+        for index in range(self.start, self.stop):
+            yield item(index)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (LineItemView, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"LineItemView({list(self)!r})"
+
+    def total(self) -> Decimal:
+        """Suma exacta de los montos de la vista.
+
+        Raises:
+            AmountOverflowError: Si la suma excede `MIN_AMOUNT`/`MAX_AMOUNT`.
+        """
+        scale = self.table.scale
+        if scale == AMOUNT_SCALE:
+            return from_cents(sum_cents(self.amounts))
+        total = Decimal(sum(self.amounts.tolist())).scaleb(-scale)
+        if not MIN_AMOUNT <= total <= MAX_AMOUNT:
+            raise AmountOverflowError(f"Monto fuera de rango: {total}")
+        return total
+
+    @property
+    def names(self) -> List[str]:
+        """Nombres de las partidas de la vista."""
+        names = self.table.names
+        return [names[code] for code in self.name_codes.tolist()]
+
+    @property
+    def name_codes(self) -> np.ndarray:
+        """Códigos de nombre de las partidas (vista del arreglo de la tabla)."""
+        return self.table.name_codes[self.start:self.stop]
+
+    @property
+    def categories(self) -> np.ndarray:
+        """Códigos de categoría de las partidas (vista del arreglo de la tabla)."""
+        return self.table.categories[self.start:self.stop]
+
+    @property
+    def amounts(self) -> np.ndarray:
+        """Montos enteros escalados por `10 ** table.scale` (vista del arreglo de la tabla)."""
+        return self.table.amounts[self.start:self.stop]
+
+class LineItemTableBuilder:
+    """Acumula las partidas de un documento por sección y arma su `LineItemTable`.
+
+    Los nombres se guardan por lote en un bloque UTF-8 con el hash de cada uno
+    y se codifican en `build` con numpy; los lotes con nombres que no son
+    texto se codifican con un diccionario.
+
+    Args:
+        sections: Clave de cada sección en los datos parseados -> categoría de
+            sus partidas, en el orden en que se expondrán.
+    """
+
+    def __init__(self, sections: Dict[str, str]):
+        self._categories = {key: CATEGORY_CODES.index(category) for key, category in sections.items()}
+        # Por sección: tramos de nombres (en orden de llegada), montos escalados y exponentes
+        self._rows: Dict[str, Tuple[List[Tuple[int, int]], array, array]] = {key: ([], array('q'), array('b')) for key in sections}
+        # Por lote de nombres: el bloque UTF-8 separado por saltos de línea y los hashes, o la lista original
+        self._chunks: List[Any] = []
+        self._hashes: List[np.ndarray] = []
+        self._count = 0
+        self._scale = AMOUNT_SCALE
+
+    def extend(self, key: str, names: Iterable[str], amounts: Iterable[Decimal]) -> None:
+        """Agrega a la sección `key` partidas con montos ya validados.
+
+        La escala crece si un monto tiene más decimales que la actual, hasta
+        `MAX_AMOUNT_SCALE`; los decimales adicionales se redondean.
+        """
+        spans, units, exponents = self._rows[key]
+        names = list(names)
+        added = 0
+        for _, amount in zip(names, amounts):
+            exponent = amount.as_tuple().exponent
+            if exponent < -self._scale:
+                if exponent < -MAX_AMOUNT_SCALE:
+                    exponent = -MAX_AMOUNT_SCALE
+                    amount = amount.quantize(Decimal(1).scaleb(exponent))
+                self._rescale(-exponent)
+            units.append(int(amount.scaleb(self._scale)))
+            exponents.append(exponent)
+            added += 1
+        spans.append(self._add_names(names[:added]))
+
+    def extend_cents(self, key: str, names: Iterable[str], cents: Iterable[int]) -> None:
+        """Agrega a la sección `key` partidas con montos en centavos (modo de punto fijo)."""
+        spans, units, exponents = self._rows[key]
+        names = list(names)
+        factor = 10 ** (self._scale - AMOUNT_SCALE)
+        units.extend(cents if factor == 1 else (value * factor for value in cents))
+        exponents.extend(repeat(-AMOUNT_SCALE, len(names)))
+        spans.append(self._add_names(names))
+
+    def extend_units(self, key: str, names: List[str], cents: np.ndarray, exponents: Optional[np.ndarray] = None) -> None:
+        """Agrega a la sección `key` partidas con montos validados en arreglos de numpy.
+
+        Args:
+            key: Clave de la sección.
+            names: Nombre de cada partida.
+            cents: Montos en centavos (int64).
+            exponents: Exponente decimal original de cada monto (int8), o None
+                para `-AMOUNT_SCALE` como en `extend_cents`.
+        """
+        spans, units, row_exponents = self._rows[key]
+        if exponents is None:
+            exponents = np.full(len(names), -AMOUNT_SCALE, dtype=np.int8)
+        units.frombytes((cents * 10 ** (self._scale - AMOUNT_SCALE)).astype(np.int64).tobytes())
+        row_exponents.frombytes(exponents.astype(np.int8).tobytes())
+        spans.append(self._add_names(names))
+
+    def _add_names(self, names: List[Any]) -> Tuple[int, int]:
+        """Guarda un lote de nombres y devuelve su tramo en el orden de llegada."""
+        start = self._count
+        if not names:
+            return start, start
+        try:
+            text = '\n'.join(names)
+        except TypeError:
+            text = None
+        if text is None or text.count('\n') != len(names) - 1:
+            self._chunks.append(list(names))
+        else:
+            self._chunks.append((text + '\n').encode('utf-8'))
+            self._hashes.append(np.fromiter(map(hash, names), dtype=np.int64, count=len(names)))
+        self._count += len(names)
+        return start, self._count
+
+    def _rescale(self, scale: int) -> None:
+        """Amplía la escala de los montos ya acumulados."""
+        factor = 10 ** (scale - self._scale)
+        for _, units, _ in self._rows.values():
+            units[:] = array('q', [value * factor for value in units])
+        self._scale = scale
+
+    def _name_codes(self) -> Tuple[NamePool, np.ndarray]:
+        """Catálogo de nombres y código de cada nombre en el orden de llegada.
+
+        Los códigos siguen el orden de la primera aparición. Los nombres con
+        el mismo hash se confirman comparando sus bytes; si difieren, o si
+        algún lote no es texto, se codifica con un diccionario.
+        """
+        if len(self._hashes) == len(self._chunks):
+            data = b''.join(self._chunks)
+            hashes = np.concatenate(self._hashes) if self._hashes else np.zeros(0, dtype=np.int64)
+            coded = _code_utf8(data, hashes)
+            if coded is not None:
+                return coded
+
+        names: List[Any] = []
+        for chunk in self._chunks:
+            names.extend(chunk if type(chunk) is list else chunk.decode('utf-8').split('\n')[:-1])
+        catalog: Dict[Any, int] = {}
+        codes = np.fromiter((catalog.setdefault(name, len(catalog)) for name in names), dtype=np.int32, count=len(names))
+        return NamePool(list(catalog)), codes
+
+    def build(self, period: Optional[str], totals: Dict[str, Decimal]) -> LineItemTable:
+        """Compacta las partidas acumuladas en una `LineItemTable`."""
+        pool, codes = self._name_codes()
+        sections = {}
+        lengths = []
+        start = 0
+        for key, (_, units, _) in self._rows.items():
+            sections[key] = (start, start + len(units))
+            lengths.append(len(units))
+            start += len(units)
+
+        rows = self._rows.values()
+        return LineItemTable(
+            period=period,
+            names=pool,
+            name_codes=np.concatenate([codes[first:last] for spans, _, _ in rows for first, last in spans] or [np.zeros(0, dtype=np.int32)]),
+            categories=np.repeat(np.array([self._categories[key] for key in sections], dtype=np.int8), lengths),
+            amounts=_concatenate([units for _, units, _ in rows], np.int64),
+            exponents=_concatenate([exponents for _, _, exponents in rows], np.int8),
+            sections=sections,
+            totals=totals,
+            scale=self._scale
+        )
+
+def _code_utf8(data: bytes, hashes: np.ndarray) -> Optional[Tuple[NamePool, np.ndarray]]:
+    """Codifica los nombres de `data` (cada uno seguido de un salto de línea) por su hash.
+
+    Devuelve None si dos nombres distintos tienen el mismo hash.
+    """
+    count = len(hashes)
+    raw = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero(raw == 10)
+    starts = np.zeros(count, dtype=np.int64)
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts
+
+    ordered = np.sort(hashes)
+    if not (ordered[1:] == ordered[:-1]).any():
+        # Todos los nombres son distintos: el catálogo es el bloque sin los saltos de línea
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return NamePool.from_utf8(data.replace(b'\n', b''), offsets), np.arange(count, dtype=np.int32)
+
+    order = np.argsort(hashes, kind='stable')
+    repeated = hashes[order[1:]] == hashes[order[:-1]]
+    # Primera aparición de cada hash: el orden estable deja primero el índice menor
+    group_start = np.ones(count, dtype=bool)
+    group_start[1:] = ~repeated
+    leaders = order[np.maximum.accumulate(np.where(group_start, np.arange(count), 0))]
+    representative = np.empty(count, dtype=np.int64)
+    representative[order] = leaders
+    duplicates = np.flatnonzero(representative != np.arange(count))
+    sources = representative[duplicates]
+    if not np.array_equal(lengths[duplicates], lengths[sources]):
+        return None
+    sizes = lengths[duplicates]
+    within = np.arange(int(sizes.sum())) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    if not np.array_equal(raw[np.repeat(starts[duplicates], sizes) + within], raw[np.repeat(starts[sources], sizes) + within]):
+        return None
+    first = representative == np.arange(count)
+    codes = (np.cumsum(first) - 1)[representative].astype(np.int32)
+
+    offsets = np.zeros(int(first.sum()) + 1, dtype=np.int64)
+    np.cumsum(lengths[first], out=offsets[1:])
+    keep = np.repeat(first, lengths + 1)
+    keep[ends] = False
+    return NamePool.from_utf8(raw[keep].tobytes(), offsets), codes
+
+def _read_only(values: np.ndarray) -> np.ndarray:
+    """Vista de `values` que no admite escritura."""
+    view = values.view()
+    view.flags.writeable = False
+    return view
+
+def _first_rows(name_codes: np.ndarray, rows: np.ndarray) -> List[int]:
+    """Primera fila de cada código de nombre entre `rows`."""
+    _, first = np.unique(name_codes[rows], return_index=True)
+    return sorted(rows[first].tolist())
+
+def _concatenate(parts: List[array], dtype: type) -> np.ndarray:
+    """Une los arreglos tipados de cada sección en un arreglo de numpy."""
+    if not parts:
+        return np.zeros(0, dtype=dtype)
+    return np.concatenate([np.frombuffer(part, dtype=dtype) if len(part) else np.zeros(0, dtype=dtype) for part in parts])
+
 @dataclass
 class FinancialDocument:
     """Representa un documento financiero (P&L o Balance)."""
@@ -17,6 +501,7 @@ class FinancialDocument:
     doc_type: str  # 'pl' o 'balance'
     file_format: str  # 'markdown' o 'csv'
     parsed_data: Optional[Dict] = None
+    sha: Optional[str] = None  # SHA del blob de git, si se conoce
 
 @dataclass
 class AuditResult:
@@ -24,4 +509,4 @@ class AuditResult:
     status: str
     discrepancies: List[Dict]
     issue_url: Optional[str] = None
-    error_message: Optional[str] = None 
\ No newline at end of file
+    error_message: Optional[str] = None
@@ -0,0 +1,45 @@
+"""Verificaciones locales previas a las consultas al modelo.
+
+`ComparisonAgent` calcula los ratios y la diferencia de la ecuación contable
+antes de armar sus prompts. Si los valores están dentro de los rangos que
+declaran esos mismos prompts (`RATIO_NORMAL_RANGES` y `TOLERANCE`) y ninguno
+depende de un total faltante, el modelo no tiene nada que señalar y la
+consulta se omite. Los casos fuera de rango o ambiguos se escalan.
+"""
+
+from decimal import Decimal
+from typing import Iterable, Mapping, Optional
+
+from .constants import RATIO_NORMAL_RANGES, TOLERANCE
+
+# Motivos para escalar al modelo
+OUT_OF_RANGE = 'out_of_range'
+MISSING_TOTALS = 'missing_totals'
+
+def ratio_escalation(ratios: Mapping[str, Decimal], missing: Iterable[str] = ()) -> Optional[str]:
+    """Motivo para consultar al modelo por los ratios, o None si todos están en su rango.
+
+    Args:
+        ratios: Ratios por nombre de `RATIO_NORMAL_RANGES`; un denominador en
+            cero da un ratio cero, que queda fuera de rango.
+        missing: Totales que no se encontraron en los documentos.
+    """
+    if any(True for _ in missing):
+        return MISSING_TOTALS
+    for name, (low, high) in RATIO_NORMAL_RANGES.items():
+        if not low <= ratios[name] <= high:
+            return OUT_OF_RANGE
+    return None
+
+def balance_escalation(difference: Decimal, missing: Iterable[str] = ()) -> Optional[str]:
+    """Motivo para consultar al modelo por la ecuación contable, o None si cuadra.
+
+    Args:
+        difference: Activos menos pasivos más capital.
+        missing: Totales del balance que no se encontraron.
+    """
+    if any(True for _ in missing):
+        return MISSING_TOTALS
+    if abs(difference) > TOLERANCE:
+        return OUT_OF_RANGE
+    return None
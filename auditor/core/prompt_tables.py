@@ -0,0 +1,110 @@
+"""Serialización compacta y estable de los estados parseados para los prompts.
+
+El prompt de validación incluía el `repr` de los datos parseados (listas de
+`FinancialLineItem(...)` con `Decimal('...')`), que gasta la mayor parte de
+los tokens en sintaxis de Python. `statement_table` escribe el período y una
+tabla separada por tabuladores con un solo encabezado (`sección`, `cuenta`,
+`monto`) con las partidas de cada sección y los totales.
+
+Con un presupuesto de tokens (estimados como `PROMPT_CHARS_PER_TOKEN`
+caracteres por token), las secciones más grandes se recortan a las partidas
+de mayor monto absoluto y el resto se resume en una fila `(otras N partidas)`
+con su suma; los totales se conservan siempre. La salida depende sólo de los
+datos, así que sirve para la clave de la caché de respuestas.
+"""
+
+from decimal import Decimal
+from typing import List, Mapping, Optional, Tuple
+
+from .constants import PROMPT_CHARS_PER_TOKEN
+from .models import LineItemTable
+
+TABLE_HEADER = 'sección\tcuenta\tmonto'
+
+TOTALS_SECTION = 'totals'
+
+def statement_table(data: Mapping, token_budget: Optional[int] = None) -> str:
+    """Período y partidas de un estado parseado como tabla TSV.
+
+    Args:
+        data: Estado parseado (`LineItemTable` o el diccionario equivalente).
+        token_budget: Tokens estimados como máximo; None no recorta.
+
+    Returns:
+        El texto de la tabla, idéntico para los mismos datos.
+    """
+    head = [f"período\t{_cell(data.get('period'))}", TABLE_HEADER]
+    tail = [_line(TOTALS_SECTION, name, amount) for name, amount in (data.get(TOTALS_SECTION) or {}).items()]
+    sections = [_Section(key, rows) for key, rows in _section_rows(data)]
+
+    limit = max((len(section.lines) for section in sections), default=0)
+    if token_budget is not None:
+        budget = token_budget * PROMPT_CHARS_PER_TOKEN - _size(head) - _size(tail)
+        # Mayor cantidad de partidas por sección que entra en el presupuesto
+        low, high = 0, limit
+        while low < high:
+            middle = (low + high + 1) // 2
+            if sum(section.size(middle) for section in sections) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        limit = low
+
+    body = [line for section in sections for line in section.fitted(limit)]
+    return '\n'.join(head + body + tail)
+
+class _Section:
+    """Líneas de una sección ordenadas por monto absoluto, para recortarla rápido."""
+
+    def __init__(self, key: str, rows: List[Tuple[str, Decimal]]):
+        self.key = key
+        self.lines = [_line(key, name, amount) for name, amount in rows]
+        # Índices de mayor a menor monto absoluto; el orden original desempata
+        self.ranked = sorted(range(len(rows)), key=lambda index: (-abs(rows[index][1]), index))
+        self.kept_sizes = [0]
+        for index in self.ranked:
+            self.kept_sizes.append(self.kept_sizes[-1] + len(self.lines[index]) + 1)
+        # Suma de los montos omitidos al conservar las primeras `n` del ranking
+        self.rest = [Decimal('0')] * (len(rows) + 1)
+        for position in range(len(rows) - 1, -1, -1):
+            self.rest[position] = self.rest[position + 1] + rows[self.ranked[position]][1]
+
+    def size(self, limit: int) -> int:
+        """Caracteres de la sección recortada a `limit` partidas."""
+        if limit >= len(self.lines):
+            return self.kept_sizes[-1]
+        return self.kept_sizes[limit] + len(self._summary(limit)) + 1
+
+    def fitted(self, limit: int) -> List[str]:
+        """Líneas con a lo sumo `limit` partidas, en su orden original, y el resumen de las demás."""
+        if limit >= len(self.lines):
+            return self.lines
+        return [self.lines[index] for index in sorted(self.ranked[:limit])] + [self._summary(limit)]
+
+    def _summary(self, limit: int) -> str:
+        return _line(self.key, f"(otras {len(self.lines) - limit} partidas)", self.rest[limit])
+
+def _section_rows(data: Mapping) -> List[Tuple[str, List[Tuple[str, Decimal]]]]:
+    """Nombre y monto de las partidas de cada sección, en el orden de los datos."""
+    if isinstance(data, LineItemTable):
+        names = data.names.tolist()
+        return [
+            (key, [(names[code], data.amount(row)) for row, code in enumerate(data.name_codes[start:stop].tolist(), start)])
+            for key, (start, stop) in data.sections.items()
+        ]
+    return [(key, [(item.name, item.amount) for item in data[key]]) for key in data if key not in ('period', TOTALS_SECTION)]
+
+def _size(lines: List[str]) -> int:
+    """Caracteres de las líneas unidas con saltos de línea."""
+    return sum(map(len, lines)) + len(lines)
+
+def _line(section: str, name, amount) -> str:
+    return f"{section}\t{_cell(name)}\t{_amount(amount)}"
+
+def _amount(amount) -> str:
+    """Monto sin notación científica ni ceros agregados."""
+    return format(amount, 'f') if isinstance(amount, Decimal) else _cell(amount)
+
+def _cell(value) -> str:
+    """Texto de una celda sin tabuladores ni saltos de línea."""
+    return ' '.join(str('' if value is None else value).split())
@@ -0,0 +1,461 @@
+"""Reglas de consistencia entre un P&L y un Balance.
+
+Cada regla se declara una sola vez en `RULES` con su tipo, severidad, las
+entradas que usa y los textos de la discrepancia. `compile_rules` arma un
+plan de evaluación: las entradas que necesitan las reglas elegidas, cada una
+resuelta una sola vez por par de documentos con el índice de cuentas del
+documento (`core.account_names`) y convertida a centavos en modo
+`fixed_point`, y las reglas en orden con los índices de sus entradas. El
+mismo plan sirve a `AuditService`, a `agent.compare_parsed` y a los cálculos
+locales de `ComparisonAgent`.
+"""
+
+import hashlib
+import json
+import operator
+from dataclasses import dataclass
+from decimal import MAX_EMAX, MAX_PREC, MIN_EMIN, Context, Decimal, localcontext
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .account_names import (
+    AccountIndex, NET_INCOME, RETAINED_EARNINGS, TOTAL_ASSETS, TOTAL_EQUITY, TOTAL_EXPENSES,
+    TOTAL_LIABILITIES, TOTAL_REVENUE, account_index
+)
+from .constants import AMOUNT_SCALE, TOLERANCE
+from .exceptions import ConfigurationError
+from .fixed_point import MAX_CENTS, MIN_CENTS, TOLERANCE_CENTS, add_cents, check_cents, from_cents, to_cents
+from .models import LineItemTable
+
+class Arithmetic(NamedTuple):
+    """Operaciones de montos de un modo: `Decimal` o centavos enteros."""
+    amount: Callable[[Decimal], Any]
+    report: Callable[[Any], Decimal]
+    add: Callable[[Any, Any], Any]
+    tolerance: Any
+
+def _identity(value: Any) -> Any:
+    """Devuelve el valor sin cambios."""
+    return value
+
+DECIMAL_ARITHMETIC = Arithmetic(_identity, _identity, operator.add, TOLERANCE)
+CENTS_ARITHMETIC = Arithmetic(to_cents, from_cents, add_cents, TOLERANCE_CENTS)
+
+@dataclass(frozen=True)
+class RuleInput:
+    """Valor que las reglas leen de uno de los documentos.
+
+    Args:
+        name: Nombre con el que lo declaran las reglas y lo usan sus textos.
+        doc_type: Documento del que se lee: `pl` o `balance`.
+        source: `period` (el período) o `account` (la cuenta del concepto
+            `key` en el índice de cuentas del documento).
+        key: Concepto de `core.account_names` para `account`.
+        sections: Secciones donde se busca la cuenta, en orden.
+        amount: Si es un monto, que se convierte según el modo del plan.
+    """
+    name: str
+    doc_type: str
+    source: str
+    key: Optional[str] = None
+    sections: Tuple[str, ...] = ('totals',)
+    amount: bool = True
+
+    def resolver(self) -> Callable[[Any, AccountIndex], Any]:
+        """Función `(período, índice de cuentas) -> valor` de esta entrada."""
+        if self.source == 'period':
+            return lambda period, accounts: period
+        if self.source == 'account':
+            concept, sections = self.key, self.sections
+            if len(sections) == 1:
+                section = sections[0]
+                return lambda period, accounts: accounts.get(section, _EMPTY).get(concept)
+            def lookup(period, accounts):
+                for section in sections:
+                    amount = accounts.get(section, _EMPTY).get(concept)
+                    if amount is not None:
+                        return amount
+                return None
+            return lookup
+        raise ConfigurationError(f"Origen de entrada desconocido: {self.source}")
+
+_EMPTY: Dict[str, Decimal] = {}
+
+INPUTS: Dict[str, RuleInput] = {item.name: item for item in (
+    RuleInput('pl_period', 'pl', 'period', amount=False),
+    RuleInput('balance_period', 'balance', 'period', amount=False),
+    RuleInput('pl_net_income', 'pl', 'account', NET_INCOME, ('totals', 'capital_contable')),
+    RuleInput('balance_net_income', 'balance', 'account', NET_INCOME, ('totals', 'capital_contable')),
+    RuleInput('retained_earnings', 'balance', 'account', RETAINED_EARNINGS, ('capital_contable',)),
+    RuleInput('revenue', 'pl', 'account', TOTAL_REVENUE),
+    RuleInput('expenses', 'pl', 'account', TOTAL_EXPENSES),
+    RuleInput('assets', 'balance', 'account', TOTAL_ASSETS),
+    RuleInput('liabilities', 'balance', 'account', TOTAL_LIABILITIES),
+    RuleInput('equity', 'balance', 'account', TOTAL_EQUITY)
+)}
+
+def _header(data: Mapping) -> Tuple[Any, AccountIndex]:
+    """Período e índice de cuentas de un documento parseado."""
+    if type(data) is LineItemTable:
+        return data.period, data.accounts
+    return data.get('period'), account_index(data)
+
+def _headers(documents: Iterable[Mapping]) -> Tuple[List[Any], List[AccountIndex]]:
+    """Períodos e índices de cuentas de una serie de documentos, en dos listas.
+
+    Dos listas planas en lugar de una tupla por documento: con decenas de
+    miles de tuplas vivas el recolector de ciclos recorre el heap una y otra vez.
+    """
+    periods, indexes = [], []
+    for data in documents:
+        period, accounts = _header(data)
+        periods.append(period)
+        indexes.append(accounts)
+    return periods, indexes
+
+def _column(periods: List[Any], indexes: List[AccountIndex], sections: Optional[Tuple[str, ...]], concept: Optional[str]) -> List[Any]:
+    """Valores de una entrada para una serie de documentos: el período (sin `sections`) o la cuenta."""
+    if sections is None:
+        return periods
+    if len(sections) == 1:
+        section = sections[0]
+        return [accounts.get(section, _EMPTY).get(concept) for accounts in indexes]
+    column = []
+    for accounts in indexes:
+        value = None
+        for section in sections:
+            value = accounts.get(section, _EMPTY).get(concept)
+            if value is not None:
+                break
+        column.append(value)
+    return column
+
+@dataclass(frozen=True)
+class Rule:
+    """Verificación declarativa que produce una discrepancia.
+
+    Args:
+        type: Tipo de la discrepancia (`period_mismatch`, `unbalanced`, ...).
+        severity: `high`, `medium` o `low`.
+        inputs: Nombres de las entradas de `INPUTS`, en el orden que recibe `check`.
+        test: `test(arithmetic, *valores)` es verdadero si la regla falla.
+            Usa sólo operadores y `arithmetic.add`, así que sirve tanto para
+            un par de documentos como para arreglos de numpy con un valor
+            por período (`RulePlan.evaluate_batch`).
+        description: Plantilla de la descripción, con las entradas y los
+            campos de `details`.
+        fix: Plantilla de la corrección propuesta.
+        required: Si la regla se omite cuando falta alguna entrada.
+        details: `details(arithmetic, *valores)` con los campos adicionales
+            de los textos; se calcula sólo para las reglas que fallan.
+    """
+    type: str
+    severity: str
+    inputs: Tuple[str, ...]
+    test: Callable[..., Any]
+    description: str
+    fix: str
+    required: bool = True
+    details: Optional[Callable[..., Dict[str, Any]]] = None
+
+    def describe(self) -> Dict[str, Any]:
+        """Declaración serializable de la regla, para el hash del conjunto de reglas."""
+        return {'type': self.type, 'severity': self.severity, 'inputs': list(self.inputs),
+                'test': self.test.__name__, 'details': self.details.__name__ if self.details else None,
+                'description': self.description, 'fix': self.fix, 'required': self.required}
+
+def _differs(arithmetic: Arithmetic, first: Any, second: Any) -> Any:
+    """Falla si los valores son distintos."""
+    return first != second
+
+def _outside_tolerance(arithmetic: Arithmetic, first: Any, second: Any) -> Any:
+    """Falla si los montos difieren en más que la tolerancia."""
+    return abs(first - second) > arithmetic.tolerance
+
+def _retained_earnings_stale(arithmetic: Arithmetic, retained_earnings: Any, net_income: Any) -> Any:
+    """Falla si las ganancias retenidas no incluyen la utilidad del período."""
+    return abs(arithmetic.add(retained_earnings, net_income) - retained_earnings) > arithmetic.tolerance
+
+def _expected_retained_earnings(arithmetic: Arithmetic, retained_earnings: Any, net_income: Any) -> Dict[str, Any]:
+    """Ganancias retenidas esperadas."""
+    return {'expected': arithmetic.report(arithmetic.add(retained_earnings, net_income))}
+
+def _more_than_double(arithmetic: Arithmetic, first: Any, second: Any) -> Any:
+    """Falla si el primer monto supera el doble del segundo."""
+    return first > second * 2
+
+def _greater(arithmetic: Arithmetic, first: Any, second: Any) -> Any:
+    """Falla si el primer monto supera al segundo."""
+    return first > second
+
+def _unbalanced(arithmetic: Arithmetic, assets: Any, liabilities: Any, equity: Any) -> Any:
+    """Falla si no se cumple A = P + C dentro de la tolerancia."""
+    return abs(assets - arithmetic.add(liabilities, equity)) > arithmetic.tolerance
+
+def _balance_difference(arithmetic: Arithmetic, assets: Any, liabilities: Any, equity: Any) -> Dict[str, Any]:
+    """Diferencia entre los activos y los pasivos más el capital."""
+    return {'difference': arithmetic.report(abs(assets - arithmetic.add(liabilities, equity)))}
+
+RULES: Tuple[Rule, ...] = (
+    Rule(
+        'period_mismatch', 'high', ('pl_period', 'balance_period'), _differs,
+        "Los períodos no coinciden: P&L ({pl_period}) vs Balance ({balance_period})",
+        'Asegurarse de que ambos documentos correspondan al mismo período contable.',
+        required=False
+    ),
+    Rule(
+        'income_mismatch', 'high', ('pl_net_income', 'balance_net_income'), _outside_tolerance,
+        "La utilidad neta no coincide: P&L (${pl_net_income}) vs Balance (${balance_net_income})",
+        "Ajustar la utilidad neta en el Balance General para que coincida con el P&L: ${pl_net_income}"
+    ),
+    Rule(
+        'retained_earnings_mismatch', 'high', ('retained_earnings', 'pl_net_income'), _retained_earnings_stale,
+        "Las ganancias retenidas no reflejan la utilidad del período. Actual: ${retained_earnings}, Esperado: ${expected}",
+        "Ajustar las ganancias retenidas para incluir la utilidad del período: ${expected}",
+        details=_expected_retained_earnings
+    ),
+    Rule(
+        'unusual_ratio', 'medium', ('revenue', 'assets'), _more_than_double,
+        "Los ingresos (${revenue}) son inusualmente altos en comparación con los activos (${assets})",
+        'Verificar que todos los activos estén correctamente registrados y valorados.'
+    ),
+    Rule(
+        'expense_ratio', 'high', ('expenses', 'revenue'), _greater,
+        "Los gastos (${expenses}) son mayores que los ingresos (${revenue})",
+        'Revisar y validar todos los gastos registrados. Verificar si hay gastos duplicados o incorrectamente clasificados.'
+    ),
+    Rule(
+        'unbalanced', 'high', ('assets', 'liabilities', 'equity'), _unbalanced,
+        "El balance no está balanceado: Activos (${assets}) ≠ Pasivos (${liabilities}) + Capital (${equity})",
+        "Ajustar las cuentas para mantener la ecuación contable: A = P + C. Diferencia actual: ${difference}",
+        details=_balance_difference
+    )
+)
+
+class RulePlan:
+    """Reglas compiladas: entradas únicas resueltas una vez y pasos indexados.
+
+    Args:
+        rules: Reglas a evaluar, en el orden de sus discrepancias.
+        fixed_point: Si es True, los montos se comparan como centavos enteros.
+    """
+
+    def __init__(self, rules: Sequence[Rule], fixed_point: bool = False):
+        self.rules = tuple(rules)
+        self.fixed_point = fixed_point
+        self.arithmetic = CENTS_ARITHMETIC if fixed_point else DECIMAL_ARITHMETIC
+
+        names: List[str] = []
+        for rule in self.rules:
+            for name in rule.inputs:
+                if name not in INPUTS:
+                    raise ConfigurationError(f"La regla {rule.type} usa una entrada desconocida: {name}")
+                if name not in names:
+                    names.append(name)
+        self.input_names = tuple(names)
+        # Origen de cada entrada, en el orden de `input_names`: documento (0 P&L,
+        # 1 Balance), secciones donde se busca (None para el período) y concepto;
+        # `evaluate` las lee directo del índice de cuentas, sin un resolvedor por entrada
+        for name in names:
+            INPUTS[name].resolver()  # valida el origen
+        self._sources = tuple(
+            (int(INPUTS[name].doc_type == 'balance'), INPUTS[name].sections if INPUTS[name].source == 'account' else None, INPUTS[name].key)
+            for name in names
+        )
+        self._balance = any(document for document, _, _ in self._sources)
+        self._amounts = tuple(index for index, name in enumerate(names) if INPUTS[name].amount) if fixed_point else ()
+        self._steps = tuple((rule, tuple(names.index(name) for name in rule.inputs)) for rule in self.rules)
+        # Por paso: regla, índices, selector de sus argumentos y si requiere todas sus entradas
+        self._calls = tuple(
+            (rule, indexes, _selector(indexes), rule.test, rule.required and frozenset(indexes))
+            for rule, indexes in self._steps
+        )
+
+    def _resolve(self, pl_data: Mapping, balance_data: Mapping) -> List[Any]:
+        """Valores de las entradas en el orden de `input_names`."""
+        headers = (_header(pl_data), _header(balance_data) if self._balance else (None, _EMPTY))
+        raw = []
+        for document, sections, concept in self._sources:
+            period, accounts = headers[document]
+            if sections is None:
+                raw.append(period)
+                continue
+            value = None
+            for section in sections:
+                value = accounts.get(section, _EMPTY).get(concept)
+                if value is not None:
+                    break
+            raw.append(value)
+        return raw
+
+    def resolve(self, pl_data: Mapping, balance_data: Mapping) -> Dict[str, Any]:
+        """Entradas del plan para un par de documentos, tal como se leyeron."""
+        return dict(zip(self.input_names, self._resolve(pl_data, balance_data)))
+
+    def evaluate(self, pl_data: Mapping, balance_data: Mapping) -> List[Dict[str, Any]]:
+        """Discrepancias de un par de documentos, en el orden de las reglas."""
+        raw = self._resolve(pl_data, balance_data)
+        values = self._convert(raw)
+        # Comparar con `is` evita que `None in args` compare cada `Decimal`
+        missing = {index for index, value in enumerate(raw) if value is None}
+        discrepancies = []
+        arithmetic = self.arithmetic
+        for rule, indexes, select, test, required in self._calls:
+            if missing and required and not missing.isdisjoint(required):
+                continue
+            if test(arithmetic, *select(values)):
+                discrepancies.append(self._discrepancy(rule, indexes, raw, values))
+        return discrepancies
+
+    def evaluate_many(self, pairs: Iterable[Tuple[Mapping, Mapping]]) -> List[List[Dict[str, Any]]]:
+        """Discrepancias de cada par `(pl_data, balance_data)`."""
+        evaluate = self.evaluate
+        return [evaluate(pl_data, balance_data) for pl_data, balance_data in pairs]
+
+    def evaluate_batch(self, pairs: Sequence[Tuple[Mapping, Mapping]]) -> List[List[Dict[str, Any]]]:
+        """Como `evaluate_many`, pero cada regla se evalúa una vez sobre todos los pares.
+
+        Cada entrada se lee como una columna con un valor por par y se apila
+        en un arreglo de numpy (`_stack`); cada regla produce la máscara de
+        los pares donde falla y sólo esos se formatean.
+        """
+        documents = [_headers(pl_data for pl_data, _ in pairs)]
+        if self._balance:
+            documents.append(_headers(balance_data for _, balance_data in pairs))
+        columns = [_column(*documents[document], sections, concept) for document, sections, concept in self._sources]
+        results: List[List[Dict[str, Any]]] = [[] for _ in pairs]
+        if not results:
+            return results
+
+        arrays, arithmetic = self._stack(columns)
+        # Valores de cálculo de las filas que fallan: en centavos, los ya apilados
+        values = [array.tolist() for array in arrays] if self._amounts else columns
+        present: Dict[int, np.ndarray] = {}
+        for rule, indexes in self._steps:
+            failed = np.asarray(rule.test(arithmetic, *[arrays[index] for index in indexes]), dtype=bool)
+            if rule.required:
+                for index in indexes:
+                    if index not in present:
+                        present[index] = np.fromiter((value is not None for value in columns[index]), dtype=bool, count=len(results))
+                    failed &= present[index]
+            for row in np.flatnonzero(failed).tolist():
+                raw = [column[row] for column in columns]
+                converted = [column[row] for column in values] if self._amounts else raw
+                results[row].append(self._discrepancy(rule, indexes, raw, converted))
+        return results
+
+    def _convert(self, raw: List[Any]) -> List[Any]:
+        """Valores de cálculo: los montos en centavos en modo `fixed_point`."""
+        if not self._amounts:
+            return raw
+        values = list(raw)
+        amount = self.arithmetic.amount
+        for index in self._amounts:
+            if values[index] is not None:
+                values[index] = amount(values[index])
+        return values
+
+    def _discrepancy(self, rule: Rule, indexes: Tuple[int, ...], raw: List[Any], values: List[Any]) -> Dict[str, Any]:
+        """Discrepancia de una regla que falló, con sus textos formateados."""
+        fields = rule.details(self.arithmetic, *[values[index] for index in indexes]) if rule.details else {}
+        fields.update((rule.inputs[position], raw[index]) for position, index in enumerate(indexes))
+        return {
+            'type': rule.type,
+            'description': rule.description.format(**fields),
+            'severity': rule.severity,
+            'fix': rule.fix.format(**fields)
+        }
+
+    def _stack(self, columns: List[List[Any]]) -> Tuple[List[np.ndarray], Arithmetic]:
+        """Columnas de numpy de las entradas y la aritmética que opera sobre ellas.
+
+        En modo `fixed_point` los montos son centavos en int64 (`_cents_column`);
+        si no, arreglos de objetos con los mismos `Decimal`, que numpy opera
+        elemento a elemento sin convertirlos: convertirlos a centavos cuesta
+        más que las pocas operaciones que hacen las reglas sobre cada uno. Los
+        montos faltantes quedan en cero; las reglas que los requieren se
+        descartan con la máscara de presentes.
+        """
+        arrays = []
+        for name, column in zip(self.input_names, columns):
+            if INPUTS[name].amount and self.fixed_point:
+                arrays.append(_cents_column(column))
+            else:
+                arrays.append(_object_column(column, INPUTS[name].amount))
+        return arrays, CENTS_BATCH_ARITHMETIC if self.fixed_point else self.arithmetic
+
+    def fingerprint(self) -> str:
+        """Hash estable de las reglas y el modo del plan."""
+        data = json.dumps({'rules': [rule.describe() for rule in self.rules], 'fixed_point': self.fixed_point}, sort_keys=True)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()[:16]
+
+# Cota de los centavos en int64: las reglas suman o duplican a lo sumo dos
+# montos y restan el resultado de un tercero, así que nunca desbordan
+_INT64_LIMIT = (2 ** 63 - 1) // 4
+
+def _add_cents_arrays(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """`add_cents` sobre columnas: suma elemento a elemento verificando el rango."""
+    total = first + second
+    out_of_range = (total < MIN_CENTS) | (total > MAX_CENTS)
+    if out_of_range.any():
+        check_cents(int(total[np.flatnonzero(out_of_range)[0]]))
+    return total
+
+CENTS_BATCH_ARITHMETIC = CENTS_ARITHMETIC._replace(add=_add_cents_arrays)
+
+# Contexto en el que las multiplicaciones de `Decimal` nunca redondean
+_EXACT_CONTEXT = Context(prec=MAX_PREC, Emax=MAX_EMAX, Emin=MIN_EMIN)
+_CENTS_PER_UNIT = Decimal(10) ** AMOUNT_SCALE
+
+def _cents_column(column: List[Any]) -> np.ndarray:
+    """Columna de montos en centavos (cero si falta), como `to_cents` en `evaluate`.
+
+    Si todos son un número exacto de centavos que cabe con holgura en int64,
+    la conversión corre en los bucles de numpy sobre el arreglo de objetos,
+    sin una llamada de Python por monto; si no, se redondean uno a uno y una
+    columna que no cabe en int64 se compara con enteros de Python.
+    """
+    values = _object_column(column, True)
+    with localcontext(_EXACT_CONTEXT):
+        try:
+            scaled = values * _CENTS_PER_UNIT
+            cents = scaled.astype(np.int64)
+            if len(cents) == 0 or ((cents == scaled).all() and -_INT64_LIMIT <= cents.min() and cents.max() <= _INT64_LIMIT):
+                return cents
+        except (ArithmeticError, TypeError, ValueError):
+            pass
+    rounded = [0 if value is None else to_cents(value) for value in column]
+    dtype = np.int64 if max(map(abs, rounded), default=0) <= _INT64_LIMIT else object
+    return np.fromiter(rounded, dtype=dtype, count=len(rounded))
+
+def _object_column(column: List[Any], amount: bool) -> np.ndarray:
+    """Columna como arreglo de objetos; con `amount`, los montos faltantes en cero."""
+    values = [_ZERO if value is None else value for value in column] if amount else column
+    return np.fromiter(values, dtype=object, count=len(values))
+
+_ZERO = Decimal(0)
+
+def _selector(indexes: Tuple[int, ...]) -> Callable[[List[Any]], Tuple[Any, ...]]:
+    """Función que toma de una lista los valores de `indexes`, como tupla."""
+    if len(indexes) == 1:
+        index = indexes[0]
+        return lambda values: (values[index],)
+    return operator.itemgetter(*indexes)
+
+_RULES_BY_TYPE = {rule.type: rule for rule in RULES}
+
+def compile_rules(types: Optional[Iterable[str]] = None, fixed_point: bool = False) -> RulePlan:
+    """Compila las reglas de `RULES` con esos tipos (todas por defecto).
+
+    Raises:
+        ConfigurationError: Si algún tipo no corresponde a una regla.
+    """
+    if types is None:
+        return RulePlan(RULES, fixed_point)
+    rules = []
+    for rule_type in types:
+        if rule_type not in _RULES_BY_TYPE:
+            raise ConfigurationError(f"Regla desconocida: {rule_type}")
+        rules.append(_RULES_BY_TYPE[rule_type])
+    return RulePlan(rules, fixed_point)
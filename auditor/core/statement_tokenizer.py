@@ -0,0 +1,264 @@
+"""Tokenizador incremental de estados financieros en formato Markdown.
+
+Recorre el documento una sola vez, por bloques alineados a líneas, sin
+materializar la lista completa de líneas ni las celdas de cada fila, y emite
+eventos tipados de sección, período y filas que consumen todos los parsers del
+proyecto.
+"""
+
+import codecs
+import re
+from decimal import Decimal
+from itertools import repeat
+from operator import contains
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+TextSource = Union[str, bytes, Iterable[Union[str, bytes]]]
+
+DEFAULT_SECTION_PREFIX = '##'
+DEFAULT_PERIOD_LABELS = ('Periodo:',)
+DEFAULT_BLOCK_SIZE = 1 << 16
+
+# Valor del período cuando la etiqueta quedó al final del bloque anterior
+_PENDING_PERIOD = re.compile(r'\s*([^\n]+)')
+
+class SectionEvent(NamedTuple):
+    """Inicio de una sección (`## Ingresos`), con el nombre normalizado."""
+    name: str
+
+class PeriodEvent(NamedTuple):
+    """Período del documento (`Periodo: 2024-Q1`). Se emite una sola vez."""
+    value: str
+
+class RowsEvent(NamedTuple):
+    """Filas de tabla consecutivas de una misma sección.
+
+    Cada fila es una tupla `(nombre, valor)` con el texto ya recortado de las
+    dos primeras celdas; usar `parse_amount` para convertir el valor en monto.
+    Las filas se entregan por lotes acotados por `block_size`.
+    """
+    section: Optional[str]
+    rows: List[Tuple[str, str]]
+
+class ColumnsEvent(NamedTuple):
+    """Las filas de un `RowsEvent` como dos columnas (con `columns=True`).
+
+    `names[i]` y `values[i]` son las dos primeras celdas de la fila `i`.
+    """
+    section: Optional[str]
+    names: List[str]
+    values: List[str]
+
+StatementEvent = Union[SectionEvent, PeriodEvent, RowsEvent, ColumnsEvent]
+
+# Inicio de las filas que no son datos: separador y encabezado de tabla
+_HEADER_MARKERS = ('|--', '| Concepto')
+
+def iter_blocks(source: TextSource, encoding: str = 'utf-8', block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[Tuple[str, int, int]]:
+    """Divide la entrada en ventanas `(texto, inicio, fin)` alineadas a líneas.
+
+    Un texto completo se recorre con índices, sin copiarlo; los fragmentos
+    str/bytes de un iterador se acumulan hasta el último salto de línea, de
+    modo que sólo se mantiene en memoria un bloque a la vez. Los fragmentos
+    pueden cortar líneas o caracteres multibyte en cualquier punto.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = bytes(source).decode(encoding)
+    if isinstance(source, str):
+        length = len(source)
+        start = 0
+        while start < length:
+            end = source.rfind('\n', start, start + block_size)
+            if end == -1:
+                end = source.find('\n', start + block_size)
+            end = length if end == -1 else end + 1
+            yield source, start, end
+            start = end
+        return
+
+    decoder = None
+    pending = ''
+    for chunk in source:
+        if isinstance(chunk, (bytes, bytearray)):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding)()
+            chunk = decoder.decode(chunk)
+        if not chunk:
+            continue
+        if pending:
+            chunk = pending + chunk
+        cut = chunk.rfind('\n')
+        if cut == -1:
+            pending = chunk
+            continue
+        yield chunk, 0, cut + 1
+        pending = chunk[cut + 1:]
+    if decoder is not None:
+        pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending, 0, len(pending)
+
+def tokenize_statement(
+    source: TextSource,
+    section_prefix: str = DEFAULT_SECTION_PREFIX,
+    period_labels: Tuple[str, ...] = DEFAULT_PERIOD_LABELS,
+    encoding: str = 'utf-8',
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    columns: bool = False
+) -> Iterator[StatementEvent]:
+    """Genera los eventos de un estado financiero en Markdown en una sola pasada.
+
+    Las filas se reconocen con las mismas reglas que el bucle original
+    (`line.strip()`, `split('|')[1:-1]` con al menos dos celdas, sin
+    separadores ni encabezados `| Concepto`), pero cada tabla regular se
+    divide de una vez con `str.split` en lugar de línea por línea.
+
+    Args:
+        source: Texto completo, bytes o iterador de fragmentos (str o bytes).
+        section_prefix: Prefijo que abre una sección (`##` o `###`).
+        period_labels: Etiquetas que preceden al período; se usa la primera
+            aparición en el documento.
+        encoding: Codificación para las entradas en bytes.
+        block_size: Tamaño aproximado, en caracteres, de cada bloque procesado.
+        columns: Emitir las filas como `ColumnsEvent` en lugar de `RowsEvent`.
+    """
+    emit = _columns_event if columns else _rows_event
+    period_patterns = [(label, re.compile(re.escape(label) + r'\s*([^\n]+)')) for label in period_labels]
+    section: Optional[str] = None
+    period_found = False
+    period_pending = False
+
+    for text, start, end in iter_blocks(source, encoding, block_size):
+        # Puntos de corte del bloque: encabezados de sección y línea del período
+        marks: List[Tuple[int, int, StatementEvent]] = []
+
+        if not period_found:
+            if period_pending:
+                match = _PENDING_PERIOD.match(text, start, end)
+                if match and match.group(1).strip():
+                    period_found = True
+                    marks.append((start, start, PeriodEvent(match.group(1).strip())))
+            else:
+                for label, pattern in period_patterns:
+                    index = text.find(label, start, end)
+                    if index == -1:
+                        continue
+                    match = pattern.match(text, index, end)
+                    value = match.group(1).strip() if match else ''
+                    if value:
+                        period_found = True
+                        line_start = text.rfind('\n', start, index) + 1 or start
+                        marks.append((line_start, line_start, PeriodEvent(value)))
+                    else:
+                        # La etiqueta cierra el bloque; el valor viene en el siguiente
+                        period_pending = True
+                    break
+
+        index = text.find(section_prefix, start, end)
+        while index != -1:
+            line_start = text.rfind('\n', start, index) + 1 or start
+            line_end = text.find('\n', index, end)
+            line_end = end if line_end == -1 else line_end + 1
+            if text[line_start:index].isspace() or line_start == index:
+                name = text[line_start:line_end].replace('#', '').strip().lower()
+                marks.append((line_start, line_end, SectionEvent(name)))
+            index = text.find(section_prefix, line_end, end)
+        if len(marks) > 1:
+            marks.sort(key=lambda mark: mark[0])
+
+        position = start
+        for mark_start, mark_end, event in marks:
+            if mark_start > position:
+                event_rows = emit(section, text[position:mark_start])
+                if event_rows is not None:
+                    yield event_rows
+                position = mark_start
+            if type(event) is SectionEvent:
+                section = event.name
+                position = mark_end
+            yield event
+
+        if end > position:
+            event_rows = emit(section, text[position:end])
+            if event_rows is not None:
+                yield event_rows
+
+def _rows_event(section: Optional[str], region: str) -> Optional[RowsEvent]:
+    """`RowsEvent` con las filas del fragmento, o None si no tiene."""
+    names, values = _table_columns(region)
+    return RowsEvent(section, list(zip(names, values))) if names else None
+
+def _columns_event(section: Optional[str], region: str) -> Optional[ColumnsEvent]:
+    """`ColumnsEvent` con las filas del fragmento, o None si no tiene."""
+    names, values = _table_columns(region)
+    return ColumnsEvent(section, names, values) if names else None
+
+def _table_columns(region: str) -> Tuple[List[str], List[str]]:
+    """Extrae los nombres y valores de las filas de un fragmento sin líneas de sección."""
+    body = region.lstrip()
+    if not body:
+        return [], []
+    first_line = body.split('\n', 1)[0]
+    width = first_line.count('|')
+
+    # Camino rápido: si todas las líneas no vacías son filas con el mismo
+    # número de separadores, las celdas quedan en posiciones fijas del split
+    if body[0] == '|' and width >= 3:
+        pieces = body.split('|')
+        if (len(pieces) - 1) % width == 0:
+            gaps = pieces[width::width]
+            inner = gaps[:-1]
+            if (not gaps[-1].strip()
+                    and all(map(str.isspace, inner))
+                    and all(map(contains, inner, repeat('\n')))
+                    and ''.join(gaps).count('\n') == body.count('\n')):
+                names = list(map(str.strip, pieces[1::width]))
+                values = list(map(str.strip, pieces[2::width]))
+                for index in sorted(_header_rows(body, width), reverse=True):
+                    del names[index]
+                    del values[index]
+                return names, values
+
+    return _table_columns_by_line(body)
+
+def _header_rows(body: str, width: int) -> set:
+    """Índices de las filas separadoras o de encabezado de una tabla regular.
+
+    Cada fila tiene `width` separadores, así que el número de `|` previos a la
+    marca indica a qué fila pertenece y si la marca abre la fila.
+    """
+    indices = set()
+    for marker in _HEADER_MARKERS:
+        index = body.find(marker)
+        while index != -1:
+            pipes = body.count('|', 0, index)
+            if pipes % width == 0:
+                indices.add(pipes // width)
+            index = body.find(marker, index + 1)
+    return indices
+
+def _table_columns_by_line(region: str) -> Tuple[List[str], List[str]]:
+    """Extrae las filas línea por línea; para fragmentos con texto libre."""
+    names = []
+    values = []
+    for line in region.split('\n'):
+        line = line.strip()
+        if not line or line[0] != '|' or line.startswith(_HEADER_MARKERS):
+            continue
+        second = line.find('|', 1)
+        if second == -1:
+            continue
+        third = line.find('|', second + 1)
+        if third == -1:
+            continue
+        names.append(line[1:second].strip())
+        values.append(line[second + 1:third].strip())
+    return names, values
+
+def parse_amount(value: str) -> Decimal:
+    """Convierte el texto de una celda (`$1,200.50`) en `Decimal`.
+
+    Raises:
+        decimal.InvalidOperation: Si el texto no es un monto válido.
+    """
+    return Decimal(value.replace('$', '').replace(',', '').strip())
@@ -1,11 +1,12 @@
 """Módulo para parsear documentos financieros."""
 
-import re
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 from dataclasses import dataclass
 
+from .core.statement_tokenizer import StatementEvent, RowsEvent, PeriodEvent, tokenize_statement, parse_amount
+
 @dataclass
 class FinancialLineItem:
     """Representa una línea de un documento financiero."""
@@ -14,6 +15,9 @@ class FinancialLineItem:
     category: str
     period: Optional[str] = None
 
+# Tamaño de los bloques leídos del archivo al parsear
+READ_CHUNK_SIZE = 1 << 16
+
 class FinancialDocument:
     """Clase para parsear y manejar documentos financieros."""
     
@@ -24,9 +28,16 @@ class FinancialDocument:
             file_path: Ruta al archivo del documento.
         """
         self.file_path = file_path
-        self.content = file_path.read_text()
         self.doc_type = 'pl' if 'pl' in file_path.name.lower() else 'balance'
         self.parsed_data: Optional[Dict[str, Any]] = None
+        self._content: Optional[str] = None
+    
+    @property
+    def content(self) -> str:
+        """Contenido completo del archivo, leído bajo demanda."""
+        if self._content is None:
+            self._content = self.file_path.read_text()
+        return self._content
     
     def parse(self) -> Dict[str, Any]:
         """Parsea el documento financiero y extrae los datos relevantes."""
@@ -35,6 +46,15 @@ class FinancialDocument:
         else:
             return self._parse_balance()
     
+    def _events(self) -> Iterator[StatementEvent]:
+        """Eventos del documento, leyendo el archivo por bloques."""
+        if self._content is not None:
+            yield from tokenize_statement(self._content, section_prefix='###', period_labels=('Período:',))
+            return
+        with self.file_path.open('rb') as fh:
+            chunks = iter(lambda: fh.read(READ_CHUNK_SIZE), b'')
+            yield from tokenize_statement(chunks, section_prefix='###', period_labels=('Período:',))
+    
     def _parse_pl(self) -> Dict[str, Any]:
         """Parsea un documento de P&L y extrae los datos relevantes."""
         data = {
@@ -43,52 +63,39 @@ class FinancialDocument:
             'expenses': [],
             'totals': {}
         }
-        
-        # Extraer período
-        period_match = re.search(r'Período:\s*([^\n]+)', self.content)
-        if period_match:
-            data['period'] = period_match.group(1).strip()
-        
-        # Procesar líneas
-        current_section = None
-        for line in self.content.split('\n'):
-            line = line.strip()
-            
-            # Detectar secciones
-            if line.startswith('###'):
-                current_section = line.replace('#', '').strip().lower()
+        sections = {
+            'ingresos': ('revenue', 'revenue'),
+            'gastos': ('expenses', 'expense')
+        }
+        for event in self._events():
+            if type(event) is PeriodEvent:
+                data['period'] = event.value
+                for key, _ in sections.values():
+                    for item in data[key]:
+                        item.period = event.value
                 continue
-            
-            # Ignorar líneas vacías o encabezados de tabla
-            if not line or line.startswith('|--') or line.startswith('| Concepto'):
+            if type(event) is not RowsEvent:
                 continue
             
-            # Procesar líneas de datos
-            if line.startswith('|'):
-                cells = [cell.strip() for cell in line.split('|')[1:-1]]
-                if len(cells) >= 2:
-                    name = cells[0]
-                    try:
-                        amount = Decimal(cells[1].replace('$', '').replace(',', '').strip())
-                        
-                        if current_section == 'ingresos':
-                            data['revenue'].append(FinancialLineItem(
-                                name=name,
-                                amount=amount,
-                                category='revenue',
-                                period=data['period']
-                            ))
-                        elif current_section == 'gastos':
-                            data['expenses'].append(FinancialLineItem(
-                                name=name,
-                                amount=amount,
-                                category='expense',
-                                period=data['period']
-                            ))
-                        elif current_section == 'resultado':
-                            data['totals'][name] = amount
-                    except (ValueError, decimal.InvalidOperation):
-                        continue
+            target = sections.get(event.section)
+            if target is None and event.section != 'resultado':
+                continue
+            for name, value in event.rows:
+                try:
+                    amount = parse_amount(value)
+                except (ValueError, InvalidOperation):
+                    continue
+                
+                if target is None:
+                    data['totals'][name] = amount
+                    continue
+                
+                data[target[0]].append(FinancialLineItem(
+                    name=name,
+                    amount=amount,
+                    category=target[1],
+                    period=data['period']
+                ))
         
         return data
     
@@ -101,58 +108,40 @@ class FinancialDocument:
             'capital': [],
             'totals': {}
         }
-        
-        # Extraer período
-        period_match = re.search(r'Período:\s*([^\n]+)', self.content)
-        if period_match:
-            data['period'] = period_match.group(1).strip()
-        
-        # Procesar líneas
-        current_section = None
-        for line in self.content.split('\n'):
-            line = line.strip()
-            
-            # Detectar secciones
-            if line.startswith('###'):
-                current_section = line.replace('#', '').strip().lower()
+        sections = {
+            'activos': ('activos', 'asset'),
+            'pasivos': ('pasivos', 'liability'),
+            'capital': ('capital', 'equity')
+        }
+        for event in self._events():
+            if type(event) is PeriodEvent:
+                data['period'] = event.value
+                for key, _ in sections.values():
+                    for item in data[key]:
+                        item.period = event.value
                 continue
-            
-            # Ignorar líneas vacías o encabezados de tabla
-            if not line or line.startswith('|--') or line.startswith('| Concepto'):
+            if type(event) is not RowsEvent:
                 continue
             
-            # Procesar líneas de datos
-            if line.startswith('|'):
-                cells = [cell.strip() for cell in line.split('|')[1:-1]]
-                if len(cells) >= 2:
-                    name = cells[0]
-                    try:
-                        amount = Decimal(cells[1].replace('$', '').replace(',', '').strip())
-                        
-                        if current_section == 'activos':
-                            data['activos'].append(FinancialLineItem(
-                                name=name,
-                                amount=amount,
-                                category='asset',
-                                period=data['period']
-                            ))
-                        elif current_section == 'pasivos':
-                            data['pasivos'].append(FinancialLineItem(
-                                name=name,
-                                amount=amount,
-                                category='liability',
-                                period=data['period']
-                            ))
-                        elif current_section == 'capital':
-                            data['capital'].append(FinancialLineItem(
-                                name=name,
-                                amount=amount,
-                                category='equity',
-                                period=data['period']
-                            ))
-                        elif name.startswith('Total'):
-                            data['totals'][name] = amount
-                    except (ValueError, decimal.InvalidOperation):
-                        continue
+            target = sections.get(event.section)
+            for name, value in event.rows:
+                # Fuera de las secciones conocidas sólo interesan los totales
+                if target is None and not name.startswith('Total'):
+                    continue
+                try:
+                    amount = parse_amount(value)
+                except (ValueError, InvalidOperation):
+                    continue
+                
+                if target is None:
+                    data['totals'][name] = amount
+                    continue
+                
+                data[target[0]].append(FinancialLineItem(
+                    name=name,
+                    amount=amount,
+                    category=target[1],
+                    period=data['period']
+                ))
         
-        return data 
\ No newline at end of file
+        return data
@@ -0,0 +1,242 @@
+"""Historial de auditorías en SQLite embebido.
+
+Cada ejecución real (no las servidas desde la caché de resultados) guarda el
+repositorio, el commit, el período, los tiempos por etapa, cada discrepancia
+y los totales parseados de ambos documentos. Las consultas se paginan por
+cursor (`id` de la auditoría, de la más reciente a la más antigua) para que
+su costo dependa del tamaño de la página y no de la posición en el historial;
+los índices cubren los filtros por repositorio, período y tipo de
+discrepancia.
+
+Un historial en memoria (`:memory:`, cuando no hay `AUDIT_HISTORY_DB`)
+conserva sólo las últimas `max_audits` auditorías para no crecer sin límite
+en un proceso de larga duración.
+"""
+
+import datetime
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..core.constants import (
+    AUDIT_HISTORY_DB_ENV, AUDIT_HISTORY_MAX_PAGE_SIZE, AUDIT_HISTORY_MEMORY_MAX_AUDITS, AUDIT_HISTORY_PAGE_SIZE
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audits (
+    id INTEGER PRIMARY KEY,
+    repo_url TEXT NOT NULL,
+    branch TEXT,
+    commit_sha TEXT,
+    period TEXT,
+    status TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    duration_ms REAL NOT NULL,
+    timings TEXT NOT NULL,
+    issue_url TEXT,
+    discrepancy_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS discrepancies (
+    id INTEGER PRIMARY KEY,
+    audit_id INTEGER NOT NULL REFERENCES audits(id),
+    type TEXT NOT NULL,
+    severity TEXT,
+    description TEXT,
+    fix TEXT
+);
+CREATE TABLE IF NOT EXISTS totals (
+    audit_id INTEGER NOT NULL REFERENCES audits(id),
+    doc_type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    amount TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS audits_repo_period ON audits (repo_url, period, id);
+CREATE INDEX IF NOT EXISTS audits_period ON audits (period, id);
+CREATE INDEX IF NOT EXISTS discrepancies_audit_type ON discrepancies (audit_id, type);
+CREATE INDEX IF NOT EXISTS discrepancies_type_audit ON discrepancies (type, audit_id);
+CREATE INDEX IF NOT EXISTS totals_audit ON totals (audit_id);
+"""
+
+_AUDIT_COLUMNS = (
+    'id', 'repo_url', 'branch', 'commit_sha', 'period', 'status', 'started_at',
+    'duration_ms', 'timings', 'issue_url', 'discrepancy_count'
+)
+
+def normalize_repo_url(repo_url: str) -> str:
+    """URL del repositorio sin barra final ni sufijo `.git`, en minúsculas."""
+    return repo_url.rstrip('/').removesuffix('.git').lower()
+
+class AuditHistoryStore:
+    """Historial de auditorías sobre una conexión SQLite compartida entre hilos.
+
+    Args:
+        path: Archivo de la base de datos, o `:memory:` para un historial
+            que dura lo que el proceso.
+        max_audits: Auditorías conservadas como máximo; al guardar una nueva
+            se borran las más antiguas. Por defecto sin límite en disco y
+            `AUDIT_HISTORY_MEMORY_MAX_AUDITS` en memoria.
+    """
+
+    def __init__(self, path: str = ':memory:', max_audits: Optional[int] = None):
+        self.path = path
+        if max_audits is None and path == ':memory:':
+            max_audits = AUDIT_HISTORY_MEMORY_MAX_AUDITS
+        self.max_audits = max_audits
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._write_errors = 0
+        with self._lock, self._conn:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+                self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(_SCHEMA)
+
+    def record(self, repo_url: str, branch: Optional[str], commit_sha: Optional[str], status: str,
+               started_at: datetime.datetime, timings: Dict[str, float], discrepancies: List[Dict],
+               issue_url: Optional[str] = None, period: Optional[str] = None,
+               totals: Optional[Dict[str, Dict[str, Any]]] = None) -> Optional[int]:
+        """Guarda una auditoría y devuelve su `id`.
+
+        Args:
+            timings: Milisegundos por etapa del pipeline.
+            totals: Totales parseados por tipo de documento: `{'pl': {nombre: monto}}`.
+
+        Returns:
+            Optional[int]: El `id` asignado, o None si no se pudo escribir (el
+            error se cuenta en `stats()` y no interrumpe la auditoría).
+        """
+        try:
+            with self._lock, self._conn:
+                cursor = self._conn.execute(
+                    'INSERT INTO audits (repo_url, branch, commit_sha, period, status, started_at,'
+                    ' duration_ms, timings, issue_url, discrepancy_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (normalize_repo_url(repo_url), branch, commit_sha, period, status, started_at.isoformat(),
+                     sum(timings.values()), json.dumps(timings), issue_url, len(discrepancies))
+                )
+                audit_id = cursor.lastrowid
+                self._conn.executemany(
+                    'INSERT INTO discrepancies (audit_id, type, severity, description, fix) VALUES (?, ?, ?, ?, ?)',
+                    ((audit_id, item.get('type', ''), item.get('severity'), item.get('description'), item.get('fix'))
+                     for item in discrepancies)
+                )
+                self._conn.executemany(
+                    'INSERT INTO totals (audit_id, doc_type, name, amount) VALUES (?, ?, ?, ?)',
+                    ((audit_id, doc_type, name, str(amount))
+                     for doc_type, values in (totals or {}).items() for name, amount in values.items())
+                )
+                if self.max_audits is not None:
+                    self._prune(audit_id - self.max_audits)
+                return audit_id
+        except sqlite3.Error:
+            with self._lock:
+                self._write_errors += 1
+            return None
+
+    def query(self, repo_url: Optional[str] = None, period: Optional[str] = None, discrepancy_type: Optional[str] = None,
+              status: Optional[str] = None, cursor: Optional[int] = None, limit: int = AUDIT_HISTORY_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Página de auditorías, de la más reciente a la más antigua.
+
+        Args:
+            discrepancy_type: Sólo auditorías con al menos una discrepancia de ese tipo.
+            cursor: `next_cursor` de la página anterior; None para empezar.
+            limit: Tamaño de página, acotado a `AUDIT_HISTORY_MAX_PAGE_SIZE`.
+
+        Returns:
+            Tuple[List[Dict], Optional[int]]: Las auditorías con sus
+            discrepancias y el cursor de la página siguiente (None si no hay más).
+        """
+        limit = max(1, min(limit, AUDIT_HISTORY_MAX_PAGE_SIZE))
+        conditions, params = [], []
+        if repo_url is not None:
+            conditions.append('repo_url = ?')
+            params.append(normalize_repo_url(repo_url))
+        if period is not None:
+            conditions.append('period = ?')
+            params.append(period)
+        if status is not None:
+            conditions.append('status = ?')
+            params.append(status)
+        if discrepancy_type is not None:
+            conditions.append('EXISTS (SELECT 1 FROM discrepancies d WHERE d.audit_id = audits.id AND d.type = ?)')
+            params.append(discrepancy_type)
+        if cursor is not None:
+            conditions.append('id < ?')
+            params.append(cursor)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        sql = f"SELECT {', '.join(_AUDIT_COLUMNS)} FROM audits {where} ORDER BY id DESC LIMIT ?"
+
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, limit + 1)).fetchall()
+            audits = [self._audit(row) for row in rows[:limit]]
+            self._attach_discrepancies(audits)
+        next_cursor = audits[-1]['id'] if len(rows) > limit else None
+        return audits, next_cursor
+
+    def get(self, audit_id: int) -> Optional[Dict[str, Any]]:
+        """Una auditoría con sus discrepancias y totales, o None si no existe."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(_AUDIT_COLUMNS)} FROM audits WHERE id = ?", (audit_id,)).fetchone()
+            if row is None:
+                return None
+            audit = self._audit(row)
+            self._attach_discrepancies([audit])
+            audit['totals'] = {}
+            for doc_type, name, amount in self._conn.execute(
+                    'SELECT doc_type, name, amount FROM totals WHERE audit_id = ? ORDER BY rowid', (audit_id,)):
+                audit['totals'].setdefault(doc_type, {})[name] = amount
+        return audit
+
+    def stats(self) -> Dict[str, int]:
+        """Auditorías guardadas y escrituras fallidas."""
+        with self._lock:
+            count = self._conn.execute('SELECT COUNT(*) FROM audits').fetchone()[0]
+            return {'audits': count, 'write_errors': self._write_errors}
+
+    def close(self) -> None:
+        """Cierra la conexión."""
+        with self._lock:
+            self._conn.close()
+
+    def _prune(self, last_id: int) -> None:
+        """Borra las auditorías con `id` hasta `last_id` y sus filas; los `id` sólo crecen."""
+        if last_id < 1:
+            return
+        self._conn.execute('DELETE FROM discrepancies WHERE audit_id <= ?', (last_id,))
+        self._conn.execute('DELETE FROM totals WHERE audit_id <= ?', (last_id,))
+        self._conn.execute('DELETE FROM audits WHERE id <= ?', (last_id,))
+
+    @staticmethod
+    def _audit(row: sqlite3.Row) -> Dict[str, Any]:
+        """Convierte una fila de `audits` en diccionario."""
+        audit = dict(row)
+        audit['timings'] = json.loads(audit['timings'])
+        return audit
+
+    def _attach_discrepancies(self, audits: Iterable[Dict[str, Any]]) -> None:
+        """Agrega a cada auditoría sus discrepancias con una sola consulta."""
+        by_id = {audit['id']: audit for audit in audits}
+        for audit in by_id.values():
+            audit['discrepancies'] = []
+        if not by_id:
+            return
+        placeholders = ', '.join('?' * len(by_id))
+        for audit_id, type_, severity, description, fix in self._conn.execute(
+                f"SELECT audit_id, type, severity, description, fix FROM discrepancies"
+                f" WHERE audit_id IN ({placeholders}) ORDER BY id", tuple(by_id)):
+            by_id[audit_id]['discrepancies'].append(
+                {'type': type_, 'severity': severity, 'description': description, 'fix': fix}
+            )
+
+_default_store: Optional[AuditHistoryStore] = None
+_default_store_lock = threading.Lock()
+
+def default_history_store() -> AuditHistoryStore:
+    """Historial compartido del proceso; en disco si está definido `AUDIT_HISTORY_DB`."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = AuditHistoryStore(os.getenv(AUDIT_HISTORY_DB_ENV) or ':memory:')
+        return _default_store
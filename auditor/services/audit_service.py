@@ -1,12 +1,18 @@
-from typing import Dict, List, Optional
-from decimal import Decimal
+import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from dataclasses import dataclass
 
 from ..core.models import FinancialDocument, AuditResult
 from ..core.exceptions import ValidationError
-from ..core.constants import TOLERANCE
+from ..core.rules import compile_rules
+from . import metrics, tracing
+from .audit_history import AuditHistoryStore, default_history_store
+from .document_cache import default_cache
 from .document_service import DocumentService
 from .github_service import GitHubService
+from .github_http import track_requests
+from .result_cache import AuditResultCache, default_result_cache, ruleset_hash
+from .stage_limits import default_stage_limits
 
 @dataclass
 class AuditResult:
@@ -14,41 +20,98 @@ class AuditResult:
     status: str
     discrepancies: List[Dict]
     issue_url: Optional[str] = None
+    github_requests: Optional[Dict[str, int]] = None
+    commit_sha: Optional[str] = None
+    cached: bool = False
+    audit_id: Optional[int] = None
 
 class AuditService:
     """Servicio para realizar auditorías financieras."""
 
-    def __init__(self, document_service: Optional[DocumentService] = None, github_service: Optional[GitHubService] = None):
-        """Inicializa el servicio de auditoría."""
-        self.document_service = document_service or DocumentService()
+    def __init__(self, document_service: Optional[DocumentService] = None, github_service: Optional[GitHubService] = None, fixed_point: bool = False, result_cache: Optional[AuditResultCache] = None, history: Optional[AuditHistoryStore] = None):
+        """Inicializa el servicio de auditoría.
+
+        Args:
+            document_service: Servicio de parseo; por defecto uno nuevo con la
+                caché de documentos compartida del proceso.
+            github_service: Servicio de GitHub; por defecto uno nuevo.
+            fixed_point: Si es True, parsea y compara los montos como centavos
+                enteros (`core.fixed_point`) y sólo los reporta como `Decimal`.
+            result_cache: Caché de resultados por commit; por defecto la
+                compartida del proceso.
+            history: Historial donde se guarda cada ejecución; por defecto el
+                compartido del proceso.
+        """
+        self.document_service = document_service or DocumentService(fixed_point=fixed_point, cache=default_cache())
         self.github_service = github_service or GitHubService()
+        self.fixed_point = fixed_point
+        self.result_cache = result_cache or default_result_cache()
+        self.history = history or default_history_store()
+        self.rules = compile_rules(fixed_point=fixed_point)
+
+    def run_audit(self, repo_url: str, branch: str = "main", commit_sha: Optional[str] = None, force_refresh: bool = False) -> AuditResult:
+        """Ejecuta una auditoría financiera completa.
+
+        Con `commit_sha` se audita ese commit en lugar del head de `branch`.
+        Un commit ya auditado con las mismas reglas devuelve el resultado
+        guardado (`cached=True`) salvo con `force_refresh`; el resto de las
+        ejecuciones, exitosas o no, se guardan en el historial (`audit_id`).
+        El resultado incluye en `github_requests` cuántas lecturas de GitHub
+        respondieron 200 y cuántas 304 (servidas de la copia local).
+        """
+        with tracing.span('audit', repo=repo_url, branch=branch) as span, metrics.audit_duration.time(), track_requests() as github_requests:
+            result = self._run_audit(repo_url, branch, commit_sha, force_refresh)
+            span.attributes.update(commit_sha=result.commit_sha, cached=result.cached, discrepancies=len(result.discrepancies), audit_id=result.audit_id)
+            if result.status == 'error':
+                span.status, span.error = 'error', result.discrepancies[0]['description']
+        result.github_requests = dict(github_requests)
+        metrics.audits.inc(status='cached' if result.cached else result.status)
+        return result
 
-    def run_audit(self, repo_url: str, branch: str = "main") -> AuditResult:
-        """Ejecuta una auditoría financiera completa."""
+    def _run_audit(self, repo_url: str, branch: str, commit_sha: Optional[str], force_refresh: bool) -> AuditResult:
+        """Recupera, parsea y compara los documentos y reporta las discrepancias."""
+        started_at = datetime.datetime.now(datetime.timezone.utc)
+        timings: Dict[str, float] = {}
+        parsed: Dict[str, Any] = {}
         try:
-            # 1. Recuperar documentos
-            docs = self.github_service.retrieve_documents(repo_url, branch)
+            limits = default_stage_limits()
             
-            # 2. Parsear documentos
-            pl_data = self.document_service.parse_document(docs['pl'])
-            balance_data = self.document_service.parse_document(docs['balance'])
+            # 1. Resolver el commit y recuperar documentos
+            with limits.stage('retrieve', timings):
+                commit_sha = commit_sha or self.github_service.resolve_commit(repo_url, branch)
+                key = self.result_cache.key(repo_url, commit_sha, ruleset_hash(fixed_point=self.fixed_point))
+                cached = self.result_cache.get(key, force_refresh)
+                if cached is not None:
+                    cached.cached = True
+                    return cached
+                docs = self.github_service.retrieve_documents(repo_url, branch, commit_sha)
             
-            # 3. Comparar documentos
-            discrepancies = self.compare_documents(pl_data, balance_data)
+            with limits.stage('compare', timings):
+                # 2. Parsear documentos
+                parsed['pl'] = pl_data = self.document_service.parse_document(docs['pl'])
+                parsed['balance'] = balance_data = self.document_service.parse_document(docs['balance'])
+                
+                # 3. Comparar documentos
+                discrepancies = self.compare_documents(pl_data, balance_data)
             
             # 4. Crear/actualizar issue
             issue_url = None
             if discrepancies:
-                issue_url = self.github_service.create_or_update_issue(discrepancies, repo_url)
+                with limits.stage('issue', timings):
+                    issue_url = self.github_service.create_or_update_issue(discrepancies, repo_url)
             
-            return AuditResult(
+            result = AuditResult(
                 status="success",
                 discrepancies=discrepancies,
-                issue_url=issue_url
+                issue_url=issue_url,
+                commit_sha=commit_sha
             )
+            result.audit_id = self._record(repo_url, branch, result, started_at, timings, parsed)
+            self.result_cache.put(key, result)
+            return result
             
         except Exception as e:
-            return AuditResult(
+            result = AuditResult(
                 status="error",
                 discrepancies=[{
                     'type': 'system_error',
@@ -56,108 +119,53 @@ class AuditService:
                     'severity': 'high',
                     'fix': 'Contacta al equipo de soporte'
                 }],
-                issue_url=None
+                issue_url=None,
+                commit_sha=commit_sha
             )
+            result.audit_id = self._record(repo_url, branch, result, started_at, timings, parsed)
+            return result
 
+    def _record(self, repo_url: str, branch: str, result: AuditResult, started_at: datetime.datetime, timings: Dict[str, float], parsed: Dict[str, Any]) -> Optional[int]:
+        """Guarda la ejecución en el historial con el período y los totales parseados."""
+        period = next((data.get('period') for data in parsed.values() if data.get('period')), None)
+        totals = {doc_type: dict(data.get('totals') or {}) for doc_type, data in parsed.items()}
+        return self.history.record(
+            repo_url, branch, result.commit_sha, result.status, started_at, timings,
+            result.discrepancies, issue_url=result.issue_url, period=period, totals=totals
+        )
+
+    @tracing.span('financial_comparison')
+    @metrics.comparison_duration.time()
     def compare_documents(self, pl_data: Dict, balance_data: Dict) -> List[Dict]:
         """Compara los documentos financieros y detecta inconsistencias."""
-        discrepancies = []
-        
-        # Verificar que los períodos coincidan
-        if pl_data.get('period') != balance_data.get('period'):
-            discrepancies.append({
-                'type': 'period_mismatch',
-                'description': f"Los períodos no coinciden: P&L ({pl_data.get('period')}) vs Balance ({balance_data.get('period')})",
-                'severity': 'high',
-                'fix': 'Asegurarse de que ambos documentos correspondan al mismo período contable.'
-            })
-        
-        # Verificar que la utilidad neta coincida con la utilidad del período en el balance
-        pl_net_income = self._find_net_income(pl_data)
-        balance_net_income = self._find_net_income(balance_data)
-        
-        if pl_net_income is not None and balance_net_income is not None:
-            if abs(pl_net_income - balance_net_income) > TOLERANCE:
-                discrepancies.append({
-                    'type': 'income_mismatch',
-                    'description': f"La utilidad neta no coincide: P&L (${pl_net_income}) vs Balance (${balance_net_income})",
-                    'severity': 'high',
-                    'fix': f"Ajustar la utilidad neta en el Balance General para que coincida con el P&L: ${pl_net_income}"
-                })
-        
-        # Verificar cambios en ganancias retenidas
-        retained_earnings = self._find_retained_earnings(balance_data)
-        if retained_earnings is not None and pl_net_income is not None:
-            expected_retained_earnings = retained_earnings + pl_net_income
-            if abs(expected_retained_earnings - retained_earnings) > TOLERANCE:
-                discrepancies.append({
-                    'type': 'retained_earnings_mismatch',
-                    'description': f"Las ganancias retenidas no reflejan la utilidad del período. Actual: ${retained_earnings}, Esperado: ${expected_retained_earnings}",
-                    'severity': 'high',
-                    'fix': f"Ajustar las ganancias retenidas para incluir la utilidad del período: ${expected_retained_earnings}"
-                })
-        
-        # Verificar que los totales sean consistentes
-        pl_totals = pl_data.get('totals', {})
-        balance_totals = balance_data.get('totals', {})
-        
-        # Verificar que los ingresos totales sean razonables en comparación con los activos
-        if 'Ingresos Totales' in pl_totals and 'Total Activos' in balance_totals:
-            revenue = pl_totals['Ingresos Totales']
-            assets = balance_totals['Total Activos']
-            if revenue > assets * Decimal('2'):
-                discrepancies.append({
-                    'type': 'unusual_ratio',
-                    'description': f"Los ingresos (${revenue}) son inusualmente altos en comparación con los activos (${assets})",
-                    'severity': 'medium',
-                    'fix': 'Verificar que todos los activos estén correctamente registrados y valorados.'
-                })
-        
-        # Verificar que los gastos totales sean razonables en comparación con los ingresos
-        if 'Gastos Totales' in pl_totals and 'Ingresos Totales' in pl_totals:
-            expenses = pl_totals['Gastos Totales']
-            revenue = pl_totals['Ingresos Totales']
-            if expenses > revenue:
-                discrepancies.append({
-                    'type': 'expense_ratio',
-                    'description': f"Los gastos (${expenses}) son mayores que los ingresos (${revenue})",
-                    'severity': 'high',
-                    'fix': 'Revisar y validar todos los gastos registrados. Verificar si hay gastos duplicados o incorrectamente clasificados.'
-                })
-        
-        # Verificar que el balance esté balanceado
-        if 'Total Activos' in balance_totals and 'Total Pasivos' in balance_totals and 'Total Capital Contable' in balance_totals:
-            assets = balance_totals['Total Activos']
-            liabilities = balance_totals['Total Pasivos']
-            equity = balance_totals['Total Capital Contable']
-            
-            if abs(assets - (liabilities + equity)) > TOLERANCE:
-                discrepancies.append({
-                    'type': 'unbalanced',
-                    'description': f"El balance no está balanceado: Activos (${assets}) ≠ Pasivos (${liabilities}) + Capital (${equity})",
-                    'severity': 'high',
-                    'fix': f"Ajustar las cuentas para mantener la ecuación contable: A = P + C. Diferencia actual: ${abs(assets - (liabilities + equity))}"
-                })
-        
+        discrepancies = self.rules.evaluate(pl_data, balance_data)
+        metrics.record_discrepancies(discrepancies)
+        tracing.record_comparison(discrepancies)
         return discrepancies
 
-    def _find_net_income(self, data: Dict) -> Optional[Decimal]:
-        """Busca la utilidad neta en los datos."""
-        # Buscar en totales
-        for name, amount in data.get('totals', {}).items():
-            if 'utilidad' in name.lower() or 'net' in name.lower():
-                return amount
-        
-        # Buscar en capital contable
-        for item in data.get('capital_contable', []):
-            if 'utilidad' in item.name.lower() or 'net' in item.name.lower():
-                return item.amount
-        
-        return None
+    def audit_periods(self, documents: Sequence[Tuple[FinancialDocument, FinancialDocument]]) -> List[Dict[str, Any]]:
+        """Audita varios períodos de una vez, por ejemplo años de trimestres al incorporar un cliente.
+
+        Args:
+            documents: Pares `(P&L, Balance)`, uno por período.
+
+        Returns:
+            Por cada par, en el mismo orden, `{'period': ..., 'discrepancies': [...]}`
+            con el período del P&L (o del Balance si el P&L no lo trae).
+        """
+        parse = self.document_service.parse_document
+        parsed = [(parse(pl), parse(balance)) for pl, balance in documents]
+        results = self.compare_periods(parsed)
+        return [
+            {'period': pl_data.get('period') or balance_data.get('period'), 'discrepancies': discrepancies}
+            for (pl_data, balance_data), discrepancies in zip(parsed, results)
+        ]
 
-    def _find_retained_earnings(self, data: Dict) -> Optional[Decimal]:
-        """Busca las ganancias retenidas en los datos."""
-        for item in data.get('capital_contable', []):
-            if 'retenidas' in item.name.lower() or 'retained' in item.name.lower():
-                return item.amount
-        return None 
\ No newline at end of file
+    def compare_periods(self, pairs: Sequence[Tuple[Dict, Dict]]) -> List[List[Dict]]:
+        """Como `compare_documents` para cada par, con cada regla evaluada una vez sobre todos los períodos."""
+        with tracing.span('financial_comparison', periods=len(pairs)), metrics.comparison_duration.time():
+            results = self.rules.evaluate_batch(pairs)
+            for discrepancies in results:
+                metrics.record_discrepancies(discrepancies)
+            tracing.record_comparison([discrepancy for discrepancies in results for discrepancy in discrepancies])
+        return results
@@ -0,0 +1,154 @@
+"""Caché de documentos parseados direccionada por contenido.
+
+Las claves combinan el SHA del blob de git del documento (o el mismo hash
+calculado sobre el contenido, para archivos locales) con la versión del
+parser, de modo que un archivo sin cambios entre dos pushes no se vuelve a
+descargar ni a parsear. Hay dos niveles: un LRU en memoria acotado en bytes
+y un directorio en disco que sobrevive a los reinicios del contenedor.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from ..core.models import LineItemTable
+from ..core.constants import PARSED_CACHE_MAX_BYTES, PARSED_CACHE_DIR_ENV
+
+def blob_sha(content: str) -> str:
+    """SHA del blob de git de `content`, el mismo que reporta GitHub para el archivo."""
+    data = content.encode('utf-8')
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+class ParsedDocumentCache:
+    """LRU en memoria con presupuesto de bytes respaldado por un directorio en disco.
+
+    Es segura para usarse desde varios hilos. Las entradas se escriben en disco
+    de forma atómica; una entrada ilegible se descarta y cuenta como fallo.
+
+    Args:
+        max_bytes: Memoria máxima estimada (`LineItemTable.nbytes`) de las
+            tablas retenidas; una tabla más grande sólo se guarda en disco.
+        directory: Directorio del nivel en disco, o None para sólo memoria.
+    """
+
+    def __init__(self, max_bytes: int = PARSED_CACHE_MAX_BYTES, directory: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._entries: 'OrderedDict[str, Tuple[LineItemTable, int]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'disk_errors': 0}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str) -> Optional[LineItemTable]:
+        """Devuelve la tabla de `key`, buscando primero en memoria y luego en disco."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters['hits'] += 1
+                return entry[0]
+
+        table = self._read(key)
+        with self._lock:
+            if table is None:
+                self._counters['misses'] += 1
+                return None
+            self._counters['disk_hits'] += 1
+            self._remember(key, table)
+        return table
+
+    def put(self, key: str, table: LineItemTable) -> None:
+        """Guarda la tabla de `key` en ambos niveles."""
+        with self._lock:
+            self._remember(key, table)
+        self._write(key, table)
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de aciertos, fallos y desalojos, y ocupación de la memoria."""
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), bytes=self._bytes)
+
+    def clear(self) -> None:
+        """Vacía el nivel en memoria; el disco se conserva."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remember(self, key: str, table: LineItemTable) -> None:
+        """Agrega la tabla al LRU y desaloja las menos usadas hasta respetar el presupuesto."""
+        size = table.nbytes
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (table, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self._counters['evictions'] += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def _read(self, key: str) -> Optional[LineItemTable]:
+        """Lee la tabla de `key` del disco, si existe y es válida."""
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as fh:
+                table = pickle.load(fh)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self._discard(path)
+            return None
+        if not isinstance(table, LineItemTable):
+            self._discard(path)
+            return None
+        return table
+
+    def _write(self, key: str, table: LineItemTable) -> None:
+        """Escribe la tabla en disco con un archivo temporal y `os.replace`."""
+        if not self.directory:
+            return
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as fh:
+                    pickle.dump(table, fh, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, self._path(key))
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except Exception:
+            with self._lock:
+                self._counters['disk_errors'] += 1
+
+    def _discard(self, path: str) -> None:
+        """Elimina una entrada dañada del disco."""
+        with self._lock:
+            self._counters['disk_errors'] += 1
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+_default_cache: Optional[ParsedDocumentCache] = None
+_default_lock = threading.Lock()
+
+def default_cache() -> ParsedDocumentCache:
+    """Caché compartida del proceso; usa disco si está definido `AUDITOR_CACHE_DIR`."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ParsedDocumentCache(directory=os.getenv(PARSED_CACHE_DIR_ENV) or None)
+        return _default_cache
@@ -1,23 +1,91 @@
-from typing import Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
 import pandas as pd
 from io import StringIO
-import re
 from decimal import Decimal, InvalidOperation
 
-from ..core.models import FinancialLineItem, FinancialDocument
+from ..core.models import FinancialDocument, LineItemTable, LineItemTableBuilder
 from ..core.exceptions import DocumentParseError
 from ..core.constants import (
     FORMAT_MARKDOWN, FORMAT_CSV,
     CATEGORY_REVENUE, CATEGORY_EXPENSE,
     CATEGORY_ASSET, CATEGORY_LIABILITY, CATEGORY_EQUITY,
-    MIN_AMOUNT, MAX_AMOUNT
+    MIN_AMOUNT, MAX_AMOUNT, PARSER_VERSION
 )
+from ..core.fixed_point import MIN_CENTS, MAX_CENTS, parse_cents, parse_cents_column, from_cents
+from . import metrics, tracing
+from .document_cache import ParsedDocumentCache, blob_sha
+from ..core.statement_tokenizer import TextSource, ColumnsEvent, PeriodEvent, tokenize_statement, parse_amount
+
+# Sección Markdown -> (clave en los datos parseados, categoría de las partidas)
+PL_MARKDOWN_SECTIONS = {
+    'ingresos': ('revenue', CATEGORY_REVENUE),
+    'gastos': ('expenses', CATEGORY_EXPENSE),
+}
+BALANCE_MARKDOWN_SECTIONS = {
+    'activos': ('activos', CATEGORY_ASSET),
+    'pasivos': ('pasivos', CATEGORY_LIABILITY),
+    'capital contable': ('capital_contable', CATEGORY_EQUITY),
+}
+
+# Categoría CSV (en minúsculas) -> (clave en los datos parseados, categoría)
+PL_CSV_CATEGORIES = {
+    'revenue': ('revenue', CATEGORY_REVENUE),
+    'expense': ('expenses', CATEGORY_EXPENSE),
+}
+BALANCE_CSV_CATEGORIES = {
+    'asset': ('activos', CATEGORY_ASSET),
+    'liability': ('pasivos', CATEGORY_LIABILITY),
+    'equity': ('capital_contable', CATEGORY_EQUITY),
+}
+CSV_TOTAL_CATEGORIES = ['total', 'totales']
 
 class DocumentService:
     """Servicio para parsear documentos financieros."""
 
-    def parse_document(self, document: FinancialDocument) -> Dict:
-        """Parsea un documento financiero."""
+    def __init__(self, fixed_point: bool = False, cache: Optional[ParsedDocumentCache] = None):
+        """Inicializa el servicio de documentos.
+
+        Args:
+            fixed_point: Si es True, los montos se leen directamente en centavos
+                enteros (`core.fixed_point`) sin construir un `Decimal` por fila;
+                los decimales más allá del centavo se redondean.
+            cache: Caché de documentos parseados, o None para parsear siempre.
+        """
+        self.fixed_point = fixed_point
+        self.cache = cache
+
+    def parse_document(self, document: FinancialDocument) -> LineItemTable:
+        """Parsea un documento financiero en una tabla de partidas.
+
+        Con caché, el documento se identifica por su SHA de blob (o el hash
+        equivalente del contenido) y la versión del parser, y se devuelve una
+        copia (`LineItemTable.copy`) para que quien la modifique no altere la
+        tabla compartida.
+        """
+        with tracing.span('document_parsing', doc_type=document.doc_type, file_type=document.file_format, file_size=len(document.content.encode('utf-8'))) as span, \
+                metrics.track(metrics.document_parsing_duration, metrics.document_parsing_success, metrics.document_parsing_failure, doc_type=document.doc_type):
+            if self.cache is None:
+                table = self._parse_document(document)
+            else:
+                key = self._cache_key(document)
+                table = self.cache.get(key)
+                span.set_attribute('cache_hit', table is not None)
+                if table is None:
+                    table = self._parse_document(document)
+                    self.cache.put(key, table)
+                table = table.copy()
+            span.set_attribute('parsed_items', len(table.name_codes))
+            return table
+
+    def _cache_key(self, document: FinancialDocument) -> str:
+        """Clave de caché: versión del parser, tipo, formato, modo de montos y SHA."""
+        mode = 'cents' if self.fixed_point else 'decimal'
+        sha = document.sha or blob_sha(document.content)
+        return f"v{PARSER_VERSION}-{document.doc_type}-{document.file_format}-{mode}-{sha}"
+
+    def _parse_document(self, document: FinancialDocument) -> LineItemTable:
+        """Parsea un documento según su tipo y formato."""
         if document.file_format == FORMAT_MARKDOWN:
             if document.doc_type == 'pl':
                 return self._parse_pl_markdown(document.content)
@@ -29,232 +97,180 @@ class DocumentService:
             else:
                 return self._parse_balance_csv(document.content)
 
-    def _parse_pl_markdown(self, content: str) -> Dict:
+    def _parse_pl_markdown(self, content: TextSource) -> LineItemTable:
         """Parsea un P&L en formato Markdown."""
         try:
-            lines = content.split('\n')
-            data = {
-                'period': None,
-                'revenue': [],
-                'expenses': [],
-                'totals': {}
-            }
-            
-            current_section = None
-            period_match = re.search(r'Periodo:\s*([^\n]+)', content)
-            if period_match:
-                data['period'] = period_match.group(1).strip()
-            
-            for line in lines:
-                line = line.strip()
-                
-                if line.startswith('##'):
-                    current_section = line.replace('#', '').strip().lower()
-                    continue
-                
-                if not line or line.startswith('|--') or line.startswith('| Concepto'):
-                    continue
-                
-                if line.startswith('|'):
-                    cells = [cell.strip() for cell in line.split('|')[1:-1]]
-                    if len(cells) >= 2:
-                        name = cells[0]
-                        try:
-                            amount = Decimal(cells[1].replace('$', '').replace(',', '').strip())
-                            if not MIN_AMOUNT <= amount <= MAX_AMOUNT:
-                                continue
-                            
-                            if current_section == 'ingresos':
-                                data['revenue'].append(FinancialLineItem(
-                                    name=name,
-                                    amount=amount,
-                                    category=CATEGORY_REVENUE,
-                                    period=data['period']
-                                ))
-                            elif current_section == 'gastos':
-                                data['expenses'].append(FinancialLineItem(
-                                    name=name,
-                                    amount=amount,
-                                    category=CATEGORY_EXPENSE,
-                                    period=data['period']
-                                ))
-                            elif current_section == 'totales':
-                                data['totals'][name] = amount
-                        except (ValueError, InvalidOperation):
-                            continue
-            
-            if not data['period']:
-                raise DocumentParseError("No se encontró el período en el documento")
-            
-            return data
-            
+            return self._parse_markdown(content, PL_MARKDOWN_SECTIONS)
         except Exception as e:
             raise DocumentParseError(f"Error al parsear P&L en Markdown: {str(e)}")
 
-    def _parse_balance_markdown(self, content: str) -> Dict:
+    def _parse_balance_markdown(self, content: TextSource) -> LineItemTable:
         """Parsea un Balance General en formato Markdown."""
         try:
-            lines = content.split('\n')
-            data = {
-                'period': None,
-                'activos': [],
-                'pasivos': [],
-                'capital_contable': [],
-                'totals': {}
-            }
-            
-            current_section = None
-            period_match = re.search(r'Periodo:\s*([^\n]+)', content)
-            if period_match:
-                data['period'] = period_match.group(1).strip()
-            
-            for line in lines:
-                line = line.strip()
-                
-                if line.startswith('##'):
-                    current_section = line.replace('#', '').strip().lower()
-                    continue
-                
-                if not line or line.startswith('|--') or line.startswith('| Concepto'):
-                    continue
-                
-                if line.startswith('|'):
-                    cells = [cell.strip() for cell in line.split('|')[1:-1]]
-                    if len(cells) >= 2:
-                        name = cells[0]
-                        try:
-                            amount = Decimal(cells[1].replace('$', '').replace(',', '').strip())
-                            if not MIN_AMOUNT <= amount <= MAX_AMOUNT:
-                                continue
-                            
-                            if current_section == 'activos':
-                                data['activos'].append(FinancialLineItem(
-                                    name=name,
-                                    amount=amount,
-                                    category=CATEGORY_ASSET,
-                                    period=data['period']
-                                ))
-                            elif current_section == 'pasivos':
-                                data['pasivos'].append(FinancialLineItem(
-                                    name=name,
-                                    amount=amount,
-                                    category=CATEGORY_LIABILITY,
-                                    period=data['period']
-                                ))
-                            elif current_section == 'capital contable':
-                                data['capital_contable'].append(FinancialLineItem(
-                                    name=name,
-                                    amount=amount,
-                                    category=CATEGORY_EQUITY,
-                                    period=data['period']
-                                ))
-                            elif current_section == 'totales':
-                                data['totals'][name] = amount
-                        except (ValueError, InvalidOperation):
-                            continue
-            
-            if not data['period']:
-                raise DocumentParseError("No se encontró el período en el documento")
-            
-            return data
-            
+            return self._parse_markdown(content, BALANCE_MARKDOWN_SECTIONS)
         except Exception as e:
             raise DocumentParseError(f"Error al parsear Balance en Markdown: {str(e)}")
 
-    def _parse_pl_csv(self, content: str) -> Dict:
+    def _parse_markdown(self, content: TextSource, sections: Dict[str, Tuple[str, str]]) -> LineItemTable:
+        """Arma la tabla de partidas con los eventos del tokenizador en una sola pasada.
+
+        `sections` asocia el nombre de cada sección con la clave de los datos y
+        la categoría de sus partidas; la sección 'totales' va a `totals`. Los
+        montos de cada bloque de filas se convierten juntos con
+        `parse_cents_column`; sólo las celdas que no tienen la forma canónica
+        pasan por la conversión fila por fila.
+        """
+        builder = LineItemTableBuilder(dict(sections.values()))
+        parse, low, high, extend = self._amount_parser(builder)
+        period = None
+        totals = {}
+
+        for event in tokenize_statement(content, columns=True):
+            if type(event) is ColumnsEvent:
+                target = sections.get(event.section)
+                if target is None:
+                    if event.section == 'totales':
+                        names, amounts = self._parse_rows(event.names, event.values, parse, low, high)
+                        totals.update(zip(names, map(self._report_amount, amounts)))
+                    continue
+
+                cents, exponents, parsed = parse_cents_column(event.values)
+                # Tramos consecutivos de celdas convertidas o pendientes, en el orden del documento
+                bounds = [0, *(np.flatnonzero(parsed[1:] != parsed[:-1]) + 1).tolist(), len(parsed)]
+                for start, stop in zip(bounds, bounds[1:]):
+                    if parsed[start]:
+                        builder.extend_units(target[0], event.names[start:stop], cents[start:stop], None if self.fixed_point else exponents[start:stop])
+                    else:
+                        extend(target[0], *self._parse_rows(event.names[start:stop], event.values[start:stop], parse, low, high))
+            elif type(event) is PeriodEvent:
+                period = event.value
+
+        if not period:
+            raise DocumentParseError("No se encontró el período en el documento")
+
+        return builder.build(period, totals)
+
+    def _parse_rows(self, names: List[str], values: List[str], parse: Callable, low: Any, high: Any) -> Tuple[List[str], List[Any]]:
+        """Convierte las celdas una por una; omite las inválidas o fuera de rango."""
+        kept = []
+        amounts = []
+        for name, value in zip(names, values):
+            try:
+                amount = parse(value)
+            except (ValueError, InvalidOperation):
+                continue
+            if not low <= amount <= high:
+                continue
+            kept.append(name)
+            amounts.append(amount)
+        return kept, amounts
+
+    def _amount_parser(self, builder: LineItemTableBuilder) -> Tuple[Callable, Any, Any, Callable]:
+        """Conversión de celdas, límites de rango y método del builder según el modo de montos."""
+        if self.fixed_point:
+            return parse_cents, MIN_CENTS, MAX_CENTS, builder.extend_cents
+        return parse_amount, MIN_AMOUNT, MAX_AMOUNT, builder.extend
+
+    def _report_amount(self, amount: Any) -> Decimal:
+        """Monto de un total como `Decimal`, la representación que se reporta."""
+        return from_cents(amount) if self.fixed_point else amount
+
+    def _parse_pl_csv(self, content: str) -> LineItemTable:
         """Parsea un P&L en formato CSV."""
         try:
             df = pd.read_csv(StringIO(content))
-            data = {
-                'period': None,
-                'revenue': [],
-                'expenses': [],
-                'totals': {}
-            }
             
             # Buscar período
             period_col = df.columns[df.columns.str.contains('periodo', case=False)][0]
-            data['period'] = df[period_col].iloc[0]
-            
-            for _, row in df.iterrows():
-                try:
-                    amount = Decimal(str(row['Amount']).replace('$', '').replace(',', ''))
-                    if not MIN_AMOUNT <= amount <= MAX_AMOUNT:
-                        continue
-                    
-                    if row['Category'].lower() == 'revenue':
-                        data['revenue'].append(FinancialLineItem(
-                            name=row['Item'],
-                            amount=amount,
-                            category=CATEGORY_REVENUE,
-                            period=data['period']
-                        ))
-                    elif row['Category'].lower() == 'expense':
-                        data['expenses'].append(FinancialLineItem(
-                            name=row['Item'],
-                            amount=amount,
-                            category=CATEGORY_EXPENSE,
-                            period=data['period']
-                        ))
-                    elif row['Category'].lower() in ['total', 'totales']:
-                        data['totals'][row['Item']] = amount
-                except (ValueError, InvalidOperation, KeyError):
-                    continue
+            period = df[period_col].iloc[0]
             
-            return data
+            return self._parse_csv_rows(df, period, PL_CSV_CATEGORIES)
             
         except Exception as e:
             raise DocumentParseError(f"Error al parsear P&L en CSV: {str(e)}")
 
-    def _parse_balance_csv(self, content: str) -> Dict:
+    def _parse_balance_csv(self, content: str) -> LineItemTable:
         """Parsea un Balance General en formato CSV."""
         try:
             df = pd.read_csv(StringIO(content))
-            data = {
-                'period': None,
-                'activos': [],
-                'pasivos': [],
-                'capital_contable': [],
-                'totals': {}
-            }
             
             # Buscar período
             period_col = df.columns[df.columns.str.contains('periodo', case=False)][0]
-            data['period'] = df[period_col].iloc[0]
+            period = df[period_col].iloc[0]
             
-            for _, row in df.iterrows():
-                try:
-                    amount = Decimal(str(row['Amount']).replace('$', '').replace(',', ''))
-                    if not MIN_AMOUNT <= amount <= MAX_AMOUNT:
-                        continue
-                    
-                    if row['Category'].lower() == 'asset':
-                        data['activos'].append(FinancialLineItem(
-                            name=row['Item'],
-                            amount=amount,
-                            category=CATEGORY_ASSET,
-                            period=data['period']
-                        ))
-                    elif row['Category'].lower() == 'liability':
-                        data['pasivos'].append(FinancialLineItem(
-                            name=row['Item'],
-                            amount=amount,
-                            category=CATEGORY_LIABILITY,
-                            period=data['period']
-                        ))
-                    elif row['Category'].lower() == 'equity':
-                        data['capital_contable'].append(FinancialLineItem(
-                            name=row['Item'],
-                            amount=amount,
-                            category=CATEGORY_EQUITY,
-                            period=data['period']
-                        ))
-                    elif row['Category'].lower() in ['total', 'totales']:
-                        data['totals'][row['Item']] = amount
-                except (ValueError, InvalidOperation, KeyError):
-                    continue
-            
-            return data
+            return self._parse_csv_rows(df, period, BALANCE_CSV_CATEGORIES)
             
         except Exception as e:
-            raise DocumentParseError(f"Error al parsear Balance en CSV: {str(e)}") 
\ No newline at end of file
+            raise DocumentParseError(f"Error al parsear Balance en CSV: {str(e)}") 
+
+    def _parse_csv_rows(self, df: pd.DataFrame, period: str, categories: Dict[str, Tuple[str, str]]) -> LineItemTable:
+        """Arma la tabla de partidas de un CSV con operaciones por columna.
+
+        Equivale a recorrer las filas en orden con
+        `Decimal(str(row['Amount']).replace('$', '').replace(',', ''))`,
+        el filtro `MIN_AMOUNT`/`MAX_AMOUNT` y `row['Category'].lower()`: se
+        omiten las filas sin columnas o con montos inválidos, y una categoría
+        que no es texto en una fila con monto válido aborta el parseo. Los
+        montos se convierten juntos con `parse_cents_column`; sólo los que no
+        tienen la forma canónica y los totales pasan por la conversión fila por
+        fila.
+        """
+        builder = LineItemTableBuilder(dict(categories.values()))
+        parse, low, high, extend = self._amount_parser(builder)
+        totals = {}
+        if df.empty or 'Amount' not in df.columns or 'Category' not in df.columns:
+            return builder.build(period, totals)
+
+        # `parse_cents_column` y `parse` ya descartan `$` y `,`
+        amount_values = df['Amount'].map(str).to_numpy()
+        cents, exponents, parsed = parse_cents_column(amount_values.tolist())
+
+        raw_categories = df['Category']
+        if pd.api.types.is_object_dtype(raw_categories) or pd.api.types.is_string_dtype(raw_categories):
+            lowered = raw_categories.str.lower()
+        else:
+            lowered = pd.Series(None, index=df.index, dtype=object)
+        not_text = lowered.isna().to_numpy()
+        section_keys = lowered.map({name: key for name, (key, _) in categories.items()}).to_numpy()
+        is_total = lowered.isin(CSV_TOTAL_CATEGORIES).to_numpy()
+        wanted = pd.notna(section_keys) | is_total | not_text
+
+        # Montos fila por fila: los que la conversión por columna no reconoce y los totales
+        amounts = {}
+        for position in np.flatnonzero(wanted & (~parsed | is_total)).tolist():
+            try:
+                amount = parse(amount_values[position])
+                if not low <= amount <= high:
+                    continue
+            except (ValueError, InvalidOperation):
+                continue
+            amounts[position] = amount
+        valid = parsed.copy()
+        valid[list(amounts)] = True
+
+        invalid = np.flatnonzero(valid & not_text)
+        if len(invalid):
+            position = int(invalid[0])
+            category = raw_categories.iloc[position]
+            raise DocumentParseError(f"Categoría inválida en la fila {position + 1}: {category!r}")
+        if 'Item' not in df.columns:
+            return builder.build(period, totals)
+
+        names = df['Item'].to_numpy()
+        total_rows = np.flatnonzero(valid & is_total)
+        for name, position in zip(names[total_rows].tolist(), total_rows.tolist()):
+            totals[name] = self._report_amount(amounts[position])
+        for key, _ in categories.values():
+            positions = np.flatnonzero(valid & (section_keys == key))
+            if not len(positions):
+                continue
+            # Tramos consecutivos convertidos por columna o fila por fila, en el orden del archivo
+            by_column = parsed[positions]
+            bounds = [0, *(np.flatnonzero(by_column[1:] != by_column[:-1]) + 1).tolist(), len(positions)]
+            for start, stop in zip(bounds, bounds[1:]):
+                run = positions[start:stop]
+                if by_column[start]:
+                    builder.extend_units(key, names[run].tolist(), cents[run], None if self.fixed_point else exponents[run])
+                else:
+                    extend(key, names[run].tolist(), [amounts[position] for position in run.tolist()])
+        return builder.build(period, totals)
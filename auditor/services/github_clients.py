@@ -0,0 +1,104 @@
+"""Registro de clientes de GitHub compartidos por todo el proceso.
+
+Cada combinación de token y URL base tiene un único cliente de PyGithub con
+un pool de conexiones keep-alive y lecturas condicionales (ver
+`github_http`), de modo que los servicios, los agentes y las funciones de
+`auditor.agent` reutilizan las conexiones TLS entre auditorías. Los objetos
+`Repository` se guardan por cliente durante `GITHUB_REPO_CACHE_TTL` segundos
+para no repetir `get_repo` en cada auditoría.
+"""
+
+import hashlib
+import threading
+import time
+import weakref
+from typing import Callable, Dict, Optional, Tuple
+
+from github import Auth, Github
+from github.Repository import Repository
+
+from ..core.constants import GITHUB_API_URL, GITHUB_POOL_SIZE, GITHUB_REPO_CACHE_TTL
+from .github_http import enable_conditional_requests
+
+class GitHubClientRegistry:
+    """Clientes de GitHub y repositorios resueltos, seguros entre hilos.
+
+    Args:
+        pool_size: Conexiones keep-alive por cliente.
+        repo_ttl: Segundos que se reutiliza un `Repository` ya resuelto.
+        clock: Reloj monotónico, reemplazable en pruebas.
+    """
+
+    def __init__(self, pool_size: int = GITHUB_POOL_SIZE, repo_ttl: float = GITHUB_REPO_CACHE_TTL, clock: Callable[[], float] = time.monotonic):
+        self.pool_size = pool_size
+        self.repo_ttl = repo_ttl
+        self.clock = clock
+        self._clients: Dict[Tuple[str, str], Github] = {}
+        # Repositorios por cliente; los clientes ajenos al registro (p. ej.
+        # mocks en pruebas) se liberan junto con sus repositorios
+        self._repos: 'weakref.WeakKeyDictionary[Github, Dict[str, Tuple[Repository, float]]]' = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._counters = {'clients': 0, 'repo_hits': 0, 'repo_misses': 0}
+
+    def client(self, token: str, base_url: str = GITHUB_API_URL) -> Github:
+        """Devuelve el cliente compartido de `token`, creándolo la primera vez."""
+        key = (hashlib.sha256(token.encode('utf-8')).hexdigest(), base_url)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = enable_conditional_requests(Github(auth=Auth.Token(token), base_url=base_url, pool_size=self.pool_size))
+                self._clients[key] = client
+                self._counters['clients'] += 1
+            return client
+
+    def repository(self, client: Github, full_name: str) -> Repository:
+        """Devuelve `owner/repo` resuelto con `client`, reutilizándolo mientras no expire."""
+        now = self.clock()
+        with self._lock:
+            cached = self._repos.get(client, {}).get(full_name)
+            if cached is not None and cached[1] > now:
+                self._counters['repo_hits'] += 1
+                return cached[0]
+            self._counters['repo_misses'] += 1
+
+        # La consulta se hace fuera del candado; dos hilos pueden resolver el
+        # mismo repositorio a la vez y el segundo simplemente lo reemplaza
+        repo = client.get_repo(full_name, lazy=True)
+        with self._lock:
+            self._repos.setdefault(client, {})[full_name] = (repo, now + self.repo_ttl)
+        return repo
+
+    def invalidate(self, full_name: Optional[str] = None) -> None:
+        """Descarta un repositorio resuelto (o todos) en todos los clientes."""
+        with self._lock:
+            for repos in self._repos.values():
+                if full_name is None:
+                    repos.clear()
+                else:
+                    repos.pop(full_name, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Clientes creados y aciertos/fallos de la caché de repositorios."""
+        with self._lock:
+            return dict(self._counters)
+
+    def clear(self) -> None:
+        """Cierra los clientes y vacía el registro."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._repos = weakref.WeakKeyDictionary()
+            self._counters = {'clients': 0, 'repo_hits': 0, 'repo_misses': 0}
+        for client in clients:
+            client.close()
+
+_default_registry: Optional[GitHubClientRegistry] = None
+_default_registry_lock = threading.Lock()
+
+def default_registry() -> GitHubClientRegistry:
+    """Registro de clientes compartido por el proceso."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = GitHubClientRegistry()
+        return _default_registry
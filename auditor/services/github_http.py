@@ -0,0 +1,302 @@
+"""Peticiones condicionales (ETag / If-None-Match) para las lecturas de GitHub.
+
+Cada respuesta 200 de un GET que trae `ETag` o `Last-Modified` se guarda junto
+con sus validadores; la siguiente lectura de la misma URL envía
+`If-None-Match`/`If-Modified-Since` y, si GitHub contesta 304 (que no consume
+cuota de la API), se entrega a PyGithub la copia local como si fuera un 200.
+Así se cubren las lecturas de repositorio, árbol, contenidos y listados de
+issues sin cambiar el código que las usa.
+
+Las respuestas se cuentan por proceso y, dentro de `track_requests`, por
+auditoría. Todas las peticiones de los clientes así configurados alimentan
+además las métricas `github_api_*` de `/metrics`.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from github import Github
+from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass, RequestsResponse
+
+from ..core.constants import GITHUB_CONDITIONAL_CACHE_MAX_BYTES
+from ..core.exceptions import ConfigurationError
+from . import metrics
+
+# Cabeceras de la copia local que no aplican al cuerpo ya decodificado
+_BODY_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+# Contadores de la auditoría en curso (ver `track_requests`)
+_current_counts: ContextVar[Optional[Dict[str, int]]] = ContextVar('github_request_counts', default=None)
+
+def _new_counts() -> Dict[str, int]:
+    """Contadores vacíos: respuestas 200, 304 servidas de la copia local y otras."""
+    return {'ok': 0, 'not_modified': 0, 'other': 0}
+
+class _StoredResponse(NamedTuple):
+    """Respuesta 200 guardada con sus validadores."""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    headers: Dict[str, str]
+    content: bytes
+    encoding: Optional[str]
+
+class ConditionalCache:
+    """LRU de respuestas validables, acotado en bytes y seguro entre hilos.
+
+    Las claves combinan la URL, la cabecera `Accept` y un hash de la cabecera
+    `Authorization`, de modo que un token nunca recibe la copia obtenida con
+    otro.
+    """
+
+    def __init__(self, max_bytes: int = GITHUB_CONDITIONAL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Tuple[str, str, str], _StoredResponse]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counts = _new_counts()
+
+    @staticmethod
+    def key(request: requests.PreparedRequest) -> Tuple[str, str, str]:
+        """Clave de caché de una petición."""
+        authorization = request.headers.get('Authorization', '')
+        return (
+            request.url,
+            request.headers.get('Accept', ''),
+            hashlib.sha256(authorization.encode('utf-8')).hexdigest()
+        )
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[_StoredResponse]:
+        """Devuelve la respuesta guardada para `key`, si existe."""
+        with self._lock:
+            stored = self._entries.get(key)
+            if stored is not None:
+                self._entries.move_to_end(key)
+            return stored
+
+    def put(self, key: Tuple[str, str, str], stored: _StoredResponse) -> None:
+        """Guarda una respuesta; las que exceden el presupuesto no se guardan."""
+        size = len(stored.content)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.content)
+            self._entries[key] = stored
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.content)
+
+    def record(self, status: int) -> None:
+        """Cuenta una respuesta en el proceso y en la auditoría en curso."""
+        outcome = 'not_modified' if status == 304 else 'ok' if status == 200 else 'other'
+        counts = _current_counts.get()
+        metrics.github_api_requests.inc(result=outcome)
+        with self._lock:
+            self._counts[outcome] += 1
+            if counts is not None:
+                counts[outcome] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores acumulados del proceso y tamaño de la caché."""
+        with self._lock:
+            return dict(self._counts, entries=len(self._entries), bytes=self._bytes)
+
+    def clear(self) -> None:
+        """Vacía la caché y reinicia los contadores."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._counts = _new_counts()
+
+class ConditionalHTTPAdapter(HTTPAdapter):
+    """Adaptador de `requests` que valida los GET contra `ConditionalCache`."""
+
+    def __init__(self, cache: ConditionalCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        """Envía la petición y registra su duración, errores y la cuota restante."""
+        start = time.perf_counter()
+        try:
+            response = self._send(request, **kwargs)
+        except Exception:
+            metrics.github_api_errors.inc()
+            raise
+        finally:
+            metrics.github_api_request_duration.observe(time.perf_counter() - start)
+        if response.status_code >= 400:
+            metrics.github_api_errors.inc()
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        if remaining is not None and remaining.isdigit():
+            metrics.github_api_rate_limit_remaining.set(int(remaining))
+        return response
+
+    def _send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        """Envía la petición, condicional si hay una copia local de la URL."""
+        # Las escrituras y las validaciones propias de PyGithub pasan sin cambios
+        if request.method != 'GET' or 'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers:
+            return super().send(request, **kwargs)
+
+        key = self.cache.key(request)
+        stored = self.cache.get(key)
+        if stored is not None:
+            if stored.etag:
+                request.headers['If-None-Match'] = stored.etag
+            elif stored.last_modified:
+                request.headers['If-Modified-Since'] = stored.last_modified
+
+        response = super().send(request, **kwargs)
+        if response.status_code == 304 and stored is not None:
+            self.cache.record(304)
+            return self._from_stored(stored, request, response)
+
+        self.cache.record(response.status_code)
+        if response.status_code == 200:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                headers = {name: value for name, value in response.headers.items() if name.lower() not in _BODY_HEADERS}
+                self.cache.put(key, _StoredResponse(etag, last_modified, headers, response.content, response.encoding))
+        return response
+
+    def _from_stored(self, stored: _StoredResponse, request: requests.PreparedRequest, not_modified: requests.Response) -> requests.Response:
+        """Convierte un 304 en un 200 con el cuerpo local y las cabeceras frescas."""
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(stored.headers)
+        # Los 304 traen la cuota y los validadores actuales
+        for name, value in not_modified.headers.items():
+            if name.lower() not in _BODY_HEADERS:
+                response.headers[name] = value
+        response._content = stored.content
+        response.encoding = stored.encoding
+        response.url = not_modified.url
+        response.request = request
+        response.elapsed = not_modified.elapsed
+        response.connection = self
+        not_modified.close()
+        return response
+
+class _ConditionalConnection:
+    """Conexión de PyGithub con `ConditionalHTTPAdapter`, usable desde varios hilos.
+
+    PyGithub guarda la petición en la conexión entre `request()` y
+    `getresponse()`; aquí se guarda por hilo, de modo que un mismo cliente
+    (y su pool de conexiones keep-alive) puede atender auditorías
+    concurrentes.
+    """
+
+    protocol: str
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending = threading.local()
+        self.adapter = ConditionalHTTPAdapter(
+            default_conditional_cache(),
+            max_retries=self.retry,
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size
+        )
+        self.session.mount(f'{self.protocol}://', self.adapter)
+
+    def request(self, verb: str, url: str, input, headers: Dict[str, str]) -> None:
+        self._pending.call = (verb, url, input, headers)
+
+    def getresponse(self) -> RequestsResponse:
+        verb, url, input, headers = self._pending.call
+        self._pending.call = None
+        response = self.session.request(
+            verb,
+            f'{self.protocol}://{self.host}:{self.port}{url}',
+            headers=headers,
+            data=input,
+            timeout=self.timeout,
+            verify=self.verify,
+            allow_redirects=False
+        )
+        return RequestsResponse(response)
+
+class ConditionalHTTPSConnection(_ConditionalConnection, HTTPSRequestsConnectionClass):
+    """Conexión HTTPS de PyGithub con lecturas condicionales."""
+
+class ConditionalHTTPConnection(_ConditionalConnection, HTTPRequestsConnectionClass):
+    """Conexión HTTP de PyGithub (GitHub Enterprise, pruebas) con lecturas condicionales."""
+
+# Atributos privados de PyGithub (versión fijada en requirements.txt) que
+# `enable_conditional_requests` reemplaza; ver `_requester_of`
+_REQUESTER_ATTRIBUTES = ('_Requester__connectionClass', '_Requester__connection', '_Requester__connection_lock')
+
+def _requester_of(client: Github):
+    """`Requester` de `client`, verificando los atributos privados que se reemplazan.
+
+    Raises:
+        ConfigurationError: Si la versión instalada de PyGithub no los tiene.
+    """
+    requester = getattr(client, '_Github__requester', None)
+    missing = [name for name in _REQUESTER_ATTRIBUTES if not hasattr(requester, name)]
+    if requester is None or missing:
+        raise ConfigurationError(
+            "La versión instalada de PyGithub no es compatible con las lecturas condicionales "
+            f"(faltan {', '.join(missing) or '_Github__requester'}); use la versión de requirements.txt"
+        )
+    return requester
+
+def enable_conditional_requests(client: Github) -> Github:
+    """Hace que todas las lecturas de `client` sean condicionales y lo devuelve.
+
+    `Requester.injectConnectionClasses` cambiaría la clase de conexión de todo
+    el proceso y desactivaría la reutilización de conexiones, y PyGithub no
+    ofrece otra forma de cambiarla por cliente, así que se reemplaza la clase
+    privada de este cliente.
+
+    Raises:
+        ConfigurationError: Si la versión de PyGithub no tiene esos atributos.
+    """
+    requester = _requester_of(client)
+    with requester._Requester__connection_lock:
+        if issubclass(requester._Requester__connectionClass, HTTPSRequestsConnectionClass):
+            requester._Requester__connectionClass = ConditionalHTTPSConnection
+        else:
+            requester._Requester__connectionClass = ConditionalHTTPConnection
+        if requester._Requester__connection is not None:
+            requester._Requester__connection.close()
+            requester._Requester__connection = None
+    return client
+
+@contextmanager
+def track_requests() -> Iterator[Dict[str, int]]:
+    """Cuenta las respuestas de GitHub del bloque (p. ej. una auditoría).
+
+    El diccionario entregado se actualiza con `ok` (200), `not_modified`
+    (304 servidos de la copia local) y `other`; sólo incluye las peticiones
+    hechas desde el mismo hilo o tarea.
+    """
+    counts = _new_counts()
+    token = _current_counts.set(counts)
+    try:
+        yield counts
+    finally:
+        _current_counts.reset(token)
+
+_default_cache: Optional[ConditionalCache] = None
+_default_cache_lock = threading.Lock()
+
+def default_conditional_cache() -> ConditionalCache:
+    """Caché de validadores compartida por todos los clientes del proceso."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ConditionalCache()
+        return _default_cache
@@ -1,18 +1,39 @@
+import base64
 import os
-from typing import Dict, List, Tuple
-from github import Github
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from github.ContentFile import ContentFile
+from github.Repository import Repository
 
 from ..core.models import FinancialDocument
 from ..core.exceptions import GitHubError, ConfigurationError
 from ..core.constants import (
-    FORMAT_MARKDOWN, FORMAT_CSV,
-    FILE_EXTENSIONS, PL_FILE_PATTERNS, BALANCE_FILE_PATTERNS,
-    GITHUB_DEFAULT_BRANCH, GITHUB_LABELS
+    FORMAT_MARKDOWN, FORMAT_CSV, DOC_TYPE_PL, DOC_TYPE_BALANCE,
+    GITHUB_DEFAULT_BRANCH, GITHUB_LABELS,
+    GITHUB_TREE_CACHE_SIZE, GITHUB_BLOB_CACHE_MAX_BYTES
 )
+from . import metrics, tracing
+from .github_clients import default_registry
+from .push_filter import document_kind
+
+# SHA completo de un commit: su árbol no cambia
+_COMMIT_SHA = re.compile(r'[0-9a-f]{40}')
+
+def _path_depth(entry: Tuple[str, str]) -> Tuple[int, str]:
+    """Orden de preferencia de un archivo: primero los menos anidados."""
+    return entry[0].count('/'), entry[0]
 
 class GitHubService:
     """Servicio para interactuar con GitHub."""
+
+    # Listados de árbol por commit y contenidos de blobs por SHA, compartidos
+    # entre instancias: ambos se identifican por contenido y no cambian
+    _tree_cache: 'OrderedDict[Tuple[str, str], Tuple[List[Tuple[str, str]], bool]]' = OrderedDict()
+    _blob_cache: 'OrderedDict[str, Tuple[str, int]]' = OrderedDict()
+    _blob_cache_bytes = 0
+    _cache_lock = threading.Lock()
     
     def __init__(self):
         """Inicializa el servicio de GitHub."""
@@ -20,69 +41,158 @@ class GitHubService:
         if not token:
             raise ConfigurationError("No se encontró el token de GitHub")
         
-        self.github_client = Github(token)
+        # Cliente compartido del proceso: conexiones keep-alive y lecturas
+        # validadas con ETag, cuyos 304 no gastan cuota
+        self.registry = default_registry()
+        self.github_client = self.registry.client(token)
     
     def _parse_repo_url(self, repo_url: str) -> Tuple[str, str]:
         """Parsea la URL del repositorio para obtener owner y nombre."""
         try:
             # Remover protocolo y dominio
             path = repo_url.split('github.com/')[-1]
-            # Remover .git si existe
-            path = path.replace('.git', '')
+            # Remover el sufijo .git si existe
+            path = path.rstrip('/').removesuffix('.git')
             # Dividir en owner y repo
             owner, repo = path.split('/')
             return owner, repo
         except Exception:
             raise GitHubError(f"URL de repositorio inválida: {repo_url}")
     
-    def retrieve_documents(self, repo_url: str, branch: str = GITHUB_DEFAULT_BRANCH) -> Dict[str, FinancialDocument]:
-        """Recupera los documentos financieros del repositorio."""
+    @tracing.span('document_retrieval')
+    @metrics.track(metrics.document_retrieval_duration, metrics.document_retrieval_success, metrics.document_retrieval_failure)
+    def retrieve_documents(self, repo_url: str, branch: str = GITHUB_DEFAULT_BRANCH, commit_sha: Optional[str] = None) -> Dict[str, FinancialDocument]:
+        """Recupera los documentos financieros del repositorio.
+
+        Los archivos se buscan en todo el árbol del commit con un único listado
+        recursivo y se descargan por su SHA de blob, de modo que un blob ya
+        descargado no vuelve a pedirse.
+
+        Args:
+            repo_url: URL del repositorio.
+            branch: Rama a auditar si no se indica `commit_sha`.
+            commit_sha: Commit exacto (p. ej. el `after` de un push); su
+                listado se guarda en caché porque no cambia.
+        """
         try:
             owner, repo_name = self._parse_repo_url(repo_url)
-            repo = self.github_client.get_repo(f"{owner}/{repo_name}")
+            repo = self.registry.repository(self.github_client, f"{owner}/{repo_name}")
             
             pl_files = []
             balance_files = []
             
-            contents = repo.get_contents("", ref=branch)
-            for content in contents:
-                if content.type == "file":
-                    filename = content.name.lower()
-                    if any(ext in filename for ext in FILE_EXTENSIONS):
-                        if any(pattern in filename for pattern in PL_FILE_PATTERNS):
-                            pl_files.append(content)
-                        elif any(pattern in filename for pattern in BALANCE_FILE_PATTERNS):
-                            balance_files.append(content)
+            entries, truncated = self._list_tree(repo, f"{owner}/{repo_name}", commit_sha or branch)
+            for path, sha in entries:
+                kind = document_kind(path)
+                if kind == DOC_TYPE_PL:
+                    pl_files.append((path, sha))
+                elif kind == DOC_TYPE_BALANCE:
+                    balance_files.append((path, sha))
             
+            # Con un listado truncado sólo se buscó en la raíz (ver `_list_tree`)
+            scope = " en la raíz (el listado recursivo del repositorio está truncado)" if truncated else ""
             if not pl_files:
-                raise GitHubError("No se encontraron archivos de P&L")
+                raise GitHubError(f"No se encontraron archivos de P&L{scope}")
             if not balance_files:
-                raise GitHubError("No se encontraron archivos de Balance General")
+                raise GitHubError(f"No se encontraron archivos de Balance General{scope}")
             
-            pl_content = repo.get_contents(pl_files[0].path, ref=branch).decoded_content.decode('utf-8')
-            balance_content = repo.get_contents(balance_files[0].path, ref=branch).decoded_content.decode('utf-8')
+            # Los archivos de la raíz tienen prioridad sobre los de subcarpetas
+            pl_path, pl_sha = min(pl_files, key=_path_depth)
+            balance_path, balance_sha = min(balance_files, key=_path_depth)
+            tracing.set_attributes(repo=f"{owner}/{repo_name}", branch=branch, commit_sha=commit_sha, files=[pl_path, balance_path])
+            pl_content = self._read_blob(repo, pl_sha)
+            balance_content = self._read_blob(repo, balance_sha)
             
             return {
                 'pl': FinancialDocument(
                     content=pl_content,
                     doc_type='pl',
-                    file_format=FORMAT_MARKDOWN if pl_content.strip().startswith('|') else FORMAT_CSV
+                    file_format=FORMAT_MARKDOWN if pl_content.strip().startswith('|') else FORMAT_CSV,
+                    sha=pl_sha
                 ),
                 'balance': FinancialDocument(
                     content=balance_content,
                     doc_type='balance',
-                    file_format=FORMAT_MARKDOWN if balance_content.strip().startswith('|') else FORMAT_CSV
+                    file_format=FORMAT_MARKDOWN if balance_content.strip().startswith('|') else FORMAT_CSV,
+                    sha=balance_sha
                 )
             }
             
         except Exception as e:
             raise GitHubError(f"Error al recuperar documentos: {str(e)}")
     
+    @tracing.span('commit_resolution')
+    def resolve_commit(self, repo_url: str, branch: str = GITHUB_DEFAULT_BRANCH) -> str:
+        """SHA del commit al que apunta `branch` en este momento."""
+        try:
+            owner, repo_name = self._parse_repo_url(repo_url)
+            repo = self.registry.repository(self.github_client, f"{owner}/{repo_name}")
+            return repo.get_branch(branch).commit.sha
+        except Exception as e:
+            raise GitHubError(f"Error al resolver la rama {branch}: {str(e)}")
+    
+    def _list_tree(self, repo: Repository, full_name: str, ref: str) -> Tuple[List[Tuple[str, str]], bool]:
+        """Lista `(ruta, sha)` de todos los blobs del árbol de `ref` en una sola llamada.
+
+        Si GitHub trunca el listado recursivo (árboles muy grandes), se usa en
+        su lugar el listado no recursivo de la raíz, que está completo; el
+        segundo valor indica ese caso. Los listados de un SHA de commit no
+        cambian y se guardan en caché; los de una rama se piden siempre
+        porque la rama puede moverse.
+        """
+        immutable = _COMMIT_SHA.fullmatch(ref) is not None
+        key = (full_name, ref)
+        if immutable:
+            with self._cache_lock:
+                listing = self._tree_cache.get(key)
+                if listing is not None:
+                    self._tree_cache.move_to_end(key)
+                    return listing
+        
+        tree = repo.get_git_tree(ref, recursive=True)
+        # PyGithub no expone `truncated` como atributo de `GitTree`
+        truncated = tree.raw_data.get('truncated') is True
+        if truncated:
+            tree = repo.get_git_tree(ref)
+        tracing.set_attributes(tree_truncated=truncated)
+        listing = ([(element.path, element.sha) for element in tree.tree if element.type == 'blob'], truncated)
+        
+        if immutable:
+            with self._cache_lock:
+                self._tree_cache[key] = listing
+                while len(self._tree_cache) > GITHUB_TREE_CACHE_SIZE:
+                    self._tree_cache.popitem(last=False)
+        return listing
+    
+    def _read_blob(self, repo: Repository, sha: str) -> str:
+        """Devuelve el contenido de un blob, descargándolo sólo si no está en caché."""
+        with self._cache_lock:
+            cached = self._blob_cache.get(sha)
+            if cached is not None:
+                self._blob_cache.move_to_end(sha)
+                return cached[0]
+        
+        blob = repo.get_git_blob(sha)
+        data = base64.b64decode(blob.content) if blob.encoding == 'base64' else blob.content.encode('utf-8')
+        content = data.decode('utf-8')
+        
+        with self._cache_lock:
+            if sha not in self._blob_cache:
+                self._blob_cache[sha] = (content, len(data))
+                GitHubService._blob_cache_bytes += len(data)
+            while GitHubService._blob_cache_bytes > GITHUB_BLOB_CACHE_MAX_BYTES and len(self._blob_cache) > 1:
+                _, (_, size) = self._blob_cache.popitem(last=False)
+                GitHubService._blob_cache_bytes -= size
+        return content
+    
+    @tracing.span('issue_publishing')
+    @metrics.track(metrics.issue_creation_duration, metrics.issue_creation_success, metrics.issue_creation_failure)
     def create_or_update_issue(self, discrepancies: List[Dict], repo_url: str) -> str:
         """Crea o actualiza un issue en GitHub con las discrepancias encontradas."""
         try:
             owner, repo_name = self._parse_repo_url(repo_url)
-            repo = self.github_client.get_repo(f"{owner}/{repo_name}")
+            tracing.set_attributes(repo=f"{owner}/{repo_name}", discrepancies=len(discrepancies))
+            repo = self.registry.repository(self.github_client, f"{owner}/{repo_name}")
             
             title = f"Auditoría Financiera: {len(discrepancies)} discrepancias encontradas"
             
@@ -0,0 +1,233 @@
+"""Cola de auditorías en segundo plano.
+
+El webhook de GitHub encola la auditoría y responde de inmediato; un pool de
+hilos de tamaño configurable ejecuta el pipeline síncrono y el resultado se
+consulta después por el id del trabajo.
+"""
+
+import math
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from ..core.constants import (
+    JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED,
+    AUDIT_WORKERS, AUDIT_JOB_HISTORY, AUDIT_WAIT_SAMPLES
+)
+
+_FINISHED = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    """Fecha ISO 8601 en UTC de un `time.time()`."""
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).isoformat()
+
+@dataclass
+class AuditJob:
+    """Auditoría encolada y su estado."""
+    id: str
+    repo_url: str
+    branch: str
+    options: Dict[str, Any] = field(default_factory=dict)
+    status: str = JOB_QUEUED
+    enqueued_at: float = field(default_factory=time.time)
+    ready_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    coalesced: int = 0
+
+    @property
+    def wait_seconds(self) -> Optional[float]:
+        """Tiempo que el trabajo esperó en la cola antes de ejecutarse.
+
+        En los trabajos diferidos se cuenta desde que vence su espera.
+        """
+        if self.started_at is None:
+            return None
+        return self.started_at - (self.ready_at or self.enqueued_at)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representación para la API."""
+        return {
+            'id': self.id,
+            'repo_url': self.repo_url,
+            'branch': self.branch,
+            'status': self.status,
+            'enqueued_at': _timestamp(self.enqueued_at),
+            'started_at': _timestamp(self.started_at),
+            'finished_at': _timestamp(self.finished_at),
+            'wait_seconds': self.wait_seconds,
+            'result': self.result,
+            'error': self.error,
+            'coalesced': self.coalesced
+        }
+
+class AuditJobQueue:
+    """Cola FIFO en memoria con un pool de hilos que ejecuta `audit`.
+
+    Los hilos se inician con el primer trabajo. Se conservan los últimos
+    `history` trabajos terminados para consultarlos por id.
+
+    Args:
+        audit: Función `audit(repo_url, branch, **options) -> Dict` (p. ej.
+            `audit_financial_documents`); un resultado con `status == 'error'`
+            marca el trabajo como fallido.
+        workers: Número de hilos que ejecutan auditorías.
+        history: Trabajos terminados que se conservan.
+    """
+
+    def __init__(self, audit: Callable[..., Dict[str, Any]], workers: int = AUDIT_WORKERS, history: int = AUDIT_JOB_HISTORY):
+        if workers < 1:
+            raise ValueError("Se requiere al menos un worker")
+        self.audit = audit
+        self.workers = workers
+        self.history = history
+        self._queue: 'queue.Queue[Optional[AuditJob]]' = queue.Queue()
+        self._jobs: 'OrderedDict[str, AuditJob]' = OrderedDict()
+        self._threads: List[threading.Thread] = []
+        self._timers: Dict[str, threading.Timer] = {}
+        self._lock = threading.Lock()
+        self._waits: deque = deque(maxlen=AUDIT_WAIT_SAMPLES)
+        self._counters = {'submitted': 0, 'succeeded': 0, 'failed': 0, 'cancelled': 0, 'running': 0, 'wait_seconds_total': 0.0}
+        self._closed = False
+
+    def submit(self, repo_url: str, branch: str, delay: float = 0.0, coalesced: int = 0, **options: Any) -> AuditJob:
+        """Encola una auditoría y devuelve el trabajo sin esperar a que se ejecute.
+
+        Con `delay` el trabajo queda pendiente esos segundos antes de entrar a
+        la cola; mientras tanto puede cancelarse sin ocupar un worker.
+        `coalesced` es el número de pushes que el trabajo reemplaza.
+        """
+        job = AuditJob(id=uuid.uuid4().hex, repo_url=repo_url, branch=branch, options=options, coalesced=coalesced)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("La cola de auditorías está cerrada")
+            self._jobs[job.id] = job
+            self._counters['submitted'] += 1
+            self._trim()
+            if not self._threads:
+                self._start()
+            if delay > 0:
+                timer = threading.Timer(delay, self._release, args=(job,))
+                timer.daemon = True
+                self._timers[job.id] = timer
+                timer.start()
+                return job
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[AuditJob]:
+        """Devuelve el trabajo `job_id`, o None si no existe o ya se descartó."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancela un trabajo que aún no empezó; devuelve si se canceló."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JOB_QUEUED:
+                return False
+            job.status = JOB_CANCELLED
+            job.finished_at = time.time()
+            self._counters['cancelled'] += 1
+            timer = self._timers.pop(job_id, None)
+        if timer is not None:
+            timer.cancel()
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        """Profundidad de la cola, trabajos en curso y tiempos de espera.
+
+        `wait_seconds_total` acumula todas las esperas; el promedio y los
+        percentiles se calculan sobre las últimas `AUDIT_WAIT_SAMPLES`.
+        """
+        with self._lock:
+            depth = sum(1 for job in self._jobs.values() if job.status == JOB_QUEUED)
+            waits = sorted(self._waits)
+            metrics = dict(self._counters, depth=depth, workers=self.workers)
+        metrics['wait_seconds_count'] = len(waits)
+        metrics['wait_seconds_avg'] = sum(waits) / len(waits) if waits else 0.0
+        metrics['wait_seconds_p50'] = _percentile(waits, 0.50)
+        metrics['wait_seconds_p95'] = _percentile(waits, 0.95)
+        metrics['wait_seconds_max'] = waits[-1] if waits else 0.0
+        return metrics
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Deja de aceptar trabajos y detiene los hilos al vaciar la cola."""
+        with self._lock:
+            self._closed = True
+            threads = list(self._threads)
+            timers = list(self._timers.values())
+            self._timers.clear()
+        for timer in timers:
+            timer.cancel()
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _start(self) -> None:
+        """Inicia los hilos del pool; se llama con el candado tomado."""
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'audit-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _release(self, job: AuditJob) -> None:
+        """Pasa a la cola un trabajo diferido cuando vence su espera."""
+        with self._lock:
+            if self._timers.pop(job.id, None) is None:
+                return
+            job.ready_at = time.time()
+        self._queue.put(job)
+
+    def _work(self) -> None:
+        """Bucle de un hilo: toma trabajos hasta recibir el centinela None."""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                if job.status != JOB_QUEUED:
+                    continue
+                job.status = JOB_RUNNING
+                job.started_at = time.time()
+                self._waits.append(job.wait_seconds)
+                self._counters['wait_seconds_total'] += job.wait_seconds
+                self._counters['running'] += 1
+            try:
+                result = self.audit(job.repo_url, job.branch, **job.options)
+                error = (result.get('error_message') or 'Error en la auditoría') if result.get('status') == 'error' else None
+            except Exception as e:
+                result, error = None, str(e)
+            with self._lock:
+                job.result = result
+                job.error = error
+                job.status = JOB_FAILED if error is not None else JOB_SUCCEEDED
+                job.finished_at = time.time()
+                self._counters['running'] -= 1
+                self._counters['failed' if error is not None else 'succeeded'] += 1
+                self._trim()
+
+    def _trim(self) -> None:
+        """Descarta los trabajos terminados más antiguos que excedan `history`."""
+        excess = len(self._jobs) - self.history
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.status in _FINISHED][:excess]:
+            del self._jobs[job_id]
+
+def _percentile(values: List[float], fraction: float) -> float:
+    """Percentil por rango más cercano de una lista ordenada."""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
@@ -0,0 +1,252 @@
+"""Backends del modelo de los agentes: Gemini o uno local determinista.
+
+Cada backend contesta un prompt con `generate` (lo usa `ComparisonAgent`) y
+entrega con `adk_model` el modelo de los agentes ADK (`AuditorAgent`,
+`IssueManagerAgent` y `root_agent`). `AUDITOR_LLM_BACKEND` elige el del
+proceso (`default_llm_backend`):
+
+- `gemini` (por defecto): el modelo `LLM_MODEL` vía `google.genai`.
+- `fake`: `FakeLlmBackend`, que no sale de la máquina. Espera una latencia
+  configurable (`AUDITOR_FAKE_LLM_LATENCY` más una variación uniforme de
+  hasta `AUDITOR_FAKE_LLM_JITTER` segundos, de un generador con semilla) y
+  contesta con plantillas que entienden los parsers de `core.adk_parser`,
+  en JSON o en líneas `Tipo:`/`Descripción:`. Sirve para medir el
+  rendimiento y la latencia de cola de los agentes sin conexión.
+
+`root_agent` toma su modelo al importar `auditor.agent`, así que la variable
+debe estar definida antes.
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import AsyncGenerator, Callable, Dict, List, Optional, Tuple, Union
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+
+from ..core.adk_prompts import BALANCE_VALIDATION_PROMPT, FINANCIAL_VALIDATION_PROMPT, RATIO_ANALYSIS_PROMPT
+from ..core.constants import (
+    FAKE_LLM_JITTER, FAKE_LLM_JITTER_ENV, FAKE_LLM_LATENCY, FAKE_LLM_LATENCY_ENV, LLM_BACKEND_ENV, LLM_MODEL
+)
+from ..core.exceptions import ConfigurationError
+
+# Formatos de las respuestas simuladas
+FORMAT_JSON = 'json'
+FORMAT_TEXT = 'text'
+
+# Clases de prompt que distingue el backend simulado
+PROMPT_KINDS = ('validation', 'ratios', 'balance', 'combined', 'chat')
+
+_COMBINED_KEYS = re.compile(r'\(clave "(\w+)"\)')
+
+# Primera línea de cada prompt de `ComparisonAgent`, para reconocerlo
+_PROMPT_MARKERS = (
+    ('ratios', RATIO_ANALYSIS_PROMPT.split('\n', 1)[0]),
+    ('balance', BALANCE_VALIDATION_PROMPT.split('\n', 1)[0]),
+    ('validation', FINANCIAL_VALIDATION_PROMPT.split('\n', 1)[0])
+)
+
+# Hallazgo simulado de cada verificación, con los campos de `COMBINED_RESPONSE_SCHEMA`
+FAKE_FINDINGS = {
+    'validation': {'type': 'simulated_finding', 'description': 'Hallazgo simulado', 'severity': 'low', 'fix': 'Sin acción'},
+    'ratios': {'type': 'ratio_simulado', 'value': '1.0', 'normal_range': '0.5 - 2.0', 'description': 'Ratio simulado', 'fix': 'Sin acción'},
+    'balance': {'type': 'simulated_balance', 'difference': '0', 'description': 'Diferencia simulada', 'possible_causes': 'Ninguna', 'fix': 'Sin acción'}
+}
+
+# Etiqueta de cada campo en las respuestas de texto que leen los parsers de `core.adk_parser`
+_TEXT_LABELS = {
+    'validation': (('type', 'Tipo'), ('description', 'Descripción'), ('severity', 'Severidad'), ('fix', 'Solución')),
+    'ratios': (('type', 'Ratio'), ('value', 'Valor'), ('normal_range', 'Rango Normal'), ('description', 'Análisis'), ('fix', 'Recomendación')),
+    'balance': (('type', 'Tipo'), ('difference', 'Diferencia'), ('description', 'Análisis'), ('possible_causes', 'Causas Posibles'), ('fix', 'Sugerencias'))
+}
+
+class LlmBackend:
+    """Modelo que contestan los agentes; `model` es su nombre y parte de la clave de `llm_cache`."""
+
+    model: str = LLM_MODEL
+
+    def generate(self, prompt: str, response_schema: Optional[Dict] = None) -> str:
+        """Respuesta del modelo a `prompt`; con `response_schema`, JSON que cumple ese esquema."""
+        raise NotImplementedError
+
+    def adk_model(self) -> Union[str, BaseLlm]:
+        """Modelo para los agentes ADK: un nombre registrado o una instancia de `BaseLlm`."""
+        return self.model
+
+class GeminiBackend(LlmBackend):
+    """Gemini vía `google.genai`; el cliente se crea en la primera consulta."""
+
+    def __init__(self, model: str = LLM_MODEL):
+        self.model = model
+        self._client = None
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str, response_schema: Optional[Dict] = None) -> str:
+        with self._lock:
+            if self._client is None:
+                from google import genai
+                self._client = genai.Client()
+        config = None
+        if response_schema is not None:
+            config = types.GenerateContentConfig(response_mime_type='application/json', response_json_schema=response_schema)
+        return self._client.models.generate_content(model=self.model, contents=prompt, config=config).text or ''
+
+class FakeLlmBackend(LlmBackend):
+    """Modelo local con latencia configurable y respuestas fijas, seguro entre hilos.
+
+    La latencia de cada consulta es `latency` más `seconds_per_kchar` por
+    cada mil caracteres del prompt más una variación uniforme en
+    [-`jitter`, `jitter`], tomada en orden de un generador con `seed`.
+
+    Args:
+        latency: Segundos base de cada consulta.
+        jitter: Variación máxima, en segundos, de la latencia.
+        seconds_per_kchar: Segundos agregados por cada mil caracteres del prompt.
+        response_format: `FORMAT_JSON` o `FORMAT_TEXT` para las verificaciones por separado;
+            el prompt combinado siempre se contesta en JSON.
+        findings: Si cada verificación informa un hallazgo (`FAKE_FINDINGS`) o ninguno.
+        responses: Respuesta fija por clase de prompt (`PROMPT_KINDS`), en lugar de la plantilla.
+        seed: Semilla de la variación.
+        sleep: Espera síncrona, reemplazable en pruebas.
+    """
+
+    model = 'fake-llm'
+
+    def __init__(self, latency: float = FAKE_LLM_LATENCY, jitter: float = FAKE_LLM_JITTER, seconds_per_kchar: float = 0.0,
+                 response_format: str = FORMAT_JSON, findings: bool = True, responses: Optional[Dict[str, str]] = None,
+                 seed: int = 0, sleep: Callable[[float], None] = time.sleep):
+        if response_format not in (FORMAT_JSON, FORMAT_TEXT):
+            raise ValueError(f"Formato de respuesta no soportado: {response_format}")
+        self.latency = latency
+        self.jitter = jitter
+        self.seconds_per_kchar = seconds_per_kchar
+        self.response_format = response_format
+        self.findings = findings
+        self.responses = dict(responses or {})
+        self.sleep = sleep
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counters = {'calls': 0, 'prompt_chars': 0, 'delay_seconds': 0.0}
+
+    def generate(self, prompt: str, response_schema: Optional[Dict] = None) -> str:
+        # El prompt combinado se contesta en JSON con o sin esquema
+        self.sleep(self.delay(prompt))
+        return self.respond(prompt)
+
+    async def generate_async(self, prompt: str) -> str:
+        """Como `generate`, sin bloquear el event loop durante la espera."""
+        await asyncio.sleep(self.delay(prompt))
+        return self.respond(prompt)
+
+    def delay(self, prompt: str) -> float:
+        """Latencia de la próxima consulta; la cuenta en las estadísticas."""
+        with self._lock:
+            variation = self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+            seconds = max(0.0, self.latency + len(prompt) / 1000 * self.seconds_per_kchar + variation)
+            self._counters['calls'] += 1
+            self._counters['prompt_chars'] += len(prompt)
+            self._counters['delay_seconds'] += seconds
+        return seconds
+
+    def respond(self, prompt: str) -> str:
+        """Respuesta fija a `prompt`, sin esperar."""
+        kind = prompt_kind(prompt)
+        if kind in self.responses:
+            return self.responses[kind]
+        if kind == 'combined':
+            keys = _COMBINED_KEYS.findall(prompt)
+            return json.dumps({key: self._findings(key) if key in keys else [] for key in FAKE_FINDINGS}, ensure_ascii=False)
+        key = 'validation' if kind == 'chat' else kind
+        if self.response_format == FORMAT_JSON and kind != 'chat':
+            return json.dumps(self._findings(key), ensure_ascii=False)
+        return '\n\n'.join(_text_finding(key, finding) for finding in self._findings(key)) or 'Sin hallazgos.'
+
+    def stats(self) -> Dict[str, float]:
+        """Consultas, caracteres de prompt y segundos de latencia simulados."""
+        with self._lock:
+            return dict(self._counters)
+
+    def adk_model(self) -> 'FakeLlm':
+        return FakeLlm(model=self.model, backend=self)
+
+    def _findings(self, key: str) -> List[Dict[str, str]]:
+        return [FAKE_FINDINGS[key]] if self.findings else []
+
+class FakeLlm(BaseLlm):
+    """Modelo ADK sobre `FakeLlmBackend` para ejecutar agentes con `Runner` sin conexión.
+
+    Con `tool_call` (nombre y argumentos), el primer turno pide esa
+    herramienta, si el agente la tiene, y el turno con su resultado se
+    contesta con texto; así se recorre el flujo completo del agente.
+    """
+
+    backend: FakeLlmBackend
+    tool_call: Optional[Tuple[str, Dict]] = None
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        prompt = _request_text(llm_request)
+        last = llm_request.contents[-1] if llm_request.contents else None
+        answered = last is not None and any(part.function_response for part in last.parts or [])
+        if self.tool_call and not answered and self.tool_call[0] in llm_request.tools_dict:
+            name, args = self.tool_call
+            await asyncio.sleep(self.backend.delay(prompt))
+            part = types.Part(function_call=types.FunctionCall(name=name, args=args))
+        else:
+            part = types.Part(text=await self.backend.generate_async(prompt))
+        yield LlmResponse(content=types.Content(role='model', parts=[part]))
+
+def prompt_kind(prompt: str) -> str:
+    """Clase del prompt (`PROMPT_KINDS`): una verificación de `ComparisonAgent`, el combinado o `chat`."""
+    if _COMBINED_KEYS.search(prompt):
+        return 'combined'
+    for kind, marker in _PROMPT_MARKERS:
+        if marker in prompt:
+            return kind
+    return 'chat'
+
+def _text_finding(key: str, finding: Dict[str, str]) -> str:
+    """Hallazgo en líneas `Etiqueta: valor`; `parse_ratio_response` antepone `ratio_` al tipo."""
+    values = dict(finding, type=finding['type'][len('ratio_'):]) if key == 'ratios' else finding
+    return '\n'.join(f"{label}: {values[field]}" for field, label in _TEXT_LABELS[key])
+
+def _request_text(llm_request: LlmRequest) -> str:
+    """Instrucción de sistema y partes de texto y de herramientas de la conversación."""
+    parts = [str(llm_request.config.system_instruction or '')] if llm_request.config else []
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.text:
+                parts.append(part.text)
+            elif part.function_call or part.function_response:
+                parts.append(str(part.function_call or part.function_response))
+    return '\n'.join(parts)
+
+_default_backend: Optional[LlmBackend] = None
+_default_lock = threading.Lock()
+
+def default_llm_backend() -> LlmBackend:
+    """Backend del proceso según `AUDITOR_LLM_BACKEND`.
+
+    Raises:
+        ConfigurationError: Si el backend no existe o la latencia no es numérica.
+    """
+    global _default_backend
+    with _default_lock:
+        if _default_backend is None:
+            name = os.getenv(LLM_BACKEND_ENV, 'gemini').strip().lower()
+            if name == 'gemini':
+                _default_backend = GeminiBackend()
+            elif name == 'fake':
+                try:
+                    latency = float(os.getenv(FAKE_LLM_LATENCY_ENV, FAKE_LLM_LATENCY))
+                    jitter = float(os.getenv(FAKE_LLM_JITTER_ENV, FAKE_LLM_JITTER))
+                except ValueError as e:
+                    raise ConfigurationError(f"Latencia del modelo simulado inválida: {e}") from e
+                _default_backend = FakeLlmBackend(latency=latency, jitter=jitter)
+            else:
+                raise ConfigurationError(f"{LLM_BACKEND_ENV} desconocido: {name!r} (use 'gemini' o 'fake')")
+        return _default_backend
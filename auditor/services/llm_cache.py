@@ -0,0 +1,276 @@
+"""Caché de respuestas del modelo por nombre de modelo y prompt canónico.
+
+Los prompts de `ComparisonAgent` se arman con los mismos datos parseados en
+cada reauditoría de un commit sin cambios, así que la misma consulta se
+pagaba una y otra vez. La clave es el hash del nombre del modelo y del prompt
+canonicalizado (`canonical_prompt`: Unicode NFC, saltos de línea `\\n`, sin
+espacios al final de las líneas ni líneas en blanco repetidas), de modo que
+diferencias de formato que el modelo no distingue comparten la entrada.
+
+Hay dos niveles con vencimiento (`ttl`): un LRU en memoria acotado en bytes
+y un directorio en disco, también acotado en bytes, que sobrevive a los
+reinicios; al excederlo se borran las entradas escritas hace más tiempo.
+La ocupación del disco se lleva como un total que se mide al crear la caché
+y se actualiza en cada escritura y borrado; el directorio sólo se recorre
+cuando ese total supera el presupuesto, y entonces se vuelve a medir (así se
+corrigen también los cambios de otros procesos que comparten el directorio).
+Cada consulta se cuenta en `llm_cache_lookups_total` y cada desalojo en
+`llm_cache_evictions_total`.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..core.constants import LLM_CACHE_DISK_MAX_BYTES, LLM_CACHE_MAX_BYTES, LLM_CACHE_TTL, PARSED_CACHE_DIR_ENV
+from . import metrics
+
+_TRAILING_SPACES = re.compile(r'[ \t]+$', re.MULTILINE)
+_BLANK_LINES = re.compile(r'\n{3,}')
+
+def canonical_prompt(prompt: str) -> str:
+    """Forma canónica de un prompt para la clave de la caché."""
+    text = unicodedata.normalize('NFC', prompt).replace('\r\n', '\n').replace('\r', '\n')
+    text = _TRAILING_SPACES.sub('', text)
+    return _BLANK_LINES.sub('\n\n', text).strip()
+
+class LlmResponseCache:
+    """Respuestas del modelo en memoria y en disco, seguras entre hilos.
+
+    Las entradas en disco se escriben de forma atómica como JSON; una
+    entrada ilegible se descarta y cuenta como fallo.
+
+    Args:
+        ttl: Segundos que una respuesta se considera vigente.
+        max_bytes: Bytes de texto retenidos como máximo en memoria.
+        directory: Directorio del nivel en disco, o None para sólo memoria.
+        max_disk_bytes: Bytes de archivos retenidos como máximo en disco.
+        clock: Reloj de pared (el vencimiento se guarda en disco), reemplazable en pruebas.
+    """
+
+    def __init__(self, ttl: float = LLM_CACHE_TTL, max_bytes: int = LLM_CACHE_MAX_BYTES, directory: Optional[str] = None,
+                 max_disk_bytes: int = LLM_CACHE_DISK_MAX_BYTES, clock: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.clock = clock
+        self._entries: 'OrderedDict[str, Tuple[str, float, int]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'disk_errors': 0}
+        self._disk_bytes = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_bytes = sum(size for _, _, size in self._scan())
+
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        """Clave de una consulta: hash del modelo y del prompt canónico."""
+        return hashlib.sha256(f"{model}\0{canonical_prompt(prompt)}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Respuesta vigente de `key`, buscando primero en memoria y luego en disco."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self._count('hits', 'hit')
+                    return entry[0]
+                self._forget(key)
+                self._counters['expired'] += 1
+                metrics.llm_cache_evictions.inc(tier='memory', reason='expired')
+
+        stored = self._read(key, now)
+        with self._lock:
+            if stored is None:
+                self._count('misses', 'miss')
+                return None
+            self._count('disk_hits', 'disk_hit')
+            self._remember(key, *stored)
+        return stored[0]
+
+    def put(self, key: str, response: str) -> None:
+        """Guarda la respuesta de `key` en ambos niveles con el TTL configurado."""
+        expires_at = self.clock() + self.ttl
+        with self._lock:
+            self._remember(key, response, expires_at)
+        self._write(key, response, expires_at)
+
+    def stats(self) -> Dict[str, int]:
+        """Aciertos por nivel, fallos, vencimientos, desalojos y ocupación de la memoria."""
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), bytes=self._bytes)
+
+    def clear(self) -> None:
+        """Vacía el nivel en memoria; el disco se conserva."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _count(self, counter: str, result: str) -> None:
+        """Suma una consulta al contador propio y a la métrica."""
+        self._counters[counter] += 1
+        metrics.llm_cache_lookups.inc(result=result)
+
+    def _remember(self, key: str, response: str, expires_at: float) -> None:
+        """Agrega la respuesta al LRU y desaloja las menos usadas hasta respetar el presupuesto."""
+        size = len(response.encode('utf-8'))
+        self._forget(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (response, expires_at, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self._counters['evictions'] += 1
+            metrics.llm_cache_evictions.inc(tier='memory', reason='size')
+
+    def _forget(self, key: str) -> None:
+        """Quita la entrada de `key` de la memoria, si está."""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[2]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        """Respuesta y vencimiento de `key` en disco, si existe, es válida y está vigente."""
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as fh:
+                data = json.load(fh)
+            response, expires_at = data['response'], float(data['expires_at'])
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self._discard(path, error=True)
+            return None
+        if not isinstance(response, str):
+            self._discard(path, error=True)
+            return None
+        if expires_at <= now:
+            self._discard(path)
+            with self._lock:
+                self._counters['expired'] += 1
+            metrics.llm_cache_evictions.inc(tier='disk', reason='expired')
+            return None
+        return response, expires_at
+
+    def _write(self, key: str, response: str, expires_at: float) -> None:
+        """Escribe la respuesta en disco con un archivo temporal y `os.replace`."""
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+                    json.dump({'expires_at': expires_at, 'response': response}, fh, ensure_ascii=False)
+                size = os.path.getsize(temp_path)
+                previous = _size(path)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except Exception:
+            with self._lock:
+                self._counters['disk_errors'] += 1
+            return
+        self._prune(size - previous)
+
+    def _prune(self, added: int) -> None:
+        """Suma `added` bytes al total en disco; si excede `max_disk_bytes` borra las entradas más antiguas."""
+        with self._disk_lock:
+            self._disk_bytes += added
+            if self._disk_bytes <= self.max_disk_bytes:
+                return
+            files = self._scan()
+            total = sum(size for _, _, size in files)
+            for _, path, size in sorted(files):
+                if total <= self.max_disk_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                metrics.llm_cache_evictions.inc(tier='disk', reason='size')
+                total -= size
+            self._disk_bytes = total
+
+    def _scan(self) -> List[Tuple[float, str, int]]:
+        """Fecha de modificación, ruta y tamaño de cada entrada en disco."""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, entry.path, stat.st_size))
+        return files
+
+    def _discard(self, path: str, error: bool = False) -> None:
+        """Elimina una entrada del disco; `error` la cuenta como dañada."""
+        if error:
+            with self._lock:
+                self._counters['disk_errors'] += 1
+        size = _size(path)
+        try:
+            os.unlink(path)
+        except OSError:
+            return
+        with self._disk_lock:
+            self._disk_bytes -= size
+
+def _size(path: str) -> int:
+    """Tamaño del archivo en bytes, o 0 si no existe."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def cached_generate(generate: Callable[[str], str], model: str, prompt: str, cache: Optional[LlmResponseCache] = None) -> str:
+    """Respuesta de `generate(prompt)`, reutilizada si el modelo ya contestó ese prompt.
+
+    Args:
+        generate: Función que consulta al modelo.
+        model: Nombre del modelo, parte de la clave.
+        prompt: Prompt de la consulta.
+        cache: Caché a usar; por defecto la compartida del proceso.
+    """
+    cache = cache or default_llm_cache()
+    key = cache.key(model, prompt)
+    response = cache.get(key)
+    if response is None:
+        response = generate(prompt)
+        if isinstance(response, str):
+            cache.put(key, response)
+    return response
+
+_default_cache: Optional[LlmResponseCache] = None
+_default_lock = threading.Lock()
+
+def default_llm_cache() -> LlmResponseCache:
+    """Caché compartida del proceso; usa disco si está definido `AUDITOR_CACHE_DIR`."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            directory = os.getenv(PARSED_CACHE_DIR_ENV)
+            _default_cache = LlmResponseCache(directory=os.path.join(directory, 'llm') if directory else None)
+        return _default_cache
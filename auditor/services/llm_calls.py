@@ -0,0 +1,43 @@
+"""Conteo de las consultas al modelo omitidas o escaladas por las verificaciones locales.
+
+Cada decisión de `ComparisonAgent` se cuenta en `llm_precheck_total` por
+verificación y resultado y, dentro de `track_llm_calls`, en los contadores
+de la auditoría en curso.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from . import metrics
+
+SKIPPED = 'skipped'
+ESCALATED = 'escalated'
+
+# Contadores de la auditoría en curso (ver `track_llm_calls`)
+_current_counts: ContextVar[Optional[Dict[str, int]]] = ContextVar('llm_call_counts', default=None)
+
+def _new_counts() -> Dict[str, int]:
+    """Contadores vacíos: consultas omitidas y escaladas al modelo."""
+    return {SKIPPED: 0, ESCALATED: 0}
+
+def record_precheck(check: str, escalated: bool) -> None:
+    """Cuenta si la verificación local `check` omitió la consulta o la escaló."""
+    outcome = ESCALATED if escalated else SKIPPED
+    metrics.llm_prechecks.inc(check=check, outcome=outcome)
+    counts = _current_counts.get()
+    if counts is not None:
+        counts[outcome] += 1
+
+@contextmanager
+def track_llm_calls() -> Iterator[Dict[str, int]]:
+    """Cuenta las consultas omitidas y escaladas del bloque (p. ej. una auditoría).
+
+    Sólo incluye las decisiones tomadas desde el mismo hilo o tarea.
+    """
+    counts = _new_counts()
+    token = _current_counts.set(counts)
+    try:
+        yield counts
+    finally:
+        _current_counts.reset(token)
@@ -0,0 +1,250 @@
+"""Métricas del auditor en formato de exposición de texto de Prometheus.
+
+Implementa las métricas de `docs/observability.md` con contadores, gauges e
+histogramas propios: cada observación cuesta un `bisect` y un lock, sin
+dependencias nuevas. `render()` produce el texto que sirve `GET /metrics`.
+Las métricas de contenedor (CPU, memoria, red) las reporta el runtime de
+Docker y no se duplican aquí.
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from ..core.constants import METRICS_DURATION_BUCKETS
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LabelValues = Tuple[str, ...]
+
+def _format_value(value: float) -> str:
+    """Número en la sintaxis de Prometheus (`+Inf`, enteros sin decimales)."""
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """`{nombre="valor",...}` con los valores escapados, o vacío sin etiquetas."""
+    if not names:
+        return ''
+    pairs = (
+        '%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"'))
+        for name, value in zip(names, values)
+    )
+    return '{%s}' % ','.join(pairs)
+
+class _Metric:
+    """Base de las métricas: nombre, ayuda, etiquetas y valores por etiqueta."""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        """Valores de las etiquetas en el orden declarado."""
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """Muestras `(sufijo, etiquetas, valor)` para la exposición."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Bloque `# HELP`/`# TYPE` y muestras de la métrica."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self.samples())
+        return '\n'.join(lines) + '\n'
+
+class Counter(_Metric):
+    """Contador monotónico, opcionalmente por etiquetas."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {} if labelnames else {(): 0.0}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Suma `amount` al contador de `labels`."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Valor actual del contador de `labels`."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            return [('', _format_labels(self.labelnames, key), value) for key, value in sorted(self._values.items())]
+
+class Gauge(Counter):
+    """Valor que sube y baja; se fija con `set`."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels: str) -> None:
+        """Fija el valor de `labels`."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+class Histogram(_Metric):
+    """Histograma de duraciones con buckets fijos acumulados al exponerse.
+
+    Args:
+        buckets: Límites superiores en segundos, en orden creciente.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = METRICS_DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por etiqueta: conteos por bucket (el último es +Inf), suma y total
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        if not labelnames:
+            self._values[()] = self._empty()
+
+    def _empty(self) -> Tuple[List[int], List[float]]:
+        return [0] * (len(self.buckets) + 1), [0.0]
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Registra una observación de `value` segundos."""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = self._empty()
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observa lo que tarda el bloque, termine bien o con excepción."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        """Observaciones registradas para `labels`."""
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        samples = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (math.inf,), counts):
+                    cumulative += count
+                    samples.append(('_bucket', _format_labels(self.labelnames + ('le',), key + (_format_value(bound),)), cumulative))
+                labels = _format_labels(self.labelnames, key)
+                samples.append(('_sum', labels, total[0]))
+                samples.append(('_count', labels, cumulative))
+        return samples
+
+class MetricsRegistry:
+    """Conjunto de métricas expuestas juntas."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Agrega `metric`; los nombres no pueden repetirse."""
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"La métrica {metric.name} ya está registrada")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Todas las métricas en formato de exposición de texto."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return ''.join(metric.render() for metric in metrics)
+
+REGISTRY = MetricsRegistry()
+
+def _counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Crea y registra un contador en `REGISTRY`."""
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+def _histogram(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Histogram:
+    """Crea y registra un histograma de duraciones en `REGISTRY`."""
+    return REGISTRY.register(Histogram(name, documentation, labelnames))
+
+# DocumentRetrieverAgent
+document_retrieval_duration = _histogram('document_retrieval_duration_seconds', 'Time spent retrieving documents')
+document_retrieval_success = _counter('document_retrieval_success_total', 'Successful document retrievals')
+document_retrieval_failure = _counter('document_retrieval_failure_total', 'Failed document retrievals')
+
+# DocumentParserAgent
+document_parsing_duration = _histogram('document_parsing_duration_seconds', 'Time spent parsing a document', ['doc_type'])
+document_parsing_success = _counter('document_parsing_success_total', 'Successfully parsed documents', ['doc_type'])
+document_parsing_failure = _counter('document_parsing_failure_total', 'Documents that failed to parse', ['doc_type'])
+
+# ComparisonAgent
+comparison_duration = _histogram('comparison_duration_seconds', 'Time spent comparing P&L and Balance')
+discrepancies_found = _counter('discrepancies_found_total', 'Number of discrepancies found', ['severity'])
+validation_success = _counter('validation_success_total', 'Comparisons that found no discrepancies')
+comparison_llm_duration = _histogram('comparison_llm_duration_seconds', 'Time spent in ComparisonAgent model calls, by mode (batched or concurrent)', ['mode'])
+llm_cache_lookups = _counter('llm_cache_lookups_total', 'Model response cache lookups, by result (hit, disk_hit, miss)', ['result'])
+llm_cache_evictions = _counter('llm_cache_evictions_total', 'Model responses evicted from the cache, by tier and reason (expired, size)', ['tier', 'reason'])
+llm_prechecks = _counter('llm_precheck_total', 'Model calls skipped by a local pre-check or escalated to the model', ['check', 'outcome'])
+
+# IssueManagerAgent
+issue_creation_duration = _histogram('issue_creation_duration_seconds', 'Time spent creating or updating the audit issue')
+issue_creation_success = _counter('issue_creation_success_total', 'Issues created or updated')
+issue_creation_failure = _counter('issue_creation_failure_total', 'Failed issue creations or updates')
+
+# Auditoría completa
+audit_duration = _histogram('audit_duration_seconds', 'End-to-end audit duration, including stage waits')
+audits = _counter('audits_total', 'Audits run, by outcome', ['status'])
+
+# GitHub API
+github_api_rate_limit_remaining = REGISTRY.register(Gauge('github_api_rate_limit_remaining', 'Requests left in the current GitHub rate-limit window'))
+github_api_request_duration = _histogram('github_api_request_duration_seconds', 'GitHub API request duration')
+github_api_requests = _counter('github_api_requests_total', 'GitHub API reads by result (ok, not_modified, other)', ['result'])
+github_api_errors = _counter('github_api_error_total', 'GitHub API requests that failed or returned an error status')
+
+@contextmanager
+def track(duration: Histogram, success: Counter, failure: Counter, **labels: str) -> Iterator[None]:
+    """Mide el bloque en `duration` y cuenta si terminó bien o con excepción."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        failure.inc(**labels)
+        raise
+    else:
+        success.inc(**labels)
+    finally:
+        duration.observe(time.perf_counter() - start, **labels)
+
+def record_discrepancies(discrepancies: List[Dict]) -> None:
+    """Cuenta las discrepancias de una comparación por severidad."""
+    if not discrepancies:
+        validation_success.inc()
+    for item in discrepancies:
+        discrepancies_found.inc(severity=item.get('severity') or 'unknown')
+
+def render() -> str:
+    """Texto de exposición de todas las métricas del auditor."""
+    return REGISTRY.render()
@@ -0,0 +1,169 @@
+"""Perfiles bajo demanda de auditorías individuales.
+
+Una petición a `/audit` o `/webhook/github` se perfila si trae la cabecera
+`X-Audit-Profile` con el token de `AUDIT_PROFILE_TOKEN`, o por muestreo con
+probabilidad `AUDIT_PROFILE_SAMPLE_RATE`. El pipeline completo corre bajo
+`cProfile` en el hilo que lo ejecuta y el resultado se guarda con formato
+`pstats` en un directorio rotativo (`AUDIT_PROFILE_DIR`) que conserva los
+últimos `AUDIT_PROFILE_MAX_FILES` perfiles.
+"""
+
+import cProfile
+import datetime
+import hmac
+import io
+import os
+import pstats
+import random
+import re
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..core.exceptions import ConfigurationError
+from ..core.constants import (
+    AUDIT_PROFILE_DIR_ENV, AUDIT_PROFILE_MAX_FILES, AUDIT_PROFILE_SAMPLE_RATE_ENV, AUDIT_PROFILE_TOKEN_ENV
+)
+
+PROFILE_SUFFIX = '.prof'
+_NAME = re.compile(r'^[\w.-]+\.prof$')
+
+class ProfileStore:
+    """Directorio de perfiles que descarta los más antiguos.
+
+    Args:
+        directory: Directorio de los perfiles; se crea si no existe.
+        max_profiles: Perfiles retenidos como máximo.
+    """
+
+    def __init__(self, directory: str, max_profiles: int = AUDIT_PROFILE_MAX_FILES):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def save(self, profile: cProfile.Profile, label: str) -> str:
+        """Guarda `profile` y devuelve su nombre de archivo."""
+        stamp = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+        label = re.sub(r'[^\w.-]+', '_', label).strip('_')[:80]
+        name = f"{stamp}-{label}{PROFILE_SUFFIX}"
+        with self._lock:
+            profile.dump_stats(os.path.join(self.directory, name))
+            names = self._names()
+            for stale in names[:max(0, len(names) - self.max_profiles)]:
+                try:
+                    os.unlink(os.path.join(self.directory, stale))
+                except OSError:
+                    pass
+        return name
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Perfiles guardados, del más reciente al más antiguo."""
+        profiles = []
+        for name in reversed(self._names()):
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            profiles.append({
+                'name': name,
+                'size': stat.st_size,
+                'created_at': datetime.datetime.fromtimestamp(stat.st_mtime, datetime.timezone.utc).isoformat()
+            })
+        return profiles
+
+    def path(self, name: str) -> Optional[str]:
+        """Ruta del perfil `name`, o None si no existe o el nombre no es válido."""
+        if not _NAME.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    def summary(self, name: str, limit: int = 40) -> Optional[str]:
+        """Las `limit` funciones con más tiempo acumulado, en texto de `pstats`."""
+        path = self.path(name)
+        if path is None:
+            return None
+        output = io.StringIO()
+        pstats.Stats(path, stream=output).sort_stats('cumulative').print_stats(limit)
+        return output.getvalue()
+
+    def _names(self) -> List[str]:
+        """Nombres de los perfiles, del más antiguo al más reciente."""
+        # El nombre empieza con la marca de tiempo, así que el orden es cronológico
+        return sorted(name for name in os.listdir(self.directory) if _NAME.match(name))
+
+class ProfilingPolicy:
+    """Decide qué peticiones se perfilan.
+
+    Args:
+        token: Valor de `X-Audit-Profile` que habilita el perfil y el acceso a
+            los perfiles guardados; None lo deshabilita.
+        sample_rate: Fracción de peticiones perfiladas sin cabecera (0 a 1).
+        rng: Fuente de números aleatorios, reemplazable en pruebas.
+    """
+
+    def __init__(self, token: Optional[str] = None, sample_rate: float = 0.0, rng: Callable[[], float] = random.random):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ConfigurationError(f"Tasa de muestreo de perfiles inválida: {sample_rate}")
+        self.token = token or None
+        self.sample_rate = sample_rate
+        self.rng = rng
+
+    def authorized(self, header: Optional[str]) -> bool:
+        """Si la cabecera trae el token configurado."""
+        return self.token is not None and header is not None and hmac.compare_digest(header.encode(), self.token.encode())
+
+    def should_profile(self, header: Optional[str]) -> bool:
+        """Si la petición se perfila: cabecera autorizada o muestreo."""
+        return self.authorized(header) or (self.sample_rate > 0 and self.rng() < self.sample_rate)
+
+def profile_call(store: ProfileStore, label: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, Optional[str]]:
+    """Ejecuta `func` bajo `cProfile` y guarda el perfil.
+
+    Returns:
+        Tuple[Any, Optional[str]]: El resultado de `func` y el nombre del
+        perfil, o None si no se pudo perfilar (otro perfilador activo).
+    """
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        return func(*args, **kwargs), None
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        profile.disable()
+    return result, store.save(profile, label)
+
+_default_store: Optional[ProfileStore] = None
+_default_policy: Optional[ProfilingPolicy] = None
+_default_lock = threading.Lock()
+
+def default_profile_store() -> ProfileStore:
+    """Directorio de perfiles del proceso (`AUDIT_PROFILE_DIR` o uno temporal)."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            directory = os.getenv(AUDIT_PROFILE_DIR_ENV) or os.path.join(tempfile.gettempdir(), 'auditor-profiles')
+            _default_store = ProfileStore(directory)
+        return _default_store
+
+def default_profiling_policy() -> ProfilingPolicy:
+    """Política del proceso, leída de `AUDIT_PROFILE_TOKEN` y `AUDIT_PROFILE_SAMPLE_RATE`."""
+    global _default_policy
+    with _default_lock:
+        if _default_policy is None:
+            try:
+                sample_rate = float(os.getenv(AUDIT_PROFILE_SAMPLE_RATE_ENV) or 0.0)
+            except ValueError:
+                raise ConfigurationError(f"{AUDIT_PROFILE_SAMPLE_RATE_ENV} debe ser un número entre 0 y 1")
+            _default_policy = ProfilingPolicy(os.getenv(AUDIT_PROFILE_TOKEN_ENV), sample_rate)
+        return _default_policy
+
+def profiled_audit(audit: Callable[..., Dict[str, Any]], label: str, store: Optional[ProfileStore] = None) -> Callable[..., Dict[str, Any]]:
+    """Envuelve una función de auditoría para perfilarla; su resultado incluye `profile`."""
+    def run(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+        result, name = profile_call(store or default_profile_store(), label, audit, *args, **kwargs)
+        return dict(result, profile=name)
+    return run
@@ -0,0 +1,81 @@
+"""Agrupación de ráfagas de pushes por repositorio y rama.
+
+Cada push programa la auditoría del nuevo head con una espera de `window`
+segundos; si llega otro push a la misma rama antes de que esa auditoría
+empiece, se cancela y se reemplaza por la del commit más reciente. Para que
+una ráfaga continua no posponga la auditoría indefinidamente, la espera nunca
+supera `max_wait` segundos desde el primer push de la ráfaga.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..core.constants import AUDIT_DEBOUNCE_SECONDS, AUDIT_DEBOUNCE_MAX_SECONDS, JOB_QUEUED
+from .job_queue import AuditJob, AuditJobQueue
+from .push_filter import FinancialChanges
+
+class PushCoalescer:
+    """Debouncer de auditorías por `(repo_url, branch)` sobre `AuditJobQueue`.
+
+    Args:
+        job_queue: Cola donde se programan las auditorías.
+        window: Segundos de espera tras el último push antes de auditar.
+        max_wait: Espera máxima desde el primer push de una ráfaga.
+        clock: Reloj monotónico, reemplazable en pruebas.
+    """
+
+    def __init__(self, job_queue: AuditJobQueue, window: float = AUDIT_DEBOUNCE_SECONDS, max_wait: float = AUDIT_DEBOUNCE_MAX_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.job_queue = job_queue
+        self.window = window
+        self.max_wait = max(max_wait, window)
+        self.clock = clock
+        # Auditoría pendiente de cada rama y momento del primer push de su ráfaga
+        self._pending: Dict[Tuple[str, str], Tuple[AuditJob, float]] = {}
+        self._lock = threading.Lock()
+        self._counters = {'pushes': 0, 'coalesced': 0}
+
+    def push(self, repo_url: str, branch: str, head_sha: Optional[str] = None, changes: Optional[FinancialChanges] = None, **options: Any) -> AuditJob:
+        """Registra un push y devuelve la auditoría que lo cubrirá.
+
+        `changes` son los archivos financieros del push; al agrupar pushes se
+        combinan, y si alguno no los indica la auditoría revisa todo. Las
+        demás `options` (p. ej. `profile`) se conservan de la auditoría
+        reemplazada salvo que el nuevo push las cambie.
+        """
+        key = (repo_url, branch)
+        now = self.clock()
+        with self._lock:
+            self._counters['pushes'] += 1
+            coalesced = 0
+            burst_start = now
+            pending = self._pending.get(key)
+            # Sólo se reemplaza una auditoría que todavía no empezó
+            if pending is not None and self.job_queue.cancel(pending[0].id):
+                coalesced = pending[0].coalesced + 1
+                burst_start = pending[1]
+                previous = pending[0].options.get('changes')
+                changes = previous.merge(changes) if previous is not None and changes is not None else None
+                inherited = {name: value for name, value in pending[0].options.items() if name not in ('commit_sha', 'changes')}
+                options = dict(inherited, **options)
+                self._counters['coalesced'] += 1
+
+            options['commit_sha'] = head_sha
+            if changes is not None:
+                options['changes'] = changes
+            delay = max(0.0, min(self.window, burst_start + self.max_wait - now))
+            # `coalesced` se fija al crear el trabajo: un worker puede tomarlo antes de que `submit` regrese
+            job = self.job_queue.submit(repo_url, branch, delay=delay, coalesced=coalesced, **options)
+            self._prune()
+            self._pending[key] = (job, burst_start)
+            return job
+
+    def _prune(self) -> None:
+        """Olvida las ramas cuya auditoría ya empezó o terminó: no pueden reemplazarse."""
+        for key in [key for key, (job, _) in self._pending.items() if job.status != JOB_QUEUED]:
+            del self._pending[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Pushes recibidos y auditorías evitadas por agrupación."""
+        with self._lock:
+            return dict(self._counters)
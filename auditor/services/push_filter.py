@@ -0,0 +1,206 @@
+"""Filtro de pushes por archivos financieros y almacén de los últimos documentos.
+
+El payload de un push lista las rutas agregadas, modificadas y eliminadas de
+cada commit. Con las mismas reglas de descubrimiento de documentos
+(`FILE_EXTENSIONS`, `PL_FILE_PATTERNS`, `BALANCE_FILE_PATTERNS`) se decide,
+sin llamar a la API de GitHub, si el push puede afectar la auditoría. Cuando
+sólo cambió uno de los dos documentos, el otro se toma del almacén de
+documentos descargados por última vez para esa rama, siempre que el push
+demuestre que no cambió desde el commit en que se descargó.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..core.constants import (
+    DOC_TYPE_PL, DOC_TYPE_BALANCE,
+    FILE_EXTENSIONS, PL_FILE_PATTERNS, BALANCE_FILE_PATTERNS,
+    DOCUMENT_STORE_MAX_REPOS, GITHUB_PUSH_COMMITS_LIMIT
+)
+
+# Palabras de un nombre de archivo: se separan en los signos, entre letras y
+# dígitos y en los cambios de minúscula a mayúscula (`BalanceGeneral`, `PLReport`)
+_NAME_WORDS = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+')
+
+# Patrones que también se buscan dentro de una palabra (`incomestatement`); las
+# abreviaturas más cortas (`pl`, `bs`) aparecen en demasiadas palabras comunes
+_SUBSTRING_MIN_LENGTH = 4
+
+def document_kind(path: str) -> Optional[str]:
+    """Tipo de documento financiero (`pl` o `balance`) de una ruta, o None.
+
+    Se evalúa el nombre del archivo como en el descubrimiento de documentos:
+    primero la extensión y luego los patrones de P&L antes que los de Balance.
+    Los patrones deben coincidir con una palabra completa del nombre
+    (`pl_2024.md`, `pl2024.md`, `BalanceGeneral.md`), no con parte de ella
+    (`template.md`, `jobs.md`), salvo los de al menos `_SUBSTRING_MIN_LENGTH`
+    letras (`incomestatement.md`).
+    """
+    filename = path.rsplit('/', 1)[-1]
+    stem, dot, extension = filename.rpartition('.')
+    if not dot or f".{extension.lower()}" not in FILE_EXTENSIONS:
+        return None
+    words = [word.lower() for word in _NAME_WORDS.findall(stem)]
+    if _matches(words, PL_FILE_PATTERNS):
+        return DOC_TYPE_PL
+    if _matches(words, BALANCE_FILE_PATTERNS):
+        return DOC_TYPE_BALANCE
+    return None
+
+def _matches(words: List[str], patterns: List[str]) -> bool:
+    """Si algún patrón es una de las palabras o, si es largo, parte de una."""
+    return any(
+        pattern == word or (len(pattern) >= _SUBSTRING_MIN_LENGTH and pattern in word)
+        for pattern in patterns for word in words
+    )
+
+@dataclass
+class FinancialChanges:
+    """Rutas financieras que tocó un push (o una ráfaga de pushes).
+
+    `before` y `head` son los SHA anterior y final de la rama y `commits` los
+    SHA de los commits del push: los cambios listados cubren todo lo ocurrido
+    desde cualquiera de ellos hasta `head`.
+    """
+    pl: Set[str] = field(default_factory=set)
+    balance: Set[str] = field(default_factory=set)
+    removed: bool = False
+    before: Optional[str] = None
+    head: Optional[str] = None
+    commits: Set[str] = field(default_factory=set)
+
+    @property
+    def touched(self) -> bool:
+        """Si el push agregó, modificó o eliminó algún documento financiero."""
+        return bool(self.pl or self.balance or self.removed)
+
+    @property
+    def since(self) -> Set[str]:
+        """Commits desde los que los cambios listados están completos."""
+        return self.commits | {self.before} if self.before else set(self.commits)
+
+    def merge(self, other: 'FinancialChanges') -> 'FinancialChanges':
+        """Cambios combinados de dos pushes, `other` posterior a éste.
+
+        Los commits de ambos sólo se conservan si `other` empieza donde termina
+        éste; si falta un push intermedio, los cambios sólo están completos
+        desde los commits de `other`.
+        """
+        contiguous = self.head is not None and self.head == other.before
+        return FinancialChanges(
+            self.pl | other.pl, self.balance | other.balance, self.removed or other.removed,
+            before=self.before if contiguous else other.before,
+            head=other.head,
+            commits=self.commits | other.commits if contiguous else set(other.commits)
+        )
+
+def financial_changes(payload: Dict[str, Any]) -> Optional[FinancialChanges]:
+    """Extrae los cambios financieros del payload de un push.
+
+    Devuelve None cuando el payload no permite saber qué cambió: sin lista de
+    commits, lista truncada por GitHub o push forzado. En ese caso hay que
+    auditar todo.
+    """
+    commits = payload.get('commits')
+    if commits is None or payload.get('forced') or len(commits) >= GITHUB_PUSH_COMMITS_LIMIT:
+        return None
+
+    changes = FinancialChanges(before=payload.get('before'), head=payload.get('after'))
+    for commit in commits:
+        if commit.get('id'):
+            changes.commits.add(commit['id'])
+        for key in ('added', 'modified', 'removed'):
+            for path in commit.get(key) or ():
+                kind = document_kind(path)
+                if kind is None:
+                    continue
+                if key == 'removed':
+                    changes.removed = True
+                else:
+                    getattr(changes, kind).add(path)
+    return changes
+
+class LastDocumentStore:
+    """Últimos documentos descargados por `(repo_url, rama)`, en un LRU pequeño.
+
+    Guarda la ruta, el contenido y el SHA del commit de cada tipo de
+    documento; es seguro entre hilos.
+    """
+
+    def __init__(self, max_repos: int = DOCUMENT_STORE_MAX_REPOS):
+        self.max_repos = max_repos
+        self._entries: 'OrderedDict[Tuple[str, str], Dict[str, Tuple[str, str, Optional[str]]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, repo_url: str, branch: str, doc_type: str, path: str, content: str, sha: Optional[str] = None) -> None:
+        """Guarda el documento `doc_type` descargado de `path` en el commit `sha`.
+
+        Sin `sha` (descargado de la punta de la rama) el documento no puede
+        reutilizarse en `plan_partial`.
+        """
+        key = (repo_url, branch)
+        with self._lock:
+            self._entries.setdefault(key, {})[doc_type] = (path, content, sha)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_repos:
+                self._entries.popitem(last=False)
+
+    def get(self, repo_url: str, branch: str) -> Dict[str, Tuple[str, str, Optional[str]]]:
+        """Copia de los documentos guardados de la rama: `{tipo: (ruta, contenido, sha)}`."""
+        with self._lock:
+            documents = self._entries.get((repo_url, branch))
+            if documents is None:
+                return {}
+            self._entries.move_to_end((repo_url, branch))
+            return dict(documents)
+
+    def plan_partial(self, repo_url: str, branch: str, changes: Optional[FinancialChanges]) -> Optional[Tuple[str, str, str]]:
+        """Decide si basta con descargar un solo documento.
+
+        Devuelve `(tipo, ruta, contenido_del_otro)` cuando el push modificó
+        únicamente el archivo ya guardado de un tipo y el otro sigue vigente:
+        se guardó en el `before` del push o en uno de sus commits
+        (`FinancialChanges.since`), así que el push no lo modificó desde
+        entonces. En ese caso el otro queda registrado en el `head` del push.
+        En cualquier otro caso (archivos nuevos o eliminados, ambos tipos,
+        almacén incompleto, documento de otro commit) devuelve None y hay que
+        descubrir los documentos de nuevo.
+        """
+        if changes is None or changes.removed:
+            return None
+        stored = self.get(repo_url, branch)
+        if DOC_TYPE_PL not in stored or DOC_TYPE_BALANCE not in stored:
+            return None
+        if changes.pl and not changes.balance:
+            kind, other, paths = DOC_TYPE_PL, DOC_TYPE_BALANCE, changes.pl
+        elif changes.balance and not changes.pl:
+            kind, other, paths = DOC_TYPE_BALANCE, DOC_TYPE_PL, changes.balance
+        else:
+            return None
+        if paths != {stored[kind][0]}:
+            return None
+        other_path, other_content, other_sha = stored[other]
+        if other_sha is None or other_sha not in changes.since:
+            return None
+        if changes.head:
+            self.put(repo_url, branch, other, other_path, other_content, changes.head)
+        return kind, stored[kind][0], other_content
+
+    def clear(self) -> None:
+        """Vacía el almacén."""
+        with self._lock:
+            self._entries.clear()
+
+_default_store: Optional[LastDocumentStore] = None
+_default_store_lock = threading.Lock()
+
+def default_document_store() -> LastDocumentStore:
+    """Almacén de últimos documentos compartido por el proceso."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = LastDocumentStore()
+        return _default_store
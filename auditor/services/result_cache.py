@@ -0,0 +1,119 @@
+"""Caché de resultados de auditoría por commit y configuración de reglas.
+
+Un mismo commit auditado con las mismas reglas siempre produce el mismo
+resultado, así que los reintentos manuales, las reentregas del webhook y las
+ejecuciones simultáneas desde Actions y el webhook reutilizan el resultado
+guardado. La clave combina el repositorio, el SHA del commit ya resuelto y
+un hash de los prompts, las reglas y los umbrales vigentes (`ruleset_hash`); cambiar una
+regla invalida las entradas anteriores sin borrarlas explícitamente.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..core import account_names, constants, prompts, rules
+from ..core.constants import AUDIT_RESULT_CACHE_TTL, AUDIT_RESULT_CACHE_SIZE, RULESET_VERSION
+
+# Parámetros de `constants` que cambian el resultado de una auditoría
+_RULE_CONSTANTS = (
+    'MIN_AMOUNT', 'MAX_AMOUNT', 'TOLERANCE', 'AMOUNT_SCALE', 'RATIO_SCALE', 'PARSER_VERSION',
+    'PL_FILE_PATTERNS', 'BALANCE_FILE_PATTERNS', 'FILE_EXTENSIONS'
+)
+
+def ruleset_hash(**options: Any) -> str:
+    """Hash de los prompts, las reglas y las opciones que afectan el resultado.
+
+    Args:
+        **options: Opciones propias de quien audita (p. ej. `fixed_point`).
+    """
+    ruleset = {
+        'version': RULESET_VERSION,
+        'prompts': [prompts.MAIN_AGENT_PROMPT, prompts.COMPARISON_PROMPTS, prompts.ANALYSIS_PROMPTS, prompts.REPORT_PROMPTS],
+        'rules': [rule.describe() for rule in rules.RULES],
+        'accounts': account_names.ACCOUNT_SYNONYMS,
+        'constants': {name: getattr(constants, name) for name in _RULE_CONSTANTS},
+        'options': options
+    }
+    data = json.dumps(ruleset, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()[:16]
+
+class AuditResultCache:
+    """LRU de resultados con vencimiento, seguro entre hilos.
+
+    Los resultados se copian al guardarlos y al entregarlos, de modo que
+    quien los modifica no altera la copia en caché.
+
+    Args:
+        ttl: Segundos que un resultado se considera vigente.
+        max_entries: Resultados retenidos como máximo.
+        clock: Reloj monotónico, reemplazable en pruebas.
+    """
+
+    def __init__(self, ttl: float = AUDIT_RESULT_CACHE_TTL, max_entries: int = AUDIT_RESULT_CACHE_SIZE, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: 'OrderedDict[Tuple[str, str, str], Tuple[Any, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'expired': 0, 'refreshes': 0}
+
+    @staticmethod
+    def key(repo_url: str, commit_sha: str, ruleset: str) -> Tuple[str, str, str]:
+        """Clave de un resultado; la URL se normaliza como en `_parse_repo_url`."""
+        return repo_url.rstrip('/').removesuffix('.git').lower(), commit_sha, ruleset
+
+    def get(self, key: Tuple[str, str, str], force_refresh: bool = False) -> Optional[Any]:
+        """Devuelve el resultado vigente de `key`; con `force_refresh` siempre None."""
+        with self._lock:
+            if force_refresh:
+                self._counters['refreshes'] += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            if entry[1] <= self.clock():
+                del self._entries[key]
+                self._counters['expired'] += 1
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            value = entry[0]
+        return copy.deepcopy(value)
+
+    def put(self, key: Tuple[str, str, str], value: Any) -> None:
+        """Guarda un resultado con el TTL configurado."""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (value, self.clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Aciertos, fallos, vencimientos, refrescos forzados y entradas."""
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries))
+
+    def clear(self) -> None:
+        """Vacía la caché y reinicia los contadores."""
+        with self._lock:
+            self._entries.clear()
+            self._counters = {'hits': 0, 'misses': 0, 'expired': 0, 'refreshes': 0}
+
+_default_cache: Optional[AuditResultCache] = None
+_default_cache_lock = threading.Lock()
+
+def default_result_cache() -> AuditResultCache:
+    """Caché de resultados compartida por el proceso."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AuditResultCache()
+        return _default_cache
@@ -0,0 +1,99 @@
+"""Límites de concurrencia por etapa del pipeline de auditoría.
+
+Las etapas bloqueantes (`retrieve` en GitHub, `compare` con parseo y
+comparación, `issue` en GitHub) se ejecutan en hilos; cada una tiene un
+semáforo propio para que, con muchas auditorías simultáneas, ninguna acapare
+la cuota de GitHub ni la CPU. Los límites se configuran con la variable
+`AUDIT_STAGE_LIMITS`, p. ej. `retrieve=4,compare=2,issue=2`.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from ..core.exceptions import ConfigurationError
+from ..core.constants import AUDIT_STAGE_LIMITS, AUDIT_STAGE_LIMITS_ENV
+from . import tracing
+
+def parse_stage_limits(spec: str) -> Dict[str, int]:
+    """Convierte `etapa=límite,...` en un diccionario, partiendo de los valores por defecto.
+
+    Raises:
+        ConfigurationError: Si el texto no tiene el formato esperado o algún
+            límite no es un entero positivo.
+    """
+    limits = dict(AUDIT_STAGE_LIMITS)
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, value = item.partition('=')
+        try:
+            limit = int(value)
+        except ValueError:
+            raise ConfigurationError(f"Límite de etapa inválido: {item}")
+        if not name.strip() or limit < 1:
+            raise ConfigurationError(f"Límite de etapa inválido: {item}")
+        limits[name.strip()] = limit
+    return limits
+
+class StageLimits:
+    """Semáforos por etapa con contadores de ejecución y espera.
+
+    Las etapas sin límite configurado se ejecutan sin restricción.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        self.limits = dict(AUDIT_STAGE_LIMITS if limits is None else limits)
+        self._semaphores = {name: threading.BoundedSemaphore(limit) for name, limit in self.limits.items()}
+        self._lock = threading.Lock()
+        self._active = dict.fromkeys(self.limits, 0)
+        self._waiting = dict.fromkeys(self.limits, 0)
+
+    @contextmanager
+    def stage(self, name: str, timings: Optional[Dict[str, float]] = None) -> Iterator[None]:
+        """Ejecuta el bloque cuando la etapa `name` tiene un lugar libre.
+
+        Con `timings`, suma a `timings[name]` los milisegundos que tardó el
+        bloque, sin contar la espera por el lugar; la espera se agrega al span
+        activo como `<etapa>_wait_ms`.
+        """
+        semaphore = self._semaphores.get(name)
+        if semaphore is not None:
+            with self._lock:
+                self._waiting[name] += 1
+            waited = time.perf_counter()
+            semaphore.acquire()
+            # La espera por el lugar queda en el span activo (p. ej. `audit`)
+            tracing.set_attributes(**{f'{name}_wait_ms': (time.perf_counter() - waited) * 1000})
+            with self._lock:
+                self._waiting[name] -= 1
+                self._active[name] += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+            if semaphore is not None:
+                with self._lock:
+                    self._active[name] -= 1
+                semaphore.release()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Límite, ejecuciones en curso y esperas de cada etapa."""
+        with self._lock:
+            return {
+                name: {'limit': limit, 'active': self._active[name], 'waiting': self._waiting[name]}
+                for name, limit in self.limits.items()
+            }
+
+_default_limits: Optional[StageLimits] = None
+_default_limits_lock = threading.Lock()
+
+def default_stage_limits() -> StageLimits:
+    """Límites compartidos por el proceso, leídos de `AUDIT_STAGE_LIMITS`."""
+    global _default_limits
+    with _default_limits_lock:
+        if _default_limits is None:
+            _default_limits = StageLimits(parse_stage_limits(os.getenv(AUDIT_STAGE_LIMITS_ENV, '')))
+        return _default_limits
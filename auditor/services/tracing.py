@@ -0,0 +1,176 @@
+"""Trazas de las etapas de una auditoría.
+
+Cada etapa abre un span (`document_retrieval`, `document_parsing`,
+`financial_comparison`, `issue_publishing`, ...) con los atributos de
+`docs/observability.md`. El span activo viaja en un `ContextVar`, así que
+los spans anidados, incluso los que corren en otro hilo con el contexto
+copiado (`contextvars.copy_context`), quedan en la misma traza con su padre.
+Al cerrarse, cada span se entrega al exportador configurado; con
+`AUDIT_TRACE_FILE` se escriben como líneas JSON en ese archivo.
+"""
+
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..core.constants import TRACE_FILE_ENV
+
+@dataclass
+class Span:
+    """Una operación medida dentro de una traza."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_time: float
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    duration_ms: Optional[float] = None
+    status: str = 'ok'
+    error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Agrega o reemplaza un atributo."""
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representación serializable del span."""
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_time': self.start_time,
+            'duration_ms': self.duration_ms,
+            'status': self.status,
+            'error': self.error,
+            'attributes': self.attributes
+        }
+
+class SpanExporter:
+    """Destino de los spans terminados."""
+
+    def export(self, span: Span) -> None:
+        """Recibe un span al cerrarse; no debe lanzar excepciones."""
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        """Libera los recursos del exportador."""
+
+class InMemoryExporter(SpanExporter):
+    """Guarda los spans en una lista, para pruebas y depuración."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+class JsonLinesExporter(SpanExporter):
+    """Escribe cada span como una línea JSON al final de `path`."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line + '\n')
+                self._file.flush()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+# Span activo del contexto actual
+_current_span: ContextVar[Optional[Span]] = ContextVar('audit_span', default=None)
+
+class Tracer:
+    """Crea spans anidados y los entrega a `exporter` (None para descartarlos)."""
+
+    def __init__(self, exporter: Optional[SpanExporter] = None):
+        self.exporter = exporter
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Abre un span hijo del activo (o una traza nueva) mientras dura el bloque.
+
+        Una excepción marca el span con `status='error'` y se propaga.
+        """
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent is not None else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent is not None else None,
+            start_time=time.time(),
+            attributes=attributes
+        )
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.status = 'error'
+            span.error = str(e) or type(e).__name__
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - start) * 1000
+            _current_span.reset(token)
+            exporter = self.exporter
+            if exporter is not None:
+                exporter.export(span)
+
+_default_tracer: Optional[Tracer] = None
+_default_tracer_lock = threading.Lock()
+
+def default_tracer() -> Tracer:
+    """Tracer del proceso; exporta a `AUDIT_TRACE_FILE` si está definido."""
+    global _default_tracer
+    with _default_tracer_lock:
+        if _default_tracer is None:
+            path = os.getenv(TRACE_FILE_ENV)
+            _default_tracer = Tracer(JsonLinesExporter(path) if path else None)
+        return _default_tracer
+
+def set_exporter(exporter: Optional[SpanExporter]) -> Optional[SpanExporter]:
+    """Cambia el exportador del tracer del proceso y devuelve el anterior."""
+    tracer = default_tracer()
+    previous, tracer.exporter = tracer.exporter, exporter
+    return previous
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """`Tracer.span` del tracer del proceso; también sirve como decorador."""
+    with default_tracer().span(name, **attributes) as current:
+        yield current
+
+def current_span() -> Optional[Span]:
+    """Span activo, o None fuera de una traza."""
+    return _current_span.get()
+
+def set_attributes(**attributes: Any) -> None:
+    """Agrega atributos al span activo, si lo hay."""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+_SEVERITY_RANK = {'low': 0, 'medium': 1, 'high': 2}
+
+def record_comparison(discrepancies: List[Dict[str, Any]]) -> None:
+    """Agrega al span activo la cantidad de discrepancias y la severidad más alta."""
+    severities = [item.get('severity') for item in discrepancies]
+    set_attributes(
+        discrepancies=len(discrepancies),
+        severity=max(severities, key=lambda severity: _SEVERITY_RANK.get(severity, -1), default=None)
+    )
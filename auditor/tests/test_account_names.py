@@ -0,0 +1,56 @@
+from decimal import Decimal
+
+from ..core.account_names import (
+    ACCOUNT_SYNONYMS, NET_INCOME, RETAINED_EARNINGS, TOTAL_ASSETS, TOTAL_EQUITY, TOTAL_LIABILITIES,
+    account_concept, account_index, fold, name_concepts
+)
+from ..core.models import FinancialLineItem, NamePool
+from ..core.rules import compile_rules
+from ..services.document_service import DocumentService
+
+def test_fold_and_synonyms():
+    """Prueba la normalización y que cada sinónimo corresponde a su concepto."""
+    assert fold('  Utilidad   NETA del Período: ') == 'utilidad neta del periodo'
+    assert fold("Total Stockholders' Equity") == 'total stockholders equity'
+    for concept, names in ACCOUNT_SYNONYMS.items():
+        for name in names:
+            for variant in (name, name.upper(), f" {name}.", fold(name)):
+                assert account_concept(variant) == concept, variant
+
+def test_similar_names_are_not_net_income():
+    """Prueba que los nombres con 'net' o 'utilidad' no se confunden con la utilidad neta."""
+    for name in ('Activos Netos', 'Ventas Netas', 'Internet', 'Net Assets', 'Utilidad Bruta', 'Cuentas Netas'):
+        assert account_concept(name) is None, name
+    assert account_concept('Utilidades Retenidas') == RETAINED_EARNINGS
+    assert account_concept(float('nan')) is None
+
+def test_name_concepts_matches_single_lookups():
+    """Prueba que la búsqueda en bloque encuentra lo mismo que la consulta por nombre."""
+    names = ['Efectivo', 'UTILIDAD NETA', 'İnventario', 'Pérdida Neta', 'Net-Income', '- Total Capital', 'Activos Netos']
+    expected = {index: account_concept(name) for index, name in enumerate(names) if account_concept(name)}
+    assert name_concepts(names) == expected == {1: NET_INCOME, 3: NET_INCOME, 4: NET_INCOME, 5: TOTAL_EQUITY}
+    assert name_concepts(names + [None]) == expected
+
+    ascii_names = [name for name in names if name.isascii()] + ['', 'Ne', 'Total Activos', 'Retained Earnings.', '_x']
+    pool = NamePool(ascii_names)
+    assert pool.concepts() == name_concepts(ascii_names) == {1: NET_INCOME, 2: NET_INCOME, 3: TOTAL_EQUITY, 7: TOTAL_ASSETS, 8: RETAINED_EARNINGS}
+    assert NamePool(names).concepts() == expected
+
+def test_table_index_built_at_parse(sample_balance_markdown):
+    """Prueba que la tabla parseada trae el índice con la primera partida de cada concepto."""
+    content = sample_balance_markdown.replace('| Utilidad | $200  |', '| Activos Netos | $50 |\n    | Utilidad | $200  |\n    | Utilidad Neta | $999 |')
+    table = DocumentService()._parse_balance_markdown(content)
+
+    assert table.accounts['capital_contable'] == {NET_INCOME: Decimal('200')}
+    assert table.accounts['totals'] == {TOTAL_ASSETS: Decimal('1500'), TOTAL_LIABILITIES: Decimal('1000'), TOTAL_EQUITY: Decimal('500')}
+    assert account_index(table.to_dict()) == table.accounts
+
+def test_net_assets_do_not_break_income_check():
+    """Prueba que 'Activos Netos' en los totales ya no se toma como utilidad neta."""
+    pl_data = {'period': '2024-Q1', 'totals': {'Utilidad Neta': Decimal('400')}}
+    balance_data = {
+        'period': '2024-Q1',
+        'capital_contable': [FinancialLineItem('Utilidad del Ejercicio', Decimal('400'), 'equity', '2024-Q1')],
+        'totals': {'Activos Netos': Decimal('900')}
+    }
+    assert compile_rules(['income_mismatch']).evaluate(pl_data, balance_data) == []
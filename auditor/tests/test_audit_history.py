@@ -0,0 +1,87 @@
+import datetime
+from decimal import Decimal
+
+from ..services.audit_history import AuditHistoryStore, normalize_repo_url
+
+STARTED = datetime.datetime(2024, 4, 1, tzinfo=datetime.timezone.utc)
+
+def _discrepancy(kind: str) -> dict:
+    """Discrepancia mínima del tipo indicado."""
+    return {'type': kind, 'severity': 'high', 'description': kind, 'fix': 'corregir'}
+
+def _seed(store: AuditHistoryStore) -> list:
+    """Guarda cinco auditorías de dos repositorios y devuelve sus ids."""
+    return [
+        store.record('https://github.com/owner/repo', 'main', 'a' * 40, 'success', STARTED, {'retrieve': 1.5, 'compare': 2.5},
+                     [_discrepancy('unbalanced')], period='2024-Q1'),
+        store.record('https://github.com/owner/repo', 'main', 'b' * 40, 'success', STARTED, {'retrieve': 1.0}, [], period='2024-Q1'),
+        store.record('https://github.com/owner/other', 'main', 'c' * 40, 'success', STARTED, {'retrieve': 1.0},
+                     [_discrepancy('unbalanced'), _discrepancy('income_mismatch')], period='2024-Q2'),
+        store.record('https://github.com/Owner/Repo.git', 'main', 'd' * 40, 'success', STARTED, {'retrieve': 1.0},
+                     [_discrepancy('income_mismatch')], period='2024-Q2'),
+        store.record('https://github.com/owner/repo', 'main', None, 'error', STARTED, {}, [_discrepancy('system_error')])
+    ]
+
+def test_record_and_get():
+    """Prueba que una auditoría se guarda con sus tiempos, discrepancias y totales."""
+    store = AuditHistoryStore()
+    audit_id = store.record(
+        'https://github.com/owner/repo/', 'main', 'a' * 40, 'success', STARTED, {'retrieve': 1.5, 'compare': 2.5},
+        [_discrepancy('unbalanced')], issue_url='https://github.com/owner/repo/issues/1', period='2024-Q1',
+        totals={'balance': {'Total Activos': Decimal('1500.00')}}
+    )
+
+    audit = store.get(audit_id)
+
+    assert audit['repo_url'] == 'https://github.com/owner/repo'
+    assert audit['duration_ms'] == 4.0
+    assert audit['timings'] == {'retrieve': 1.5, 'compare': 2.5}
+    assert audit['started_at'] == STARTED.isoformat()
+    assert audit['discrepancies'] == [_discrepancy('unbalanced')]
+    assert audit['totals'] == {'balance': {'Total Activos': '1500.00'}}
+    assert store.get(audit_id + 1) is None
+    assert store.stats() == {'audits': 1, 'write_errors': 0}
+
+def test_query_filters():
+    """Prueba los filtros por repositorio, período, tipo de discrepancia y estado."""
+    store = AuditHistoryStore()
+    ids = _seed(store)
+
+    def found(**filters):
+        return [audit['id'] for audit in store.query(**filters)[0]]
+
+    assert found() == ids[::-1]
+    assert found(repo_url='https://github.com/OWNER/repo') == [ids[4], ids[3], ids[1], ids[0]]
+    assert found(period='2024-Q2') == [ids[3], ids[2]]
+    assert found(discrepancy_type='unbalanced') == [ids[2], ids[0]]
+    assert found(repo_url='https://github.com/owner/repo', discrepancy_type='income_mismatch') == [ids[3]]
+    assert found(status='error') == [ids[4]]
+
+def test_normalize_repo_url():
+    """Prueba que sólo se quitan la barra final y el sufijo `.git`."""
+    assert normalize_repo_url('https://github.com/Owner/Repo.git/') == 'https://github.com/owner/repo'
+    assert normalize_repo_url('https://github.com/owner/my.github-tools') == 'https://github.com/owner/my.github-tools'
+
+def test_query_pages_with_cursor():
+    """Prueba que las páginas se encadenan por cursor sin repetir auditorías."""
+    store = AuditHistoryStore()
+    ids = _seed(store)
+
+    first, cursor = store.query(limit=2)
+    second, cursor = store.query(limit=2, cursor=cursor)
+    third, cursor = store.query(limit=2, cursor=cursor)
+
+    assert [audit['id'] for audit in first + second + third] == ids[::-1]
+    assert cursor is None
+    assert [item['type'] for item in second[0]['discrepancies']] == ['unbalanced', 'income_mismatch']
+
+def test_memory_history_is_bounded():
+    """Prueba que el historial conserva sólo las últimas `max_audits` auditorías y sus filas."""
+    store = AuditHistoryStore(max_audits=2)
+    ids = _seed(store)
+
+    assert [audit['id'] for audit in store.query()[0]] == [ids[4], ids[3]]
+    assert store.get(ids[2]) is None
+    assert store._conn.execute('SELECT COUNT(*) FROM discrepancies').fetchone()[0] == 2
+    assert store.stats() == {'audits': 2, 'write_errors': 0}
+    assert AuditHistoryStore().max_audits == 10_000
@@ -149,4 +149,25 @@ def test_run_audit(audit_service):
     
     assert result.status == 'success'
     assert len(result.discrepancies) == 0
-    assert result.issue_url is None 
\ No newline at end of file
+    assert result.issue_url is None
+
+def test_compare_parsed_tables(audit_service, sample_pl_markdown: str, sample_balance_markdown: str):
+    """Prueba la comparación con las tablas de partidas que devuelve el parser."""
+    service = DocumentService()
+    pl_data = service._parse_pl_markdown(sample_pl_markdown)
+    balance_data = service._parse_balance_markdown(sample_balance_markdown)
+
+    discrepancies = audit_service.compare_documents(pl_data, balance_data)
+    assert discrepancies == audit_service.compare_documents(pl_data.to_dict(), balance_data.to_dict())
+    assert [d['type'] for d in discrepancies] == ['income_mismatch']
+
+def test_audit_periods(sample_pl_document, sample_balance_document, sample_balance_markdown):
+    """Prueba la auditoría de varios períodos en un lote."""
+    service = AuditService(document_service=DocumentService(), github_service=Mock(spec=GitHubService))
+    shifted = FinancialDocument(sample_balance_markdown.replace('2024-Q1', '2024-Q2'), 'balance', 'markdown')
+    results = service.audit_periods([(sample_pl_document, sample_balance_document), (sample_pl_document, shifted)])
+
+    assert [result['period'] for result in results] == ['2024-Q1', '2024-Q1']
+    assert [[d['type'] for d in result['discrepancies']] for result in results] == [['income_mismatch'], ['period_mismatch', 'income_mismatch']]
+    single = service.compare_documents(service.document_service.parse_document(sample_pl_document), service.document_service.parse_document(shifted))
+    assert results[1]['discrepancies'] == single
@@ -0,0 +1,180 @@
+import json
+import threading
+from decimal import Decimal
+
+import pytest
+
+from ..agents.comparison_agent import ComparisonAgent
+from ..core.adk_parser import parse_combined_response
+from ..core.adk_prompts import COMBINED_RESPONSE_SCHEMA, FINANCIAL_VALIDATION_PROMPT, RATIO_ANALYSIS_PROMPT
+from ..core.constants import PROMPT_CHARS_PER_TOKEN, PROMPT_DATA_TOKEN_BUDGET, RATIO_NORMAL_RANGES
+from ..core.models import FinancialLineItem
+from ..core.prechecks import MISSING_TOTALS, OUT_OF_RANGE, balance_escalation
+from ..services import llm_cache, metrics
+from ..services.llm_cache import LlmResponseCache
+from ..services.llm_calls import track_llm_calls
+
+PL_DATA = {'period': '2024-Q1', 'totals': {'Ingresos Totales': Decimal('1000'), 'Gastos Totales': Decimal('800')}}
+BALANCE_DATA = {
+    'period': '2024-Q1',
+    'totals': {'Total Activos': Decimal('1000'), 'Total Pasivos': Decimal('500'), 'Total Capital Contable': Decimal('500')}
+}
+
+COMBINED_RESPONSE = json.dumps({
+    'validation': [{'type': 'period_mismatch', 'description': 'Períodos distintos', 'severity': 'high', 'fix': 'Revisar'}],
+    'ratios': [{'type': 'ratio_gastos', 'value': '0.95', 'description': 'Gastos altos', 'fix': 'Revisar gastos'}],
+    'balance': []
+})
+
+@pytest.fixture(autouse=True)
+def fresh_llm_cache(monkeypatch):
+    """Cada prueba usa una caché de respuestas propia y vacía."""
+    cache = LlmResponseCache()
+    monkeypatch.setattr(llm_cache, '_default_cache', cache)
+    return cache
+
+def recording_agent(prompts, respond=lambda prompt: '[]', schemas=None, **options):
+    """Agente cuyo modelo registra los prompts (y en `schemas` los esquemas de respuesta) y contesta con `respond`."""
+    class RecordingAgent(ComparisonAgent):
+        def generate(self, prompt, response_schema=None):
+            prompts.append(prompt)
+            if schemas is not None:
+                schemas.append(response_schema)
+            return respond(prompt)
+    return RecordingAgent(**options)
+
+def test_ranges_match_prompt():
+    """Prueba que los rangos locales son los que declara el prompt de ratios."""
+    for low, high in RATIO_NORMAL_RANGES.values():
+        assert f"Rango normal: {low} - {high}" in RATIO_ANALYSIS_PROMPT
+    assert balance_escalation(Decimal('0.01')) is None
+    assert balance_escalation(Decimal('-0.02')) == OUT_OF_RANGE
+    assert balance_escalation(Decimal('0'), ['equity']) == MISSING_TOTALS
+
+def test_clean_inputs_skip_the_model():
+    """Prueba que ratios en rango y un balance cuadrado no consultan al modelo."""
+    prompts = []
+    agent = recording_agent(prompts)
+    skipped = metrics.llm_prechecks.value(check='ratios', outcome='skipped')
+    without_equity = {'totals': {name: amount for name, amount in BALANCE_DATA['totals'].items() if name != 'Total Capital Contable'}}
+    with track_llm_calls() as counts:
+        assert agent.analyze_ratios(PL_DATA, BALANCE_DATA) == []
+        assert agent.validate_balance_equation(BALANCE_DATA) == []
+        # Los ratios no usan el capital contable: que falte no los escala
+        assert agent.analyze_ratios(PL_DATA, without_equity) == []
+
+    assert prompts == []
+    assert counts == {'skipped': 3, 'escalated': 0}
+    assert metrics.llm_prechecks.value(check='ratios', outcome='skipped') == skipped + 2
+
+def test_out_of_range_and_ambiguous_inputs_escalate():
+    """Prueba que los valores fuera de rango y los totales faltantes se escalan."""
+    prompts = []
+    agent = recording_agent(prompts, fixed_point=True)
+    expensive = {'totals': dict(PL_DATA['totals'], **{'Gastos Totales': Decimal('950')})}
+    unbalanced = {'totals': dict(BALANCE_DATA['totals'], **{'Total Pasivos': Decimal('499')})}
+    with track_llm_calls() as counts:
+        agent.analyze_ratios(expensive, BALANCE_DATA)
+        agent.analyze_ratios({'totals': {'Ingresos Totales': Decimal('1000')}}, BALANCE_DATA)
+        agent.validate_balance_equation(unbalanced)
+        agent.validate_balance_equation({'totals': {'Total Activos': Decimal('0')}})
+        agent.validate_balance_equation(BALANCE_DATA)
+
+    assert counts == {'skipped': 1, 'escalated': 4}
+    assert 'Gastos/Ingresos: 0.950000' in prompts[0]
+    assert 'Diferencia: $1.00' in prompts[2]
+
+def test_prechecks_can_be_disabled():
+    """Prueba que sin verificaciones locales siempre se consulta al modelo."""
+    prompts = []
+    agent = recording_agent(prompts, prechecks=False)
+    with track_llm_calls() as counts:
+        agent.analyze_ratios(PL_DATA, BALANCE_DATA)
+        agent.validate_balance_equation(BALANCE_DATA)
+
+    assert len(prompts) == 2
+    assert counts == {'skipped': 0, 'escalated': 2}
+
+def test_batched_validations_use_one_prompt():
+    """Prueba que las tres verificaciones van en un prompt y la respuesta se separa."""
+    prompts, schemas = [], []
+    agent = recording_agent(prompts, lambda prompt: COMBINED_RESPONSE, schemas, prechecks=False)
+    discrepancies = agent.run_validations(PL_DATA, BALANCE_DATA)
+
+    assert len(prompts) == 1 and schemas == [COMBINED_RESPONSE_SCHEMA]
+    assert all(f'(clave "{key}")' in prompts[0] for key in ('validation', 'ratios', 'balance'))
+    assert [d['type'] for d in discrepancies] == ['period_mismatch', 'ratio_gastos']
+    assert discrepancies[1]['value'] == Decimal('0.95')
+
+def test_unbatched_validations_run_concurrently():
+    """Prueba que sin lotes cada verificación se consulta por separado y en paralelo."""
+    barrier = threading.Barrier(3, timeout=5)
+
+    def respond(prompt):
+        # Sólo pasa cuando las tres consultas están en curso a la vez
+        barrier.wait()
+        if prompt == RATIO_ANALYSIS_PROMPT.format(revenue_assets_ratio=1, expense_revenue_ratio=Decimal('0.8'), liability_assets_ratio=Decimal('0.5')):
+            return 'Ratio: Gastos\nAnálisis: En rango'
+        return 'Tipo: revision\nDescripción: Revisar'
+
+    prompts = []
+    agent = recording_agent(prompts, respond, prechecks=False, batch_calls=False)
+    discrepancies = agent.run_validations(PL_DATA, BALANCE_DATA)
+
+    assert len(prompts) == 3
+    assert [d['type'] for d in discrepancies] == ['revision', 'ratio_gastos', 'revision']
+
+def test_invalid_combined_response_falls_back():
+    """Prueba que una respuesta combinada inválida repite las consultas por separado."""
+    prompts = []
+    respond = lambda prompt: 'no es JSON' if 'clave "validation"' in prompt else '[]'
+    agent = recording_agent(prompts, respond, prechecks=False)
+
+    assert agent.run_validations(PL_DATA, BALANCE_DATA) == []
+    assert len(prompts) == 4
+    # Un hallazgo sin un campo obligatorio del esquema también
+    prompts.clear()
+    incomplete = json.dumps({'validation': [{'type': 'x', 'description': 'y', 'fix': 'z'}], 'ratios': [], 'balance': []})
+    respond = lambda prompt: incomplete if 'clave "validation"' in prompt else '[]'
+    assert recording_agent(prompts, respond, prechecks=False, cache_responses=False).run_validations(PL_DATA, BALANCE_DATA) == []
+    assert len(prompts) == 4
+    # Con las verificaciones locales en rango sólo queda la validación general
+    prompts.clear()
+    assert recording_agent(prompts, cache_responses=False).run_validations(PL_DATA, BALANCE_DATA) == []
+    assert len(prompts) == 1 and 'clave' not in prompts[0]
+
+def test_parse_combined_response():
+    """Prueba el parseo de la respuesta combinada, también dentro de un bloque de código."""
+    parsed = parse_combined_response(f"```json\n{COMBINED_RESPONSE}\n```")
+    assert parsed['balance'] == [] and parsed['ratios'][0]['value'] == Decimal('0.95')
+    missing_severity = '{"validation": [{"type": "x", "description": "y", "fix": "z"}], "ratios": [], "balance": []}'
+    for response in ('[]', '{"ratios": {}}', '{"validation": ["x"]}', '{"validation": [], "ratios": []}', missing_severity):
+        with pytest.raises(ValueError):
+            parse_combined_response(response)
+
+def test_reaudit_reuses_cached_responses(fresh_llm_cache):
+    """Prueba que reauditar los mismos datos no vuelve a consultar al modelo."""
+    prompts = []
+    agent = recording_agent(prompts, lambda prompt: COMBINED_RESPONSE, prechecks=False)
+    first = agent.run_validations(PL_DATA, BALANCE_DATA)
+
+    assert agent.run_validations(PL_DATA, BALANCE_DATA) == first
+    assert len(prompts) == 1
+    assert fresh_llm_cache.stats()['hits'] == 1
+    # Sin caché se consulta siempre
+    recording_agent(prompts, lambda prompt: COMBINED_RESPONSE, prechecks=False, cache_responses=False).run_validations(PL_DATA, BALANCE_DATA)
+    assert len(prompts) == 2
+
+def test_validation_prompt_uses_statement_tables():
+    """Prueba que la validación general envía los estados como tablas dentro del presupuesto."""
+    prompts = []
+    expenses = [FinancialLineItem(f'Gasto {index}', Decimal(index), 'expense', '2024-Q1') for index in range(2000)]
+    pl_data = dict(PL_DATA, expenses=expenses)
+    recording_agent(prompts).validate_financial_documents(pl_data, BALANCE_DATA)
+    recording_agent(prompts, prompt_token_budget=None).validate_financial_documents(pl_data, BALANCE_DATA)
+
+    assert "totals\tTotal Activos\t1000" in prompts[0]
+    assert "FinancialLineItem" not in prompts[0] and "Decimal(" not in prompts[0]
+    assert "partidas)" in prompts[0] and "expenses\tGasto 1999\t1999" in prompts[0]
+    assert len(prompts[0]) < len(FINANCIAL_VALIDATION_PROMPT) + PROMPT_DATA_TOKEN_BUDGET * PROMPT_CHARS_PER_TOKEN
+    assert "expenses\tGasto 0\t0" in prompts[1]
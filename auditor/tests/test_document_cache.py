@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from dataclasses import replace
+
+from ..core.models import FinancialDocument
+from ..services.document_cache import ParsedDocumentCache, blob_sha
+from ..services.document_service import DocumentService
+
+def test_blob_sha_matches_git():
+    """Prueba que el hash del contenido coincide con `git hash-object`."""
+    assert blob_sha("hello\n") == 'ce013625030ba8dba906f756967f9e9ca394464a'
+
+def test_parse_document_hits_cache(sample_pl_document: FinancialDocument):
+    """Prueba que un documento sin cambios se parsea una sola vez."""
+    cache = ParsedDocumentCache()
+    service = DocumentService(cache=cache)
+
+    first = service.parse_document(sample_pl_document)
+    second = service.parse_document(replace(sample_pl_document))
+
+    # Cada llamada recibe su copia, sobre los mismos arreglos
+    assert second is not first
+    assert np.shares_memory(second.amounts, first.amounts)
+    assert second.to_dict() == first.to_dict()
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['hits'] == 1
+
+    # El SHA del blob, cuando se conoce, es la clave
+    service.parse_document(replace(sample_pl_document, sha='0' * 40))
+    assert cache.stats()['misses'] == 2
+
+def test_cached_table_cannot_be_altered(sample_pl_document: FinancialDocument):
+    """Prueba que modificar una tabla devuelta no altera la guardada en la caché."""
+    service = DocumentService(cache=ParsedDocumentCache())
+
+    first = service.parse_document(sample_pl_document)
+    expected = first.to_dict()
+    first.totals.clear()
+    first.sections.pop('revenue')
+    first.accounts.clear()
+    with pytest.raises(ValueError):
+        first.amounts[0] = 0
+
+    second = service.parse_document(sample_pl_document)
+    assert second.to_dict() == expected
+    assert second.accounts
+
+def test_cache_key_includes_mode(sample_pl_document: FinancialDocument):
+    """Prueba que el modo de montos separa las entradas."""
+    decimal_key = DocumentService()._cache_key(sample_pl_document)
+    cents_key = DocumentService(fixed_point=True)._cache_key(sample_pl_document)
+    assert decimal_key != cents_key
+    assert decimal_key.endswith(blob_sha(sample_pl_document.content))
+
+def test_lru_byte_budget(document_service: DocumentService, sample_pl_markdown: str):
+    """Prueba el desalojo de las entradas menos usadas al exceder el presupuesto."""
+    table = document_service._parse_pl_markdown(sample_pl_markdown)
+    cache = ParsedDocumentCache(max_bytes=table.nbytes * 2)
+
+    cache.put('a', table)
+    cache.put('b', table)
+    assert cache.get('a') is table
+    cache.put('c', table)
+
+    assert cache.get('b') is None
+    assert cache.get('a') is table
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['entries'] == 2
+    assert stats['bytes'] <= cache.max_bytes
+
+def test_disk_tier_survives_restart(tmp_path, sample_balance_document: FinancialDocument):
+    """Prueba que el nivel en disco sirve entradas a una caché nueva."""
+    DocumentService(cache=ParsedDocumentCache(directory=str(tmp_path))).parse_document(sample_balance_document)
+
+    cache = ParsedDocumentCache(directory=str(tmp_path))
+    table = DocumentService(cache=cache).parse_document(sample_balance_document)
+
+    assert cache.stats()['disk_hits'] == 1
+    assert cache.stats()['misses'] == 0
+    assert [item.name for item in table['activos']] == ['Efectivo', 'Cuentas']
+
+def test_corrupt_disk_entry_is_a_miss(tmp_path):
+    """Prueba que una entrada dañada se descarta."""
+    (tmp_path / 'k.pickle').write_bytes(b'no es un pickle')
+    cache = ParsedDocumentCache(directory=str(tmp_path))
+
+    assert cache.get('k') is None
+    assert cache.stats()['disk_errors'] == 1
+    assert not (tmp_path / 'k.pickle').exists()
@@ -1,7 +1,11 @@
 import pytest
+import numpy as np
 from decimal import Decimal
 
+from ..core.constants import CATEGORY_LIABILITY, CATEGORY_CODES, CATEGORY_ASSET
 from ..core.exceptions import DocumentParseError
+from ..core import models
+from ..core.models import FinancialLineItem, LineItemTable, LineItemTableBuilder
 from ..services.document_service import DocumentService
 
 def test_parse_pl_markdown(document_service: DocumentService, sample_pl_markdown: str):
@@ -77,4 +81,112 @@ def test_parse_document(document_service: DocumentService, sample_pl_document):
     assert result['period'] == '2024-Q1'
     assert len(result['revenue']) == 2
     assert len(result['expenses']) == 2
-    assert len(result['totals']) == 3 
\ No newline at end of file
+    assert len(result['totals']) == 3 
+
+def test_parse_markdown_period_after_rows(document_service: DocumentService):
+    """Prueba que el período declarado al final se asigna a todas las partidas."""
+    content = """
+    ## Ingresos
+    | Concepto | Monto |
+    |----------|-------|
+    | Ventas   | $1,000.50 |
+
+    Periodo: 2024-Q3
+    """
+    result = document_service._parse_pl_markdown(content)
+
+    assert result['period'] == '2024-Q3'
+    assert result['revenue'][0].amount == Decimal('1000.50')
+    assert result['revenue'][0].period == '2024-Q3'
+
+def test_parse_balance_csv(document_service: DocumentService):
+    """Prueba el parseo por columnas de un Balance en CSV."""
+    content = (
+        "Periodo,Item,Category,Amount\n"
+        "2024-Q1,Efectivo,Asset,\"$1,000.50\"\n"
+        "2024-Q1,Proveedores,liability,300\n"
+        "2024-Q1,Capital Social,EQUITY,700.50\n"
+        "2024-Q1,Fuera de rango,Asset,1000000000\n"
+        "2024-Q1,Sin monto,Asset,N/A\n"
+        "2024-Q1,Otro,Memo,50\n"
+        "2024-Q1,Total Activos,Total,\"$1,000.50\"\n"
+    )
+    result = document_service._parse_balance_csv(content)
+
+    assert result['period'] == '2024-Q1'
+    assert [item.name for item in result['activos']] == ['Efectivo']
+    assert result['activos'][0].amount == Decimal('1000.50')
+    assert result['pasivos'][0].category == CATEGORY_LIABILITY
+    assert result['capital_contable'][0].amount == Decimal('700.50')
+    assert result['totals'] == {'Total Activos': Decimal('1000.50')}
+
+def test_parse_csv_mixed_amount_forms(document_service: DocumentService):
+    """Prueba que los montos fuera de la forma canónica se convierten fila por fila sin alterar el orden."""
+    content = (
+        "Periodo,Item,Category,Amount\n"
+        "2024-Q1,Caja,Asset,10.5\n"
+        "2024-Q1,Fondo,Asset,0.125\n"
+        "2024-Q1,Bonos,Asset,1E+3\n"
+        "2024-Q1,Bancos,Asset,\"$2,000\"\n"
+        "2024-Q1,Total Activos,Total,3010.625\n"
+    )
+    result = document_service._parse_balance_csv(content)
+
+    assert [(item.name, str(item.amount)) for item in result['activos']] == [
+        ('Caja', '10.5'), ('Fondo', '0.125'), ('Bonos', '1E+3'), ('Bancos', '2000')
+    ]
+    assert result.scale == 3
+    assert result['totals'] == {'Total Activos': Decimal('3010.625')}
+
+def test_parse_csv_non_text_category(document_service: DocumentService):
+    """Prueba que una categoría no textual con monto válido sigue siendo un error."""
+    content = "Periodo,Item,Category,Amount\n2024-Q1,Ventas,3,100\n"
+    with pytest.raises(DocumentParseError, match="fila 1: 3"):
+        document_service._parse_pl_csv(content)
+
+def test_line_item_table_views(document_service: DocumentService, sample_balance_markdown: str):
+    """Prueba que las secciones son vistas sin copia sobre los arreglos de la tabla."""
+    result = document_service._parse_balance_markdown(sample_balance_markdown)
+    assert isinstance(result, LineItemTable)
+
+    activos = result['activos']
+    assert activos.names == ['Efectivo', 'Cuentas']
+    assert activos.amounts.tolist() == [100000, 50000]
+    assert np.shares_memory(activos.amounts, result.amounts)
+    assert set(activos.categories.tolist()) == {CATEGORY_CODES.index(CATEGORY_ASSET)}
+    assert activos[-1] == FinancialLineItem('Cuentas', Decimal('500'), CATEGORY_ASSET, '2024-Q1')
+    assert list(result) == ['period', 'activos', 'pasivos', 'capital_contable', 'totals']
+
+def test_line_item_table_keeps_decimals(document_service: DocumentService):
+    """Prueba que los montos se reconstruyen con el mismo `Decimal` del documento."""
+    content = "Periodo: 2024-Q1\n## Activos\n| Caja | $1,000.50 |\n| Fondo | 0.125 |\n| Bonos | 1E+3 |\n"
+    result = document_service._parse_balance_markdown(content)
+
+    amounts = [str(item.amount) for item in result['activos']]
+    assert amounts == ['1000.50', '0.125', '1E+3']
+    assert result.scale == 3
+    assert result.to_dict()['activos'] == list(result['activos'])
+
+def test_line_item_table_name_codes(document_service: DocumentService, monkeypatch):
+    """Prueba el catálogo de nombres: orden de aparición, repetidos, colisiones y nombres no textuales."""
+    content = "Periodo: 2024-Q1\n## Activos\n| Caja | 1 |\n| Señal | 2 |\n| Caja | 3 |\n## Pasivos\n| Señal | 4 |\n| Deuda | 5 |\n"
+    result = document_service._parse_balance_markdown(content)
+    assert result.names.tolist() == ['Caja', 'Señal', 'Deuda']
+    assert result.name_codes.tolist() == [0, 1, 0, 1, 2]
+    assert result['pasivos'].names == ['Señal', 'Deuda']
+
+    # Nombres distintos con el mismo hash se codifican con un diccionario
+    monkeypatch.setattr(models, 'hash', lambda name: 0, raising=False)
+    collided = document_service._parse_balance_markdown(content)
+    assert collided.names.tolist() == result.names.tolist()
+    assert collided.name_codes.tolist() == result.name_codes.tolist()
+    monkeypatch.undo()
+
+    builder = LineItemTableBuilder({'activos': CATEGORY_ASSET})
+    missing = float('nan')
+    builder.extend_cents('activos', ['Caja', missing], [100, 200])
+    builder.extend_units('activos', ['Caja'], np.array([300], dtype=np.int64))
+    table = builder.build('2024-Q1', {})
+    assert table.names.tolist() == ['Caja', missing]
+    assert table.name_codes.tolist() == [0, 1, 0]
+    assert table.amounts.tolist() == [100, 200, 300]
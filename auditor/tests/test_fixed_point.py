@@ -0,0 +1,82 @@
+import pytest
+import numpy as np
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN, ROUND_HALF_UP, ROUND_FLOOR
+
+from ..core.exceptions import AmountOverflowError
+from ..core.fixed_point import (
+    MAX_CENTS, divide, to_cents, from_cents, parse_cents, parse_cents_column, add_cents, sum_cents, ratio
+)
+from ..core.statement_tokenizer import parse_amount
+from ..services.audit_service import AuditService
+from ..services.document_service import DocumentService
+
+def test_parse_cents():
+    """Prueba la lectura de celdas en centavos con redondeo exacto."""
+    assert parse_cents(' $1,200.50 ') == 120050
+    assert parse_cents('-7') == -700
+    assert parse_cents('.5') == 50
+    assert parse_cents('1E+3') == 100000
+    assert parse_cents('0.125') == 12
+    assert parse_cents('0.125', ROUND_HALF_UP) == 13
+    assert parse_cents('-0.001', ROUND_FLOOR) == -1
+    with pytest.raises(InvalidOperation):
+        parse_cents('N/A')
+    with pytest.raises(InvalidOperation):
+        parse_cents('Infinity')
+
+def test_parse_cents_column_matches_decimal():
+    """Prueba que la conversión por columna coincide con `Decimal` y deja el resto para la conversión por fila."""
+    canonical = ['$1,200.50', '-7', '0.5', '-0', '999,999,999.99', '-999999999.99', '00012.30']
+    pending = ['1000000000.00', '.5', '5.', '+5', '1E+3', '0.125', '$ 5', '1.2.3', '-', '', 'N/A']
+    cents, exponents, parsed = parse_cents_column(canonical + pending)
+
+    assert parsed.tolist() == [True] * len(canonical) + [False] * len(pending)
+    for value, amount, exponent in zip(canonical, cents.tolist(), exponents.tolist()):
+        expected = parse_amount(value)
+        assert amount == to_cents(expected)
+        assert exponent == expected.as_tuple().exponent
+    assert not cents[len(canonical):].any()
+    # Una celda no ASCII deja toda la columna para la conversión por fila
+    assert not parse_cents_column(['10', '€5'])[2].any()
+
+def test_divide_matches_decimal():
+    """Prueba que la división entera redondea como `Decimal.quantize`."""
+    for numerator in range(-30, 31):
+        for denominator in (4, -4, 10):
+            expected = (Decimal(numerator) / Decimal(denominator)).quantize(Decimal(1), rounding=ROUND_HALF_EVEN)
+            assert divide(numerator, denominator) == int(expected)
+
+def test_overflow_detection():
+    """Prueba que los resultados fuera de MAX_AMOUNT se detectan."""
+    assert to_cents(Decimal('999999999.99')) == MAX_CENTS
+    assert add_cents(MAX_CENTS - 1, 1) == MAX_CENTS
+    with pytest.raises(AmountOverflowError):
+        add_cents(MAX_CENTS, 1)
+    with pytest.raises(AmountOverflowError):
+        sum_cents(np.array([MAX_CENTS, MAX_CENTS], dtype=np.int64))
+    with pytest.raises(InvalidOperation):
+        to_cents(Decimal('1E+40'))
+
+def test_reporting_boundary():
+    """Prueba la conversión a `Decimal` de montos y ratios."""
+    assert from_cents(-5) == Decimal('-0.05')
+    assert ratio(120000, 150000) == Decimal('0.800000')
+    assert ratio(1, 3, places=4) == Decimal('0.3333')
+    assert ratio(5, 0) == Decimal('0')
+
+def test_fixed_point_parse_matches_decimal(sample_pl_markdown: str, sample_balance_markdown: str):
+    """Prueba que el modo de punto fijo produce las mismas partidas y discrepancias."""
+    decimal_service = DocumentService()
+    fixed_service = DocumentService(fixed_point=True)
+
+    for parse in ('_parse_pl_markdown', '_parse_balance_markdown'):
+        expected = getattr(decimal_service, parse)(sample_pl_markdown if 'pl' in parse else sample_balance_markdown)
+        result = getattr(fixed_service, parse)(sample_pl_markdown if 'pl' in parse else sample_balance_markdown)
+        assert result.amounts.tolist() == expected.amounts.tolist()
+        assert result.totals == expected.totals
+
+    pl_data = fixed_service._parse_pl_markdown(sample_pl_markdown)
+    balance_data = fixed_service._parse_balance_markdown(sample_balance_markdown)
+    discrepancies = AuditService(fixed_service, github_service=object(), fixed_point=True).compare_documents(pl_data, balance_data)
+    assert [d['type'] for d in discrepancies] == ['income_mismatch']
+    assert pl_data['revenue'].total() == Decimal('1200.00')
@@ -0,0 +1,38 @@
+from unittest.mock import Mock
+
+from ..services.github_clients import GitHubClientRegistry
+
+def test_client_is_shared_per_token():
+    """Prueba que cada token tiene un único cliente compartido."""
+    registry = GitHubClientRegistry()
+    assert registry.client('token_a') is registry.client('token_a')
+    assert registry.client('token_a') is not registry.client('token_b')
+    assert registry.stats()['clients'] == 2
+    registry.clear()
+
+def test_repository_cache_expires():
+    """Prueba que los repositorios resueltos se reutilizan hasta que expiran."""
+    now = [0.0]
+    registry = GitHubClientRegistry(repo_ttl=60, clock=lambda: now[0])
+    client = Mock()
+    client.get_repo.side_effect = lambda name, lazy: Mock(full_name=name)
+
+    first = registry.repository(client, 'owner/repo')
+    assert registry.repository(client, 'owner/repo') is first
+    now[0] = 61
+    assert registry.repository(client, 'owner/repo') is not first
+    assert client.get_repo.call_count == 2
+    # El repositorio se resuelve sin consultarlo; sus métodos usan su URL
+    client.get_repo.assert_called_with('owner/repo', lazy=True)
+
+    registry.invalidate('owner/repo')
+    registry.repository(client, 'owner/repo')
+    assert client.get_repo.call_count == 3
+    assert registry.stats() == {'clients': 0, 'repo_hits': 1, 'repo_misses': 3}
+
+def test_repositories_are_kept_per_client():
+    """Prueba que un repositorio resuelto con un cliente no se entrega a otro."""
+    registry = GitHubClientRegistry()
+    client_a, client_b = Mock(), Mock()
+    assert registry.repository(client_a, 'owner/repo') is client_a.get_repo.return_value
+    assert registry.repository(client_b, 'owner/repo') is client_b.get_repo.return_value
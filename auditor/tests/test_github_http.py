@@ -0,0 +1,201 @@
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from github import Auth, Github, GithubException
+from github.Requester import HTTPSRequestsConnectionClass
+
+from ..services import metrics
+from ..services.audit_service import AuditService
+from ..services.document_service import DocumentService
+from ..services.github_service import GitHubService
+from ..services.result_cache import AuditResultCache
+from ..core.exceptions import ConfigurationError
+from ..services.github_http import _REQUESTER_ATTRIBUTES, ConditionalHTTPSConnection, default_conditional_cache, enable_conditional_requests, track_requests
+
+BLOBS = {
+    '1' * 40: b'| Reporte | P&L |\nPeriodo: 2024-Q1\n## Ingresos\n| Ventas | $10 |\n',
+    '2' * 40: b'| Reporte | Balance |\nPeriodo: 2024-Q1\n## Activos\n| Caja | $10 |\n'
+}
+
+class _GitHubStandIn(BaseHTTPRequestHandler):
+    """Servidor local que imita la API de GitHub y responde 304 a validadores vigentes."""
+
+    def do_GET(self):
+        body = self.server.routes.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        data = json.dumps(body).encode('utf-8')
+        etag = '"%s"' % hashlib.sha1(data).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            self.server.statuses.append(304)
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.server.statuses.append(200)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('X-RateLimit-Remaining', str(5000 - len(self.server.statuses)))
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    """Servidor HTTP local con un repositorio, su árbol, sus blobs y sus issues."""
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _GitHubStandIn)
+    base = f'http://127.0.0.1:{httpd.server_port}'
+    repo = {'full_name': 'owner/repo', 'name': 'repo', 'url': f'{base}/repos/owner/repo'}
+    httpd.statuses = []
+    tree = {
+        'sha': '3' * 40,
+        'tree': [
+            {'path': 'pl.md', 'type': 'blob', 'sha': '1' * 40},
+            {'path': 'balance.md', 'type': 'blob', 'sha': '2' * 40}
+        ]
+    }
+    httpd.routes = {
+        '/repos/owner/repo': repo,
+        '/repos/owner/repo/branches/main': {'name': 'main', 'commit': {'sha': 'c' * 40}},
+        '/repos/owner/repo/git/trees/main?recursive=1': tree,
+        f'/repos/owner/repo/git/trees/{"c" * 40}?recursive=1': tree,
+        '/repos/owner/repo/issues?state=open': [
+            {'number': 1, 'title': 'Auditoría Financiera: 1 discrepancias encontradas'}
+        ]
+    }
+    for sha, data in BLOBS.items():
+        httpd.routes[f'/repos/owner/repo/git/blobs/{sha}'] = {
+            'sha': sha, 'content': data.decode('utf-8'), 'encoding': 'utf-8', 'size': len(data)
+        }
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = base
+    default_conditional_cache().clear()
+    GitHubService._tree_cache.clear()
+    GitHubService._blob_cache.clear()
+    GitHubService._blob_cache_bytes = 0
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def _client(server) -> Github:
+    """Cliente de PyGithub apuntando al servidor local."""
+    client = Github(auth=Auth.Token('test_token'), base_url=server.url, seconds_between_requests=0)
+    return enable_conditional_requests(client)
+
+def test_pygithub_internals_are_available():
+    """Prueba que PyGithub tiene los atributos privados que se reemplazan por cliente.
+
+    Si falla, la versión instalada no es la de requirements.txt y
+    `enable_conditional_requests` debe revisarse antes de actualizarla.
+    """
+    client = Github(auth=Auth.Token('test_token'))
+    requester = client._Github__requester
+    for name in _REQUESTER_ATTRIBUTES:
+        assert hasattr(requester, name), name
+    assert requester._Requester__connectionClass is HTTPSRequestsConnectionClass
+
+    enable_conditional_requests(client)
+
+    assert requester._Requester__connectionClass is ConditionalHTTPSConnection
+
+def test_incompatible_pygithub_fails_loudly():
+    """Prueba que un Requester sin los atributos esperados produce un error claro."""
+    client = Github(auth=Auth.Token('test_token'))
+    client._Github__requester = object()
+
+    with pytest.raises(ConfigurationError, match='PyGithub'):
+        enable_conditional_requests(client)
+
+def test_conditional_reads(server):
+    """Prueba que las lecturas repetidas se validan y se sirven de la copia local."""
+    client = _client(server)
+
+    with track_requests() as first:
+        repo = client.get_repo('owner/repo')
+        tree = repo.get_git_tree('main', recursive=True)
+        titles = [issue.title for issue in repo.get_issues(state='open')]
+    with track_requests() as second:
+        cached_repo = client.get_repo('owner/repo')
+        cached_tree = repo.get_git_tree('main', recursive=True)
+        cached_titles = [issue.title for issue in repo.get_issues(state='open')]
+
+    assert first == {'ok': 3, 'not_modified': 0, 'other': 0}
+    assert second == {'ok': 0, 'not_modified': 3, 'other': 0}
+    assert server.statuses == [200, 200, 200, 304, 304, 304]
+    assert cached_repo.full_name == repo.full_name == 'owner/repo'
+    assert [e.path for e in cached_tree.tree] == [e.path for e in tree.tree] == ['pl.md', 'balance.md']
+    assert cached_titles == titles
+
+def test_requests_feed_metrics(server):
+    """Prueba que las peticiones alimentan las métricas de la API de GitHub."""
+    client = _client(server)
+    requests_before = metrics.github_api_request_duration.count()
+    errors_before = metrics.github_api_errors.value()
+
+    client.get_repo('owner/repo')
+    with pytest.raises(GithubException):
+        client.get_repo('owner/missing')
+
+    assert metrics.github_api_request_duration.count() == requests_before + 2
+    assert metrics.github_api_errors.value() == errors_before + 1
+    assert metrics.github_api_rate_limit_remaining.value() == 4999
+
+def test_changed_resource_is_downloaded(server):
+    """Prueba que un recurso modificado vuelve a responder 200 con el contenido nuevo."""
+    client = _client(server)
+    client.get_repo('owner/repo')
+    server.routes['/repos/owner/repo'] = dict(server.routes['/repos/owner/repo'], name='renamed')
+
+    with track_requests() as counts:
+        repo = client.get_repo('owner/repo')
+
+    assert repo.name == 'renamed'
+    assert counts['ok'] == 1 and counts['not_modified'] == 0
+
+def test_tokens_do_not_share_copies(server):
+    """Prueba que la copia obtenida con un token no se valida con otro."""
+    _client(server).get_repo('owner/repo')
+    other = enable_conditional_requests(Github(auth=Auth.Token('other_token'), base_url=server.url, seconds_between_requests=0))
+    other.get_repo('owner/repo')
+    assert server.statuses == [200, 200]
+
+def test_audit_reports_conditional_counts(server):
+    """Prueba que cada auditoría reporta sus respuestas 200 y 304."""
+    with patch.dict('os.environ', {'GITHUB_TOKEN': 'test_token'}):
+        github_service = GitHubService()
+    github_service.github_client = _client(server)
+    audit_service = AuditService(document_service=DocumentService(), github_service=github_service, result_cache=AuditResultCache())
+
+    first = audit_service.run_audit('https://github.com/owner/repo')
+    second = audit_service.run_audit('https://github.com/owner/repo', force_refresh=True)
+
+    assert first.status == second.status == 'success'
+    assert first.commit_sha == 'c' * 40
+    # La primera resuelve la rama y descarga árbol y blobs (el repositorio se
+    # resuelve sin consultarlo); la segunda sólo valida la rama: el árbol del
+    # commit y los blobs ya están
+    assert first.github_requests == {'ok': 4, 'not_modified': 0, 'other': 0}
+    assert second.github_requests == {'ok': 0, 'not_modified': 1, 'other': 0}
+
+def test_shared_client_is_thread_safe(server):
+    """Prueba que un mismo cliente atiende lecturas concurrentes sin mezclarlas."""
+    client = _client(server)
+    repo = client.get_repo('owner/repo')
+    shas = list(BLOBS) * 20
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        blobs = list(executor.map(repo.get_git_blob, shas))
+
+    assert [blob.sha for blob in blobs] == shas
@@ -1,3 +1,4 @@
+import base64
 import pytest
 from unittest.mock import Mock, patch
 from github import Github
@@ -32,8 +33,32 @@ def mock_repo():
     contents = [content1, content2]
     repo.get_contents.return_value = contents
     repo.get_contents.side_effect = lambda path, ref=None: next((c for c in contents if c.path == path), contents)
+    _set_tree(repo, {
+        'README.md': b'# Reportes',
+        'reports/2024/pl.md': content1.decoded_content,
+        'balance.md': content2.decoded_content,
+        # Nombres que contienen los patrones sin ser documentos financieros
+        'template.md': b'# Plantilla',
+        'docs/deployment.md': b'# Despliegue'
+    })
     return repo
 
+def _set_tree(repo: Mock, files: dict) -> None:
+    """Configura el listado recursivo y los blobs de un repositorio simulado."""
+    blobs = {f'{index:040x}': content for index, content in enumerate(files.values(), start=1)}
+    elements = [Mock(path='reports', type='tree', sha='f' * 40)]
+    for (path, _), sha in zip(files.items(), blobs):
+        elements.append(Mock(path=path, type='blob', sha=sha))
+    repo.get_git_tree.return_value = Mock(tree=elements, raw_data={'truncated': False})
+    repo.get_git_blob.side_effect = lambda sha: Mock(content=base64.b64encode(blobs[sha]).decode(), encoding='base64')
+
+@pytest.fixture(autouse=True)
+def clear_github_caches():
+    """Vacía las cachés compartidas de árboles y blobs entre pruebas."""
+    GitHubService._tree_cache.clear()
+    GitHubService._blob_cache.clear()
+    GitHubService._blob_cache_bytes = 0
+
 @pytest.fixture
 def github_service():
     """Fixture con un servicio de GitHub."""
@@ -58,11 +83,55 @@ def test_retrieve_documents(github_service, mock_github, mock_repo):
     assert docs['pl'].doc_type == 'pl'
     assert docs['balance'].doc_type == 'balance'
 
+def test_retrieve_documents_from_tree(github_service, mock_github, mock_repo):
+    """Prueba la búsqueda recursiva y la descarga por SHA de blob."""
+    mock_github.return_value.get_repo.return_value = mock_repo
+    github_service.github_client = mock_github.return_value
+    commit = 'a' * 40
+
+    docs = github_service.retrieve_documents('https://github.com/owner/repo', commit_sha=commit)
+
+    mock_repo.get_git_tree.assert_called_once_with(commit, recursive=True)
+    assert not mock_repo.get_contents.called
+    assert docs['pl'].content.startswith('IyBQJkw')
+    assert docs['pl'].sha == f'{2:040x}'
+    assert docs['balance'].sha == f'{3:040x}'
+
+    # El mismo commit no vuelve a listar el árbol ni a descargar los blobs
+    github_service.retrieve_documents('https://github.com/owner/repo', commit_sha=commit)
+    assert mock_repo.get_git_tree.call_count == 1
+    assert mock_repo.get_git_blob.call_count == 2
+
+    # Una rama se lista siempre; los blobs siguen en caché
+    github_service.retrieve_documents('https://github.com/owner/repo', 'main')
+    assert mock_repo.get_git_tree.call_count == 2
+    assert mock_repo.get_git_blob.call_count == 2
+
+def test_truncated_tree_falls_back_to_root(github_service, mock_github, mock_repo):
+    """Prueba que un listado recursivo truncado se reemplaza por el de la raíz."""
+    mock_github.return_value.get_repo.return_value = mock_repo
+    github_service.github_client = mock_github.return_value
+    root = [Mock(path='pl.md', type='blob', sha='1' * 40), Mock(path='balance.md', type='blob', sha='2' * 40)]
+    mock_repo.get_git_tree.side_effect = lambda ref, recursive=False: (
+        Mock(tree=[Mock(path='docs/template.md', type='blob', sha='3' * 40)], raw_data={'truncated': True}) if recursive
+        else Mock(tree=root, raw_data={'truncated': False})
+    )
+    mock_repo.get_git_blob.side_effect = lambda sha: Mock(content=base64.b64encode(b'| x |').decode(), encoding='base64')
+
+    docs = github_service.retrieve_documents('https://github.com/owner/repo', commit_sha='b' * 40)
+    assert docs['pl'].sha == '1' * 40 and docs['balance'].sha == '2' * 40
+
+    # Sin documentos en la raíz, el error indica que el listado estaba truncado
+    root.clear()
+    with pytest.raises(GitHubError, match='truncado'):
+        github_service.retrieve_documents('https://github.com/owner/repo', 'main')
+
 def test_retrieve_documents_no_files(github_service, mock_github, mock_repo):
     """Prueba la recuperación cuando no hay archivos."""
     empty_repo = Mock()
     empty_repo.get_contents.return_value = []
     empty_repo.get_contents.side_effect = lambda path, ref=None: []
+    _set_tree(empty_repo, {})
     mock_github.return_value.get_repo.return_value = empty_repo
     github_service.github_client = mock_github.return_value
     
@@ -112,6 +181,11 @@ def test_update_existing_issue(github_service, mock_github, mock_repo):
     assert existing_issue.edit.called
     assert not mock_repo.create_issue.called
 
+def test_parse_repo_url(github_service):
+    """Prueba que sólo se quita el sufijo `.git` del nombre del repositorio."""
+    assert github_service._parse_repo_url('https://github.com/owner/repo.git') == ('owner', 'repo')
+    assert github_service._parse_repo_url('https://github.com/owner/my.github-tools') == ('owner', 'my.github-tools')
+
 def test_invalid_repo_url():
     """Prueba el manejo de URLs de repositorio inválidas."""
     service = GitHubService()
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from ..core.constants import JOB_QUEUED, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED
+from ..services.job_queue import AuditJobQueue
+
+def _wait_for(job_queue: AuditJobQueue, job_id: str, timeout: float = 5.0):
+    """Espera a que un trabajo termine y lo devuelve."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = job_queue.get(job_id)
+        if job.finished_at is not None:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"El trabajo {job_id} no terminó")
+
+def test_submit_runs_in_background():
+    """Prueba que el trabajo se encola sin bloquear y guarda el resultado."""
+    release = threading.Event()
+
+    def audit(repo_url, branch):
+        release.wait(5)
+        return {'status': 'success', 'repo': repo_url, 'branch': branch}
+
+    job_queue = AuditJobQueue(audit, workers=1)
+    job = job_queue.submit('https://github.com/owner/repo', 'main')
+    assert job.status in (JOB_QUEUED, 'running')
+
+    release.set()
+    job = _wait_for(job_queue, job.id)
+    assert job.status == JOB_SUCCEEDED
+    assert job.result == {'status': 'success', 'repo': 'https://github.com/owner/repo', 'branch': 'main'}
+    assert job.to_dict()['wait_seconds'] >= 0
+    job_queue.shutdown()
+
+def test_failed_audits():
+    """Prueba los resultados con error y las excepciones de la auditoría."""
+    def audit(repo_url, branch):
+        if branch == 'boom':
+            raise RuntimeError('sin conexión')
+        return {'status': 'error', 'error_message': 'sin documentos'}
+
+    job_queue = AuditJobQueue(audit, workers=2)
+    reported = _wait_for(job_queue, job_queue.submit('repo', 'main').id)
+    raised = _wait_for(job_queue, job_queue.submit('repo', 'boom').id)
+
+    assert (reported.status, reported.error) == (JOB_FAILED, 'sin documentos')
+    assert (raised.status, raised.error) == (JOB_FAILED, 'sin conexión')
+    assert job_queue.metrics()['failed'] == 2
+    job_queue.shutdown()
+
+def test_depth_wait_metrics_and_cancel():
+    """Prueba la profundidad de la cola, las esperas y la cancelación."""
+    release = threading.Event()
+    job_queue = AuditJobQueue(lambda repo_url, branch: release.wait(5) and {'status': 'success'}, workers=1)
+    first = job_queue.submit('repo', 'a')
+    second = job_queue.submit('repo', 'b')
+    third = job_queue.submit('repo', 'c')
+    time.sleep(0.05)
+
+    assert job_queue.metrics()['depth'] == 2
+    assert job_queue.cancel(third.id)
+    assert not job_queue.cancel(first.id)
+
+    release.set()
+    assert _wait_for(job_queue, second.id).status == JOB_SUCCEEDED
+    assert job_queue.get(third.id).status == JOB_CANCELLED
+
+    metrics = job_queue.metrics()
+    assert metrics['depth'] == 0
+    assert (metrics['submitted'], metrics['succeeded'], metrics['cancelled']) == (3, 2, 1)
+    assert metrics['wait_seconds_count'] == 2
+    assert metrics['wait_seconds_max'] >= 0.05
+    assert metrics['wait_seconds_p50'] <= metrics['wait_seconds_p95'] <= metrics['wait_seconds_max']
+    job_queue.shutdown()
+
+def test_history_is_bounded():
+    """Prueba que sólo se conservan los últimos trabajos terminados."""
+    job_queue = AuditJobQueue(lambda repo_url, branch: {'status': 'success'}, workers=1, history=2)
+    jobs = [job_queue.submit('repo', str(index)) for index in range(4)]
+    _wait_for(job_queue, jobs[-1].id)
+    assert job_queue.get(jobs[0].id) is None
+    assert job_queue.get(jobs[-1].id) is not None
+    job_queue.shutdown()
+
+def test_closed_queue_rejects_jobs():
+    """Prueba que una cola detenida no acepta trabajos."""
+    job_queue = AuditJobQueue(lambda repo_url, branch: {}, workers=1)
+    job_queue.shutdown()
+    with pytest.raises(RuntimeError):
+        job_queue.submit('repo', 'main')
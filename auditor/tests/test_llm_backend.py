@@ -0,0 +1,125 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+from google.adk.agents import LlmAgent
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools.function_tool import FunctionTool
+from google.genai import types
+
+from ..agents.comparison_agent import ComparisonAgent
+from ..core.adk_parser import parse_balance_response, parse_ratio_response, parse_validation_response
+from ..core.exceptions import ConfigurationError
+from ..services import llm_backend
+from ..services.llm_backend import FORMAT_JSON, FORMAT_TEXT, FakeLlm, FakeLlmBackend, GeminiBackend, default_llm_backend
+
+PL_DATA = {'period': '2024-Q1', 'totals': {'Ingresos Totales': Decimal('1000'), 'Gastos Totales': Decimal('950')}}
+BALANCE_DATA = {
+    'period': '2024-Q1',
+    'totals': {'Total Activos': Decimal('1000'), 'Total Pasivos': Decimal('500'), 'Total Capital Contable': Decimal('499')}
+}
+
+def test_latency_is_deterministic():
+    """Prueba que la latencia depende sólo de la configuración, la semilla y el prompt."""
+    waits = []
+    backend = FakeLlmBackend(latency=0.2, jitter=0.05, seconds_per_kchar=0.1, seed=7, sleep=waits.append)
+    for _ in range(20):
+        backend.generate('x' * 1000)
+
+    again = FakeLlmBackend(latency=0.2, jitter=0.05, seconds_per_kchar=0.1, seed=7)
+    assert waits == [again.delay('x' * 1000) for _ in range(20)]
+    assert all(0.25 <= wait <= 0.35 for wait in waits) and len(set(waits)) > 1
+    assert backend.stats()['calls'] == 20 and backend.stats()['prompt_chars'] == 20_000
+    assert FakeLlmBackend(latency=0.01, jitter=0.5).delay('') >= 0
+
+@pytest.mark.parametrize('response_format', [FORMAT_JSON, FORMAT_TEXT])
+def test_responses_parse_in_both_formats(response_format):
+    """Prueba que los parsers de ADK entienden las respuestas simuladas de cada verificación."""
+    waits = []
+    agent = ComparisonAgent(prechecks=False, batch_calls=False, cache_responses=False,
+                            backend=FakeLlmBackend(response_format=response_format, sleep=waits.append))
+
+    assert [item['type'] for item in agent.validate_financial_documents(PL_DATA, BALANCE_DATA)] == ['simulated_finding']
+    assert [item['type'] for item in agent.analyze_ratios(PL_DATA, BALANCE_DATA)] == ['ratio_simulado']
+    assert [item['type'] for item in agent.validate_balance_equation(BALANCE_DATA)] == ['simulated_balance']
+    assert len(waits) == 3
+    if response_format == FORMAT_TEXT:
+        assert agent.backend.respond(agent._balance_prompt(BALANCE_DATA)).startswith('Tipo: simulated_balance\nDiferencia: 0')
+
+def test_combined_and_fixed_responses():
+    """Prueba la respuesta JSON del prompt combinado y las respuestas fijas por clase de prompt."""
+    agent = ComparisonAgent(cache_responses=False, backend=FakeLlmBackend(latency=0, jitter=0))
+    pl_data = {'period': '2024-Q1', 'totals': {'Ingresos Totales': Decimal('1000'), 'Gastos Totales': Decimal('800')}}
+    # Los ratios en rango no van en el prompt combinado y no reciben hallazgos
+    assert [item['type'] for item in agent.run_validations(pl_data, BALANCE_DATA)] == ['simulated_finding', 'simulated_balance']
+
+    backend = FakeLlmBackend(latency=0, jitter=0, findings=False, responses={'ratios': 'Ratio: Liquidez\nValor: 3'})
+    agent = ComparisonAgent(prechecks=False, batch_calls=False, cache_responses=False, backend=backend)
+    assert agent.run_validations(PL_DATA, BALANCE_DATA) == [{'type': 'ratio_liquidez', 'value': Decimal('3')}]
+    assert parse_validation_response(backend.respond('Hola')) == []
+    assert parse_ratio_response('[]') == parse_balance_response(backend.respond(agent._balance_prompt(BALANCE_DATA))) == []
+
+def test_fake_llm_runs_adk_agent_with_tool_call():
+    """Prueba que un agente ADK recorre la herramienta y la respuesta final sin conexión."""
+    calls = []
+
+    def compare(pl_content: str, balance_content: str) -> list:
+        """Compara los documentos."""
+        calls.append((pl_content, balance_content))
+        return []
+
+    backend = FakeLlmBackend(latency=0, jitter=0, response_format=FORMAT_TEXT)
+    agent = LlmAgent(name='offline', model=FakeLlm(model=backend.model, backend=backend, tool_call=('compare', {'pl_content': 'a', 'balance_content': 'b'})),
+                     instruction='Audita', tools=[FunctionTool(compare)])
+    sessions = InMemorySessionService()
+    runner = Runner(app_name='offline', agent=agent, session_service=sessions)
+
+    async def run():
+        session = sessions.create_session(app_name='offline', user_id='user')
+        message = types.Content(role='user', parts=[types.Part(text='Audita el repositorio')])
+        return [event async for event in runner.run_async(user_id='user', session_id=session.id, new_message=message)]
+
+    events = asyncio.run(run())
+    assert calls == [('a', 'b')]
+    assert events[-1].content.parts[0].text.startswith('Tipo: simulated_finding')
+    assert backend.stats()['calls'] == 2
+
+def test_default_backend_from_environment(monkeypatch):
+    """Prueba la elección del backend del proceso con `AUDITOR_LLM_BACKEND`."""
+    monkeypatch.setattr(llm_backend, '_default_backend', None)
+    monkeypatch.delenv('AUDITOR_LLM_BACKEND', raising=False)
+    assert isinstance(default_llm_backend(), GeminiBackend) and default_llm_backend().adk_model() == 'gemini-2.0-flash'
+
+    monkeypatch.setattr(llm_backend, '_default_backend', None)
+    monkeypatch.setenv('AUDITOR_LLM_BACKEND', 'fake')
+    monkeypatch.setenv('AUDITOR_FAKE_LLM_LATENCY', '0.5')
+    backend = default_llm_backend()
+    assert isinstance(backend, FakeLlmBackend) and backend.latency == 0.5
+    assert ComparisonAgent().model.model == 'fake-llm'
+
+    monkeypatch.setattr(llm_backend, '_default_backend', None)
+    monkeypatch.setenv('AUDITOR_LLM_BACKEND', 'otro')
+    with pytest.raises(ConfigurationError):
+        default_llm_backend()
+
+def test_analyze_documents_runs_prechecked_validations(monkeypatch, sample_pl_markdown, sample_balance_markdown):
+    """Prueba que el agente principal consulta ratios y ecuación contable, y nada si los datos están en rango."""
+    monkeypatch.setenv('GITHUB_TOKEN', 'offline')
+    from ..agent import AuditorAgent
+
+    backend = FakeLlmBackend(latency=0, jitter=0)
+    agent = AuditorAgent(backend=backend)
+    agent.comparison_agent.cache_responses = False
+    docs = {'pl': sample_pl_markdown, 'balance': sample_balance_markdown}
+
+    # Datos en rango: las verificaciones locales omiten el modelo
+    agent.analyze_documents(docs)
+    assert backend.stats()['calls'] == 0
+
+    # Escaladas, ratios y ecuación contable van en un solo prompt, sin la validación general
+    agent.comparison_agent.prechecks = False
+    types_found = [item['type'] for item in agent.analyze_documents(docs)]
+    assert types_found[-2:] == ['ratio_simulado', 'simulated_balance']
+    assert 'simulated_finding' not in types_found
+    assert backend.stats()['calls'] == 1
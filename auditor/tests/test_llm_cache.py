@@ -0,0 +1,107 @@
+import os
+
+from ..services import metrics
+from ..services.llm_cache import LlmResponseCache, cached_generate, canonical_prompt
+
+class FakeClock:
+    """Reloj manual para las pruebas de vencimiento."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_key_uses_model_and_canonical_prompt():
+    """Prueba que el formato irrelevante no cambia la clave y el modelo sí."""
+    prompt = "Valida:\n  Total Activos: $1500\n"
+    assert canonical_prompt("Valida:  \r\n  Total Activos: $1500\n\n\n") == "Valida:\n  Total Activos: $1500"
+    assert LlmResponseCache.key('gemini-2.0-flash', prompt) == LlmResponseCache.key('gemini-2.0-flash', "Valida: \r\n  Total Activos: $1500")
+    assert LlmResponseCache.key('gemini-2.0-flash', prompt) != LlmResponseCache.key('gemini-1.5-pro', prompt)
+    assert LlmResponseCache.key('gemini-2.0-flash', prompt) != LlmResponseCache.key('gemini-2.0-flash', prompt.replace('1500', '1501'))
+
+def test_cached_generate_hits_and_expires():
+    """Prueba que una respuesta se reutiliza hasta vencer y cuenta aciertos y fallos."""
+    clock = FakeClock()
+    cache = LlmResponseCache(ttl=60, clock=clock)
+    calls = []
+    generate = lambda prompt: calls.append(prompt) or f"respuesta {len(calls)}"
+    hits = metrics.llm_cache_lookups.value(result='hit')
+
+    assert cached_generate(generate, 'modelo', 'prompt', cache) == 'respuesta 1'
+    assert cached_generate(generate, 'modelo', 'prompt', cache) == 'respuesta 1'
+    clock.now += 61
+    assert cached_generate(generate, 'modelo', 'prompt', cache) == 'respuesta 2'
+
+    assert len(calls) == 2
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2 and cache.stats()['expired'] == 1
+    assert metrics.llm_cache_lookups.value(result='hit') == hits + 1
+
+def test_memory_byte_budget():
+    """Prueba el desalojo de las respuestas menos usadas al exceder los bytes en memoria."""
+    cache = LlmResponseCache(max_bytes=10)
+    cache.put('a', 'xxxx')
+    cache.put('b', 'yyyy')
+    cache.get('a')
+    cache.put('c', 'zzzz')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 'xxxx' and cache.get('c') == 'zzzz'
+    assert cache.stats()['evictions'] == 1 and cache.stats()['bytes'] == 8
+    # Una respuesta mayor que el presupuesto no se retiene en memoria
+    cache.put('d', 'w' * 11)
+    assert cache.get('d') is None
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Prueba que el nivel en disco sirve a una caché nueva, vence y descarta archivos dañados."""
+    clock = FakeClock()
+    LlmResponseCache(ttl=60, directory=str(tmp_path), clock=clock).put('a', 'respuesta')
+    restarted = LlmResponseCache(ttl=60, directory=str(tmp_path), clock=clock)
+
+    assert restarted.get('a') == 'respuesta'
+    assert restarted.stats()['disk_hits'] == 1
+    assert restarted.get('a') == 'respuesta' and restarted.stats()['hits'] == 1
+
+    clock.now += 61
+    assert LlmResponseCache(directory=str(tmp_path), clock=clock).get('a') is None
+    assert not os.path.exists(tmp_path / 'a.json')
+
+    (tmp_path / 'b.json').write_text('{no es json')
+    broken = LlmResponseCache(directory=str(tmp_path), clock=clock)
+    assert broken.get('b') is None and broken.stats()['disk_errors'] == 1
+
+def test_disk_byte_budget(tmp_path):
+    """Prueba que el disco conserva las entradas más recientes dentro del presupuesto."""
+    # Con el reloj fijo todas las entradas ocupan lo mismo
+    cache = LlmResponseCache(directory=str(tmp_path), clock=lambda: 1000.0)
+    cache.put('a', 'x' * 60)
+    cache.max_disk_bytes = os.path.getsize(tmp_path / 'a.json') * 2
+    for index, key in enumerate('abc'):
+        cache.put(key, 'x' * 60)
+        os.utime(tmp_path / f'{key}.json', (index, index))
+    cache.put('d', 'x' * 60)
+
+    assert sorted(os.listdir(tmp_path)) == ['c.json', 'd.json']
+
+def test_disk_scanned_only_over_budget(tmp_path, monkeypatch):
+    """Prueba que el directorio se recorre al crear la caché y al exceder el presupuesto, no en cada escritura."""
+    scans = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, 'scandir', lambda path: scans.append(path) or scandir(path))
+    LlmResponseCache(directory=str(tmp_path), clock=lambda: 1000.0).put('a', 'x' * 60)
+    size = os.path.getsize(tmp_path / 'a.json')
+
+    cache = LlmResponseCache(directory=str(tmp_path), max_disk_bytes=size * 3, clock=lambda: 1000.0)
+    assert len(scans) == 2
+    cache.put('b', 'x' * 60)
+    cache.put('b', 'x' * 60)
+    cache.put('c', 'x' * 60)
+    assert len(scans) == 2
+    # Las entradas borradas por vencidas liberan su espacio en la cuenta
+    cache.clock = lambda: 10 ** 9
+    assert cache.get('c') is None
+    cache.clock = lambda: 1000.0
+    cache.put('d', 'x' * 60)
+    assert len(scans) == 2
+    cache.put('e', 'x' * 60)
+    assert len(scans) == 3 and len(os.listdir(tmp_path)) == 3
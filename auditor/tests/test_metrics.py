@@ -0,0 +1,68 @@
+import pytest
+
+from ..services import metrics
+from ..services.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+def test_exposition_format():
+    """Prueba el texto de exposición de contadores, gauges e histogramas."""
+    registry = MetricsRegistry()
+    errors = registry.register(Counter('errors_total', 'Errors', ['severity']))
+    remaining = registry.register(Gauge('remaining', 'Remaining'))
+    duration = registry.register(Histogram('duration_seconds', 'Duration', buckets=(0.1, 1.0)))
+
+    errors.inc(severity='high')
+    errors.inc(2, severity='a "b"')
+    remaining.set(4999)
+    duration.observe(0.05)
+    duration.observe(0.5)
+    duration.observe(0.1)
+
+    assert registry.render() == (
+        '# HELP errors_total Errors\n'
+        '# TYPE errors_total counter\n'
+        'errors_total{severity="a \\"b\\""} 2\n'
+        'errors_total{severity="high"} 1\n'
+        '# HELP remaining Remaining\n'
+        '# TYPE remaining gauge\n'
+        'remaining 4999\n'
+        '# HELP duration_seconds Duration\n'
+        '# TYPE duration_seconds histogram\n'
+        'duration_seconds_bucket{le="0.1"} 2\n'
+        'duration_seconds_bucket{le="1"} 3\n'
+        'duration_seconds_bucket{le="+Inf"} 3\n'
+        'duration_seconds_sum 0.65\n'
+        'duration_seconds_count 3\n'
+    )
+    with pytest.raises(ValueError):
+        registry.register(Counter('errors_total', 'Duplicate'))
+    with pytest.raises(ValueError):
+        errors.inc()
+
+def test_track_counts_outcomes():
+    """Prueba que `track` mide el bloque y separa éxitos de fallos."""
+    duration = Histogram('stage_seconds', 'Stage', ['doc_type'])
+    success = Counter('stage_success_total', 'Success', ['doc_type'])
+    failure = Counter('stage_failure_total', 'Failure', ['doc_type'])
+
+    @metrics.track(duration, success, failure, doc_type='pl')
+    def stage(fail: bool) -> None:
+        if fail:
+            raise ValueError('falló')
+
+    stage(False)
+    with pytest.raises(ValueError):
+        stage(True)
+
+    assert duration.count(doc_type='pl') == 2
+    assert success.value(doc_type='pl') == failure.value(doc_type='pl') == 1
+
+def test_discrepancies_by_severity():
+    """Prueba el conteo de discrepancias por severidad y de validaciones limpias."""
+    high = metrics.discrepancies_found.value(severity='high')
+    clean = metrics.validation_success.value()
+
+    metrics.record_discrepancies([{'severity': 'high'}, {'severity': 'high'}])
+    metrics.record_discrepancies([])
+
+    assert metrics.discrepancies_found.value(severity='high') == high + 2
+    assert metrics.validation_success.value() == clean + 1
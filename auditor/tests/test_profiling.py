@@ -0,0 +1,53 @@
+import pstats
+
+import pytest
+
+from ..core.exceptions import ConfigurationError
+from ..services.profiling import ProfileStore, ProfilingPolicy, profile_call, profiled_audit
+
+def _busy(n: int) -> int:
+    """Trabajo medible por el perfilador."""
+    return sum(i * i for i in range(n))
+
+def test_profile_call_saves_stats(tmp_path):
+    """Prueba que el perfil se guarda en formato `pstats` y se resume en texto."""
+    store = ProfileStore(str(tmp_path))
+
+    result, name = profile_call(store, 'audit-https://github.com/owner/repo', _busy, 1000)
+
+    assert result == _busy(1000)
+    assert name.endswith('-audit-https_github.com_owner_repo.prof')
+    assert pstats.Stats(store.path(name)).total_calls > 0
+    assert '_busy' in store.summary(name)
+    assert [profile['name'] for profile in store.list()] == [name]
+
+def test_store_rotates_and_validates_names(tmp_path):
+    """Prueba que se conservan los perfiles más recientes y se rechazan rutas ajenas."""
+    store = ProfileStore(str(tmp_path), max_profiles=2)
+
+    names = [profile_call(store, f'run{index}', _busy, 10)[1] for index in range(3)]
+
+    assert [profile['name'] for profile in store.list()] == names[:0:-1]
+    assert store.path(names[0]) is None
+    for name in ('../secret.prof', 'profile.txt', names[0]):
+        assert store.path(name) is None and store.summary(name) is None
+
+def test_policy():
+    """Prueba la autorización por token y el muestreo."""
+    policy = ProfilingPolicy('secret', sample_rate=0.1, rng=lambda: 0.5)
+    assert policy.authorized('secret') and policy.should_profile('secret')
+    assert not policy.authorized('wrong') and not policy.should_profile(None)
+    assert ProfilingPolicy(sample_rate=0.1, rng=lambda: 0.05).should_profile(None)
+    assert not ProfilingPolicy().authorized('') and not ProfilingPolicy().should_profile(None)
+    with pytest.raises(ConfigurationError):
+        ProfilingPolicy(sample_rate=2)
+
+def test_profiled_audit(tmp_path):
+    """Prueba que la auditoría perfilada informa el nombre del perfil."""
+    store = ProfileStore(str(tmp_path))
+    audit = profiled_audit(lambda repo_url, branch: {'status': 'success', 'branch': branch}, 'audit', store)
+
+    result = audit('repo', 'main')
+
+    assert result['status'] == 'success' and result['branch'] == 'main'
+    assert store.path(result['profile']) is not None
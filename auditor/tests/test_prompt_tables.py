@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+from ..core.constants import PROMPT_CHARS_PER_TOKEN
+from ..core.models import FinancialLineItem
+from ..core.prompt_tables import statement_table
+from ..services.document_service import DocumentService
+
+BALANCE_MARKDOWN = """# Balance General
+Periodo: 2024-Q1
+
+## Activos
+| Concepto | Monto |
+|----------|-------|
+| Efectivo | $1,000.50 |
+| Bancos | $250 |
+
+## Pasivos
+| Concepto | Monto |
+|----------|-------|
+| Proveedores | $500 |
+
+## Totales
+| Concepto | Monto |
+|----------|-------|
+| Total Activos | $1,250.50 |
+"""
+
+def large_statement(rows: int):
+    """Estado con `rows` gastos de montos crecientes y un ingreso."""
+    return {
+        'period': '2024-Q1',
+        'revenue': [FinancialLineItem('Ventas', Decimal('1000000'), 'revenue', '2024-Q1')],
+        'expenses': [FinancialLineItem(f'Gasto {index:04d}', Decimal(index), 'expense', '2024-Q1') for index in range(1, rows + 1)],
+        'totals': {'Gastos Totales': Decimal(rows * (rows + 1) // 2)}
+    }
+
+def test_table_format():
+    """Prueba la tabla TSV de un estado parseado y que coincide con su diccionario."""
+    table = DocumentService()._parse_balance_markdown(BALANCE_MARKDOWN)
+
+    assert statement_table(table) == (
+        "período\t2024-Q1\n"
+        "sección\tcuenta\tmonto\n"
+        "activos\tEfectivo\t1000.50\n"
+        "activos\tBancos\t250\n"
+        "pasivos\tProveedores\t500\n"
+        "totals\tTotal Activos\t1250.50"
+    )
+    assert statement_table(table.to_dict()) == statement_table(table)
+
+def test_cells_without_separators():
+    """Prueba que los tabuladores y saltos de línea de los nombres no rompen la tabla."""
+    data = {'period': None, 'revenue': [FinancialLineItem('Ventas\tnetas\n2024', Decimal('1E+3'), 'revenue', '')], 'totals': {}}
+    assert statement_table(data).splitlines() == ["período\t", "sección\tcuenta\tmonto", "revenue\tVentas netas 2024\t1000"]
+
+def test_budget_truncates_largest_section():
+    """Prueba que el presupuesto recorta la sección más grande y conserva los totales."""
+    data = large_statement(500)
+    full = statement_table(data)
+    fitted = statement_table(data, token_budget=100)
+    lines = fitted.splitlines()
+
+    assert len(fitted) <= 100 * PROMPT_CHARS_PER_TOKEN < len(full)
+    assert statement_table(data, token_budget=len(full)) == full
+    assert "revenue\tVentas\t1000000" in lines
+    assert lines[-1] == "totals\tGastos Totales\t125250"
+    # Quedan los gastos mayores, en su orden, y la suma de los omitidos
+    kept = [line for line in lines if line.startswith('expenses\tGasto')]
+    omitted = 500 - len(kept)
+    assert kept == [f"expenses\tGasto {index:04d}\t{index}" for index in range(omitted + 1, 501)]
+    assert f"expenses\t(otras {omitted} partidas)\t{omitted * (omitted + 1) // 2}" in lines
+
+def test_output_is_deterministic():
+    """Prueba que los mismos datos dan el mismo texto con y sin presupuesto."""
+    assert statement_table(large_statement(300), 50) == statement_table(large_statement(300), 50)
+    assert statement_table(large_statement(300)) == statement_table(large_statement(300))
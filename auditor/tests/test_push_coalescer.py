@@ -0,0 +1,126 @@
+import threading
+import time
+
+from ..core.constants import JOB_CANCELLED, JOB_SUCCEEDED
+from ..services.job_queue import AuditJobQueue
+from ..services.push_coalescer import PushCoalescer
+from ..services.push_filter import FinancialChanges
+
+def _wait_for(job_queue: AuditJobQueue, job_id: str, timeout: float = 5.0):
+    """Espera a que un trabajo termine y lo devuelve."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = job_queue.get(job_id)
+        if job.finished_at is not None:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"El trabajo {job_id} no terminó")
+
+def _recording_queue():
+    """Cola cuya auditoría registra los commits auditados."""
+    audited = []
+    lock = threading.Lock()
+
+    def audit(repo_url, branch, commit_sha=None):
+        with lock:
+            audited.append((repo_url, branch, commit_sha))
+        return {'status': 'success'}
+
+    return AuditJobQueue(audit, workers=2), audited
+
+def test_burst_is_audited_once_at_newest_head():
+    """Prueba que una ráfaga de pushes produce una sola auditoría del último commit."""
+    job_queue, audited = _recording_queue()
+    coalescer = PushCoalescer(job_queue, window=0.2)
+
+    jobs = [coalescer.push('repo', 'main', f'sha{index}') for index in range(5)]
+    last = _wait_for(job_queue, jobs[-1].id)
+
+    assert last.status == JOB_SUCCEEDED
+    assert last.coalesced == 4
+    assert all(job_queue.get(job.id).status == JOB_CANCELLED for job in jobs[:-1])
+    assert audited == [('repo', 'main', 'sha4')]
+    assert coalescer.stats() == {'pushes': 5, 'coalesced': 4}
+    # La espera de la ventana no cuenta como espera en la cola
+    assert last.wait_seconds < 0.2
+    job_queue.shutdown()
+
+def test_branches_are_independent():
+    """Prueba que cada repositorio y rama tiene su propia ventana."""
+    job_queue, audited = _recording_queue()
+    coalescer = PushCoalescer(job_queue, window=0.05)
+
+    jobs = [coalescer.push('repo', 'main', 'a'), coalescer.push('repo', 'dev', 'b'), coalescer.push('other', 'main', 'c')]
+    for job in jobs:
+        _wait_for(job_queue, job.id)
+
+    assert sorted(audited) == [('other', 'main', 'c'), ('repo', 'dev', 'b'), ('repo', 'main', 'a')]
+    assert coalescer.stats()['coalesced'] == 0
+
+    # Las ramas con la auditoría terminada se olvidan en el siguiente push
+    last = coalescer.push('repo', 'main', 'd')
+    assert list(coalescer._pending) == [('repo', 'main')]
+    _wait_for(job_queue, last.id)
+    job_queue.shutdown()
+
+def test_running_audit_is_not_replaced():
+    """Prueba que un push durante una auditoría en curso programa otra."""
+    release = threading.Event()
+    job_queue = AuditJobQueue(lambda repo_url, branch, commit_sha=None: release.wait(5) and {'status': 'success'}, workers=1)
+    coalescer = PushCoalescer(job_queue, window=0)
+
+    first = coalescer.push('repo', 'main', 'a')
+    while job_queue.get(first.id).started_at is None:
+        time.sleep(0.01)
+    second = coalescer.push('repo', 'main', 'b')
+    release.set()
+
+    assert _wait_for(job_queue, first.id).status == JOB_SUCCEEDED
+    assert _wait_for(job_queue, second.id).status == JOB_SUCCEEDED
+    assert second.coalesced == 0
+    job_queue.shutdown()
+
+def test_max_wait_bounds_the_delay():
+    """Prueba que una ráfaga continua no pospone la auditoría más allá de `max_wait`."""
+    now = [0.0]
+    job_queue, _ = _recording_queue()
+    coalescer = PushCoalescer(job_queue, window=30, max_wait=60, clock=lambda: now[0])
+
+    coalescer.push('repo', 'main', 'a')
+    now[0] = 50.0
+    job = coalescer.push('repo', 'main', 'b')
+
+    # Quedan 10 s del máximo de la ráfaga, menos que la ventana de 30 s
+    assert 9 < job_queue._timers[job.id].interval <= 10
+    job_queue.shutdown()
+
+def test_coalesced_changes_are_merged():
+    """Prueba que la auditoría agrupada recibe los cambios de toda la ráfaga."""
+    received = []
+    job_queue = AuditJobQueue(lambda repo_url, branch, commit_sha=None, changes=None: received.append(changes) or {'status': 'success'}, workers=1)
+    coalescer = PushCoalescer(job_queue, window=0.1)
+
+    coalescer.push('repo', 'main', 'a', FinancialChanges(pl={'pl.md'}))
+    job = coalescer.push('repo', 'main', 'b', FinancialChanges(balance={'balance.md'}))
+    _wait_for(job_queue, job.id)
+    assert received == [FinancialChanges(pl={'pl.md'}, balance={'balance.md'})]
+
+    # Un push sin información de cambios obliga a revisar todo
+    coalescer.push('repo', 'main', 'c', FinancialChanges(pl={'pl.md'}))
+    job = coalescer.push('repo', 'main', 'd')
+    _wait_for(job_queue, job.id)
+    assert received[-1] is None
+    job_queue.shutdown()
+
+def test_options_survive_coalescing():
+    """Prueba que las opciones de un push agrupado pasan a la auditoría final."""
+    received = []
+    job_queue = AuditJobQueue(lambda repo_url, branch, **options: received.append(options) or {'status': 'success'}, workers=1)
+    coalescer = PushCoalescer(job_queue, window=0.1)
+
+    coalescer.push('repo', 'main', 'a', profile=True)
+    job = coalescer.push('repo', 'main', 'b')
+    _wait_for(job_queue, job.id)
+
+    assert received == [{'commit_sha': 'b', 'profile': True}]
+    job_queue.shutdown()
@@ -0,0 +1,109 @@
+from unittest.mock import Mock, patch
+
+from .. import agent
+from ..services.push_filter import FinancialChanges, LastDocumentStore, document_kind, financial_changes
+
+def _push(*commits, **extra) -> dict:
+    """Payload de push con los commits indicados."""
+    return dict(extra, commits=[dict({'added': [], 'modified': [], 'removed': []}, **commit) for commit in commits])
+
+def test_document_kind():
+    """Prueba las reglas de descubrimiento aplicadas a rutas del push."""
+    assert document_kind('reports/2024/pl.md') == 'pl'
+    assert document_kind('Income-Statement.CSV') == 'pl'
+    assert document_kind('balance.md') == 'balance'
+    assert document_kind('README.md') is None
+    assert document_kind('pl.txt') is None
+    assert document_kind('reports/PL_2024-Q1.md') == 'pl'
+    # Los patrones deben ser palabras completas del nombre
+    assert [document_kind(path) for path in ('template.md', 'deployment.md', 'simple.md', 'jobs.csv', 'tabs.md', 'notes.mdx')] == [None] * 6
+    # Palabras unidas por dígitos, mayúsculas intermedias o sin separador
+    assert document_kind('pl2024.md') == 'pl'
+    assert document_kind('reports/PLReport.md') == 'pl'
+    assert document_kind('BalanceGeneral.md') == 'balance'
+    assert document_kind('bs2024-q1.csv') == 'balance'
+    assert document_kind('incomestatement.md') == 'pl'
+    assert document_kind('balancesheet.csv') == 'balance'
+
+def test_financial_changes():
+    """Prueba la extracción de cambios financieros del payload."""
+    changes = financial_changes(_push({'modified': ['README.md', 'pl.md']}, {'added': ['docs/balance.md']}))
+    assert changes == FinancialChanges(pl={'pl.md'}, balance={'docs/balance.md'})
+
+    assert not financial_changes(_push({'modified': ['README.md', 'src/app.py']})).touched
+    assert financial_changes(_push({'removed': ['balance.md']})).removed
+    # Sin información suficiente se audita todo
+    assert financial_changes({}) is None
+    assert financial_changes(_push({'modified': ['README.md']}, forced=True)) is None
+    assert financial_changes(_push(*[{'modified': ['README.md']}] * 20)) is None
+
+    changes = financial_changes(_push({'id': 'c1', 'modified': ['pl.md']}, {'id': 'c2'}, before='b0', after='c2'))
+    assert (changes.before, changes.head, changes.since) == ('b0', 'c2', {'b0', 'c1', 'c2'})
+
+def test_merge_keeps_commits_of_contiguous_pushes():
+    """Prueba que al agrupar pushes sólo se acumulan los commits de pushes consecutivos."""
+    first = FinancialChanges(pl={'pl.md'}, before='a', head='b', commits={'b'})
+    merged = first.merge(FinancialChanges(pl={'pl.md'}, before='b', head='c', commits={'c'}))
+    assert (merged.head, merged.since) == ('c', {'a', 'b', 'c'})
+    # Falta el push de `b` a `c`: los cambios sólo están completos desde `c`
+    gap = first.merge(FinancialChanges(pl={'pl.md'}, before='c', head='d', commits={'d'}))
+    assert (gap.head, gap.since) == ('d', {'c', 'd'})
+
+def test_plan_partial():
+    """Prueba cuándo basta con descargar un solo documento."""
+    store = LastDocumentStore()
+    repo = 'https://github.com/owner/repo'
+    only_pl = FinancialChanges(pl={'pl.md'}, before='a1', head='b2', commits={'b1', 'b2'})
+    assert store.plan_partial(repo, 'main', only_pl) is None
+
+    store.put(repo, 'main', 'pl', 'pl.md', 'P&L viejo', 'a1')
+    store.put(repo, 'main', 'balance', 'balance.md', 'Balance', 'a1')
+    assert store.plan_partial(repo, 'main', only_pl) == ('pl', 'pl.md', 'Balance')
+    # El documento reutilizado queda registrado en el head del push
+    assert store.get(repo, 'main')['balance'] == ('balance.md', 'Balance', 'b2')
+    only_balance = FinancialChanges(balance={'balance.md'}, before='b2', head='c1', commits={'c1'})
+    assert store.plan_partial(repo, 'main', only_balance) is None  # el P&L guardado es de a1
+
+    store.put(repo, 'main', 'pl', 'pl.md', 'P&L', 'b1')
+    assert store.plan_partial(repo, 'main', FinancialChanges(balance={'balance.md'}, before='a1', commits={'b1'})) == ('balance', 'balance.md', 'P&L')
+    assert store.plan_partial(repo, 'main', FinancialChanges(pl={'pl.md'}, balance={'balance.md'}, before='b1')) is None
+    assert store.plan_partial(repo, 'main', FinancialChanges(pl={'nuevo/pl.md'}, before='b2')) is None
+    assert store.plan_partial(repo, 'main', FinancialChanges(pl={'pl.md'}, removed=True, before='b2')) is None
+    assert store.plan_partial(repo, 'main', None) is None
+    assert store.plan_partial(repo, 'dev', only_pl) is None
+
+    # Sin SHA no se sabe si el otro documento sigue vigente
+    store.put(repo, 'main', 'balance', 'balance.md', 'Balance', None)
+    assert store.plan_partial(repo, 'main', FinancialChanges(pl={'pl.md'}, before='b2')) is None
+
+def test_partial_retrieval_reuses_stored_document(monkeypatch):
+    """Prueba que sólo se descarga el documento modificado por el push."""
+    monkeypatch.setenv('GITHUB_TOKEN', 'test_token')
+    files = {'pl.md': b'P&L v1', 'balance.md': b'Balance v1', 'README.md': b'# Reportes'}
+    listing = [Mock(type='file', path=name) for name in files]
+    for item in listing:
+        item.name = item.path
+    repo = Mock()
+    repo.get_contents.side_effect = lambda path, ref=None: listing if path == '' else Mock(decoded_content=files[path])
+    registry = Mock()
+    registry.repository.return_value = repo
+    store = LastDocumentStore()
+    repo_url = 'https://github.com/owner/repo'
+
+    with patch.object(agent, 'default_registry', return_value=registry), \
+            patch.object(agent, 'default_document_store', return_value=store):
+        assert agent._retrieve_documents(repo_url, 'main', 'a' * 40) == {'pl': 'P&L v1', 'balance': 'Balance v1'}
+        assert repo.get_contents.call_count == 3
+
+        files['pl.md'] = b'P&L v2'
+        docs = agent._retrieve_documents(repo_url, 'main', 'b' * 40, FinancialChanges(pl={'pl.md'}, before='a' * 40, head='b' * 40))
+        assert docs == {'pl': 'P&L v2', 'balance': 'Balance v1'}
+        assert repo.get_contents.call_count == 4
+        repo.get_contents.assert_called_with('pl.md', ref='b' * 40)
+
+        # El push no parte del commit de los documentos guardados: se descubren de nuevo
+        files['balance.md'] = b'Balance v2'
+        docs = agent._retrieve_documents(repo_url, 'main', 'd' * 40, FinancialChanges(pl={'pl.md'}, before='c' * 40, head='d' * 40))
+
+    assert docs == {'pl': 'P&L v2', 'balance': 'Balance v2'}
+    assert repo.get_contents.call_count == 7
@@ -0,0 +1,71 @@
+from unittest.mock import Mock
+
+from ..services.audit_history import AuditHistoryStore
+from ..services.audit_service import AuditResult, AuditService
+from ..services.document_service import DocumentService
+from ..services.github_service import GitHubService
+from ..services.result_cache import AuditResultCache, ruleset_hash
+
+class _Clock:
+    """Reloj manual para probar vencimientos."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_entries_expire_after_ttl():
+    """Prueba que un resultado deja de servirse al vencer su TTL."""
+    clock = _Clock()
+    cache = AuditResultCache(ttl=10, clock=clock)
+    key = cache.key('https://github.com/Owner/Repo.git', 'abc', ruleset_hash())
+    cache.put(key, {'status': 'success'})
+
+    clock.now = 9.9
+    assert cache.get(cache.key('https://github.com/owner/repo/', 'abc', ruleset_hash())) == {'status': 'success'}
+    clock.now = 10.0
+    assert cache.get(key) is None
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'expired': 1, 'refreshes': 0, 'entries': 0}
+
+    # Sólo se quita el sufijo `.git`; los repositorios con `.git` en el nombre no se confunden
+    assert cache.key('https://github.com/owner/my.github-tools', 'abc', 'r') != cache.key('https://github.com/owner/myhub-tools', 'abc', 'r')
+    assert cache.key('https://github.com/owner/my.github-tools.git', 'abc', 'r')[0] == 'https://github.com/owner/my.github-tools'
+
+def test_force_refresh_and_copies():
+    """Prueba que `force_refresh` ignora la entrada y que se entregan copias."""
+    cache = AuditResultCache()
+    key = cache.key('repo', 'abc', ruleset_hash())
+    cache.put(key, {'discrepancies': []})
+
+    cache.get(key)['discrepancies'].append('modificado')
+
+    assert cache.get(key, force_refresh=True) is None
+    assert cache.get(key) == {'discrepancies': []}
+    assert cache.stats()['refreshes'] == 1
+
+def test_ruleset_hash_depends_on_options():
+    """Prueba que las opciones de auditoría cambian la clave."""
+    assert ruleset_hash(fixed_point=False) == ruleset_hash(fixed_point=False)
+    assert ruleset_hash(fixed_point=False) != ruleset_hash(fixed_point=True)
+
+def test_audit_service_reuses_result_for_same_commit():
+    """Prueba que un commit ya auditado no vuelve a descargarse ni compararse."""
+    github_service = Mock(spec=GitHubService)
+    github_service.resolve_commit.return_value = 'c' * 40
+    github_service.retrieve_documents.return_value = {'pl': Mock(content='pl'), 'balance': Mock(content='balance')}
+    document_service = Mock(spec=DocumentService)
+    document_service.parse_document.return_value = {'period': '2024-Q1', 'totals': {}}
+    audit_service = AuditService(document_service, github_service, result_cache=AuditResultCache(), history=AuditHistoryStore())
+    audit_service.compare_documents = Mock(return_value=[])
+
+    first = audit_service.run_audit('https://github.com/owner/repo')
+    second = audit_service.run_audit('https://github.com/owner/repo')
+    third = audit_service.run_audit('https://github.com/owner/repo', commit_sha='d' * 40)
+
+    assert isinstance(second, AuditResult)
+    assert (first.status, first.cached) == ('success', False)
+    assert (second.status, second.cached, second.commit_sha) == ('success', True, 'c' * 40)
+    assert third.cached is False
+    assert github_service.resolve_commit.call_count == 2
+    assert github_service.retrieve_documents.call_count == 2
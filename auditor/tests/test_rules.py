@@ -0,0 +1,101 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from ..core import rules
+from ..core.account_names import TOTAL_REVENUE
+from ..core.exceptions import ConfigurationError
+from ..core.models import FinancialLineItem
+from ..core.rules import compile_rules
+from ..services.document_service import DocumentService
+
+PL_DATA = {
+    'period': '2024-Q1',
+    'totals': {'Ingresos Totales': Decimal('1200'), 'Gastos Totales': Decimal('1300'), 'Utilidad Neta': Decimal('-100')}
+}
+
+BALANCE_DATA = {
+    'period': '2024-Q2',
+    'capital_contable': [FinancialLineItem('Utilidad', Decimal('300'), 'equity', '2024-Q2')],
+    'totals': {'Total Activos': Decimal('500'), 'Total Pasivos': Decimal('100'), 'Total Capital Contable': Decimal('300')}
+}
+
+def test_all_rules():
+    """Prueba que el plan completo produce cada discrepancia en el orden de las reglas."""
+    discrepancies = compile_rules().evaluate(PL_DATA, BALANCE_DATA)
+
+    assert [d['type'] for d in discrepancies] == ['period_mismatch', 'income_mismatch', 'unusual_ratio', 'expense_ratio', 'unbalanced']
+    assert discrepancies[1] == {
+        'type': 'income_mismatch',
+        'description': "La utilidad neta no coincide: P&L ($-100) vs Balance ($300)",
+        'severity': 'high',
+        'fix': "Ajustar la utilidad neta en el Balance General para que coincida con el P&L: $-100"
+    }
+    assert discrepancies[-1]['fix'].endswith('Diferencia actual: $100')
+
+def test_rule_subset_and_missing_inputs():
+    """Prueba la selección de reglas y que se omiten las que no tienen sus entradas."""
+    plan = compile_rules(['unbalanced', 'period_mismatch'])
+
+    assert plan.input_names == ('assets', 'liabilities', 'equity', 'pl_period', 'balance_period')
+    assert [d['type'] for d in plan.evaluate(PL_DATA, BALANCE_DATA)] == ['unbalanced', 'period_mismatch']
+    # Sin totales sólo queda la regla que acepta entradas faltantes
+    assert [d['type'] for d in plan.evaluate({'period': 'Q1'}, {})] == ['period_mismatch']
+    assert plan.fingerprint() != compile_rules().fingerprint()
+    with pytest.raises(ConfigurationError):
+        compile_rules(['unknown'])
+
+def test_inputs_resolved_once(monkeypatch):
+    """Prueba que una entrada compartida por varias reglas se resuelve una sola vez por par."""
+    calls = []
+
+    class CountingSection(dict):
+        def get(self, key, default=None):
+            calls.append(key)
+            return super().get(key, default)
+
+    index = rules.account_index
+    monkeypatch.setattr(rules, 'account_index', lambda data: {**index(data), 'totals': CountingSection(index(data)['totals'])})
+    plan = compile_rules(['unusual_ratio', 'expense_ratio'])
+
+    assert [len(items) for items in plan.evaluate_many([(PL_DATA, BALANCE_DATA)] * 3)] == [2, 2, 2]
+    assert calls.count(TOTAL_REVENUE) == 3
+
+def test_tables_and_fixed_point(sample_pl_markdown, sample_balance_markdown):
+    """Prueba que tablas, diccionarios y centavos enteros dan las mismas discrepancias."""
+    pl_data = DocumentService()._parse_pl_markdown(sample_pl_markdown)
+    balance_data = DocumentService()._parse_balance_markdown(sample_balance_markdown)
+    fixed_service = DocumentService(fixed_point=True)
+    fixed = (fixed_service._parse_pl_markdown(sample_pl_markdown), fixed_service._parse_balance_markdown(sample_balance_markdown))
+
+    expected = compile_rules().evaluate(pl_data.to_dict(), balance_data.to_dict())
+    assert [d['type'] for d in expected] == ['income_mismatch']
+    assert compile_rules().evaluate(pl_data, balance_data) == expected
+    # En centavos los montos se reportan con dos decimales
+    assert [d['type'] for d in compile_rules(fixed_point=True).evaluate(*fixed)] == ['income_mismatch']
+
+def test_batch_matches_single_pairs(sample_pl_markdown, sample_balance_markdown):
+    """Prueba que la evaluación vectorizada da lo mismo que la evaluación por par."""
+    precise = dict(BALANCE_DATA, totals={'Total Activos': Decimal('500.0049'), 'Total Pasivos': Decimal('100'), 'Total Capital Contable': Decimal('400')})
+    huge = dict(PL_DATA, totals={'Ingresos Totales': Decimal('1E+40'), 'Gastos Totales': Decimal('1')})
+    pairs = [(PL_DATA, BALANCE_DATA), ({'period': 'Q1'}, {}), (PL_DATA, precise), (huge, BALANCE_DATA)]
+    for plan in (compile_rules(), compile_rules(['unbalanced', 'period_mismatch'])):
+        assert plan.evaluate_batch(pairs) == plan.evaluate_many(pairs)
+        assert plan.evaluate_batch(pairs[:3] * 5) == plan.evaluate_many(pairs[:3] * 5)
+    # Decimales más allá de los centavos también se comparan exactos
+    tiny = dict(BALANCE_DATA, totals={'Total Activos': Decimal('400.0000000001'), 'Total Pasivos': Decimal('100'), 'Total Capital Contable': Decimal('300')})
+    assert compile_rules().evaluate_batch([(PL_DATA, tiny)]) == compile_rules().evaluate_many([(PL_DATA, tiny)])
+    assert compile_rules().evaluate_batch([]) == []
+    # Los centavos exactos se convierten en bloque; los demás se redondean como `to_cents`
+    assert rules._cents_column([Decimal('1.5'), None]).tolist() == [150, 0]
+    assert rules._cents_column([Decimal('1.5')]).dtype == np.int64
+    assert rules._cents_column([Decimal('0.005'), Decimal('-0.015')]).tolist() == [0, -2]
+    assert rules._cents_column([Decimal('1E+20')]).dtype == object
+    assert rules._cents_column([Decimal(-2 ** 63).scaleb(-2)]).dtype == object
+    assert rules._cents_column([]).dtype == np.int64
+
+    fixed_service = DocumentService(fixed_point=True)
+    fixed = [(fixed_service._parse_pl_markdown(sample_pl_markdown), fixed_service._parse_balance_markdown(sample_balance_markdown))] * 3
+    plan = compile_rules(fixed_point=True)
+    assert plan.evaluate_batch(fixed + pairs[:3]) == plan.evaluate_many(fixed + pairs[:3])
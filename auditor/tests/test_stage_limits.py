@@ -0,0 +1,39 @@
+import threading
+import time
+
+import pytest
+
+from ..core.exceptions import ConfigurationError
+from ..services.stage_limits import StageLimits, parse_stage_limits
+
+def test_parse_stage_limits():
+    """Prueba la configuración de límites a partir del texto de entorno."""
+    assert parse_stage_limits('retrieve=8, issue=1') == {'retrieve': 8, 'compare': 2, 'issue': 1}
+    assert parse_stage_limits('') == {'retrieve': 4, 'compare': 2, 'issue': 2}
+    for spec in ('retrieve', 'retrieve=0', '=3', 'compare=dos'):
+        with pytest.raises(ConfigurationError):
+            parse_stage_limits(spec)
+
+def test_stage_concurrency_is_bounded():
+    """Prueba que una etapa nunca ejecuta más bloques que su límite."""
+    limits = StageLimits({'retrieve': 2})
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with limits.stage('retrieve'):
+            with lock:
+                peak.append(limits.stats()['retrieve']['active'])
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 2
+    assert limits.stats()['retrieve'] == {'limit': 2, 'active': 0, 'waiting': 0}
+    # Las etapas sin límite no se restringen
+    with limits.stage('compare'):
+        pass
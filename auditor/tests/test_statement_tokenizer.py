@@ -0,0 +1,91 @@
+import pytest
+from decimal import Decimal, InvalidOperation
+
+from ..core.statement_tokenizer import (
+    SectionEvent, PeriodEvent, RowsEvent, ColumnsEvent,
+    iter_blocks, tokenize_statement, parse_amount
+)
+
+def _rows(events) -> list:
+    """Aplana los lotes de filas en tuplas (sección, nombre, valor)."""
+    return [(e.section, name, value) for e in events if isinstance(e, RowsEvent) for name, value in e.rows]
+
+def test_tokenize_events(sample_pl_markdown: str):
+    """Prueba los eventos emitidos para un P&L completo."""
+    events = list(tokenize_statement(sample_pl_markdown))
+    rows = _rows(events)
+
+    assert events[0] == PeriodEvent('2024-Q1')
+    assert SectionEvent('ingresos') in events
+    assert ('ingresos', 'Ventas', '$1000') in rows
+    assert ('totales', 'Utilidad Neta', '$400') in rows
+    # Encabezados y separadores de tabla no generan filas
+    assert all(name != 'Concepto' for _, name, _ in rows)
+    assert len(rows) == 7
+
+def test_chunked_bytes_match_text(sample_balance_markdown: str):
+    """Prueba que fragmentos arbitrarios en bytes producen las mismas filas."""
+    content = sample_balance_markdown + "| Señal | $5 |\n"
+    raw = content.encode('utf-8')
+    chunks = [raw[i:i + 7] for i in range(0, len(raw), 7)]
+
+    expected = list(tokenize_statement(content))
+    assert _rows(tokenize_statement(chunks)) == _rows(expected)
+    assert _rows(tokenize_statement(content, block_size=16)) == _rows(expected)
+    assert PeriodEvent('2024-Q1') in list(tokenize_statement(chunks))
+
+def test_iter_blocks_are_line_aligned():
+    """Prueba que los bloques terminan en un salto de línea."""
+    text = "a\nbb\nccc\nd"
+    blocks = [text[start:end] for text, start, end in iter_blocks(text, block_size=4)]
+    assert ''.join(blocks) == text
+    assert all(block.endswith('\n') for block in blocks[:-1])
+
+def test_period_on_next_line():
+    """Prueba el período escrito en la línea siguiente a la etiqueta."""
+    assert list(tokenize_statement("Periodo:\n\n  2024-Q2  \n")) == [PeriodEvent('2024-Q2')]
+    chunks = ["Periodo:", "\n", "2024-Q3\n"]
+    assert list(tokenize_statement(chunks)) == [PeriodEvent('2024-Q3')]
+
+def test_rows_need_closing_pipe():
+    """Prueba que filas con menos de dos celdas completas se ignoran."""
+    content = "## Ingresos\n| Ventas | $10\n| Otros |\n  | Ventas | $10 | extra |\n"
+    assert _rows(tokenize_statement(content)) == [('ingresos', 'Ventas', '$10')]
+
+def test_irregular_tables():
+    """Prueba tablas con anchos mixtos y texto libre entre filas."""
+    content = (
+        "## Activos\n"
+        "| Concepto | Monto | Nota |\n"
+        "|----------|-------|------|\n"
+        "| Caja | $10 | -- |\n"
+        "| Bancos | $20 |\n"
+        "Texto libre | con | barras\n"
+        "   | Inventario |  $30  |\n"
+        "| Total | $60 ||\n"
+    )
+    assert _rows(tokenize_statement(content)) == [
+        ('activos', 'Caja', '$10'),
+        ('activos', 'Bancos', '$20'),
+        ('activos', 'Inventario', '$30'),
+        ('activos', 'Total', '$60')
+    ]
+
+def test_columns_match_rows(sample_balance_markdown: str):
+    """Prueba que `columns=True` emite las mismas filas como columnas."""
+    content = sample_balance_markdown + "Texto libre\n| Señal | $5 |\n"
+    for block_size in (16, 1 << 16):
+        events = list(tokenize_statement(content, block_size=block_size, columns=True))
+        assert not any(isinstance(event, RowsEvent) for event in events)
+        columns = [
+            (event.section, name, value)
+            for event in events if isinstance(event, ColumnsEvent)
+            for name, value in zip(event.names, event.values)
+        ]
+        assert columns == _rows(tokenize_statement(content, block_size=block_size))
+
+def test_parse_amount():
+    """Prueba la conversión de celdas a montos."""
+    assert parse_amount(' $1,200.50 ') == Decimal('1200.50')
+    with pytest.raises(InvalidOperation):
+        parse_amount('N/A')
@@ -0,0 +1,90 @@
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+
+from ..services import tracing
+from ..services.audit_history import AuditHistoryStore
+from ..services.audit_service import AuditService
+from ..services.document_service import DocumentService
+from ..services.github_service import GitHubService
+from ..services.result_cache import AuditResultCache
+from ..services.tracing import InMemoryExporter, JsonLinesExporter, Tracer
+
+@pytest.fixture
+def exporter():
+    """Exportador en memoria instalado en el tracer del proceso."""
+    exporter = InMemoryExporter()
+    previous = tracing.set_exporter(exporter)
+    yield exporter
+    tracing.set_exporter(previous)
+
+def test_nested_spans_and_errors():
+    """Prueba el anidamiento, los atributos y el estado de error de los spans."""
+    exporter = InMemoryExporter()
+    tracer = Tracer(exporter)
+
+    with tracer.span('audit', repo='owner/repo') as root:
+        with pytest.raises(ValueError):
+            with tracer.span('document_parsing'):
+                raise ValueError('tabla inválida')
+        with tracer.span('financial_comparison') as comparison:
+            comparison.set_attribute('discrepancies', 2)
+
+    parsing, comparison, audit = exporter.spans
+    assert audit is root and audit.parent_id is None and audit.attributes == {'repo': 'owner/repo'}
+    assert parsing.trace_id == comparison.trace_id == audit.trace_id
+    assert parsing.parent_id == comparison.parent_id == audit.span_id
+    assert (parsing.status, parsing.error) == ('error', 'tabla inválida')
+    assert comparison.status == 'ok' and comparison.attributes == {'discrepancies': 2}
+    assert audit.duration_ms >= comparison.duration_ms
+    assert tracing.current_span() is None
+
+def test_json_lines_exporter(tmp_path):
+    """Prueba que el exportador escribe un objeto JSON por span."""
+    path = tmp_path / 'spans.jsonl'
+    exporter = JsonLinesExporter(str(path))
+    tracer = Tracer(exporter)
+
+    with tracer.span('audit'):
+        with tracer.span('document_retrieval', files=['pl.md', 'balance.md']):
+            pass
+    exporter.shutdown()
+
+    spans = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert [span['name'] for span in spans] == ['document_retrieval', 'audit']
+    assert spans[0]['parent_id'] == spans[1]['span_id']
+    assert spans[0]['attributes'] == {'files': ['pl.md', 'balance.md']}
+
+def test_context_crosses_threads_with_copied_context(exporter):
+    """Prueba que un span abierto en otro hilo con el contexto copiado conserva su padre."""
+    def stage():
+        with tracing.span('document_retrieval'):
+            pass
+
+    with tracing.span('audit_request') as parent, ThreadPoolExecutor(max_workers=1) as executor:
+        executor.submit(contextvars.copy_context().run, stage).result()
+
+    child = exporter.spans[0]
+    assert (child.trace_id, child.parent_id) == (parent.trace_id, parent.span_id)
+
+def test_audit_service_spans(exporter, sample_pl_document, sample_balance_document):
+    """Prueba que una auditoría emite los spans de parseo y comparación bajo `audit`."""
+    github_service = Mock(spec=GitHubService)
+    github_service.resolve_commit.return_value = 'c' * 40
+    github_service.retrieve_documents.return_value = {'pl': sample_pl_document, 'balance': sample_balance_document}
+    audit_service = AuditService(DocumentService(), github_service, result_cache=AuditResultCache(), history=AuditHistoryStore())
+
+    audit_service.run_audit('https://github.com/owner/repo')
+
+    spans = {span.name: span for span in exporter.spans}
+    audit = spans['audit']
+    assert audit.attributes['commit_sha'] == 'c' * 40 and audit.attributes['cached'] is False
+    assert 'retrieve_wait_ms' in audit.attributes
+    parsing = [span for span in exporter.spans if span.name == 'document_parsing']
+    assert [span.attributes['doc_type'] for span in parsing] == ['pl', 'balance']
+    assert all(span.attributes['parsed_items'] > 0 and span.attributes['file_size'] > 0 for span in parsing)
+    assert spans['financial_comparison'].attributes['discrepancies'] == audit.attributes['discrepancies']
+    assert all(span.parent_id == audit.span_id for span in parsing + [spans['financial_comparison']])
@@ -0,0 +1,107 @@
+"""Benchmark del índice de cuentas: búsqueda por subcadena vs. sinónimos normalizados.
+
+Uso:
+    python -m benchmarks.bench_account_names [filas]
+
+Arma un corpus con cada sinónimo de `ACCOUNT_SYNONYMS` en variantes de
+mayúsculas, acentos, espacios y puntuación, más nombres que no son la
+utilidad neta ni las ganancias retenidas aunque contienen 'net' o
+'utilidad', y reporta los aciertos de la búsqueda anterior y del índice.
+Después mide el costo de encontrar la utilidad neta en un capital contable
+de `filas` partidas: el recorrido anterior de `FinancialLineItem`, el armado
+del índice al parsear y la consulta al índice.
+"""
+
+import sys
+import time
+import unicodedata
+from typing import Callable, List, Optional, Tuple
+
+from auditor.core.account_names import ACCOUNT_SYNONYMS, NET_INCOME, RETAINED_EARNINGS, account_concept, fold
+from auditor.services.document_service import DocumentService
+
+# Nombres que no son ninguno de los conceptos de la tabla
+NEGATIVES = (
+    'Activos Netos', 'Ventas Netas', 'Cuentas por Cobrar Netas', 'Inventarios Netos', 'Net Assets',
+    'Net Sales', 'Internet y Telefonía', 'Servicios de Internet', 'Utilidad Bruta', 'Utilidad de Operación',
+    'Gross Profit', 'Operating Income', 'Capital Social', 'Reserva Legal', 'Cuentas Netas por Pagar'
+)
+
+def strip_accents(text: str) -> str:
+    """El texto sin marcas diacríticas."""
+    return ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+
+def variants(name: str) -> List[str]:
+    """Formas en que un nombre aparece escrito en los documentos."""
+    return [
+        name, name.upper(), name.lower(), name.title(), strip_accents(name), strip_accents(name).upper(),
+        f"  {name}  ", name.replace(' ', '  '), f"{name}:", f"{name}.", name.replace(' ', '\t')
+    ]
+
+def build_corpus() -> List[Tuple[str, Optional[str]]]:
+    """Pares (nombre, concepto esperado) con todos los sinónimos y los negativos."""
+    corpus = [(variant, concept) for concept, names in ACCOUNT_SYNONYMS.items() for name in names for variant in variants(name)]
+    corpus.extend((variant, None) for name in NEGATIVES for variant in variants(name))
+    return corpus
+
+def legacy_concept(name: str) -> Optional[str]:
+    """Clasificación de la búsqueda anterior por subcadena (utilidad neta primero)."""
+    lowered = name.lower()
+    if 'utilidad' in lowered or 'net' in lowered:
+        return NET_INCOME
+    if 'retenidas' in lowered or 'retained' in lowered:
+        return RETAINED_EARNINGS
+    return None
+
+def accuracy(classify: Callable[[str], Optional[str]], corpus: List[Tuple[str, Optional[str]]]) -> Tuple[int, int]:
+    """Aciertos y errores para los conceptos que buscaba la versión anterior."""
+    relevant = [(name, expected) for name, expected in corpus if expected in (NET_INCOME, RETAINED_EARNINGS, None)]
+    hits = sum(1 for name, expected in relevant if classify(name) == expected)
+    return hits, len(relevant) - hits
+
+def timed(label: str, func: Callable, repeat: int = 5):
+    """Mejor tiempo de `func`."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<44} {best * 1e6:12.1f} µs")
+    return result
+
+def build_balance(rows: int) -> str:
+    """Balance con `rows` partidas de capital y la utilidad del ejercicio al final."""
+    lines = ["# Balance General", "Periodo: 2024-Q4", "", "## Capital Contable", "| Concepto | Monto |", "|---|---|"]
+    lines.extend(f"| Cuenta de Capital {index:06d} | ${index % 1000}.00 |" for index in range(rows))
+    lines.append("| Utilidad del Ejercicio | $1234.56 |")
+    return '\n'.join(lines)
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    corpus = build_corpus()
+    print(f"Corpus: {len(corpus)} nombres, {len({fold(name) for name, _ in corpus})} claves normalizadas\n")
+
+    for label, classify in (("subcadena (anterior)", legacy_concept), ("sinónimos normalizados", account_concept)):
+        hits, misses = accuracy(classify, corpus)
+        print(f"{label:<44} {hits} aciertos, {misses} errores")
+    mistakes = [(name, expected) for name, expected in corpus if account_concept(name) != expected]
+    assert not mistakes, mistakes[:5]
+    print()
+
+    content = build_balance(rows)
+    table = DocumentService()._parse_balance_markdown(content)
+    items = table.to_dict()['capital_contable']
+
+    def legacy_lookup():
+        for item in items:
+            if 'utilidad' in item.name.lower() or 'net' in item.name.lower():
+                return item.amount
+        return None
+
+    legacy = timed(f"recorrido de {rows} partidas (anterior)", legacy_lookup)
+    timed("armado del índice (al parsear)", table._index_accounts, repeat=3)
+    indexed = timed("consulta al índice", lambda: table.accounts['capital_contable'][NET_INCOME])
+    assert legacy == indexed
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark de consultas al historial de auditorías con millones de discrepancias.
+
+Uso:
+    python -m benchmarks.bench_audit_history [auditorías] [discrepancias_por_auditoría]
+
+Siembra un historial sintético en un archivo SQLite temporal (varios
+repositorios y períodos, tipos de discrepancia con frecuencias distintas) y
+mide las consultas de `GET /audits`: primera página, páginas profundas por
+cursor frente a `OFFSET`, filtros por repositorio/período y por tipo de
+discrepancia (frecuente y rara), y el detalle de una auditoría.
+"""
+
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+from auditor.services.audit_history import AuditHistoryStore
+
+REPOS = [f"https://github.com/owner/repo{index}" for index in range(50)]
+PERIODS = [f"{year}-Q{quarter}" for year in range(2015, 2025) for quarter in range(1, 5)]
+# Tipos de discrepancia con su peso relativo; `period_mismatch` es rara
+TYPES = {'unbalanced': 40, 'income_mismatch': 30, 'expense_ratio': 20, 'unusual_ratio': 9.9, 'period_mismatch': 0.1}
+BATCH = 10_000
+
+def seed(store: AuditHistoryStore, audits: int, per_audit: int) -> None:
+    """Inserta `audits` auditorías con `per_audit` discrepancias en promedio."""
+    rng = random.Random(7)
+    started = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc).isoformat()
+    timings = json.dumps({'retrieve': 120.0, 'compare': 15.0, 'issue': 80.0})
+    types, weights = list(TYPES), list(TYPES.values())
+    conn = store._conn
+    with conn:
+        for start in range(1, audits + 1, BATCH):
+            ids = range(start, min(start + BATCH, audits + 1))
+            counts = [rng.randint(0, 2 * per_audit) for _ in ids]
+            conn.executemany(
+                'INSERT INTO audits (id, repo_url, branch, commit_sha, period, status, started_at, duration_ms,'
+                ' timings, issue_url, discrepancy_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                ((audit_id, rng.choice(REPOS), 'main', f"{audit_id:040x}", rng.choice(PERIODS), 'success',
+                  started, 215.0, timings, None, count) for audit_id, count in zip(ids, counts))
+            )
+            conn.executemany(
+                'INSERT INTO discrepancies (audit_id, type, severity, description, fix) VALUES (?, ?, ?, ?, ?)',
+                ((audit_id, kind, 'high', 'Discrepancia sintética', 'Corregir')
+                 for audit_id, count in zip(ids, counts) for kind in rng.choices(types, weights, k=count))
+            )
+    conn.execute('ANALYZE')
+
+def timed(label: str, func: Callable[[], object], repeat: int = 20) -> None:
+    """Reporta la mediana y el máximo de `repeat` ejecuciones de `func`."""
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    print(f"{label:<48} p50={samples[len(samples) // 2] * 1000:8.2f} ms   max={samples[-1] * 1000:8.2f} ms")
+
+def main() -> None:
+    audits = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    per_audit = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = AuditHistoryStore(os.path.join(directory, 'history.db'))
+        start = time.perf_counter()
+        seed(store, audits, per_audit)
+        discrepancies = store._conn.execute('SELECT COUNT(*) FROM discrepancies').fetchone()[0]
+        print(f"{audits} auditorías, {discrepancies} discrepancias sembradas en {time.perf_counter() - start:.1f} s")
+
+        deep = audits // 2
+        cursor = store.query(limit=1, cursor=deep + 1)[0][0]['id'] + 1
+        timed("primera página", lambda: store.query())
+        timed(f"página por cursor (id < {cursor})", lambda: store.query(cursor=cursor))
+        timed(f"página por OFFSET {audits - deep}", lambda: store._conn.execute(
+            'SELECT * FROM audits ORDER BY id DESC LIMIT 50 OFFSET ?', (audits - deep,)).fetchall())
+        timed("repositorio + período", lambda: store.query(repo_url=REPOS[3], period=PERIODS[-1]))
+        timed("repositorio + período (página profunda)", lambda: store.query(repo_url=REPOS[3], period=PERIODS[-1], cursor=cursor))
+        timed("tipo frecuente (unbalanced)", lambda: store.query(discrepancy_type='unbalanced'))
+        timed("tipo raro (period_mismatch)", lambda: store.query(discrepancy_type='period_mismatch'))
+        timed("repositorio + tipo raro", lambda: store.query(repo_url=REPOS[3], discrepancy_type='period_mismatch'))
+        timed("detalle de una auditoría", lambda: store.get(deep))
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark de la auditoría por lotes: un período a la vez vs. reglas vectorizadas.
+
+Uso:
+    python -m benchmarks.bench_batch_audit [períodos ...]
+
+Parsea 1000 pares P&L/Balance distintos, con las discrepancias de
+`bench_rules` (más de una por período) o consistentes, y los repite hasta
+cada cantidad de períodos (por defecto 1000 y 100000). Para cada una mide la
+comparación de los datos ya parseados: `AuditService.compare_documents` en
+un bucle, como hoy se audita cada trimestre, `RulePlan.evaluate_many` y
+`AuditService.compare_periods`, que evalúa cada regla una vez sobre las
+columnas de todos los períodos. Al final mide la auditoría completa (parseo
+y comparación) con `audit_periods` contra el bucle de `parse_document` y
+`compare_documents`.
+"""
+
+import sys
+from typing import List, Tuple
+
+from auditor.core.models import FinancialDocument
+from auditor.services.audit_service import AuditService
+from auditor.services.document_service import DocumentService
+from benchmarks.bench_markdown_parser import measure
+from benchmarks.bench_rules import BALANCE_TEMPLATE, PL_TEMPLATE, build_pairs
+
+DISTINCT_PAIRS = 1000
+
+def build_clean_pairs(count: int) -> List[Tuple[str, str]]:
+    """Pares sin discrepancias: mismo período, utilidad cero y balance cuadrado."""
+    pairs = []
+    for index in range(count):
+        period = f"{2000 + index % 25}-Q{1 + index % 4}"
+        amount = 1000 + index % 700
+        assets, liabilities = 5000 + index % 3000, 2000 + index % 1000
+        pairs.append((
+            PL_TEMPLATE.format(period=period, revenue=amount, expenses=amount, net=0),
+            BALANCE_TEMPLATE.format(
+                period=period, assets=assets, liabilities=liabilities, capital=assets - liabilities,
+                retained=index % 3, balance_net=0, equity=assets - liabilities
+            )
+        ))
+    return pairs
+
+def build_documents(pairs: List[Tuple[str, str]]) -> List[Tuple[FinancialDocument, FinancialDocument]]:
+    """Documentos Markdown de los pares de contenidos."""
+    return [(FinancialDocument(pl, 'pl', 'markdown'), FinancialDocument(balance, 'balance', 'markdown')) for pl, balance in pairs]
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 100_000]
+    service = AuditService(document_service=DocumentService(), github_service=object())
+    parse = service.document_service.parse_document
+    datasets = (("con discrepancias", build_documents(build_pairs(DISTINCT_PAIRS))), ("consistentes", build_documents(build_clean_pairs(DISTINCT_PAIRS))))
+    loop = lambda pairs: [service.compare_documents(pl, balance) for pl, balance in pairs]
+
+    for label, documents in datasets:
+        distinct = [(parse(pl), parse(balance)) for pl, balance in documents]
+        for size in sizes:
+            parsed = (distinct * (size // DISTINCT_PAIRS + 1))[:size]
+            print(f"\n{size} períodos {label}")
+            baseline = measure("compare_documents (bucle)", loop, parsed, repeat=3)
+            many = measure("RulePlan.evaluate_many", service.rules.evaluate_many, parsed, repeat=3)
+            batch = measure("AuditService.compare_periods", service.compare_periods, parsed, repeat=3)
+            print(f"{'':<40} vs bucle x{baseline / batch:.1f}   vs evaluate_many x{many / batch:.1f}")
+
+            # Las reglas vectorizadas encuentran las mismas discrepancias por período
+            found = service.compare_periods(parsed)
+            assert found == loop(parsed)
+            print(f"{'':<40} {sum(map(len, found))} discrepancias")
+
+    size = min(sizes[0], DISTINCT_PAIRS)
+    documents = datasets[0][1][:size]
+    print(f"\nAuditoría completa de {size} períodos (parseo sin caché)")
+    audit_loop = lambda pairs: [service.compare_documents(DocumentService().parse_document(pl), DocumentService().parse_document(balance)) for pl, balance in pairs]
+    audit_batch = lambda pairs: AuditService(document_service=DocumentService(), github_service=object()).audit_periods(pairs)
+    measure("parse_document + compare_documents", audit_loop, documents, repeat=1)
+    measure("AuditService.audit_periods", audit_batch, documents, repeat=1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark del parseo CSV: recorrido con `iterrows()` vs. operaciones por columna.
+
+Uso:
+    python -m benchmarks.bench_csv_parser [filas]
+
+Genera un Balance sintético en CSV, lo parsea con el bucle anterior y con
+`DocumentService._parse_balance_csv`, y reporta tiempo y memoria pico.
+"""
+
+import sys
+from decimal import Decimal, InvalidOperation
+from io import StringIO
+from typing import Dict
+
+import pandas as pd
+
+from auditor.core.constants import CATEGORY_ASSET, CATEGORY_LIABILITY, CATEGORY_EQUITY, MIN_AMOUNT, MAX_AMOUNT
+from auditor.core.models import FinancialLineItem
+from auditor.services.document_service import DocumentService
+from benchmarks.bench_markdown_parser import measure
+
+def build_ledger_csv(rows: int) -> str:
+    """Construye un Balance General en CSV con `rows` partidas."""
+    categories = ('Asset', 'Liability', 'Equity', 'Memo')
+    lines = ["Periodo,Item,Category,Amount"]
+    for i in range(rows):
+        amount = f"{i * 37 % 100000}.{i % 100:02d}" if i % 50 else "N/A"
+        lines.append(f"2024-Q1,Cuenta {i:07d},{categories[i % 4]},\"${amount}\"")
+    lines.append("2024-Q1,Total Activos,Total,1500")
+    return "\n".join(lines) + "\n"
+
+def legacy_parse(content: str) -> Dict:
+    """`DocumentService._parse_balance_csv` anterior al parseo por columnas (referencia)."""
+    df = pd.read_csv(StringIO(content))
+    data = {
+        'period': None,
+        'activos': [],
+        'pasivos': [],
+        'capital_contable': [],
+        'totals': {}
+    }
+
+    period_col = df.columns[df.columns.str.contains('periodo', case=False)][0]
+    data['period'] = df[period_col].iloc[0]
+
+    for _, row in df.iterrows():
+        try:
+            amount = Decimal(str(row['Amount']).replace('$', '').replace(',', ''))
+            if not MIN_AMOUNT <= amount <= MAX_AMOUNT:
+                continue
+
+            if row['Category'].lower() == 'asset':
+                data['activos'].append(FinancialLineItem(
+                    name=row['Item'],
+                    amount=amount,
+                    category=CATEGORY_ASSET,
+                    period=data['period']
+                ))
+            elif row['Category'].lower() == 'liability':
+                data['pasivos'].append(FinancialLineItem(
+                    name=row['Item'],
+                    amount=amount,
+                    category=CATEGORY_LIABILITY,
+                    period=data['period']
+                ))
+            elif row['Category'].lower() == 'equity':
+                data['capital_contable'].append(FinancialLineItem(
+                    name=row['Item'],
+                    amount=amount,
+                    category=CATEGORY_EQUITY,
+                    period=data['period']
+                ))
+            elif row['Category'].lower() in ['total', 'totales']:
+                data['totals'][row['Item']] = amount
+        except (ValueError, InvalidOperation, KeyError):
+            continue
+
+    return data
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    content = build_ledger_csv(rows)
+    print(f"Documento: {len(content) / 2**20:.1f} MiB, {rows} filas\n")
+
+    service = DocumentService()
+    old = measure("parseo CSV (iterrows)", legacy_parse, content, repeat=1)
+    new = measure("parseo CSV (por columnas)", service._parse_balance_csv, content, repeat=3)
+    print(f"{'':<40} speedup x{old / new:.2f}")
+
+if __name__ == "__main__":
+    main()
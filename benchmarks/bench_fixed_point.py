@@ -0,0 +1,67 @@
+"""Benchmark de montos: `Decimal` vs. centavos enteros en punto fijo.
+
+Uso:
+    python -m benchmarks.bench_fixed_point [filas]
+
+Compara el parseo de un Balance sintético con `DocumentService` en ambos
+modos, la suma de una sección y las comprobaciones de tolerancia que hace
+`AuditService.compare_documents`, repetidas sobre todas las partidas.
+"""
+
+import sys
+from decimal import Decimal
+
+import numpy as np
+
+from auditor.core.constants import TOLERANCE
+from auditor.core.fixed_point import TOLERANCE_CENTS, sum_cents
+from auditor.services.document_service import DocumentService
+from benchmarks.bench_markdown_parser import build_ledger, measure
+
+SUBTOTAL_ROWS = 10_000
+
+def decimal_sum(values) -> Decimal:
+    """Suma de montos `Decimal`."""
+    return sum(values, Decimal('0'))
+
+def decimal_tolerance(pairs) -> int:
+    """Cuenta los pares cuya diferencia supera `TOLERANCE` en `Decimal`."""
+    return sum(1 for left, right in pairs if abs(left - right) > TOLERANCE)
+
+def cents_tolerance(pairs) -> int:
+    """Cuenta los pares cuya diferencia supera `TOLERANCE_CENTS` en enteros."""
+    left, right = pairs
+    return int((abs(left - right) > TOLERANCE_CENTS).sum())
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    content = build_ledger(rows)
+    print(f"Documento: {len(content) / 2**20:.1f} MiB, {rows * 3} partidas\n")
+
+    decimal_service = DocumentService()
+    fixed_service = DocumentService(fixed_point=True)
+    old = measure("parseo (Decimal)", decimal_service._parse_balance_markdown, content)
+    new = measure("parseo (centavos)", fixed_service._parse_balance_markdown, content)
+    print(f"{'':<40} speedup x{old / new:.2f}\n")
+
+    # Subtotales por bloques: la suma de toda la sección excede MAX_AMOUNT
+    table = fixed_service._parse_balance_markdown(content)
+    amounts = [item.amount for item in table['activos']]
+    cents = table['activos'].amounts
+    blocks = range(0, len(amounts), SUBTOTAL_ROWS)
+    decimal_subtotals = lambda values: [decimal_sum(values[i:i + SUBTOTAL_ROWS]) for i in blocks]
+    cents_subtotals = lambda values: [sum_cents(values[i:i + SUBTOTAL_ROWS]) for i in blocks]
+    old = measure("subtotales (Decimal)", decimal_subtotals, amounts)
+    new = measure("subtotales (centavos)", cents_subtotals, cents)
+    assert decimal_subtotals(amounts) == [Decimal(total).scaleb(-2) for total in cents_subtotals(cents)]
+    print(f"{'':<40} speedup x{old / new:.2f}\n")
+
+    offsets = np.arange(len(cents)) % 3
+    shifted = [amount + Decimal('0.01') * int(offset) for amount, offset in zip(amounts, offsets)]
+    old = measure("tolerancia por partida (Decimal)", decimal_tolerance, list(zip(amounts, shifted)))
+    new = measure("tolerancia por partida (centavos)", cents_tolerance, (cents, cents + offsets))
+    assert decimal_tolerance(zip(amounts, shifted)) == cents_tolerance((cents, cents + offsets))
+    print(f"{'':<40} speedup x{old / new:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark de memoria retenida: listas de `FinancialLineItem` vs. `LineItemTable`.
+
+Uso:
+    python -m benchmarks.bench_line_item_table [filas]
+
+Parsea un Balance sintético con el bucle anterior (una dataclass con su
+`Decimal` por fila) y con `DocumentService._parse_balance_markdown`, y
+reporta la memoria que queda retenida por el resultado.
+"""
+
+import gc
+import re
+import sys
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+from auditor.services.audit_service import AuditService
+from auditor.services.document_service import DocumentService
+from benchmarks.bench_markdown_parser import build_ledger, legacy_parse
+
+def build_repeated_ledger(rows: int, accounts: int = 1000) -> str:
+    """Balance cuyas partidas repiten `accounts` nombres (p. ej. por centro de costo)."""
+    return re.sub(r'Cuenta (\w+) (\d+)', lambda m: f"Cuenta {m.group(1)} {int(m.group(2)) % accounts:04d}", build_ledger(rows))
+
+def retained(label: str, func: Callable, content: str) -> Tuple[object, int]:
+    """Ejecuta `func` y reporta tiempo y memoria retenida por su resultado."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(content)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<40} {elapsed * 1000:9.1f} ms   retenido {current / 2**20:8.1f} MiB")
+    return result, current
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    audit = AuditService(github_service=object())
+    for title, content in (("nombres únicos", build_ledger(rows)), ("nombres repetidos", build_repeated_ledger(rows))):
+        print(f"Documento ({title}): {len(content) / 2**20:.1f} MiB, {rows * 3} partidas")
+        legacy, old = retained("dict de FinancialLineItem (anterior)", legacy_parse, content)
+        table, new = retained("LineItemTable", DocumentService()._parse_balance_markdown, content)
+        print(f"{'':<40} reducción x{old / new:.1f}   (nbytes {table.nbytes / 2**20:.1f} MiB)\n")
+
+        # La tabla sigue siendo válida para la comparación existente
+        assert audit.compare_documents(legacy, legacy) == audit.compare_documents(table, table)
+        del legacy, table
+
+if __name__ == "__main__":
+    main()
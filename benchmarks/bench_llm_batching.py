@@ -0,0 +1,83 @@
+"""Benchmark de las consultas de ComparisonAgent: secuenciales, en paralelo o en un solo prompt.
+
+Uso:
+    python -m benchmarks.bench_llm_batching [auditorías] [latencia_s]
+
+Simula el modelo con `FakeLlmBackend`: una espera de `latencia_s` (0.2 s
+por defecto) más `SECONDS_PER_KCHAR` por cada mil caracteres del prompt,
+sin variación ni hallazgos. Sin la caché de respuestas, mide la latencia,
+las consultas y los caracteres enviados de las tres verificaciones de
+`ComparisonAgent` por auditoría: una tras otra (como hasta ahora), con
+`run_validations` en paralelo (`batch_calls=False`) y con `run_validations`
+en un solo prompt JSON. Se mide con las tres
+verificaciones escaladas (`prechecks=False`) y con las verificaciones
+locales sobre documentos consistentes, donde sólo queda la validación
+general.
+"""
+
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+from auditor.agents.comparison_agent import ComparisonAgent
+from auditor.services.document_service import DocumentService
+from auditor.services.llm_backend import FakeLlmBackend
+from benchmarks.bench_rules import BALANCE_TEMPLATE, PL_TEMPLATE
+
+SECONDS_PER_KCHAR = 0.01
+
+LATENCY = 0.2
+
+def sequential(agent: ComparisonAgent, pl_data, balance_data) -> List:
+    """Las tres verificaciones una tras otra, como antes de `run_validations`."""
+    return (
+        agent.validate_financial_documents(pl_data, balance_data)
+        + agent.analyze_ratios(pl_data, balance_data)
+        + agent.validate_balance_equation(balance_data)
+    )
+
+def latencies(func: Callable, audits: int) -> List[float]:
+    """Latencia de cada una de `audits` ejecuciones de `func`."""
+    samples = []
+    for _ in range(audits):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def report(label: str, samples: List[float]) -> float:
+    """Imprime la mediana y el máximo; devuelve la mediana."""
+    median = statistics.median(samples)
+    print(f"{label:<44} mediana {median * 1000:8.1f} ms   máx {max(samples) * 1000:8.1f} ms")
+    return median
+
+def main() -> None:
+    global LATENCY
+    audits = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else LATENCY
+    service = DocumentService()
+    pl_data = service._parse_pl_markdown(PL_TEMPLATE.format(period='2024-Q4', revenue=1000, expenses=800, net=200))
+    balance_data = service._parse_balance_markdown(BALANCE_TEMPLATE.format(
+        period='2024-Q4', assets=1000, liabilities=500, capital=300, balance_net=200, retained=0, equity=500
+    ))
+    print(f"{audits} auditorías, latencia simulada {LATENCY * 1000:.0f} ms + {SECONDS_PER_KCHAR * 1000:.0f} ms por mil caracteres")
+
+    for label, prechecks in (("tres verificaciones escaladas", False), ("verificaciones locales en rango", True)):
+        print(f"\n{label}")
+        modes = (
+            ("secuencial (antes)", lambda agent: sequential(agent, pl_data, balance_data), True),
+            ("run_validations en paralelo", lambda agent: agent.run_validations(pl_data, balance_data), False),
+            ("run_validations en un prompt", lambda agent: agent.run_validations(pl_data, balance_data), True)
+        )
+        baseline = None
+        for mode, run, batch_calls in modes:
+            backend = FakeLlmBackend(latency=LATENCY, jitter=0, seconds_per_kchar=SECONDS_PER_KCHAR, findings=False)
+            agent = ComparisonAgent(prechecks=prechecks, batch_calls=batch_calls, cache_responses=False, backend=backend)
+            median = report(mode, latencies(lambda: run(agent), audits))
+            baseline = baseline or median
+            usage = backend.stats()
+            print(f"{'':<44} x{baseline / median:.1f}   {usage['calls'] / audits:.0f} consultas, {usage['prompt_chars'] / audits:.0f} caracteres por auditoría")
+
+if __name__ == "__main__":
+    main()
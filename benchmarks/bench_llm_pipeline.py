@@ -0,0 +1,107 @@
+"""Benchmark sin conexión de los agentes con el modelo simulado (`FakeLlmBackend`).
+
+Uso:
+    python -m benchmarks.bench_llm_pipeline [auditorías] [concurrencia] [latencia_s] [jitter_s]
+
+Ejecuta `auditorías` (200 por defecto) con `concurrencia` en paralelo (16)
+contra un modelo simulado de `latencia_s` (0.2 s) más una variación de hasta
+`jitter_s` (0.05 s), y reporta el rendimiento y los percentiles de latencia
+de cada etapa del flujo:
+
+- `ComparisonAgent.run_validations` sobre pares ya parseados, en hilos.
+- `AuditorAgent.analyze_documents` sobre el contenido de los documentos, en hilos.
+- `root_agent` con `Runner`: el modelo pide `compare_documents`, la
+  herramienta corre y el modelo contesta; en corrutinas sobre un event loop.
+
+Cada auditoría usa documentos distintos (`bench_rules.build_pairs`), así
+que la caché de respuestas no evita las consultas.
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from auditor.agents.comparison_agent import ComparisonAgent
+from auditor.services.document_service import DocumentService
+from auditor.services.llm_backend import FakeLlm, FakeLlmBackend
+from benchmarks.bench_rules import build_pairs
+
+def timed(func: Callable, *args) -> float:
+    """Segundos que tarda `func(*args)`."""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def run_threads(func: Callable, items: List, concurrency: int) -> List[float]:
+    """Latencia de `func(item)` para cada elemento, con `concurrency` hilos."""
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(lambda item: timed(func, item), items))
+
+def report(label: str, samples: List[float], elapsed: float, backend: FakeLlmBackend) -> None:
+    """Imprime el rendimiento, los percentiles de latencia y las consultas al modelo."""
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    print(f"{label:<36} {len(samples) / elapsed:8.1f} auditorías/s   p50 {cuts[49] * 1000:7.1f} ms   "
+          f"p95 {cuts[94] * 1000:7.1f} ms   p99 {cuts[98] * 1000:7.1f} ms   máx {max(samples) * 1000:7.1f} ms   "
+          f"{backend.stats()['calls'] / len(samples):.1f} consultas/auditoría")
+
+def measure(label: str, backend: FakeLlmBackend, run: Callable[[], List[float]]) -> None:
+    """Ejecuta `run`, que devuelve las latencias de cada auditoría, y las reporta."""
+    start = time.perf_counter()
+    samples = run()
+    report(label, samples, time.perf_counter() - start, backend)
+
+async def run_root_agent(agent, pairs: List, concurrency: int) -> List[float]:
+    """Latencia de una conversación de `agent` por par, con `concurrency` a la vez."""
+    sessions = InMemorySessionService()
+    runner = Runner(app_name='bench', agent=agent, session_service=sessions)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def converse(index: int) -> float:
+        async with limit:
+            start = time.perf_counter()
+            session = sessions.create_session(app_name='bench', user_id=f'user-{index}')
+            message = types.Content(role='user', parts=[types.Part(text='Audita los documentos financieros')])
+            async for _ in runner.run_async(user_id=session.user_id, session_id=session.id, new_message=message):
+                pass
+            return time.perf_counter() - start
+
+    return await asyncio.gather(*(converse(index) for index in range(len(pairs))))
+
+def main() -> None:
+    audits = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.2
+    jitter = float(sys.argv[4]) if len(sys.argv) > 4 else 0.05
+    # `IssueManagerAgent` exige un token aunque el benchmark no llama a GitHub
+    os.environ.setdefault('GITHUB_TOKEN', 'offline')
+    from auditor.agent import AuditorAgent, root_agent
+
+    backend = lambda: FakeLlmBackend(latency=latency, jitter=jitter)
+    pairs = build_pairs(audits)
+    service = DocumentService()
+    parsed = [(service._parse_pl_markdown(pl), service._parse_balance_markdown(balance)) for pl, balance in pairs]
+    print(f"{audits} auditorías, {concurrency} en paralelo, modelo simulado {latency * 1000:.0f} ± {jitter * 1000:.0f} ms\n")
+
+    model = backend()
+    comparison = ComparisonAgent(prechecks=False, backend=model)
+    measure("ComparisonAgent.run_validations", model, lambda: run_threads(lambda pair: comparison.run_validations(*pair), parsed, concurrency))
+
+    model = backend()
+    auditor = AuditorAgent(backend=model)
+    measure("AuditorAgent.analyze_documents", model, lambda: run_threads(lambda pair: auditor.analyze_documents({'pl': pair[0], 'balance': pair[1]}), pairs, concurrency))
+
+    model = backend()
+    tool_call = ('compare_documents', {'pl_content': pairs[0][0], 'balance_content': pairs[0][1]})
+    agent = root_agent.model_copy(update={'model': FakeLlm(model=model.model, backend=model, tool_call=tool_call)})
+    measure("root_agent (Runner)", model, lambda: asyncio.run(run_root_agent(agent, pairs, concurrency)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Benchmark del parseo Markdown: bucle original vs. tokenizador en una pasada.
+
+Uso:
+    python -m benchmarks.bench_markdown_parser [filas]
+
+Genera un Balance sintético, lo parsea con la implementación anterior
+(`split('\\n')` + `re.search` + `split('|')` por fila) y con
+`DocumentService._parse_balance_markdown`, y reporta tiempo y memoria pico.
+
+Con 100 000 filas por sección (12 MiB), el parseo completo de
+`DocumentService` es ~3.4-3.7x más rápido que el anterior (~1.0-1.2 s contra
+~0.27-0.33 s), con `Decimal` y con montos en centavos, y su memoria pico baja
+de 111 MiB a ~42 MiB: lo que queda son los arreglos de la tabla y el catálogo
+de nombres, que crecen con el documento. La tokenización sola es ~2.6-3.1x
+más rápida que la división por líneas y su memoria pico es ~1 MiB, también al
+leer en bloques. El parseo convierte los montos de cada bloque con
+`parse_cents_column` y codifica los nombres en `LineItemTableBuilder.build`
+con numpy; sólo las celdas con otra forma (`1E+3`, `0.125`) pasan por
+`Decimal` fila por fila.
+"""
+
+import gc
+import re
+import sys
+import time
+import tracemalloc
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict
+
+from auditor.core.constants import CATEGORY_ASSET, CATEGORY_LIABILITY, CATEGORY_EQUITY, MIN_AMOUNT, MAX_AMOUNT
+from auditor.core.models import FinancialLineItem
+from auditor.core.statement_tokenizer import RowsEvent, tokenize_statement
+from auditor.services.document_service import DocumentService
+
+def build_ledger(rows: int) -> str:
+    """Construye un Balance General en Markdown con `rows` partidas por sección."""
+    parts = ["# Balance General", "Periodo: 2024-Q1", ""]
+    for section in ('Activos', 'Pasivos', 'Capital Contable'):
+        parts.append(f"## {section}")
+        parts.append("| Concepto | Monto |")
+        parts.append("|----------|-------|")
+        for i in range(rows):
+            parts.append(f"| Cuenta {section} {i:07d} | ${i * 37 % 100000:,}.{i % 100:02d} |")
+        parts.append("")
+    parts.append("## Totales")
+    parts.append("| Concepto | Monto |")
+    parts.append("|----------|-------|")
+    parts.append("| Total Activos | $1,500 |")
+    return "\n".join(parts) + "\n"
+
+def legacy_parse(content: str) -> Dict:
+    """`DocumentService._parse_balance_markdown` anterior al tokenizador (referencia)."""
+    lines = content.split('\n')
+    data = {
+        'period': None,
+        'activos': [],
+        'pasivos': [],
+        'capital_contable': [],
+        'totals': {}
+    }
+
+    current_section = None
+    period_match = re.search(r'Periodo:\s*([^\n]+)', content)
+    if period_match:
+        data['period'] = period_match.group(1).strip()
+
+    for line in lines:
+        line = line.strip()
+
+        if line.startswith('##'):
+            current_section = line.replace('#', '').strip().lower()
+            continue
+
+        if not line or line.startswith('|--') or line.startswith('| Concepto'):
+            continue
+
+        if line.startswith('|'):
+            cells = [cell.strip() for cell in line.split('|')[1:-1]]
+            if len(cells) >= 2:
+                name = cells[0]
+                try:
+                    amount = Decimal(cells[1].replace('$', '').replace(',', '').strip())
+                    if not MIN_AMOUNT <= amount <= MAX_AMOUNT:
+                        continue
+
+                    if current_section == 'activos':
+                        data['activos'].append(FinancialLineItem(
+                            name=name,
+                            amount=amount,
+                            category=CATEGORY_ASSET,
+                            period=data['period']
+                        ))
+                    elif current_section == 'pasivos':
+                        data['pasivos'].append(FinancialLineItem(
+                            name=name,
+                            amount=amount,
+                            category=CATEGORY_LIABILITY,
+                            period=data['period']
+                        ))
+                    elif current_section == 'capital contable':
+                        data['capital_contable'].append(FinancialLineItem(
+                            name=name,
+                            amount=amount,
+                            category=CATEGORY_EQUITY,
+                            period=data['period']
+                        ))
+                    elif current_section == 'totales':
+                        data['totals'][name] = amount
+                except (ValueError, InvalidOperation):
+                    continue
+
+    return data
+
+def tokenize_only(content) -> int:
+    """Cuenta las filas emitidas por el tokenizador (sin construir partidas)."""
+    return sum(len(event.rows) for event in tokenize_statement(content) if type(event) is RowsEvent)
+
+def legacy_tokenize_only(content: str) -> int:
+    """Cuenta las filas con la división por líneas y celdas anterior."""
+    re.search(r'Periodo:\s*([^\n]+)', content)
+    count = 0
+    for line in content.split('\n'):
+        line = line.strip()
+        if line.startswith('|') and not line.startswith('|--') and not line.startswith('| Concepto'):
+            cells = [cell.strip() for cell in line.split('|')[1:-1]]
+            if len(cells) >= 2:
+                count += 1
+    return count
+
+def measure(label: str, func: Callable, content, repeat: int = 5) -> float:
+    """Ejecuta `func` y reporta el mejor tiempo y la memoria pico."""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(content)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<40} {best * 1000:9.1f} ms   pico {peak / 2**20:8.1f} MiB")
+    return best
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    content = build_ledger(rows)
+    print(f"Documento: {len(content) / 2**20:.1f} MiB, {rows * 3} partidas\n")
+
+    service = DocumentService()
+    old = measure("tokenización (split)", legacy_tokenize_only, content)
+    new = measure("tokenización (tokenize_statement)", tokenize_only, content)
+    print(f"{'':<40} speedup x{old / new:.2f}\n")
+
+    old = measure("parseo completo (anterior)", legacy_parse, content)
+    new = measure("parseo completo (DocumentService)", service._parse_balance_markdown, content)
+    print(f"{'':<40} speedup x{old / new:.2f}")
+    new = measure("parseo completo (centavos)", DocumentService(fixed_point=True)._parse_balance_markdown, content)
+    print(f"{'':<40} speedup x{old / new:.2f}\n")
+
+    encoded = content.encode('utf-8')
+    chunked = lambda data: tokenize_only(data[i:i + 65536] for i in range(0, len(data), 65536))
+    measure("tokenización streaming (bytes 64 KiB)", chunked, encoded)
+
+if __name__ == "__main__":
+    main()
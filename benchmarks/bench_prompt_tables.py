@@ -0,0 +1,51 @@
+"""Benchmark del tamaño del prompt de validación: `repr` de los datos vs. tablas TSV.
+
+Uso:
+    python -m benchmarks.bench_prompt_tables [partidas por sección ...]
+
+Parsea un P&L pequeño y Balances sintéticos de `build_ledger` (por defecto
+con 10, 100, 1000 y 10000 partidas por sección) y arma el prompt de
+`validate_financial_documents` con el `repr` de los diccionarios de
+`FinancialLineItem`, con las tablas completas (`prompt_token_budget=None`) y
+con el presupuesto por defecto. Reporta caracteres, tokens estimados, tiempo
+de armado y la latencia del modelo simulado de `bench_llm_batching`
+(`LATENCY` más `SECONDS_PER_KCHAR` por mil caracteres).
+"""
+
+import sys
+
+from auditor.agents.comparison_agent import ComparisonAgent
+from auditor.core.adk_prompts import FINANCIAL_VALIDATION_PROMPT
+from auditor.core.constants import PROMPT_CHARS_PER_TOKEN, PROMPT_DATA_TOKEN_BUDGET
+from auditor.services.document_service import DocumentService
+from benchmarks.bench_llm_batching import LATENCY, SECONDS_PER_KCHAR
+from benchmarks.bench_markdown_parser import build_ledger, measure
+from benchmarks.bench_rules import PL_TEMPLATE
+
+def report(prompt: str, baseline: int) -> None:
+    """Imprime el tamaño del prompt, su reducción y la latencia simulada."""
+    latency = LATENCY + len(prompt) / 1000 * SECONDS_PER_KCHAR
+    print(f"{'':<40} {len(prompt):>11,} caracteres  ~{len(prompt) // PROMPT_CHARS_PER_TOKEN:>9,} tokens"
+          f"   x{baseline / len(prompt):6.1f}   modelo simulado {latency * 1000:9.1f} ms")
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1_000, 10_000]
+    service = DocumentService()
+    pl_data = service._parse_pl_markdown(PL_TEMPLATE.format(period='2024-Q1', revenue=1000, expenses=800, net=200))
+    legacy = lambda balance: FINANCIAL_VALIDATION_PROMPT.format(pl_data=pl_data.to_dict(), balance_data=balance.to_dict())
+    print(f"Presupuesto por defecto: {PROMPT_DATA_TOKEN_BUDGET} tokens ({PROMPT_CHARS_PER_TOKEN} caracteres por token)")
+
+    for rows in sizes:
+        balance_data = service._parse_balance_markdown(build_ledger(rows))
+        print(f"\n{rows * 3} partidas en el Balance")
+        measure("repr de FinancialLineItem (antes)", legacy, balance_data, repeat=3)
+        baseline = len(legacy(balance_data))
+        report(legacy(balance_data), baseline)
+        for label, budget in (("tablas completas", None), ("tablas con presupuesto", PROMPT_DATA_TOKEN_BUDGET)):
+            agent = ComparisonAgent(prompt_token_budget=budget)
+            build = lambda balance: agent._validation_prompt(pl_data, balance)
+            measure(label, build, balance_data, repeat=3)
+            report(build(balance_data), baseline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Benchmark del motor de reglas: comparación escrita a mano vs. plan compilado.
+
+Uso:
+    python -m benchmarks.bench_rules [pares]
+
+Arma pares P&L/Balance sintéticos con distintas discrepancias, los parsea
+una vez y mide sobre los mismos datos parseados la comparación anterior de
+`AuditService` escrita a mano y `RulePlan.evaluate_many` con las mismas
+reglas, con `Decimal` y en centavos (`fixed_point`). El parseo no entra en
+ninguna de las mediciones.
+
+Medido con 10000 pares (CPython 3.11), el plan con `Decimal` queda entre
+1.4x y 1.7x más rápido que la comparación a mano, no un orden de magnitud:
+ambos hacen el mismo trabajo por par (una decena de búsquedas en
+diccionarios y cinco comparaciones) y buena parte del tiempo se va en dar
+formato a las descripciones, que son las mismas en los dos. En centavos
+queda a la par de la comparación a mano, porque convierte cada monto.
+"""
+
+import sys
+from typing import Dict, List, Tuple
+
+from auditor.core.constants import TOLERANCE
+from auditor.core.rules import compile_rules
+from auditor.services.document_service import DocumentService
+from benchmarks.bench_markdown_parser import measure
+
+PL_TEMPLATE = """# Estado de Resultados
+Periodo: {period}
+
+## Ingresos
+| Concepto | Monto |
+|----------|-------|
+| Ventas   | ${revenue} |
+
+## Gastos
+| Concepto | Monto |
+|----------|-------|
+| Costos   | ${expenses} |
+
+## Totales
+| Concepto | Monto |
+|----------|-------|
+| Ingresos Totales | ${revenue} |
+| Gastos Totales   | ${expenses} |
+| Utilidad Neta    | ${net} |
+"""
+
+BALANCE_TEMPLATE = """# Balance General
+Periodo: {period}
+
+## Activos
+| Concepto | Monto |
+|----------|-------|
+| Efectivo | ${assets} |
+
+## Pasivos
+| Concepto | Monto |
+|----------|-------|
+| Deudas   | ${liabilities} |
+
+## Capital Contable
+| Concepto | Monto |
+|----------|-------|
+| Capital  | ${capital} |
+| Utilidad del Ejercicio | ${balance_net} |
+| Utilidades Retenidas | ${retained} |
+
+## Totales
+| Concepto | Monto |
+|----------|-------|
+| Total Activos | ${assets} |
+| Total Pasivos | ${liabilities} |
+| Total Capital Contable | ${equity} |
+"""
+
+def build_pairs(count: int) -> List[Tuple[str, str]]:
+    """Pares de documentos con discrepancias que varían según el índice."""
+    pairs = []
+    for index in range(count):
+        revenue = 1000 + index % 700
+        expenses = 600 + index % 900
+        net = revenue - expenses
+        assets = 5000 + index % 3000
+        liabilities = 2000 + index % 1000
+        equity = assets - liabilities - (index % 5 == 0)
+        pairs.append((
+            PL_TEMPLATE.format(period=f"{2000 + index % 25}-Q{1 + index % 4}", revenue=revenue, expenses=expenses, net=net),
+            BALANCE_TEMPLATE.format(
+                period=f"{2000 + index % 25}-Q{1 + (index + (index % 7 == 0)) % 4}",
+                assets=assets, liabilities=liabilities, capital=equity // 2, retained=index % 3,
+                balance_net=net + (index % 11 == 0), equity=equity
+            )
+        ))
+    return pairs
+
+def legacy_compare(pl_data: Dict, balance_data: Dict) -> List[Dict]:
+    """Comparación anterior de `AuditService` (modo `Decimal`), sin métricas ni trazas."""
+    def find_net_income(data):
+        for name, amount in data.get('totals', {}).items():
+            if 'utilidad' in name.lower() or 'net' in name.lower():
+                return amount
+        for item in data.get('capital_contable', []):
+            if 'utilidad' in item.name.lower() or 'net' in item.name.lower():
+                return item.amount
+        return None
+
+    def find_retained_earnings(data):
+        for item in data.get('capital_contable', []):
+            if 'retenidas' in item.name.lower() or 'retained' in item.name.lower():
+                return item.amount
+        return None
+
+    discrepancies = []
+    if pl_data.get('period') != balance_data.get('period'):
+        discrepancies.append({
+            'type': 'period_mismatch',
+            'description': f"Los períodos no coinciden: P&L ({pl_data.get('period')}) vs Balance ({balance_data.get('period')})",
+            'severity': 'high',
+            'fix': 'Asegurarse de que ambos documentos correspondan al mismo período contable.'
+        })
+    pl_net_income = find_net_income(pl_data)
+    balance_net_income = find_net_income(balance_data)
+    if pl_net_income is not None and balance_net_income is not None:
+        if abs(pl_net_income - balance_net_income) > TOLERANCE:
+            discrepancies.append({
+                'type': 'income_mismatch',
+                'description': f"La utilidad neta no coincide: P&L (${pl_net_income}) vs Balance (${balance_net_income})",
+                'severity': 'high',
+                'fix': f"Ajustar la utilidad neta en el Balance General para que coincida con el P&L: ${pl_net_income}"
+            })
+    retained_earnings = find_retained_earnings(balance_data)
+    if retained_earnings is not None and pl_net_income is not None:
+        expected = retained_earnings + pl_net_income
+        if abs(expected - retained_earnings) > TOLERANCE:
+            discrepancies.append({
+                'type': 'retained_earnings_mismatch',
+                'description': f"Las ganancias retenidas no reflejan la utilidad del período. Actual: ${retained_earnings}, Esperado: ${expected}",
+                'severity': 'high',
+                'fix': f"Ajustar las ganancias retenidas para incluir la utilidad del período: ${expected}"
+            })
+    pl_totals = pl_data.get('totals', {})
+    balance_totals = balance_data.get('totals', {})
+    if 'Ingresos Totales' in pl_totals and 'Total Activos' in balance_totals:
+        revenue = pl_totals['Ingresos Totales']
+        assets = balance_totals['Total Activos']
+        if revenue > assets * 2:
+            discrepancies.append({
+                'type': 'unusual_ratio',
+                'description': f"Los ingresos (${revenue}) son inusualmente altos en comparación con los activos (${assets})",
+                'severity': 'medium',
+                'fix': 'Verificar que todos los activos estén correctamente registrados y valorados.'
+            })
+    if 'Gastos Totales' in pl_totals and 'Ingresos Totales' in pl_totals:
+        expenses = pl_totals['Gastos Totales']
+        revenue = pl_totals['Ingresos Totales']
+        if expenses > revenue:
+            discrepancies.append({
+                'type': 'expense_ratio',
+                'description': f"Los gastos (${expenses}) son mayores que los ingresos (${revenue})",
+                'severity': 'high',
+                'fix': 'Revisar y validar todos los gastos registrados. Verificar si hay gastos duplicados o incorrectamente clasificados.'
+            })
+    if 'Total Activos' in balance_totals and 'Total Pasivos' in balance_totals and 'Total Capital Contable' in balance_totals:
+        assets = balance_totals['Total Activos']
+        liabilities = balance_totals['Total Pasivos']
+        equity = balance_totals['Total Capital Contable']
+        difference = abs(assets - (liabilities + equity))
+        if difference > TOLERANCE:
+            discrepancies.append({
+                'type': 'unbalanced',
+                'description': f"El balance no está balanceado: Activos (${assets}) ≠ Pasivos (${liabilities}) + Capital (${equity})",
+                'severity': 'high',
+                'fix': f"Ajustar las cuentas para mantener la ecuación contable: A = P + C. Diferencia actual: ${difference}"
+            })
+    return discrepancies
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    pairs = build_pairs(count)
+    service = DocumentService()
+    parsed = [(service._parse_pl_markdown(pl), service._parse_balance_markdown(balance)) for pl, balance in pairs]
+    plan = compile_rules()
+    print(f"{count} pares P&L/Balance\n")
+
+    legacy_loop = lambda items: [legacy_compare(pl, balance) for pl, balance in items]
+    legacy = measure("comparación a mano", legacy_loop, parsed)
+    compiled = measure("RulePlan.evaluate_many", plan.evaluate_many, parsed)
+    fixed = measure("RulePlan.evaluate_many (centavos)", compile_rules(fixed_point=True).evaluate_many, parsed)
+    print(f"{'':<40} vs a mano x{legacy / compiled:.1f} (centavos x{legacy / fixed:.1f})")
+
+    # Las mismas reglas encuentran las mismas discrepancias
+    found = plan.evaluate_many(parsed)
+    assert found == legacy_loop(parsed)
+    print(f"{'':<40} {sum(map(len, found))} discrepancias")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Prueba de carga: latencia de `/docs` mientras corren auditorías.
+
+Uso:
+    python -m benchmarks.load_docs_latency [auditorías] [--blocking]
+
+Levanta la app en un servidor uvicorn local y reemplaza el pipeline por uno
+simulado que bloquea su hilo como lo harían GitHub y el parseo (respetando
+los límites por etapa). Mide p50/p99 de `GET /docs` en reposo y mientras se
+atienden N `POST /audit` simultáneos. Con `--blocking` se ejecuta el
+pipeline dentro del event loop, como antes, para comparar.
+"""
+
+import asyncio
+import socket
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+
+import httpx
+import uvicorn
+
+import app as app_module
+from auditor.services.stage_limits import default_stage_limits
+
+STAGE_SECONDS = {'retrieve': 0.2, 'compare': 0.05, 'issue': 0.1}
+SAMPLE_INTERVAL = 0.02
+
+def fake_audit(repo_url: str, branch: str = "main", **options: Any) -> Dict[str, Any]:
+    """Pipeline simulado: cada etapa bloquea su hilo el tiempo indicado."""
+    limits = default_stage_limits()
+    for stage, seconds in STAGE_SECONDS.items():
+        with limits.stage(stage):
+            time.sleep(seconds)
+    return {"status": "success", "discrepancies": [], "issue_url": None}
+
+async def blocking_run_audit(repo_url: str, branch: str = "main", force_refresh: bool = False, profile: bool = False) -> Dict[str, Any]:
+    """La versión anterior de `run_audit`: el pipeline corre en el event loop."""
+    return fake_audit(repo_url, branch)
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Percentil por rango más cercano."""
+    ordered = sorted(values)
+    return ordered[max(0, int(fraction * len(ordered) + 0.999999) - 1)]
+
+async def sample_docs(client: httpx.AsyncClient, stop: asyncio.Event) -> List[float]:
+    """Pide `/docs` repetidamente hasta `stop` y devuelve las latencias en segundos."""
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/docs")
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200
+        await asyncio.sleep(SAMPLE_INTERVAL)
+    return latencies
+
+async def run(base_url: str, audits: int) -> None:
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_docs(client, stop))
+        await asyncio.sleep(1.0)
+        stop.set()
+        idle = await sampler
+
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_docs(client, stop))
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post("/audit", params={"repo_url": f"https://github.com/owner/repo{i}"})
+            for i in range(audits)
+        ))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        loaded = await sampler
+
+    assert all(response.json()["status"] == "success" for response in responses)
+    print(f"{audits} auditorías en {elapsed:.2f} s")
+    for label, latencies in (("/docs en reposo", idle), ("/docs con auditorías", loaded)):
+        print(f"{label:<24} n={len(latencies):<4} p50={percentile(latencies, 0.5) * 1000:8.1f} ms"
+              f"  p99={percentile(latencies, 0.99) * 1000:8.1f} ms")
+
+def main() -> None:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    audits = int(args[0]) if args else 50
+    app_module.audit_financial_documents = fake_audit
+    if "--blocking" in sys.argv:
+        app_module.run_audit = blocking_run_audit
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app_module.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    try:
+        asyncio.run(run(f"http://127.0.0.1:{port}", audits))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+if __name__ == "__main__":
+    main()
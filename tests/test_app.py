@@ -0,0 +1,186 @@
+import asyncio
+import datetime
+import hashlib
+import hmac
+import json
+import sys
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from auditor.services import tracing
+from auditor.services.audit_history import AuditHistoryStore
+from auditor.services.job_queue import AuditJobQueue
+from auditor.services.profiling import ProfileStore, ProfilingPolicy
+from auditor.services.push_coalescer import PushCoalescer
+
+SECRET = 'webhook_secret'
+
+@pytest.fixture
+def client(monkeypatch):
+    """Cliente de la API con una cola de auditorías simulada."""
+    monkeypatch.setenv('GITHUB_WEBHOOK_SECRET', SECRET)
+    job_queue = AuditJobQueue(lambda repo_url, branch, **options: {'status': 'success', 'discrepancies': []}, workers=1)
+    monkeypatch.setattr(app_module, 'job_queue', job_queue)
+    monkeypatch.setattr(app_module, 'push_coalescer', PushCoalescer(job_queue, window=0))
+    yield TestClient(app_module.app)
+    job_queue.shutdown()
+
+def _signed_push(client: TestClient, payload: dict):
+    """Envía un push firmado al webhook."""
+    body = json.dumps(payload).encode()
+    signature = 'sha256=' + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+    return client.post('/webhook/github', content=body, headers={'X-Hub-Signature-256': signature, 'Content-Type': 'application/json'})
+
+def test_webhook_returns_job(client):
+    """Prueba que el webhook responde 202 y el trabajo se consulta por id."""
+    response = _signed_push(client, {'ref': 'refs/heads/main', 'repository': {'html_url': 'https://github.com/owner/repo'}})
+    assert response.status_code == 202
+    job_id = response.json()['job_id']
+
+    for _ in range(500):
+        job = client.get(f'/audit/jobs/{job_id}').json()
+        if job['status'] == 'succeeded':
+            break
+        time.sleep(0.01)
+    assert job['status'] == 'succeeded'
+    assert job['repo_url'] == 'https://github.com/owner/repo'
+    assert job['result'] == {'status': 'success', 'discrepancies': []}
+
+    metrics = client.get('/audit/queue').json()
+    assert metrics['submitted'] == 1 and metrics['depth'] == 0
+
+def test_webhook_skips_other_branches(client):
+    """Prueba que los pushes a otras ramas no encolan auditorías."""
+    response = _signed_push(client, {'ref': 'refs/heads/dev', 'repository': {'html_url': 'https://github.com/owner/repo'}})
+    assert response.status_code == 200
+    assert response.json()['status'] == 'skipped'
+
+def test_webhook_skips_non_financial_pushes(client):
+    """Prueba que un push sin documentos financieros no encola auditorías."""
+    payload = {
+        'ref': 'refs/heads/main',
+        'after': 'a' * 40,
+        'repository': {'html_url': 'https://github.com/owner/repo'},
+        'commits': [{'added': ['docs/notas.md'], 'modified': ['README.md'], 'removed': []}]
+    }
+    response = _signed_push(client, payload)
+    assert response.status_code == 200
+    assert response.json()['status'] == 'skipped'
+    assert client.get('/audit/queue').json()['submitted'] == 0
+
+def test_unknown_job(client):
+    """Prueba la consulta de un trabajo inexistente."""
+    assert client.get('/audit/jobs/desconocido').status_code == 404
+
+def test_audit_history(client, monkeypatch):
+    """Prueba el historial paginado y la consulta de una auditoría."""
+    store = AuditHistoryStore()
+    monkeypatch.setattr(app_module, 'default_history_store', lambda: store)
+    started = datetime.datetime.now(datetime.timezone.utc)
+    discrepancy = {'type': 'unbalanced', 'severity': 'high', 'description': 'Activos ≠ Pasivos + Capital', 'fix': 'Ajustar'}
+    ids = [store.record('https://github.com/owner/repo', 'main', sha * 40, 'success', started, {'retrieve': 1.0}, [discrepancy], period='2024-Q1')
+           for sha in 'abc']
+
+    first = client.get('/audits', params={'repo_url': 'https://github.com/owner/repo', 'type': 'unbalanced', 'limit': 2}).json()
+    second = client.get('/audits', params={'cursor': first['next_cursor']}).json()
+
+    assert [audit['id'] for audit in first['items']] == [ids[2], ids[1]]
+    assert [audit['id'] for audit in second['items']] == [ids[0]]
+    assert second['next_cursor'] is None
+    assert client.get(f'/audits/{ids[0]}').json()['discrepancies'] == [discrepancy]
+    assert client.get('/audits/999').status_code == 404
+    assert client.get('/audits', params={'limit': 0}).status_code == 422
+
+def test_metrics_endpoint(client):
+    """Prueba que `/metrics` expone las métricas de observabilidad en texto."""
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    for name in ('document_retrieval_duration_seconds', 'document_parsing_duration_seconds', 'comparison_duration_seconds',
+                 'issue_creation_duration_seconds', 'github_api_rate_limit_remaining'):
+        assert f'# TYPE {name} ' in response.text
+
+def test_audit_spans_follow_request(client, monkeypatch):
+    """Prueba que los spans del pipeline, en el executor, cuelgan de `audit_request`."""
+    exporter = tracing.InMemoryExporter()
+    monkeypatch.setattr(tracing.default_tracer(), 'exporter', exporter)
+
+    def traced_audit(repo_url, branch, **options):
+        with tracing.span('document_retrieval'):
+            return {'status': 'success', 'discrepancies': []}
+
+    monkeypatch.setattr(app_module, 'audit_financial_documents', traced_audit)
+    assert client.post('/audit', params={'repo_url': 'https://github.com/owner/repo'}).json()['status'] == 'success'
+
+    retrieval, request = exporter.spans
+    assert request.name == 'audit_request' and request.attributes == {'repo': 'https://github.com/owner/repo', 'branch': 'main'}
+    assert (retrieval.trace_id, retrieval.parent_id) == (request.trace_id, request.span_id)
+
+def test_audit_profiling(client, monkeypatch, tmp_path):
+    """Prueba que la cabecera autorizada perfila la auditoría y da acceso a los perfiles."""
+    store = ProfileStore(str(tmp_path))
+    monkeypatch.setattr(app_module, 'default_profiling_policy', lambda: ProfilingPolicy('secret'))
+    monkeypatch.setattr(app_module, 'default_profile_store', lambda: store)
+    monkeypatch.setattr(app_module, 'audit_financial_documents', lambda repo_url, branch, **options: {'status': 'success', 'discrepancies': []})
+    params = {'repo_url': 'https://github.com/owner/repo'}
+    headers = {'X-Audit-Profile': 'secret'}
+
+    assert 'profile' not in client.post('/audit', params=params).json()
+    assert 'profile' not in client.post('/audit', params=params, headers={'X-Audit-Profile': 'wrong'}).json()
+    name = client.post('/audit', params=params, headers=headers).json()['profile']
+
+    assert client.get('/profiles').status_code == 403
+    assert [profile['name'] for profile in client.get('/profiles', headers=headers).json()['profiles']] == [name]
+    raw = client.get(f'/profiles/{name}', headers=headers)
+    assert raw.status_code == 200 and raw.content == (tmp_path / name).read_bytes()
+    text = client.get(f'/profiles/{name}', params={'format': 'text'}, headers=headers)
+    assert text.status_code == 200 and 'cumulative' in text.text
+    assert client.get('/profiles/missing.prof', headers=headers).status_code == 404
+
+def test_audit_does_not_block_event_loop(client, monkeypatch):
+    """Prueba que una auditoría lenta no detiene las demás peticiones."""
+    started = threading.Event()
+
+    def slow_audit(repo_url, branch, **options):
+        started.set()
+        time.sleep(1.0)
+        return {'status': 'success', 'discrepancies': []}
+
+    monkeypatch.setattr(app_module, 'audit_financial_documents', slow_audit)
+    audit = threading.Thread(target=client.post, args=('/audit',), kwargs={'params': {'repo_url': 'https://github.com/owner/repo'}})
+    audit.start()
+    assert started.wait(5)
+
+    start = time.perf_counter()
+    assert client.get('/docs').status_code == 200
+    assert time.perf_counter() - start < 0.5
+    audit.join()
+
+def test_agent_tool_cannot_profile(monkeypatch):
+    """Prueba que la herramienta del agente no declara al modelo los parámetros de los endpoints."""
+    tools = {tool.name: tool for tool in app_module.root_agent.tools}
+    assert 'run_audit' not in tools
+    parameters = tools['audit_repository']._get_declaration().parameters.properties
+    assert set(parameters) == {'repo_url', 'branch'}
+
+    calls = []
+    monkeypatch.setattr(app_module, 'audit_financial_documents', lambda repo_url, branch, **options: calls.append(options) or {'status': 'success'})
+    assert asyncio.run(app_module.audit_repository('https://github.com/owner/repo')) == {'status': 'success'}
+    assert calls == [{'force_refresh': False}]
+
+@pytest.mark.parametrize('argv', [['2'], ['2', '--blocking']])
+def test_docs_latency_benchmark_runs(monkeypatch, capsys, argv):
+    """Prueba de humo de `benchmarks.load_docs_latency` en ambos modos."""
+    from benchmarks import load_docs_latency
+
+    # `main` reemplaza el pipeline y `run_audit`; monkeypatch los restaura
+    monkeypatch.setattr(app_module, 'audit_financial_documents', app_module.audit_financial_documents)
+    monkeypatch.setattr(app_module, 'run_audit', app_module.run_audit)
+    monkeypatch.setattr(sys, 'argv', ['load_docs_latency'] + argv)
+    load_docs_latency.main()
+
+    assert '2 auditorías' in capsys.readouterr().out